@@ -16,6 +16,7 @@ from google.cloud.firestore import SERVER_TIMESTAMP
 from .clients import client, _sheets_client, _fs
 from .automation_runtime import ai_for, clock_for, firestore_for
 from .budget_guard import should_block_openai_call
+from .retention import SHEET_CHANGELOG_RETENTION, expires_at
 from .messaging import build_conversation_payload
 from .sheets import _header_index_map, _get_first_tab_title, _col_letter, _execute_with_retry
 from .column_config import (
@@ -32,17 +33,22 @@ from .column_config import (
 )
 from .notification_payloads import sanitize_new_property_referral_response
 from .property_ref import normalize_anchor
-from .openai_usage import track_openai_usage_safely
+from .openai_usage import (
+    estimate_openai_cost,
+    track_avoided_openai_call_safely,
+    track_openai_usage_safely,
+)
+from .proposal_cache import proposal_cache, proposal_request_digest
 from . import file_handling as _file_handling
 from .file_handling import project_safe_native_image_manifest
+from .inbound_text import inbound_text_context
+from .pdf_text import PDF_PROMPT_CHAR_LIMIT, PROMPT_FIELD_HINT_RE, PROMPT_RETAINED_TAIL_CHARS
 from .property_images import STREET_SUFFIX_TOKENS
 from .tour_scheduling import (
     TOUR_INTENT_COURTESY,
-    classify_tour_intent,
     extract_proposed_tour_options,
     looks_like_tour_scheduling_reply,
     looks_like_tour_only_unavailable,
-    subject_bound_tour_segments,
 )
 from .outbound_safety import find_unresolved_placeholders
 
@@ -278,8 +284,10 @@ def _event_evidence_only_in_quote(event: dict, newest_text: str, quoted_region:
     rejection/opt-out/referral as live signal, we strip the event when its own
     evidence is quote-exclusive (A′ misreads M02, M05, M09, M16, M17, M21, M27).
     """
-    quoted_norm = _norm_ws(quoted_region)
-    newest_norm = _norm_ws(newest_text)
+    quoted = inbound_text_context(quoted_region)
+    newest = inbound_text_context(newest_text)
+    quoted_norm = quoted.normalized
+    newest_norm = newest.normalized
     if not quoted_norm:
         return False
 
@@ -293,8 +301,8 @@ def _event_evidence_only_in_quote(event: dict, newest_text: str, quoted_region:
     words = _significant_words(candidate)
     if not words:
         return False
-    quoted_words = _significant_words(quoted_region)
-    newest_words = _significant_words(newest_text)
+    quoted_words = quoted.tokens
+    newest_words = newest.tokens
     quote_exclusive = {w for w in words if w in quoted_words and w not in newest_words}
     return len(quote_exclusive) >= 2
 
@@ -303,12 +311,12 @@ def _latest_inbound_text(conversation: List[dict]) -> str:
     for message in reversed(conversation or []):
         if (message.get("direction") or "").lower() == "inbound":
             raw = message.get("content") or message.get("body") or message.get("preview") or ""
-            return _strip_quoted_history(raw)
+            return inbound_text_context(raw).latest
     return ""
 
 
 def _looks_like_access_remediation(text: str) -> bool:
-    latest_text = _strip_quoted_history(text or "").lower()
+    latest_text = inbound_text_context(text or "").latest.lower()
     if not latest_text:
         return False
 
@@ -356,7 +364,7 @@ def _looks_like_requirements_mismatch_nonviable(text: str) -> bool:
     is stripped first so an old rejection re-quoted under a new positive reply
     does not fire.
     """
-    latest_text = _strip_quoted_history(text or "").lower()
+    latest_text = inbound_text_context(text or "").latest.lower()
     if not latest_text:
         return False
 
@@ -1037,7 +1045,7 @@ def _apply_event_retention_guards(
         # that layer still fails closed when no subject-bound clause exists.
         if (
             etype == "tour_requested"
-            and classify_tour_intent(newest_text) == TOUR_INTENT_COURTESY
+            and inbound_text_context(newest_text).tour_intent == TOUR_INTENT_COURTESY
         ):
             continue
 
@@ -1215,8 +1223,7 @@ def _fresh_inbound_text(conversation: List[dict]) -> str:
     _latest_inbound_text, because #15's _latest_inbound_text already strips quotes —
     feeding it here would leave _split_fresh_and_quoted nothing to separate (#15×#19).
     """
-    fresh, _ = _split_fresh_and_quoted(_raw_latest_inbound(conversation))
-    return fresh
+    return inbound_text_context(_raw_latest_inbound(conversation)).fresh
 
 
 # Per-event-type text signals used to decide whether an LLM-emitted event was
@@ -1317,7 +1324,8 @@ def _suppress_quote_only_events(proposal: dict, conversation: List[dict]) -> dic
     if not events:
         return proposal
     # Source raw text (quotes preserved); #15's _latest_inbound_text pre-strips quotes.
-    fresh, quoted = _split_fresh_and_quoted(_raw_latest_inbound(conversation))
+    inbound = inbound_text_context(_raw_latest_inbound(conversation))
+    fresh, quoted = inbound.fresh, inbound.quoted
     if not quoted.strip():
         return proposal
     fresh_lower = fresh.lower()
@@ -1398,7 +1406,7 @@ def _drive_count_in_unit(unit: str) -> Optional[str]:
 
 
 def _current_target_drive_evidence(text: str, target_anchor: Optional[str]) -> _DriveEvidence:
-    fresh, target_identity = _strip_quoted_history(text or ""), _target_street_identity(target_anchor or "")
+    fresh, target_identity = inbound_text_context(text or "").latest, _target_street_identity(target_anchor or "")
     last_binding = last_value = None
     target_explicit_nonfit = target_independent_nonfit = False
     saw_drive = False
@@ -1603,10 +1611,12 @@ def _augment_events_with_deterministic_signals(
     events = proposal.setdefault("events", [])
     # Reason only over the broker's FRESH message; quoted prior-thread history must
     # not deterministically fire property_unavailable / redirect / tour signals.
-    latest_text_raw = _fresh_inbound_text(conversation)
+    inbound = inbound_text_context(_raw_latest_inbound(conversation))
+    latest_text_raw = inbound.fresh
     latest_text = latest_text_raw.lower()
     if not latest_text:
         return proposal
+    latest_context = inbound_text_context(latest_text_raw)
 
     # Out-of-office / auto-reply guard (LIVE breaks E1/E3): an OOO auto-reply that
     # lists a backup or assistant address ("for urgent matters, contact X",
@@ -1620,7 +1630,7 @@ def _augment_events_with_deterministic_signals(
             if (e or {}).get("type") != "wrong_contact"
             and not (
                 (e or {}).get("type") == "tour_requested"
-                and classify_tour_intent(latest_text_raw) == TOUR_INTENT_COURTESY
+                and latest_context.tour_intent == TOUR_INTENT_COURTESY
             )
         ]
         events = proposal["events"]
@@ -1714,8 +1724,7 @@ def _augment_events_with_deterministic_signals(
     # HEAD retention/terminal layer reasons over the FULL latest inbound plus its
     # quoted region. Target-grounded terminal detection (_detect_target_terminal_reason,
     # below) supersedes the flat unavailable-pattern list #19 used here.
-    raw_latest = _raw_latest_inbound(conversation)
-    quoted_region = _quoted_region(raw_latest)
+    quoted_region = inbound.quoted_region
 
     # Near-miss guard: "one suite is leased but an alternate suite remains viable"
     # must not terminalize the row. CodeRabbit PR#15: the alternate-reference and the
@@ -1816,7 +1825,7 @@ def _augment_events_with_deterministic_signals(
         )
 
     tour_reply_reason = None
-    tour_reply_text = " ".join(subject_bound_tour_segments(latest_text_raw))
+    tour_reply_text = " ".join(latest_context.tour_segments)
     proposed_tour_options = extract_proposed_tour_options(tour_reply_text)
     tour_only_unavailable = looks_like_tour_only_unavailable(tour_reply_text)
     if tour_only_unavailable and not proposed_tour_options:
@@ -6305,12 +6314,10 @@ def _augment_proposal_with_flyer_link(
 
 # ---- Prompt content clipping (retain deep field data) -----------------------
 _URL_TEXT_CHAR_LIMIT = 8000
-_PDF_TEXT_CHAR_LIMIT = 16000
-_FIELD_HINT_RE = re.compile(
-    r"(?:\$|\bsf\b|square\s*f|\bdock|drive[-\s]?in|clear|ceiling|amp|volt|nnn|opex|"
-    r"total\s+sf|\bpsf\b|\b\d{3,}\b)",
-    re.IGNORECASE,
-)
+# Shared with pdf_text, which stops table extraction once more text could no
+# longer change what _clip_for_prompt keeps.
+_PDF_TEXT_CHAR_LIMIT = PDF_PROMPT_CHAR_LIMIT
+_FIELD_HINT_RE = PROMPT_FIELD_HINT_RE
 
 
 def _clip_for_prompt(text: str, limit: int) -> str:
@@ -6325,7 +6332,7 @@ def _clip_for_prompt(text: str, limit: int) -> str:
     tail = text[limit:]
     kept = [ln for ln in tail.splitlines() if _FIELD_HINT_RE.search(ln)]
     result = head + "\n... [text truncated] ..."
-    extra = "\n".join(kept)[:4000]
+    extra = "\n".join(kept)[:PROMPT_RETAINED_TAIL_CHARS]
     if extra:
         result += "\n[additional detail lines retained beyond truncation]\n" + extra
     return result
@@ -7767,8 +7774,9 @@ IMPORTANT: The response should feel natural and conversational, not robotic or t
         ) or {}
         sender_email = (latest_inbound_msg.get("from") or email or "").strip()
         sender_display_name = (latest_inbound_msg.get("fromName") or latest_inbound_msg.get("senderName") or "").strip()
-        raw_latest_human = _raw_latest_inbound(conversation)
-        last_human_message = _strip_quoted_history(raw_latest_human)
+        # Every deterministic guard below reads its views of this message
+        # from the same shared context.
+        last_human_message = inbound_text_context(_raw_latest_inbound(conversation)).latest
 
         # Build contact name context with an ADVISORY first name for greetings.
         # FIX-13/14: reconcile the mapped name against the live sender, strip
@@ -8009,45 +8017,70 @@ OUTPUT ONLY valid JSON in this exact format:
         input_content.append({"type": "input_text", "text": prompt})
 
         # ---- Call OpenAI (low temperature for determinism) --------------------
-        response = ai_for(runtime, client).create_response({
+        extraction_request = {
             "model": "gpt-5.2",  # GPT-5.2 Thinking for complex extraction
             "input": [{"role": "user", "content": input_content}],
             "temperature": 0.1,
-        })
-        # The OpenAI call above ALWAYS bills, even under dry_run — dry_run only
-        # skips the sheetChangeLog Firestore write further down, not the paid API
-        # call. Metering must therefore NOT be gated on it: budget_guard sums these
-        # rollups, so every unmetered billed call makes the guard under-count and
-        # overshoot its limit. The certification-runtime seams below already send a
-        # dry run's spend to its own store on its own clock, so recording it here
-        # cannot corrupt a real user's rollups.
-        track_openai_usage_safely(
-            # Cost is state: a certification run must record its spend into
-            # its OWN store on its OWN clock, or it corrupts a real user's
-            # rollups and reads another tenant's numbers back.
-            db=firestore_for(runtime, _fs),
-            now=clock_for(runtime, lambda: datetime.now(timezone.utc))(),
-            user_id=uid,
-            client_id=client_id,
-            thread_id=thread_id,
-            operation="ai.extract_sheet_updates",
-            model="gpt-5.2",
-            usage=getattr(response, "usage", None),
-            request_id=getattr(response, "id", None),
-            endpoint="responses",
-            metadata={
-                "sheetId": sheet_id,
-                "rowNumber": rownum,
-                "headerCount": len(header or []),
-                "conversationMessageCount": len(conversation or []),
-                "hasPdfManifest": bool(prepared_attachment_manifest),
-                "pdfCount": len(prepared_attachment_manifest),
-                "urlTextCount": len(url_texts or []),
-                "configuredExtractionFieldCount": len(extraction_fields or []),
-            },
+        }
+        # A retry of a message that failed after this call (Sheets write,
+        # review projection, Graph blip) sends the identical request; reuse the
+        # validated reply instead of paying for it again. Certification
+        # runtimes never touch the cache, so their transports still refuse.
+        cache = proposal_cache()
+        cache_digest = (
+            proposal_request_digest(extraction_request, column_rules=COLUMN_RULES)
+            if runtime is None and cache.enabled() else None
         )
-
-        raw_response = (response.output_text or "").strip()
+        cached_reply = cache.get(_fs, uid, cache_digest)
+        response = None
+        if cached_reply is None:
+            response = ai_for(runtime, client).create_response(extraction_request)
+            # The OpenAI call above ALWAYS bills, even under dry_run — dry_run only
+            # skips the sheetChangeLog Firestore write further down, not the paid API
+            # call. Metering must therefore NOT be gated on it: budget_guard sums these
+            # rollups, so every unmetered billed call makes the guard under-count and
+            # overshoot its limit. The certification-runtime seams below already send a
+            # dry run's spend to its own store on its own clock, so recording it here
+            # cannot corrupt a real user's rollups.
+            track_openai_usage_safely(
+                # Cost is state: a certification run must record its spend into
+                # its OWN store on its OWN clock, or it corrupts a real user's
+                # rollups and reads another tenant's numbers back.
+                db=firestore_for(runtime, _fs),
+                now=clock_for(runtime, lambda: datetime.now(timezone.utc))(),
+                user_id=uid,
+                client_id=client_id,
+                thread_id=thread_id,
+                operation="ai.extract_sheet_updates",
+                model="gpt-5.2",
+                usage=getattr(response, "usage", None),
+                request_id=getattr(response, "id", None),
+                endpoint="responses",
+                metadata={
+                    "sheetId": sheet_id,
+                    "rowNumber": rownum,
+                    "headerCount": len(header or []),
+                    "conversationMessageCount": len(conversation or []),
+                    "hasPdfManifest": bool(prepared_attachment_manifest),
+                    "pdfCount": len(prepared_attachment_manifest),
+                    "urlTextCount": len(url_texts or []),
+                    "configuredExtractionFieldCount": len(extraction_fields or []),
+                },
+            )
+            raw_response = (response.output_text or "").strip()
+        else:
+            print(f"♻️ Reusing cached extraction reply for thread {thread_id} (request {cache_digest[:12]})")
+            track_avoided_openai_call_safely(
+                db=_fs,
+                now=datetime.now(timezone.utc),
+                user_id=uid,
+                client_id=client_id,
+                operation="ai.extract_sheet_updates",
+                model=extraction_request["model"],
+                cost_usd=cached_reply["costUsd"],
+            )
+            raw_response = cached_reply["outputText"].strip()
+        reply_text = raw_response
 
         # ---- Parse JSON safely ------------------------------------------------
         try:
@@ -8074,6 +8107,18 @@ OUTPUT ONLY valid JSON in this exact format:
             print(f"❌ Invalid proposal structure: {proposal}")
             return None
 
+        if response is not None and cache_digest:
+            cache.put(
+                _fs, uid, cache_digest,
+                output_text=reply_text,
+                model=extraction_request["model"],
+                cost_usd=estimate_openai_cost(
+                    extraction_request["model"], getattr(response, "usage", None)
+                )["cost"]["totalUsd"],
+                thread_id=thread_id,
+                request_id=getattr(response, "id", None),
+            )
+
         proposal.setdefault("updates", [])
         proposal.setdefault("events", [])
         proposal.setdefault("response_email", None)  # LLM-generated response email
@@ -8183,7 +8228,8 @@ OUTPUT ONLY valid JSON in this exact format:
                     if prepared_attachment.legacy_file_id()
                 ],
                 "urlTexts": url_texts or [],
-                "createdAt": SERVER_TIMESTAMP
+                "createdAt": SERVER_TIMESTAMP,
+                "expiresAt": expires_at(SHEET_CHANGELOG_RETENTION),
             })
             print(f"💾 Stored proposal in sheetChangeLog/{log_doc_id}")
         else:
@@ -29,10 +29,12 @@ from __future__ import annotations
 import hashlib
 import re
 import threading
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any, Callable, Dict, Mapping, Optional, Protocol, Tuple
 
+from .rate_governor import estimate_openai_tokens, governor as _rate_governor, retry_after_seconds
 from .message_transport import (
     ConversationStateSource,
     FixtureConversationStateSource,
@@ -292,6 +294,27 @@ class AIProviderTransport(Protocol):
     def upload_file(self, file_obj: Any, purpose: str) -> Any: ...
 
 
+@contextmanager
+def _openai_quota(request: Mapping[str, Any]):
+    """Draw the request's estimated tokens from the shared OpenAI TPM bucket.
+
+    A provider 429 shrinks the bucket before the error propagates, so the next
+    extraction in this process waits instead of being rejected in turn.
+    """
+    _rate_governor().acquire("openai_tpm", estimate_openai_tokens(request))
+    try:
+        yield
+    except Exception as exc:
+        if getattr(exc, "status_code", None) == 429:
+            headers = getattr(getattr(exc, "response", None), "headers", None)
+            _rate_governor().report_rate_limited(
+                "openai_tpm",
+                retry_after=retry_after_seconds(headers),
+            )
+        raise
+    _rate_governor().report_success("openai_tpm")
+
+
 class ProviderBackedAITransport:
     """Ordinary production. Resolves the real client LAZILY, never at build time."""
 
@@ -308,10 +331,12 @@ class ProviderBackedAITransport:
         return self._client
 
     def create_response(self, request: Mapping[str, Any]) -> Any:
-        return self._resolve().responses.create(**dict(request))
+        with _openai_quota(request):
+            return self._resolve().responses.create(**dict(request))
 
     def create_chat_completion(self, request: Mapping[str, Any]) -> Any:
-        return self._resolve().chat.completions.create(**dict(request))
+        with _openai_quota(request):
+            return self._resolve().chat.completions.create(**dict(request))
 
     def upload_file(self, file_obj: Any, purpose: str) -> Any:
         return self._resolve().files.create(file=file_obj, purpose=purpose)
@@ -894,10 +919,12 @@ class AmbientAITransport:
         self._client = client
 
     def create_response(self, request: Mapping[str, Any]) -> Any:
-        return self._client.responses.create(**dict(request))
+        with _openai_quota(request):
+            return self._client.responses.create(**dict(request))
 
     def create_chat_completion(self, request: Mapping[str, Any]) -> Any:
-        return self._client.chat.completions.create(**dict(request))
+        with _openai_quota(request):
+            return self._client.chat.completions.create(**dict(request))
 
     def upload_file(self, file_obj: Any, purpose: str) -> Any:
         return self._client.files.create(file=file_obj, purpose=purpose)
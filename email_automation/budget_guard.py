@@ -5,12 +5,16 @@ USAGE_MONTHLY_BUDGET_USD (>0) is set, ``should_block_openai_call()`` returns Tru
 once the current calendar-month cross-user spend reaches the limit, so callers
 can SKIP the paid call (defer the turn) instead of overspending.
 
-Spend is aggregated from the per-user ``openaiUsageDaily`` rollups (``totalCostUsd``)
-that ``record_openai_usage`` already maintains — no new writes, and consistent
-with the admin dashboard's own aggregation.
-
-Cost note: O(users x month-days) reads per check — fine for the current small
-beta. For scale, maintain a ``systemMetrics`` monthly counter and read it O(1).
+Spend is read from the global ``usageMonthly/{YYYY-MM}`` aggregate that
+``record_openai_usage`` increments next to the per-user ``openaiUsageDaily``
+rollups: one document read per check, memoized in process for
+``MONTHLY_SPEND_TTL_SECONDS``. The per-user scan (``global_month_spend_usd``) is
+the reconciliation path. The aggregate is trusted only once it carries a
+``reconciledAt`` marker, because the first Increment after a mid-month deploy
+creates a doc holding post-deploy spend only; until then the guard answers from
+the scan. The marker is written by ``scripts/repair_usage_monthly.py`` (run it
+once after deploying mid-month) or, for a month with no aggregate yet, by the
+guard itself, which seeds the doc from the scan it just did.
 
 Failure policy: FAIL-OPEN. A budget-check error (Firestore hiccup, etc.) must not
 break extraction; actual spend is still metered and visible on the dashboard, so
@@ -18,8 +22,15 @@ a brief overshoot is preferable to halting the pipeline. Flip to fail-closed onl
 if hard cost containment is required over availability.
 """
 import os
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+from google.cloud.firestore import SERVER_TIMESTAMP
+
+from .automation_runtime import ScopedFirestore
+from .openai_usage import USAGE_MONTHLY_COLLECTION
 
 _TRUTHY = {"1", "true", "yes", "on"}
 
@@ -43,13 +54,9 @@ def _month_prefix(now: Optional[datetime] = None) -> str:
     return dt.strftime("%Y-%m")
 
 
-def global_month_spend_usd(db: Any, *, now: Optional[datetime] = None) -> float:
-    """Sum ``totalCostUsd`` across every user's ``openaiUsageDaily`` docs whose
-    id (a YYYY-MM-DD date key) falls in the current calendar month. Reads only the
-    user-level rollups (NOT the per-client subcollection) to avoid double counting.
-    """
-    month = _month_prefix(now)
+def _scan_month_rollups(db: Any, month: str) -> Dict[str, Any]:
     total = 0.0
+    calls = 0
     for user in db.collection("users").stream():
         for day in user.reference.collection("openaiUsageDaily").stream():
             if not str(getattr(day, "id", "")).startswith(month):
@@ -59,7 +66,136 @@ def global_month_spend_usd(db: Any, *, now: Optional[datetime] = None) -> float:
                 total += float(data.get("totalCostUsd") or 0.0)
             except (TypeError, ValueError):
                 continue
-    return total
+            try:
+                calls += int(data.get("calls") or 0)
+            except (TypeError, ValueError):
+                pass
+    return {"month": month, "totalCostUsd": total, "calls": calls}
+
+
+def global_month_spend_usd(db: Any, *, now: Optional[datetime] = None) -> float:
+    """Sum ``totalCostUsd`` across every user's ``openaiUsageDaily`` docs whose
+    id (a YYYY-MM-DD date key) falls in the current calendar month. Reads only the
+    user-level rollups (NOT the per-client subcollection) to avoid double counting.
+
+    O(users x days): the reconciliation path, not the per-call check.
+    """
+    return _scan_month_rollups(db, _month_prefix(now))["totalCostUsd"]
+
+
+MONTHLY_SPEND_TTL_SECONDS = 60.0
+
+
+def _spend_memo_enabled() -> bool:
+    return os.getenv("E2E_TEST_MODE") != "true"
+
+
+class MonthlySpendMemo:
+    """Last spend read per month, served back only for the same ``db`` object."""
+
+    def __init__(self, *, ttl_seconds: float = MONTHLY_SPEND_TTL_SECONDS,
+                 enabled=_spend_memo_enabled, clock=time.monotonic) -> None:
+        self._ttl = ttl_seconds
+        self._enabled = enabled
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Any, Tuple[float, str], float]] = {}
+
+    def get(self, db: Any, month: str) -> Optional[Tuple[float, str]]:
+        if not self._enabled():
+            return None
+        with self._lock:
+            entry = self._entries.get(month)
+            if entry is None or entry[0] is not db or entry[2] <= self._clock():
+                return None
+            return entry[1]
+
+    def put(self, db: Any, month: str, spend: float, source: str) -> None:
+        if not self._enabled():
+            return
+        with self._lock:
+            self._entries[month] = (db, (spend, source), self._clock() + self._ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_SPEND_MEMO = MonthlySpendMemo()
+
+
+def _seed_month_usage(db: Any, month: str, totals: Dict[str, Any]) -> None:
+    """Create ``usageMonthly/{month}`` from a scan, marked reconciled.
+
+    ``create`` fails if an Increment got there first; that doc stays
+    unreconciled and the guard keeps scanning until the repair script runs.
+    A fenced run never writes the cross-user aggregate.
+    """
+    if isinstance(db, ScopedFirestore):
+        return
+    try:
+        db.collection(USAGE_MONTHLY_COLLECTION).document(month).create({
+            **totals,
+            "reconciledAt": SERVER_TIMESTAMP,
+            "updatedAt": SERVER_TIMESTAMP,
+        })
+    except Exception as e:  # noqa: BLE001 — the next check scans again
+        print(f"⚠️ budget_guard: could not seed usageMonthly/{month}: {e}")
+
+
+def _month_spend(db: Any, now: Optional[datetime]) -> Tuple[float, str]:
+    """(spend, source) for the current month; source is "aggregate" or "scan"."""
+    month = _month_prefix(now)
+    cached = _SPEND_MEMO.get(db, month)
+    if cached is not None:
+        return cached
+
+    snapshot = None
+    try:
+        snapshot = db.collection(USAGE_MONTHLY_COLLECTION).document(month).get()
+    except Exception as e:  # noqa: BLE001 — the scan below still answers
+        print(f"⚠️ budget_guard: monthly aggregate read failed, scanning rollups: {e}")
+    exists = snapshot is not None and getattr(snapshot, "exists", False)
+    data = (snapshot.to_dict() or {}) if exists else None
+    result = None
+    if data is not None and data.get("reconciledAt"):
+        try:
+            result = (float(data.get("totalCostUsd") or 0.0), "aggregate")
+        except (TypeError, ValueError):
+            result = None
+    if result is None:
+        totals = _scan_month_rollups(db, month)
+        result = (totals["totalCostUsd"], "scan")
+        if snapshot is not None and not exists:
+            _seed_month_usage(db, month, totals)
+    _SPEND_MEMO.put(db, month, *result)
+    return result
+
+
+def month_spend_usd(db: Any, *, now: Optional[datetime] = None) -> float:
+    """Current-month cross-user spend from the aggregate (scan until it is reconciled)."""
+    return _month_spend(db, now)[0]
+
+
+def recompute_month_usage(db: Any, month: str) -> Dict[str, Any]:
+    """Rebuild ``usageMonthly/{month}`` totals from the per-user daily rollups."""
+    return _scan_month_rollups(db, month)
+
+
+def repair_month_usage(db: Any, month: str) -> Dict[str, Any]:
+    """Overwrite ``usageMonthly/{month}`` with the recomputed totals.
+
+    Increments that land between the scan and the write are lost, so run this
+    while extraction is quiet (or re-run it afterwards).
+    """
+    totals = recompute_month_usage(db, month)
+    db.collection(USAGE_MONTHLY_COLLECTION).document(month).set({
+        **totals,
+        "reconciledAt": SERVER_TIMESTAMP,
+        "updatedAt": SERVER_TIMESTAMP,
+    })
+    _SPEND_MEMO.clear()
+    return totals
 
 
 def budget_status(db: Any, *, now: Optional[datetime] = None) -> Dict[str, Any]:
@@ -68,7 +204,7 @@ def budget_status(db: Any, *, now: Optional[datetime] = None) -> Dict[str, Any]:
     enforced = budget_enforcement_enabled()
     limit = monthly_budget_limit_usd()
     try:
-        spent = global_month_spend_usd(db, now=now)
+        spent, source = _month_spend(db, now)
     except Exception as e:  # noqa: BLE001 — fail-open, never raise from a status read
         print(f"⚠️ budget_guard: spend read failed (fail-open): {e}")
         return {"enforced": enforced, "limitUsd": limit, "spentUsd": None,
@@ -80,6 +216,7 @@ def budget_status(db: Any, *, now: Optional[datetime] = None) -> Dict[str, Any]:
         "spentUsd": round(spent, 6),
         "overBudget": over,
         "remainingUsd": round(max(0.0, limit - spent), 6) if limit > 0 else None,
+        "source": source,
     }
 
 
@@ -92,7 +229,7 @@ def should_block_openai_call(db: Any, *, now: Optional[datetime] = None) -> bool
         limit = monthly_budget_limit_usd()
         if limit <= 0:
             return False
-        return global_month_spend_usd(db, now=now) >= limit
+        return month_spend_usd(db, now=now) >= limit
     except Exception as e:  # noqa: BLE001 — never block extraction due to a check error
         print(f"⚠️ budget_guard: check failed (fail-open, allowing call): {e}")
         return False
@@ -1,11 +1,16 @@
 import os
 import json
 import base64
-import requests
+import threading
+from typing import Callable, Dict, Optional, Tuple
+from .http_pool import pooled_requests as requests
 from google.cloud import firestore
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import build_http
 import openai
 from .app_config import FIREBASE_API_KEY, OPENAI_API_KEY, OPENAI_ASSISTANT_MODEL
 from .automation_runtime import firestore_for
@@ -15,14 +20,14 @@ _fs = firestore.Client()
 openai.api_key = OPENAI_API_KEY
 client = openai.OpenAI(api_key=OPENAI_API_KEY)
 
-def _helper_google_creds():
+def _new_helper_google_creds() -> Credentials:
     client_id = os.getenv("GOOGLE_OAUTH_CLIENT_ID")
     client_secret = os.getenv("GOOGLE_OAUTH_CLIENT_SECRET")
     refresh_token = os.getenv("GOOGLE_REFRESH_TOKEN")
     if not (client_id and client_secret and refresh_token):
         raise RuntimeError("Missing GOOGLE_OAUTH_CLIENT_ID/SECRET/REFRESH_TOKEN")
 
-    creds = Credentials(
+    return Credentials(
         token=None,
         refresh_token=refresh_token,
         token_uri="https://oauth2.googleapis.com/token",
@@ -33,13 +38,99 @@ def _helper_google_creds():
             "https://www.googleapis.com/auth/spreadsheets",
         ],
     )
-    creds.refresh(Request())
-    return creds
+
+
+class GoogleClientProvider:
+    """Process-wide helper-account credentials and Google API service clients.
+
+    Building a client used to cost a token refresh against oauth2.googleapis.com
+    plus a discovery-document parse and a fresh HTTP connection, and several of
+    those happen per inbound message. Here the credentials are shared and
+    refreshed only once they are within google-auth's expiry margin, each
+    discovery document is loaded once, and each thread keeps its own built
+    service over a keep-alive connection. Services are per-thread because
+    httplib2 connections are not safe to share across the concurrent user pool.
+    """
+
+    def __init__(self, credentials_factory: Callable[[], Credentials] = _new_helper_google_creds):
+        self._credentials_factory = credentials_factory
+        self._lock = threading.Lock()
+        self._credentials: Optional[Credentials] = None
+        self._discovery_docs: Dict[Tuple[str, str], str] = {}
+        self._local = threading.local()
+        self._stats = {
+            "credentialRefreshes": 0,
+            "refreshesAvoided": 0,
+            "serviceBuilds": 0,
+            "buildsAvoided": 0,
+        }
+
+    def credentials(self) -> Credentials:
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self._credentials_factory()
+            if self._credentials.valid:
+                self._stats["refreshesAvoided"] += 1
+            else:
+                self._credentials.refresh(Request())
+                self._stats["credentialRefreshes"] += 1
+            return self._credentials
+
+    def _discovery_doc(self, api: str, version: str) -> str:
+        key = (api, version)
+        with self._lock:
+            doc = self._discovery_docs.get(key)
+            if doc is None:
+                doc = get_static_doc(api, version)
+                if doc is None:
+                    raise RuntimeError(f"No bundled discovery document for {api} {version}")
+                self._discovery_docs[key] = doc
+            return doc
+
+    def service(self, api: str, version: str):
+        credentials = self.credentials()
+        services = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+        key = (api, version)
+        cached = services.get(key)
+        # A provider reset swaps in new credentials; a service bound to the old
+        # object must not outlive it.
+        if cached is not None and cached[0] is credentials:
+            with self._lock:
+                self._stats["buildsAvoided"] += 1
+            return cached[1]
+        http = AuthorizedHttp(credentials, http=build_http())
+        service = build_from_document(self._discovery_doc(api, version), http=http)
+        services[key] = (credentials, service)
+        with self._lock:
+            self._stats["serviceBuilds"] += 1
+        return service
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def reset(self) -> None:
+        """Drop the shared credentials, e.g. after the refresh token is rotated."""
+        with self._lock:
+            self._credentials = None
+
+
+_GOOGLE_CLIENTS = GoogleClientProvider()
+
+
+def google_client_stats() -> Dict[str, int]:
+    return _GOOGLE_CLIENTS.stats()
+
+def _helper_google_creds():
+    return _GOOGLE_CLIENTS.credentials()
 
 def _sheets_client():
-    creds = _helper_google_creds()
-    sheets = build("sheets", "v4", credentials=creds, cache_discovery=False)
-    return sheets
+    return _GOOGLE_CLIENTS.service("sheets", "v4")
+
+def _drive_client():
+    return _GOOGLE_CLIENTS.service("drive", "v3")
 
 def _get_sheet_id_or_fail(uid: str, client_id: str, runtime=None) -> str:
     fs = firestore_for(runtime, _fs)
@@ -17,10 +17,15 @@ CANONICAL FIELDS:
 - When writing to sheets, we translate back to actual column names
 """
 
+import hashlib
 import json
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from decimal import Decimal, InvalidOperation
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
 
 
 LISTING_COMMENT_COLUMN_ALIASES = (
@@ -863,62 +868,104 @@ def _field_mention_contexts(text: str, mention_spans: List[tuple]) -> List[tuple
     return contexts
 
 
-def _column_field_term_matches(
-    text: str,
-    term: str,
-    *,
-    disambiguate_sf: bool = False,
-) -> List[Any]:
-    """Return word-bounded matches for a field term, excluding unit-only SF."""
-    normalized = (term or "").strip()
-    if not normalized:
-        return []
-    parts = _FIELD_REFERENCE_TOKEN_RE.findall(normalized)
+# Non-ASCII characters Python's IGNORECASE matches against an ASCII term
+# letter; folded before the literal prefilter so it never skips a real match.
+_FIELD_TERM_CASEFOLD = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+_SF_FIELD_REFERENCES = {"sf", "sq ft", "square foot", "square feet"}
+
+
+@dataclass(frozen=True)
+class _CompiledFieldTerm:
+    regex: re.Pattern
+    # One tuple per term token: a match contains at least one of its literals.
+    required_literals: Tuple[Tuple[str, ...], ...]
+    sf_reference: bool
+
+    def may_match(self, folded_text: str) -> bool:
+        return all(
+            any(literal in folded_text for literal in literals)
+            for literals in self.required_literals
+        )
+
+    def matches(self, text: str, *, disambiguate_sf: bool = False) -> List[Any]:
+        matches = list(self.regex.finditer(text or ""))
+        if not disambiguate_sf or not self.sf_reference:
+            return matches
+        return [
+            match
+            for match in matches
+            if not _FIELD_REQUEST_SF_UNIT_PREFIX_RE.search((text or "")[:match.start()])
+        ]
+
+
+def _fold_field_text(text: str) -> str:
+    return (text or "").translate(_FIELD_TERM_CASEFOLD).lower()
+
+
+@lru_cache(maxsize=4096)
+def _compiled_field_term(term: str) -> Optional[_CompiledFieldTerm]:
+    """Compile one field term's word-bounded matcher, or None for an empty term."""
+    parts = _FIELD_REFERENCE_TOKEN_RE.findall(term)
     if not parts:
-        return []
+        return None
     token_patterns = []
+    required_literals = []
     for part in parts:
         token = part.lower()
         if token in _CUSTOM_FIELD_GENERIC_TOKENS:
             token_patterns.append(re.escape(token))
+            required_literals.append((token,))
         elif token in {"foot", "feet"}:
             token_patterns.append(r"(?:foot|feet)")
+            required_literals.append(("foot", "feet"))
         elif len(token) > 4 and token.endswith("ies"):
             token_patterns.append(
                 rf"(?:{re.escape(token[:-3])}y|{re.escape(token)})"
             )
+            required_literals.append((token[:-3],))
         elif len(token) > 3 and re.search(r"[^aeiou]y$", token):
             token_patterns.append(rf"{re.escape(token[:-1])}(?:y|ies)")
+            required_literals.append((token[:-1],))
         elif len(token) > 2 and token.endswith("s") and not token.endswith("ss"):
             token_patterns.append(rf"{re.escape(token[:-1])}s?")
+            required_literals.append((token[:-1],))
         elif len(token) > 3 and token not in {"sq", "sf", "ft", "yr", "mo"}:
             token_patterns.append(rf"{re.escape(token)}s?")
+            required_literals.append((token,))
         else:
             token_patterns.append(re.escape(token))
+            required_literals.append((token,))
     pattern = _FIELD_TERM_SEPARATOR_PATTERN.join(token_patterns)
     if (
         len(parts) >= 2
         and all(part.isalpha() and len(part) <= 3 for part in parts)
     ):
         pattern += r"(?:\.(?=[ \t]+(?-i:[a-z])))?"
-    matches = list(re.finditer(
-        rf"(?<![A-Za-z0-9]){pattern}(?![A-Za-z0-9])",
-        text or "",
-        re.IGNORECASE,
-    ))
-    normalized_reference = " ".join(parts).lower()
-    if not disambiguate_sf or normalized_reference not in {
-        "sf",
-        "sq ft",
-        "square foot",
-        "square feet",
-    }:
-        return matches
-    return [
-        match
-        for match in matches
-        if not _FIELD_REQUEST_SF_UNIT_PREFIX_RE.search((text or "")[:match.start()])
-    ]
+    return _CompiledFieldTerm(
+        regex=re.compile(rf"(?<![A-Za-z0-9]){pattern}(?![A-Za-z0-9])", re.IGNORECASE),
+        required_literals=tuple(required_literals),
+        sf_reference=" ".join(parts).lower() in _SF_FIELD_REFERENCES,
+    )
+
+
+def _column_field_term_matches(
+    text: str,
+    term: str,
+    *,
+    disambiguate_sf: bool = False,
+    folded_text: Optional[str] = None,
+) -> List[Any]:
+    """Return word-bounded matches for a field term, excluding unit-only SF.
+
+    ``folded_text`` (_fold_field_text of text) lets the caller skip terms
+    whose literals cannot occur in text without running their regex.
+    """
+    compiled = _compiled_field_term((term or "").strip())
+    if compiled is None:
+        return []
+    if folded_text is not None and not compiled.may_match(folded_text):
+        return []
+    return compiled.matches(text, disambiguate_sf=disambiguate_sf)
 
 
 def contains_column_field_term(text: str, term: str) -> bool:
@@ -926,15 +973,9 @@ def contains_column_field_term(text: str, term: str) -> bool:
     return bool(_column_field_term_matches(text, term))
 
 
-def _field_group_match_spans(text: str, terms: List[str]) -> List[tuple]:
-    """Return maximal, de-duplicated spans for aliases of one configured field."""
-    spans = {
-        (match.start(), match.end())
-        for term in terms
-        for match in _column_field_term_matches(text, term, disambiguate_sf=True)
-    }
+def _maximal_spans(spans) -> List[tuple]:
     maximal_spans = []
-    for start, end in sorted(spans, key=lambda span: (span[0] - span[1], span[0])):
+    for start, end in sorted(set(spans), key=lambda span: (span[0] - span[1], span[0])):
         if any(
             kept_start <= start and end <= kept_end
             for kept_start, kept_end in maximal_spans
@@ -944,13 +985,25 @@ def _field_group_match_spans(text: str, terms: List[str]) -> List[tuple]:
     return sorted(maximal_spans)
 
 
-def _configured_field_mentions(text: str, field_groups: List[tuple]) -> List[tuple]:
-    """Find configured fields, with Note/Skip/formula spans taking precedence."""
-    raw_mentions = {
-        (start, end, group_index)
-        for group_index, (_kind, _header, terms) in enumerate(field_groups)
-        for start, end in _field_group_match_spans(text, terms)
-    }
+def _field_group_match_spans(
+    text: str,
+    terms: List[str],
+    *,
+    folded_text: Optional[str] = None,
+) -> List[tuple]:
+    """Return maximal, de-duplicated spans for aliases of one configured field."""
+    return _maximal_spans(
+        (match.start(), match.end())
+        for term in terms
+        for match in _column_field_term_matches(
+            text, term, disambiguate_sf=True, folded_text=folded_text
+        )
+    )
+
+
+def _resolve_field_mentions(raw_mentions, field_groups: List[tuple]) -> List[tuple]:
+    """Apply Note/Skip/formula precedence to raw (start, end, group) mentions."""
+    raw_mentions = set(raw_mentions)
     nonrequestable_spans = [
         (start, end)
         for start, end, group_index in raw_mentions
@@ -985,6 +1038,73 @@ def _configured_field_mentions(text: str, field_groups: List[tuple]) -> List[tup
     return sorted(mentions)
 
 
+def _configured_field_mentions(text: str, field_groups: List[tuple]) -> List[tuple]:
+    """Find configured fields, with Note/Skip/formula spans taking precedence."""
+    return ColumnTermMatcher(field_groups).mentions(text)
+
+
+class ColumnTermMatcher:
+    """Every configured field term of one columnConfig, compiled once.
+
+    ``field_groups`` are the (kind, header, terms) groups the request
+    classifier works on. mentions() folds the text once and only runs the
+    regexes of terms whose literals occur in it, so a body that names three
+    fields pays for those three rather than for every alias of every column.
+    """
+
+    def __init__(self, field_groups: List[tuple]):
+        self.field_groups = field_groups
+        self._group_terms = [
+            tuple(
+                compiled
+                for compiled in (_compiled_field_term((term or "").strip()) for term in terms)
+                if compiled is not None
+            )
+            for _kind, _header, terms in field_groups
+        ]
+
+    def mentions(self, text: str) -> List[tuple]:
+        folded_text = _fold_field_text(text)
+        raw_mentions = []
+        for group_index, compiled_terms in enumerate(self._group_terms):
+            spans = [
+                match.span()
+                for compiled in compiled_terms
+                if compiled.may_match(folded_text)
+                for match in compiled.matches(text, disambiguate_sf=True)
+            ]
+            raw_mentions.extend((start, end, group_index) for start, end in _maximal_spans(spans))
+        return _resolve_field_mentions(raw_mentions, self.field_groups)
+
+
+COLUMN_TERM_MATCHER_CACHE_SIZE = 32
+_column_term_matchers: "OrderedDict[str, ColumnTermMatcher]" = OrderedDict()
+_column_term_matchers_lock = threading.Lock()
+
+
+def _column_config_fingerprint(column_config: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(column_config, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def column_term_matcher(column_config: dict) -> ColumnTermMatcher:
+    """The ColumnTermMatcher for column_config, memoized by its fingerprint."""
+    key = _column_config_fingerprint(column_config)
+    with _column_term_matchers_lock:
+        matcher = _column_term_matchers.get(key)
+        if matcher is not None:
+            _column_term_matchers.move_to_end(key)
+            return matcher
+
+    matcher = ColumnTermMatcher(_configured_field_groups(column_config))
+    with _column_term_matchers_lock:
+        _column_term_matchers[key] = matcher
+        while len(_column_term_matchers) > COLUMN_TERM_MATCHER_CACHE_SIZE:
+            _column_term_matchers.popitem(last=False)
+    return matcher
+
+
 def _last_pattern_match(pattern: re.Pattern, text: str) -> Optional[Any]:
     return next(reversed(list(pattern.finditer(text))), None)
 
@@ -1803,11 +1923,8 @@ def _requestable_field_groups(column_config: dict) -> List[tuple]:
     return groups
 
 
-def _classify_configured_field_requests(
-    response_body: str,
-    column_config: dict,
-) -> tuple:
-    """Return requested Ask headers and whether any nonrequestable field is requested."""
+def _configured_field_groups(column_config: dict) -> List[tuple]:
+    """(kind, header, terms) for every Ask field, then every Note/Skip/formula field."""
     ask_groups = _requestable_field_groups(column_config)
     field_groups = [
         ("ask", header, terms)
@@ -1827,7 +1944,17 @@ def _classify_configured_field_requests(
         )
         for terms in get_non_requestable_field_terms(column_config)
     )
-    mentions = _configured_field_mentions(response_body, field_groups)
+    return field_groups
+
+
+def _classify_configured_field_requests(
+    response_body: str,
+    column_config: dict,
+) -> tuple:
+    """Return requested Ask headers and whether any nonrequestable field is requested."""
+    matcher = column_term_matcher(column_config)
+    field_groups = matcher.field_groups
+    mentions = matcher.mentions(response_body)
     mention_spans = list({(start, end) for start, end, _group in mentions})
     contexts = _field_mention_contexts(response_body, mention_spans)
     request_like_groups = {
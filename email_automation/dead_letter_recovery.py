@@ -9,6 +9,7 @@ from typing import Any, Dict, Optional
 
 from google.cloud.firestore import SERVER_TIMESTAMP
 
+from .message_artifacts import add_with_message_artifacts
 from .sent_mail_guard import (
     SentMailGuardLookupError,
     find_matching_sent_message_for_retry,
@@ -275,8 +276,15 @@ def _requeue_verified_unsent(
         )
         return {"success": False, "code": "blocked_manual_continuation"}
 
-    add_result = _user_collection(user_id, "outbox").add(
-        _safe_outbox_payload(data, dead_letter_id, operator_id, note)
+    from .clients import _fs
+
+    user_ref = _fs.collection("users").document(user_id)
+    add_result = add_with_message_artifacts(
+        _fs,
+        user_ref,
+        "outbox",
+        user_ref.collection("outbox"),
+        _safe_outbox_payload(data, dead_letter_id, operator_id, note),
     )
     outbox_ref = _doc_ref_from_add_result(add_result)
     outbox_id = getattr(outbox_ref, "id", None)
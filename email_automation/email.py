@@ -1,7 +1,7 @@
 import json
 import os
 import re
-import requests
+from .http_pool import pooled_requests as requests
 import time
 import uuid
 import logging
@@ -42,8 +42,11 @@ from .message_transport import (
     DeliveryKind,
     GraphDraftDeliveryTransport,
     OutboundDraft,
+    inline_create_enabled,
 )
 from .utils import normalize_message_id
+from .graph_batch import graph_batch_enabled
+from .send_pacing import send_pacer
 from .sent_mail_guard import (
     SentMailGuardLookupError,
     find_sent_conversation_continuation_for_retry,
@@ -65,6 +68,7 @@ from .campaign_safety import (
     get_client_automation_pause,
 )
 from .outbound_safety import validate_outbound_body
+from .message_artifacts import add_with_message_artifacts
 from .column_config import (
     get_column_config_error,
     response_requests_nonrequestable_fields,
@@ -327,6 +331,10 @@ def _delivery_transport_for(runtime, headers, base):
         retry=exponential_backoff_request,
         max_retries=GRAPH_SEND_MAX_RETRIES,
         send_max_retries=1,
+        # Attachments ride in the create call and its response carries the
+        # identity; anything too large for it shares one $batch call.
+        batch=graph_batch_enabled(),
+        inline_create=inline_create_enabled(),
     )
 
 
@@ -343,6 +351,13 @@ def _fs_for(runtime):
     return _fs
 
 
+def _claim_send_slot(fs, runtime, user_id: str, lane: str) -> bool:
+    """Per-mailbox send pacing; a request-scoped runtime is never paced."""
+    if runtime is not None:
+        return True
+    return send_pacer().claim(fs, user_id, lane=lane).granted
+
+
 def _send_counter_scope_key(user_id: str, day_key: str, scope: str) -> str:
     return f"{user_id}:{day_key}" if scope == "user" else day_key
 
@@ -2071,11 +2086,12 @@ def _graph_recipient(address: str, name: Optional[str] = None) -> Dict[str, Any]
     return {"emailAddress": email_address}
 
 
-# Last operator (sender) mailbox this process has filtered reply-all audiences
-# for. SiteSift runs per-mailbox, so once we've seen the operator address we can
-# still strip it from a reply-all audience even if a caller forgets to thread
-# user_email through — preventing the mailbox from reply-all'ing itself.
-_LAST_KNOWN_OPERATOR_EMAIL: Optional[str] = None
+# Last operator (sender) mailbox each user has filtered reply-all audiences for.
+# Once we've seen a user's operator address we can still strip it from their
+# reply-all audience even if a caller forgets to thread user_email through —
+# preventing the mailbox from reply-all'ing itself. Keyed by user id because
+# SITESIFT_USER_CONCURRENCY runs several mailboxes in one process.
+_LAST_KNOWN_OPERATOR_EMAILS: Dict[str, str] = {}
 
 
 def _filter_reply_all_draft_recipients(
@@ -2094,14 +2110,13 @@ def _filter_reply_all_draft_recipients(
     """
     from .processing import is_contact_opted_out, _mailbox_identity_without_plus
 
-    global _LAST_KNOWN_OPERATOR_EMAIL
     operator = _normalize_email(user_email)
     if operator:
         # Remember the operator so a later caller that omits user_email still
         # gets the self-send guard.
-        _LAST_KNOWN_OPERATOR_EMAIL = operator
-    elif _LAST_KNOWN_OPERATOR_EMAIL:
-        operator = _LAST_KNOWN_OPERATOR_EMAIL
+        _LAST_KNOWN_OPERATOR_EMAILS[user_id] = operator
+    else:
+        operator = _LAST_KNOWN_OPERATOR_EMAILS.get(user_id)
     # Compare on the plus-alias-stripped mailbox identity so an operator alias
     # (e.g. agent+campaign1@sitesift.com) is recognized as the operator's own
     # mailbox and removed — otherwise reply-all would deliver back to us.
@@ -3837,7 +3852,8 @@ def _move_to_dead_letter(user_id: str, doc_ref, data: dict, reason: str, runtime
     fs = _fs_for(runtime)
     from google.cloud.firestore import SERVER_TIMESTAMP
 
-    dead_letter_ref = fs.collection("users").document(user_id).collection("deadLetterQueue")
+    user_ref = fs.collection("users").document(user_id)
+    dead_letter_ref = user_ref.collection("deadLetterQueue")
     attempts = max(int(data.get("attempts") or 0), MAX_OUTBOX_ATTEMPTS)
 
     # Copy data to dead-letter queue with failure info
@@ -3854,7 +3870,7 @@ def _move_to_dead_letter(user_id: str, doc_ref, data: dict, reason: str, runtime
         "source": "outbox"
     }
 
-    dead_letter_ref.add(dead_letter_data)
+    add_with_message_artifacts(fs, user_ref, "deadLetterQueue", dead_letter_ref, dead_letter_data)
     _update_action_audit(user_id, data.get("actionAuditId"), {
         "status": "dead_lettered",
         "outboxId": getattr(doc_ref, "id", None),
@@ -3908,7 +3924,8 @@ def _record_outbox_reconciliation(
         "updatedAt": SERVER_TIMESTAMP,
         **identity_payload,
     }
-    fs.collection("users").document(user_id).collection("deadLetterQueue").add(dead_letter_payload)
+    user_ref = fs.collection("users").document(user_id)
+    add_with_message_artifacts(fs, user_ref, "deadLetterQueue", user_ref.collection("deadLetterQueue"), dead_letter_payload)
 
     if delete_original:
         _update_action_audit(user_id, data.get("actionAuditId"), {
@@ -4139,7 +4156,7 @@ def send_outboxes(
             f"⏱️ Processing {len(recipients_list)} recipient(s) this request; "
             f"leaving {deferred_count} queued for the next scoped run"
         )
-    for idx, (recipient_email, items) in enumerate(recipients_list):
+    for recipient_email, items in recipients_list:
         # Filter out items that have exceeded max attempts
         valid_items = []
         for item in items:
@@ -4219,6 +4236,13 @@ def send_outboxes(
                 )
                 return operation_states
 
+        # Pacing: separate-mode groups claim a slot per property email inside
+        # _send_multi_property_email; everything else is one dispatch here.
+        paced_per_property = len(valid_items) > 1 and send_plan["mode"] != "combined"
+        if not paced_per_property and not _claim_send_slot(fs, runtime, user_id, "outbox"):
+            return operation_states
+        paced_out = 0
+
         # Check if multiple properties for same broker
         if len(valid_items) > 1:
             # Per-campaign send mode: 'separate' (default — one email per property)
@@ -4241,7 +4265,7 @@ def send_outboxes(
                 )
             else:
                 print(f"🔗 Detected {len(valid_items)} properties for same broker: {recipient_email}")
-                _send_multi_property_email(
+                paced_result = _send_multi_property_email(
                     user_id,
                     _fresh_graph_headers(headers, headers_provider),
                     recipient_email,
@@ -4251,7 +4275,11 @@ def send_outboxes(
                     user_email,
                     headers_provider=headers_provider,
                     operation_states=operation_states,
+                    send_slot=lambda: _claim_send_slot(fs, runtime, user_id, "outbox"),
                 )
+                # Properties left queued by pacing are counted when they send.
+                paced_out = paced_result if isinstance(paced_result, int) else 0
+                send_count -= paced_out
         else:
             # Single property - send normally
             item = valid_items[0]
@@ -4270,7 +4298,7 @@ def send_outboxes(
         # --- Rail 2: record the sends we just made -------------------------
         # If we cannot persist the increment we can no longer trust the ceiling
         # for subsequent recipients, so we halt the drain (fail-closed).
-        if daily_cap is not None or global_cap is not None:
+        if send_count > 0 and (daily_cap is not None or global_cap is not None):
             try:
                 if daily_cap is not None:
                     _increment_send_count(
@@ -4295,10 +4323,8 @@ def send_outboxes(
                 )
                 return operation_states
 
-        # 2-minute delay between ALL emails to avoid spam detection
-        if idx < len(recipients_list) - 1:
-            print("  ⏳ Waiting 2 minutes before next recipient to avoid spam detection...")
-            time.sleep(120)
+        if paced_out:
+            return operation_states
 
     return operation_states
 
@@ -4313,11 +4339,15 @@ def _send_multi_property_email(
     user_email: str = None,
     headers_provider: Optional[Callable[[], Dict[str, str]]] = None,
     operation_states: Optional[list] = None,
-):
+    send_slot: Optional[Callable[[], bool]] = None,
+) -> int:
     """
     Send SEPARATE emails for multiple properties to the same broker.
     Each property gets its own thread for clean tracking.
     The first email acknowledges there are multiple and explains the organization strategy.
+
+    ``send_slot`` is asked before each property; once it refuses, the rest stay
+    queued. Returns how many properties were left queued that way.
     """
     # Check for opted-out contacts first
     from .processing import is_contact_opted_out
@@ -4338,7 +4368,7 @@ def _send_multi_property_email(
             )
             item['doc'].reference.delete()
         print(f"🗑️ Deleted {len(items)} outbox items (recipient opted out)")
-        return
+        return 0
 
     # Extract property info from each item
     properties = []
@@ -4370,6 +4400,9 @@ def _send_multi_property_email(
         if _delete_cancelled_outbox_item_if_needed(item['doc'].reference, data, user_id=user_id):
             continue
 
+        if send_slot is not None and not send_slot():
+            return len(properties) - idx
+
         # CRITICAL: Claim the item before processing to prevent duplicate sends
         if not _claim_outbox_item(item['doc'].reference, data, user_id=user_id):
             print(f"   ⏭️ Skipping property {idx + 1} - already being processed by another worker")
@@ -4637,10 +4670,7 @@ def _send_multi_property_email(
                 ),
             )
 
-        # 2-minute delay between emails to same recipient to avoid spam flags
-        if idx < len(properties) - 1:
-            print(f"  ⏳ Waiting 2 minutes before sending next email to avoid spam detection...")
-            time.sleep(120)
+    return 0
 
 
 def _send_combined_property_email(
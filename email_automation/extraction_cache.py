@@ -0,0 +1,294 @@
+"""Content-addressed cache of process_pdf_for_ai results.
+
+The same broker flyer is forwarded across threads, and
+retry_processing_failures replays a failed message from scratch; both used to
+re-parse the PDF, re-render its page images and possibly re-upload it to
+OpenAI. Entries are keyed by the SHA-256 of the PDF bytes plus the extractor
+variant, and hold the extracted text, the base64 page PNGs, the method and
+any OpenAI file_id.
+
+Two tiers:
+  * a local disk directory, evicted least-recently-used once it passes
+    EXTRACTION_CACHE_MAX_BYTES. It is off unless EXTRACTION_CACHE_DIR names
+    one: on Cloud Run the filesystem is in-memory and counts against the
+    container's memory limit, and each job execution starts with it empty, so
+    a default directory under the temp dir costs up to the byte cap in RAM and
+    is only reused within one run. Point it at a mounted volume (or accept the
+    RAM, with a small EXTRACTION_CACHE_MAX_BYTES) to turn it on;
+  * a durable ``users/{uid}/extractionCache/{key}`` Firestore doc for reuse
+    across runs, scoped to the mailbox the run is acting for. Entries too big
+    for one Firestore document are only cached on disk, and docs past
+    ``expiresAt`` are ignored until the retention pass deletes them
+    (retention.EXTRACTION_CACHE_RETENTION).
+
+Failed extractions are never cached. Inert under E2E_TEST_MODE.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from .rate_governor import current_mailbox
+
+
+EXTRACTION_CACHE_COLLECTION = "extractionCache"
+EXTRACTION_CACHE_DIR_ENV = "EXTRACTION_CACHE_DIR"
+EXTRACTION_CACHE_MAX_BYTES_ENV = "EXTRACTION_CACHE_MAX_BYTES"
+EXTRACTION_CACHE_MAX_BYTES_DEFAULT = 256 * 1024 * 1024
+# Firestore caps a document at 1 MiB including field names and metadata.
+DURABLE_ENTRY_MAX_BYTES = 900 * 1024
+DURABLE_ENTRY_TTL = timedelta(days=30)
+
+_ENTRY_FIELDS = ("text", "images", "method", "file_id")
+
+
+def _cache_enabled() -> bool:
+    return os.getenv("E2E_TEST_MODE") != "true"
+
+
+def _default_directory() -> Optional[str]:
+    return os.getenv(EXTRACTION_CACHE_DIR_ENV, "").strip() or None
+
+
+def _default_max_bytes() -> int:
+    try:
+        return max(0, int(os.getenv(EXTRACTION_CACHE_MAX_BYTES_ENV, "")))
+    except ValueError:
+        return EXTRACTION_CACHE_MAX_BYTES_DEFAULT
+
+
+def extraction_cache_key(content: bytes, variant: str) -> str:
+    """SHA-256 of the bytes, suffixed with a digest of the extractor variant."""
+    variant_digest = hashlib.sha256(variant.encode("utf-8")).hexdigest()[:12]
+    return f"{hashlib.sha256(content).hexdigest()}-{variant_digest}"
+
+
+def _entry_payload(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: entry.get(field) for field in _ENTRY_FIELDS}
+
+
+class FirestoreExtractionStore:
+    """Durable tier: one doc per key under the acting user's tree."""
+
+    def __init__(self, db: Any = None) -> None:
+        self._db = db
+
+    def _collection(self, uid: str):
+        db = self._db
+        if db is None:
+            from .clients import _fs as db
+        return db.collection("users").document(uid).collection(EXTRACTION_CACHE_COLLECTION)
+
+    def get(self, uid: str, key: str) -> Optional[Dict[str, Any]]:
+        snapshot = self._collection(uid).document(key).get()
+        if not getattr(snapshot, "exists", False):
+            return None
+        data = snapshot.to_dict() or {}
+        expires_at = data.get("expiresAt")
+        if isinstance(expires_at, datetime) and expires_at <= datetime.now(timezone.utc):
+            return None
+        return {
+            "text": data.get("text") or "",
+            "images": list(data.get("images") or []),
+            "method": data.get("method"),
+            "file_id": data.get("fileId"),
+        }
+
+    def put(self, uid: str, key: str, entry: Dict[str, Any], size: int) -> None:
+        now = datetime.now(timezone.utc)
+        self._collection(uid).document(key).set({
+            "text": entry.get("text") or "",
+            "images": list(entry.get("images") or []),
+            "method": entry.get("method"),
+            "fileId": entry.get("file_id"),
+            "bytes": size,
+            "createdAt": now,
+            "expiresAt": now + DURABLE_ENTRY_TTL,
+        })
+
+
+class ExtractionCache:
+    """Disk LRU in front of the durable store, with hit/miss/byte counters."""
+
+    def __init__(
+        self,
+        *,
+        directory: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        durable: Any = None,
+        owner: Callable[[], Optional[str]] = current_mailbox,
+        enabled: Callable[[], bool] = _cache_enabled,
+    ) -> None:
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._durable = durable if durable is not None else FirestoreExtractionStore()
+        self._owner = owner
+        self._enabled = enabled
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._stats = {
+            "diskHits": 0,
+            "durableHits": 0,
+            "misses": 0,
+            "bytesRead": 0,
+            "bytesWritten": 0,
+            "evictions": 0,
+        }
+
+    # -- disk tier ----------------------------------------------------------
+
+    def _dir(self) -> Optional[str]:
+        return self._directory or _default_directory()
+
+    def _limit(self) -> int:
+        return self._max_bytes if self._max_bytes is not None else _default_max_bytes()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._dir(), f"{key}.json")
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        """Existing entries, least recently used first (by mtime)."""
+        if self._index is None:
+            found = []
+            try:
+                with os.scandir(self._dir()) as entries:
+                    for item in entries:
+                        if item.name.endswith(".json") and item.is_file():
+                            stat = item.stat()
+                            found.append((stat.st_mtime, item.name[:-5], stat.st_size))
+            except FileNotFoundError:
+                pass
+            self._index = OrderedDict((key, size) for _, key, size in sorted(found))
+        return self._index
+
+    def _disk_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._dir() is None:
+            return None
+        index = self._load_index()
+        if key not in index:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                raw = handle.read()
+            entry = json.loads(raw)
+            os.utime(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ extraction cache: dropping unreadable entry {key[:12]}: {e}")
+            self._remove(key)
+            return None
+        index.move_to_end(key)
+        self._stats["bytesRead"] += len(raw)
+        return entry
+
+    def _disk_put(self, key: str, raw: bytes) -> None:
+        limit = self._limit()
+        if self._dir() is None or len(raw) > limit:
+            return
+        index = self._load_index()
+        os.makedirs(self._dir(), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir(), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(raw)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        index[key] = len(raw)
+        index.move_to_end(key)
+        self._stats["bytesWritten"] += len(raw)
+        while sum(index.values()) > limit:
+            oldest = next(iter(index))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        if self._index is not None:
+            self._index.pop(key, None)
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    # -- public -------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self._enabled():
+            return None
+        with self._lock:
+            entry = self._disk_get(key)
+            if entry is not None:
+                self._stats["diskHits"] += 1
+                return entry
+
+        uid = self._owner()
+        entry = None
+        if uid:
+            try:
+                entry = self._durable.get(uid, key)
+            except Exception as e:  # noqa: BLE001 — a miss just re-extracts
+                print(f"⚠️ extraction cache: durable read failed for {key[:12]}: {e}")
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["durableHits"] += 1
+            raw = json.dumps(_entry_payload(entry)).encode("utf-8")
+            self._stats["bytesRead"] += len(raw)
+            try:
+                self._disk_put(key, raw)
+            except OSError as e:
+                print(f"⚠️ extraction cache: disk write failed for {key[:12]}: {e}")
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        if not self._enabled() or entry.get("method") == "failed":
+            return
+        payload = _entry_payload(entry)
+        raw = json.dumps(payload).encode("utf-8")
+        with self._lock:
+            try:
+                self._disk_put(key, raw)
+            except OSError as e:
+                print(f"⚠️ extraction cache: disk write failed for {key[:12]}: {e}")
+
+        uid = self._owner()
+        if not uid or len(raw) > DURABLE_ENTRY_MAX_BYTES:
+            return
+        try:
+            self._durable.put(uid, key, payload, len(raw))
+        except Exception as e:  # noqa: BLE001 — the disk tier still has it
+            print(f"⚠️ extraction cache: durable write failed for {key[:12]}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hits"] = stats["diskHits"] + stats["durableHits"]
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+_EXTRACTION_CACHE = ExtractionCache()
+
+
+def extraction_cache() -> ExtractionCache:
+    return _EXTRACTION_CACHE
+
+
+def extraction_cache_stats() -> Dict[str, int]:
+    return _EXTRACTION_CACHE.stats()
@@ -4,18 +4,25 @@ import datetime
 import hashlib
 import ipaddress
 import re
-import requests
+from .http_pool import pooled_requests as requests
 import socket
 import tempfile
+import threading
+import time
 import unicodedata
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Callable, Tuple, Optional
 from urllib.parse import unquote, urljoin, urlparse
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload
 import io
+from . import pdf_text
+from .extraction_cache import extraction_cache, extraction_cache_key
 from .app_config import native_image_ingestion_enabled
-from .clients import _helper_google_creds, client
+from .clients import _drive_client, client
 from .automation_runtime import ai_for, drive_publication_for
 
 
@@ -29,7 +36,7 @@ def _pdf_substantive_text_for_threshold(extracted_text: str) -> str:
 
 # PDF extraction libraries
 try:
-    import pdfplumber
+    import pdfplumber  # noqa: F401 - parsing itself lives in pdf_text
     HAS_PDFPLUMBER = True
 except ImportError:
     HAS_PDFPLUMBER = False
@@ -1471,133 +1478,226 @@ def project_safe_native_image_manifest(
     return projections[0]
 
 
-def extract_pdf_text(content: bytes, filename: str = "document.pdf") -> Tuple[str, List[bytes]]:
+# Sparse-page renders handed to the vision fallback per PDF.
+PDF_PAGE_IMAGE_LIMIT = 5
+PDF_PARSE_PROCESSES_ENV = "PDF_PARSE_PROCESSES"
+PDF_PARSE_PROCESSES_MAX = 4
+ASSET_INGEST_WORKERS_ENV = "ASSET_INGEST_WORKERS"
+ASSET_INGEST_WORKERS_DEFAULT = 4
+ASSET_INGEST_WORKERS_MAX = 8
+
+
+def _bounded_env_int(name: str, default: int, maximum: int) -> int:
+    value = os.getenv(name, "")
+    if not value.strip():
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        return default
+    return max(0, min(parsed, maximum))
+
+
+def pdf_parse_processes() -> int:
+    """Worker processes for PDF parsing; 0 parses in the calling thread.
+
+    Defaults to one per CPU (capped) when there is more than one CPU. Always 0
+    under E2E_TEST_MODE so test patches of the parse path stay in effect.
+    """
+    if os.getenv("E2E_TEST_MODE") == "true":
+        return 0
+    cpus = os.cpu_count() or 1
+    default = min(cpus, PDF_PARSE_PROCESSES_MAX) if cpus > 1 else 0
+    return _bounded_env_int(PDF_PARSE_PROCESSES_ENV, default, PDF_PARSE_PROCESSES_MAX)
+
+
+def asset_ingest_workers() -> int:
+    """Assets of one message downloaded/parsed/uploaded at once.
+
+    1 keeps the strictly serial walk, which E2E_TEST_MODE always uses so
+    ordered mock side effects stay deterministic.
+    """
+    if os.getenv("E2E_TEST_MODE") == "true":
+        return 1
+    return max(1, _bounded_env_int(
+        ASSET_INGEST_WORKERS_ENV,
+        ASSET_INGEST_WORKERS_DEFAULT,
+        ASSET_INGEST_WORKERS_MAX,
+    ))
+
+
+class PdfParsePool:
+    """Process-wide pool that runs pdf_text.extract_pdf_text off the GIL.
+
+    pdfplumber and PyMuPDF are CPU-bound, so the threads that overlap a
+    message's downloads and uploads would otherwise serialize on parsing. The
+    pool starts lazily, and its workers are fresh interpreters that import only
+    pdf_text (see ``pdf_text.PdfWorkerPool``): forking a process that already
+    holds gRPC and HTTP threads is unsafe, and a multiprocessing worker would
+    re-import main.py and with it the provider clients. A broken
+    pool is dropped and the parse reruns in-process, which is exactly what ran
+    before the pool existed.
+    """
+
+    def __init__(self, processes: Callable[[], int] = pdf_parse_processes):
+        self._processes = processes
+        self._lock = threading.Lock()
+        self._executor = None
+        self._size = 0
+
+    def _pool(self, size: int):
+        with self._lock:
+            if self._executor is None or self._size != size:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = pdf_text.PdfWorkerPool(size)
+                self._size = size
+            return self._executor
+
+    def _drop(self, executor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._size = 0
+        executor.shutdown(wait=False)
+
+    def extract(self, content: bytes, filename: str, **options) -> Tuple[str, List[bytes]]:
+        size = self._processes()
+        if size <= 0:
+            return pdf_text.extract_pdf_text(content, filename, **options)
+        executor = self._pool(size)
+        try:
+            return executor.submit(pdf_text.extract_pdf_text, content, filename, **options).result()
+        except BrokenProcessPool as e:
+            print(f"⚠️ PDF parse pool failed for {filename} ({e}); parsing in-process")
+            self._drop(executor)
+            return pdf_text.extract_pdf_text(content, filename, **options)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor, self._size = self._executor, None, 0
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_PDF_PARSE_POOL = PdfParsePool()
+
+
+def extract_pdf_text(
+    content: bytes,
+    filename: str = "document.pdf",
+    *,
+    max_images: Optional[int] = None,
+) -> Tuple[str, List[bytes]]:
     """
-    Extract text from PDF using multiple strategies for maximum coverage.
+    Extract text from PDF in one pass (see pdf_text.extract_pdf_text).
+
+    Runs in the PDF parse pool when one is enabled. ``max_images`` caps how
+    many sparse pages are rendered; None renders all of them.
 
     Returns:
         Tuple of (extracted_text, list_of_page_images_as_bytes)
         - extracted_text: All text found in the PDF
         - page_images: Images of pages with little/no text (for OCR fallback)
     """
-    text_parts = []
-    page_images = []
+    return _PDF_PARSE_POOL.extract(content, filename, max_images=max_images)
 
-    # Track which pages have sufficient text (threshold: 50 chars per page)
-    MIN_TEXT_PER_PAGE = 50
 
-    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-        tmp.write(content)
-        tmp_path = tmp.name
+def map_assets_in_order(
+    func: Callable[[Any], Any],
+    items: List[Any],
+    *,
+    workers: Optional[int] = None,
+) -> List[Any]:
+    """Apply ``func`` to each item on a bounded thread pool, results in input order.
+
+    Every task runs in a copy of the caller's context so the mailbox reader and
+    rate-governor ContextVars follow the work into the pool. The first item's
+    exception (in input order) is re-raised after every task has finished,
+    which is the exception a serial walk would have surfaced.
+    """
+    items = list(items or [])
+    workers = asset_ingest_workers() if workers is None else workers
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
 
-    try:
-        # Strategy 1: pdfplumber for text and tables (best for native PDFs)
-        if HAS_PDFPLUMBER:
-            try:
-                with pdfplumber.open(tmp_path) as pdf:
-                    for page_num, page in enumerate(pdf.pages):
-                        page_text = ""
-
-                        # Extract regular text
-                        raw_text = page.extract_text() or ""
-                        page_text += raw_text
-
-                        # Extract tables (common in property brochures)
-                        tables = page.extract_tables()
-                        for table in tables:
-                            for row in table:
-                                if row:
-                                    row_text = " | ".join([str(cell) if cell else "" for cell in row])
-                                    page_text += "\n" + row_text
-
-                        text_parts.append(f"--- Page {page_num + 1} ---\n{page_text.strip()}")
-
-                        # If page has little text, mark for image extraction
-                        if len(page_text.strip()) < MIN_TEXT_PER_PAGE:
-                            print(f"  📄 Page {page_num + 1}: Low text ({len(page_text.strip())} chars) - will extract image")
-
-                print(f"📄 pdfplumber extracted {sum(len(p) for p in text_parts)} chars from {filename}")
-            except Exception as e:
-                print(f"⚠️ pdfplumber failed for {filename}: {e}")
-
-        # Strategy 2: PyMuPDF as fallback for text + image extraction for sparse pages
-        if HAS_PYMUPDF:
-            try:
-                doc = fitz.open(tmp_path)
-                pymupdf_text_parts = []
-
-                for page_num in range(len(doc)):
-                    page = doc[page_num]
-                    page_text = page.get_text("text") or ""
-
-                    # If pdfplumber didn't get much, add PyMuPDF text
-                    if page_num < len(text_parts) and len(text_parts[page_num]) < MIN_TEXT_PER_PAGE + 30:
-                        # Append PyMuPDF text if it has more
-                        if len(page_text.strip()) > len(text_parts[page_num]):
-                            text_parts[page_num] = f"--- Page {page_num + 1} ---\n{page_text.strip()}"
-                    elif page_num >= len(text_parts):
-                        pymupdf_text_parts.append(f"--- Page {page_num + 1} ---\n{page_text.strip()}")
-
-                    # Convert pages with little text to images for vision API
-                    combined_text = text_parts[page_num] if page_num < len(text_parts) else ""
-                    if len(combined_text.strip().replace(f"--- Page {page_num + 1} ---", "").strip()) < MIN_TEXT_PER_PAGE:
-                        if HAS_PILLOW:
-                            # Render page to image at good resolution (150 DPI)
-                            mat = fitz.Matrix(150/72, 150/72)
-                            pix = page.get_pixmap(matrix=mat)
-                            img_bytes = pix.tobytes("png")
-                            page_images.append(img_bytes)
-                            print(f"  🖼️ Converted page {page_num + 1} to image for vision analysis")
-
-                text_parts.extend(pymupdf_text_parts)
-                doc.close()
-
-            except Exception as e:
-                print(f"⚠️ PyMuPDF failed for {filename}: {e}")
-
-        # Combine all extracted text
-        full_text = "\n\n".join(text_parts)
-
-        # Clean up text
-        full_text = clean_extracted_text(full_text)
-
-        print(f"✅ PDF extraction complete: {len(full_text)} chars text, {len(page_images)} page images")
-        return full_text, page_images
+    with ThreadPoolExecutor(max_workers=min(workers, len(items)), thread_name_prefix="asset") as pool:
+        futures = [pool.submit(copy_context().run, func, item) for item in items]
+        wait(futures)
+    return [future.result() for future in futures]
 
-    finally:
-        os.unlink(tmp_path)
 
+_ASSET_TIMINGS: ContextVar = ContextVar("asset_ingest_timings", default=None)
 
-def clean_extracted_text(text: str) -> str:
-    """Clean up extracted PDF text for better model comprehension."""
-    import re
 
-    # Remove excessive whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r'[ \t]+', ' ', text)
+@contextmanager
+def asset_timing_capture():
+    """Collect one timing entry per asset processed inside the block.
 
-    # Remove common PDF artifacts
-    text = re.sub(r'\x00', '', text)  # Null bytes
-    text = re.sub(r'[\x01-\x08\x0b\x0c\x0e-\x1f]', '', text)  # Control chars
+    Yields the list; entries carry lane, position, name, status and seconds.
+    """
+    timings: List[Dict[str, Any]] = []
+    token = _ASSET_TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _ASSET_TIMINGS.reset(token)
 
-    # Fix common OCR/extraction issues
-    text = text.replace('|', ' | ')  # Space around pipe for tables
-    text = re.sub(r'\s+\|', ' |', text)
-    text = re.sub(r'\|\s+', '| ', text)
 
-    return text.strip()
+def _timed_asset(lane: str, position: int, name: str, func, *args):
+    timings = _ASSET_TIMINGS.get()
+    started = time.monotonic()
+    status = "error"
+    try:
+        result = func(*args)
+        status = "ok" if result is not None else "skipped"
+        return result
+    finally:
+        if timings is not None:
+            timings.append({
+                "lane": lane,
+                "position": position,
+                "name": name,
+                "status": status,
+                "seconds": round(time.monotonic() - started, 3),
+            })
 
 
 def process_pdf_for_ai(content: bytes, filename: str = "document.pdf") -> Dict[str, Any]:
     """
     Process a PDF and prepare it for AI consumption.
 
+    Identical bytes (a forwarded flyer, a replayed message) are served from
+    the extraction cache instead of being parsed, rendered and uploaded again.
+
     Returns dict with:
         - 'text': Extracted text content
         - 'images': List of base64-encoded page images (for pages with little text)
         - 'method': How the content was extracted
         - 'file_id': OpenAI file ID if uploaded (fallback)
     """
+    cache = extraction_cache()
+    cache_key = extraction_cache_key(
+        content, f"{pdf_text.PDF_EXTRACTOR_VERSION}/images={PDF_PAGE_IMAGE_LIMIT}"
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        print(f"📄 PDF served from extraction cache: {filename} ({cached.get('method')})")
+        return {
+            'text': cached.get('text') or '',
+            'images': list(cached.get('images') or []),
+            'method': cached.get('method') or 'none',
+            'file_id': cached.get('file_id'),
+            'id': cached.get('file_id'),
+            'filename': filename,
+        }
+
+    result = _process_pdf_uncached(content, filename)
+    cache.put(cache_key, result)
+    return result
+
+
+def _process_pdf_uncached(content: bytes, filename: str) -> Dict[str, Any]:
     result = {
         'text': '',
         'images': [],
@@ -1608,7 +1708,7 @@ def process_pdf_for_ai(content: bytes, filename: str = "document.pdf") -> Dict[s
     }
 
     # Try local extraction first
-    extracted_text, page_images = extract_pdf_text(content, filename)
+    extracted_text, page_images = extract_pdf_text(content, filename, max_images=PDF_PAGE_IMAGE_LIMIT)
 
     if extracted_text and len(_pdf_substantive_text_for_threshold(extracted_text)) > 100:
         result['text'] = extracted_text
@@ -1616,7 +1716,7 @@ def process_pdf_for_ai(content: bytes, filename: str = "document.pdf") -> Dict[s
 
         # Add images for pages with little text (for vision fallback)
         if page_images:
-            result['images'] = [base64.b64encode(img).decode('utf-8') for img in page_images[:5]]  # Max 5 pages
+            result['images'] = [base64.b64encode(img).decode('utf-8') for img in page_images[:PDF_PAGE_IMAGE_LIMIT]]
             result['method'] = 'local_extraction+images'
 
         print(f"📄 PDF processed via local extraction: {len(extracted_text)} chars, {len(result['images'])} images")
@@ -1632,7 +1732,7 @@ def process_pdf_for_ai(content: bytes, filename: str = "document.pdf") -> Dict[s
 
         # Still include images if we have them
         if page_images:
-            result['images'] = [base64.b64encode(img).decode('utf-8') for img in page_images[:5]]
+            result['images'] = [base64.b64encode(img).decode('utf-8') for img in page_images[:PDF_PAGE_IMAGE_LIMIT]]
             result['method'] = 'openai_upload+images'
 
         print(f"📄 PDF uploaded to OpenAI: {file_id}")
@@ -1757,11 +1857,22 @@ def fetch_pdf_attachments(
     print(f"📎 Found {len(pdf_attachments)} PDF attachment(s)")
     return _PdfAttachmentList(pdf_attachments, attachments)
 
+_DRIVE_FOLDER_LOCK = threading.Lock()
+
+
 def ensure_drive_folder(*, redact_failure_detail: bool = False):
-    """Ensure Drive folder exists and return folder ID."""
+    """Ensure Drive folder exists and return folder ID.
+
+    Serialized so concurrent asset uploads cannot each create an "Email PDFs"
+    folder on first use.
+    """
+    with _DRIVE_FOLDER_LOCK:
+        return _ensure_drive_folder(redact_failure_detail=redact_failure_detail)
+
+
+def _ensure_drive_folder(*, redact_failure_detail: bool = False):
     try:
-        creds = _helper_google_creds()
-        drive = build("drive", "v3", credentials=creds, cache_discovery=False)
+        drive = _drive_client()
         
         # Search for existing folder
         results = drive.files().list(
@@ -1796,8 +1907,7 @@ def ensure_drive_folder(*, redact_failure_detail: bool = False):
 def upload_pdf_to_drive(name: str, content: bytes, folder_id: str = None, runtime=None) -> Optional[str]:
     """Upload PDF to Drive and return webViewLink."""
     try:
-        creds = _helper_google_creds()
-        drive = build("drive", "v3", credentials=creds, cache_discovery=False)
+        drive = _drive_client()
         
         if not folder_id:
             folder_id = ensure_drive_folder()
@@ -2049,8 +2159,7 @@ def upload_property_image_to_drive(
         return None
 
     try:
-        creds = _helper_google_creds()
-        drive = build("drive", "v3", credentials=creds, cache_discovery=False)
+        drive = _drive_client()
 
         if not folder_id:
             folder_id = ensure_drive_folder(
@@ -2387,6 +2496,10 @@ def fetch_and_process_linked_assets(
     When provided, links whose filename/URL names a clearly different street
     address are rejected by build_download_candidate's deterministic guard so
     a forwarded wrong-property flyer never populates the row.
+
+    Links are fetched concurrently in waves no larger than the remaining
+    ``max_assets`` room, so the manifest is exactly what the one-at-a-time walk
+    produced: same entries, same order, same cap.
     """
     try:
         from .property_images import build_download_candidate
@@ -2394,140 +2507,161 @@ def fetch_and_process_linked_assets(
         print(f"⚠️ Could not import property image URL helpers: {e}")
         return []
 
-    processed: List[Dict[str, Any]] = []
-    seen_urls = set()
+    unique_urls: List[str] = []
     for raw_url in urls or []:
-        if len(processed) >= max_assets:
-            break
         source_url = str(raw_url or "").strip()
-        if not source_url or source_url in seen_urls:
-            continue
-        seen_urls.add(source_url)
-
-        filename_hint = _filename_from_asset_url(source_url, fallback="")
-        manual_review_reasons: List[str] = []
-        candidate = build_download_candidate(
+        if source_url and source_url not in unique_urls:
+            unique_urls.append(source_url)
+
+    def run(item):
+        position, source_url = item
+        return _timed_asset(
+            "linked",
+            position,
+            _filename_from_asset_url(source_url, fallback="") or source_url,
+            _process_linked_asset,
             source_url,
-            filename_hint=filename_hint,
-            target_property_hint=target_property_hint,
-            manual_review_reasons=manual_review_reasons,
+            target_property_hint,
+            build_download_candidate,
         )
-        if not candidate:
-            # None with a recorded reason == an address-bearing link we could
-            # not verify without target context. Do NOT silently drop it (a
-            # dropped link is indistinguishable from 'no assets' and lets the
-            # message be marked processed with the broker's payload lost) —
-            # surface it as a manual-review entry. A None with NO reason is a
-            # confident drop (blocked/unsupported host or a hint-confirmed
-            # wrong-property flyer) and stays dropped.
-            if manual_review_reasons:
-                name = _filename_from_asset_url(source_url, filename_hint or "broker flyer.pdf")
-                print(f"⚠️ Broker link needs manual review (unverifiable property address, no target context): {source_url}")
-                processed.append(_linked_asset_stub_entry(
-                    name=name,
-                    source_url=source_url,
-                    method="manual_review_required",
-                    source_type="broker_unverified_property_link",
-                    error=manual_review_reasons[0],
-                    requires_manual_review=True,
-                ))
-            continue
 
-        name = _filename_from_asset_url(candidate.get("sourceUrl") or source_url, filename_hint or "broker flyer.pdf")
-        if candidate.get("sourceType") == "direct_image" and not name.lower().endswith((".png", ".jpg", ".jpeg", ".webp", ".gif")):
-            name = "broker property image.png"
-
-        # File-share links (SharePoint/OneDrive/Box/WeTransfer/Drive folder) cannot
-        # be auto-downloaded to a concrete file. Surface them as a distinguishable
-        # manual-review entry rather than silently dropping the broker's payload —
-        # a dropped link is indistinguishable from 'no assets' and lets the message
-        # be marked processed with the broker's data lost.
-        if candidate.get("requiresManualReview") or not candidate.get("downloadUrl"):
-            print(f"⚠️ Broker file-share link needs manual review (not auto-downloadable): {source_url}")
-            processed.append(_linked_asset_stub_entry(
+    processed: List[Dict[str, Any]] = []
+    pending = list(enumerate(unique_urls))
+    while pending and len(processed) < max_assets:
+        room = max_assets - len(processed)
+        wave, pending = pending[:room], pending[room:]
+        processed.extend(entry for entry in map_assets_in_order(run, wave) if entry is not None)
+
+    if processed:
+        print(f"🖼️ Resolved {len(processed)} linked property asset(s)")
+    return processed
+
+
+def _process_linked_asset(
+    source_url: str,
+    target_property_hint: str,
+    build_download_candidate,
+) -> Optional[Dict[str, Any]]:
+    """Resolve, download and process one broker link; None drops it silently."""
+    filename_hint = _filename_from_asset_url(source_url, fallback="")
+    manual_review_reasons: List[str] = []
+    candidate = build_download_candidate(
+        source_url,
+        filename_hint=filename_hint,
+        target_property_hint=target_property_hint,
+        manual_review_reasons=manual_review_reasons,
+    )
+    if not candidate:
+        # None with a recorded reason == an address-bearing link we could
+        # not verify without target context. Do NOT silently drop it (a
+        # dropped link is indistinguishable from 'no assets' and lets the
+        # message be marked processed with the broker's payload lost) —
+        # surface it as a manual-review entry. A None with NO reason is a
+        # confident drop (blocked/unsupported host or a hint-confirmed
+        # wrong-property flyer) and stays dropped.
+        if manual_review_reasons:
+            name = _filename_from_asset_url(source_url, filename_hint or "broker flyer.pdf")
+            print(f"⚠️ Broker link needs manual review (unverifiable property address, no target context): {source_url}")
+            return _linked_asset_stub_entry(
                 name=name,
                 source_url=source_url,
                 method="manual_review_required",
-                source_type=candidate.get("sourceType") or "broker_file_share_link",
-                error="Broker file-share link could not be auto-downloaded; needs manual review",
+                source_type="broker_unverified_property_link",
+                error=manual_review_reasons[0],
                 requires_manual_review=True,
-            ))
-            continue
+            )
+        return None
 
-        try:
-            content, content_type = _download_linked_asset(candidate["downloadUrl"])
-        except Exception as e:
-            # A broken/protected broker link (dead link, 403 protected Drive file)
-            # MUST stay visible. Swallowing it and continuing (returning []) is
-            # indistinguishable from 'no assets' and lets process_inbox_message see
-            # no error and mark the message processed — the broker's payload is lost
-            # with no retry/visibility. Surface a distinguishable failure entry.
-            print(f"⚠️ Failed to download linked property asset {source_url}: {e}")
-            processed.append(_linked_asset_stub_entry(
-                name=name,
-                source_url=source_url,
-                method="failed",
-                source_type=candidate.get("sourceType") or "",
-                error=str(e),
-                download_failed=True,
-            ))
-            continue
+    name = _filename_from_asset_url(candidate.get("sourceUrl") or source_url, filename_hint or "broker flyer.pdf")
+    if candidate.get("sourceType") == "direct_image" and not name.lower().endswith((".png", ".jpg", ".jpeg", ".webp", ".gif")):
+        name = "broker property image.png"
+
+    # File-share links (SharePoint/OneDrive/Box/WeTransfer/Drive folder) cannot
+    # be auto-downloaded to a concrete file. Surface them as a distinguishable
+    # manual-review entry rather than silently dropping the broker's payload —
+    # a dropped link is indistinguishable from 'no assets' and lets the message
+    # be marked processed with the broker's data lost.
+    if candidate.get("requiresManualReview") or not candidate.get("downloadUrl"):
+        print(f"⚠️ Broker file-share link needs manual review (not auto-downloadable): {source_url}")
+        return _linked_asset_stub_entry(
+            name=name,
+            source_url=source_url,
+            method="manual_review_required",
+            source_type=candidate.get("sourceType") or "broker_file_share_link",
+            error="Broker file-share link could not be auto-downloaded; needs manual review",
+            requires_manual_review=True,
+        )
 
-        source_type = candidate.get("sourceType") or ""
-        is_pdf = source_type.endswith("_pdf") or "pdf" in content_type or name.lower().endswith(".pdf")
-        is_image = source_type == "direct_image" or content_type.startswith("image/")
+    try:
+        content, content_type = _download_linked_asset(candidate["downloadUrl"])
+    except Exception as e:
+        # A broken/protected broker link (dead link, 403 protected Drive file)
+        # MUST stay visible. Swallowing it and continuing (returning []) is
+        # indistinguishable from 'no assets' and lets process_inbox_message see
+        # no error and mark the message processed — the broker's payload is lost
+        # with no retry/visibility. Surface a distinguishable failure entry.
+        print(f"⚠️ Failed to download linked property asset {source_url}: {e}")
+        return _linked_asset_stub_entry(
+            name=name,
+            source_url=source_url,
+            method="failed",
+            source_type=candidate.get("sourceType") or "",
+            error=str(e),
+            download_failed=True,
+        )
 
-        if is_pdf:
-            print(f"\n🔗 Processing linked PDF: {name} ({len(content)} bytes)")
-            result = process_pdf_for_ai(content, name)
-            result["name"] = name
-            result["source_url"] = source_url
-            result["source_type"] = source_type
-            try:
-                result["drive_link"] = upload_pdf_to_drive(name, content)
-            except Exception as e:
-                print(f"⚠️ Linked PDF Drive upload failed: {e}")
-                result["drive_link"] = None
-            _attach_pdf_property_preview(
-                result,
-                name,
-                content,
-                source_label_prefix="Broker flyer link preview",
-                source_type="broker_pdf_link_preview",
-            )
-            processed.append(result)
-        elif is_image:
-            preview_bytes = _image_link_to_png_preview(content)
-            if not preview_bytes:
-                continue
-            print(f"\n🔗 Processing linked property image: {name} ({len(content)} bytes)")
-            uploaded_preview = upload_property_image_to_drive(name, preview_bytes)
-            if not (uploaded_preview and uploaded_preview.get("url")):
-                continue
-            processed.append({
-                "name": name,
-                "text": "",
-                "images": [],
-                "method": "direct_image_link",
-                "source_url": source_url,
-                "source_type": source_type,
-                "drive_link": None,
-                "property_image_url": uploaded_preview["url"],
-                "property_image_source": f"Broker image link: {name}",
-                "property_image_source_type": "broker_image_link",
-                "property_image_meta": {
-                    "strategy": "direct_image_link_v1",
-                    "selectionReason": "broker-provided public image link",
-                    "contentType": uploaded_preview.get("contentType") or "image/png",
-                    "byteCount": uploaded_preview.get("byteCount"),
-                    "sha256": uploaded_preview.get("sha256"),
-                    "driveLink": uploaded_preview.get("driveLink"),
-                },
-            })
+    source_type = candidate.get("sourceType") or ""
+    is_pdf = source_type.endswith("_pdf") or "pdf" in content_type or name.lower().endswith(".pdf")
+    is_image = source_type == "direct_image" or content_type.startswith("image/")
 
-    if processed:
-        print(f"🖼️ Resolved {len(processed)} linked property asset(s)")
-    return processed
+    if is_pdf:
+        print(f"\n🔗 Processing linked PDF: {name} ({len(content)} bytes)")
+        result = process_pdf_for_ai(content, name)
+        result["name"] = name
+        result["source_url"] = source_url
+        result["source_type"] = source_type
+        try:
+            result["drive_link"] = upload_pdf_to_drive(name, content)
+        except Exception as e:
+            print(f"⚠️ Linked PDF Drive upload failed: {e}")
+            result["drive_link"] = None
+        _attach_pdf_property_preview(
+            result,
+            name,
+            content,
+            source_label_prefix="Broker flyer link preview",
+            source_type="broker_pdf_link_preview",
+        )
+        return result
+    if is_image:
+        preview_bytes = _image_link_to_png_preview(content)
+        if not preview_bytes:
+            return None
+        print(f"\n🔗 Processing linked property image: {name} ({len(content)} bytes)")
+        uploaded_preview = upload_property_image_to_drive(name, preview_bytes)
+        if not (uploaded_preview and uploaded_preview.get("url")):
+            return None
+        return {
+            "name": name,
+            "text": "",
+            "images": [],
+            "method": "direct_image_link",
+            "source_url": source_url,
+            "source_type": source_type,
+            "drive_link": None,
+            "property_image_url": uploaded_preview["url"],
+            "property_image_source": f"Broker image link: {name}",
+            "property_image_source_type": "broker_image_link",
+            "property_image_meta": {
+                "strategy": "direct_image_link_v1",
+                "selectionReason": "broker-provided public image link",
+                "contentType": uploaded_preview.get("contentType") or "image/png",
+                "byteCount": uploaded_preview.get("byteCount"),
+                "sha256": uploaded_preview.get("sha256"),
+                "driveLink": uploaded_preview.get("driveLink"),
+            },
+        }
+    return None
 
 
 def upload_pdf_user_data(filename: str, content: bytes, runtime=None) -> str:
@@ -2557,68 +2691,87 @@ def upload_pdf_user_data(filename: str, content: bytes, runtime=None) -> str:
                 pass
 
 
+def _process_pdf_attachment(
+    fallback_position: int,
+    attachment: Dict[str, Any],
+) -> Optional[Tuple[int, Dict[str, Any]]]:
+    """Parse, archive and preview one already-fetched PDF."""
+    name = attachment.get("name", "document.pdf")
+    content = attachment.get("bytes", b"")
+    snapshot_position = attachment.get("_snapshot_index")
+    if type(snapshot_position) is not int or snapshot_position < 0:
+        snapshot_position = fallback_position
+
+    if not content:
+        print(f"⚠️ Empty PDF attachment: {name}")
+        return None
+
+    print(f"\n📎 Processing PDF: {name} ({len(content)} bytes)")
+    result = process_pdf_for_ai(content, name)
+    result['name'] = name
+
+    if result.get('method') == 'failed':
+        # Total extraction failure: local text extraction yielded nothing AND
+        # the OpenAI upload fallback failed (no file_id, no text). Handing this
+        # downstream as a normal manifest entry — with a drive_link — would
+        # write a flyer link to the row and let the message be marked processed
+        # though ZERO specs were extracted, hiding a complete extraction
+        # failure. Surface it as a distinguishable failure marker instead (no
+        # drive_link, no property preview) so it is not mistaken for a usable
+        # result.
+        print(f"❌ PDF extraction failed for {name}; surfacing as failure (not a usable manifest entry)")
+        return (snapshot_position, {
+            "name": name,
+            "text": "",
+            "images": result.get("images") or [],
+            "method": "failed_extraction",
+            "file_id": None,
+            "id": None,
+            "drive_link": None,
+            "extraction_failed": True,
+            "error": "PDF text extraction and OpenAI upload both failed",
+        })
+
+    # Upload to Drive for archival
+    try:
+        drive_link = upload_pdf_to_drive(name, content)
+        result['drive_link'] = drive_link
+    except Exception as e:
+        print(f"⚠️ Drive upload failed: {e}")
+        result['drive_link'] = None
+
+    _attach_pdf_property_preview(
+        result,
+        name,
+        content,
+        source_label_prefix="Broker flyer preview",
+        source_type="broker_pdf_preview",
+    )
+
+    return (snapshot_position, result)
+
+
 def _process_pdf_attachment_batch(
     attachments: List[Dict[str, Any]],
 ) -> List[Tuple[int, Dict[str, Any]]]:
-    """Process already-fetched PDFs while retaining their snapshot positions."""
-    processed: List[Tuple[int, Dict[str, Any]]] = []
-    for fallback_position, attachment in enumerate(attachments or []):
-        name = attachment.get("name", "document.pdf")
-        content = attachment.get("bytes", b"")
-        snapshot_position = attachment.get("_snapshot_index")
-        if type(snapshot_position) is not int or snapshot_position < 0:
-            snapshot_position = fallback_position
-
-        if not content:
-            print(f"⚠️ Empty PDF attachment: {name}")
-            continue
+    """Process already-fetched PDFs while retaining their snapshot positions.
 
-        print(f"\n📎 Processing PDF: {name} ({len(content)} bytes)")
-        result = process_pdf_for_ai(content, name)
-        result['name'] = name
-
-        if result.get('method') == 'failed':
-            # Total extraction failure: local text extraction yielded nothing AND
-            # the OpenAI upload fallback failed (no file_id, no text). Handing this
-            # downstream as a normal manifest entry — with a drive_link — would
-            # write a flyer link to the row and let the message be marked processed
-            # though ZERO specs were extracted, hiding a complete extraction
-            # failure. Surface it as a distinguishable failure marker instead (no
-            # drive_link, no property preview) so it is not mistaken for a usable
-            # result.
-            print(f"❌ PDF extraction failed for {name}; surfacing as failure (not a usable manifest entry)")
-            processed.append((snapshot_position, {
-                "name": name,
-                "text": "",
-                "images": result.get("images") or [],
-                "method": "failed_extraction",
-                "file_id": None,
-                "id": None,
-                "drive_link": None,
-                "extraction_failed": True,
-                "error": "PDF text extraction and OpenAI upload both failed",
-            }))
-            continue
-
-        # Upload to Drive for archival
-        try:
-            drive_link = upload_pdf_to_drive(name, content)
-            result['drive_link'] = drive_link
-        except Exception as e:
-            print(f"⚠️ Drive upload failed: {e}")
-            result['drive_link'] = None
-
-        _attach_pdf_property_preview(
-            result,
-            name,
-            content,
-            source_label_prefix="Broker flyer preview",
-            source_type="broker_pdf_preview",
+    Attachments run concurrently (see map_assets_in_order); the result keeps
+    the input order.
+    """
+    def run(item):
+        fallback_position, attachment = item
+        return _timed_asset(
+            "attachment",
+            fallback_position,
+            attachment.get("name", "document.pdf"),
+            _process_pdf_attachment,
+            fallback_position,
+            attachment,
         )
 
-        processed.append((snapshot_position, result))
-
-    return processed
+    outcomes = map_assets_in_order(run, list(enumerate(attachments or [])))
+    return [outcome for outcome in outcomes if outcome is not None]
 
 
 def fetch_and_process_pdfs(
@@ -33,7 +33,9 @@ from .message_transport import (
     DeliveryKind,
     GraphDraftDeliveryTransport,
     OutboundDraft,
+    inline_create_enabled,
 )
+from .graph_batch import graph_batch_enabled
 from .utils import (
     exponential_backoff_request,
     format_email_body_with_footer,
@@ -44,6 +46,7 @@ from .utils import (
     validate_recipient_emails,
 )
 from .messaging import save_message
+from .send_pacing import send_pacer
 from .sent_mail_guard import (
     SentMailGuardLookupError,
     find_sent_conversation_continuation_for_retry,
@@ -2680,9 +2683,8 @@ def check_and_send_followups(user_id: str, headers: Dict[str, str]) -> List[Dict
         return operation_states
 
     print(f"   Found {len(waiting_threads)} threads with follow-up tracking or recovery")
-    total_threads = len(waiting_threads)
 
-    for idx, thread_doc in enumerate(waiting_threads):
+    for thread_doc in waiting_threads:
         thread_data = thread_doc.to_dict()
         thread_id = thread_doc.id
 
@@ -2747,6 +2749,20 @@ def check_and_send_followups(user_id: str, headers: Dict[str, str]) -> List[Dict
             # always return FollowupClaim and therefore authoritative data.
             claim_owner = claim_result if isinstance(claim_result, str) else None
 
+        # Per-mailbox pacing replaces the old 2-minute sleep between sends.
+        # The slot is booked only once this thread is ours to send, so an
+        # unclaimable thread never spends it. A refused slot hands the claim
+        # back, and the rest wait for a later pass: every later thread would
+        # get the same refusal.
+        if not send_pacer().claim(_fs, user_id, lane="followup").granted:
+            _release_followup_claim(
+                user_id,
+                thread_id,
+                current_index=current_index,
+                claim_owner=claim_owner,
+            )
+            break
+
         # Send the follow-up
         _reset_followup_send_outcome()
         success = _send_followup_email(
@@ -2839,13 +2855,6 @@ def check_and_send_followups(user_id: str, headers: Dict[str, str]) -> List[Dict
                     operation_states.append(
                         _followup_operation_state("healthy", thread_id=thread_id)
                     )
-
-            # Stagger follow-up sends by 2 minutes to avoid spam detection
-            # Only sleep if there are more threads to process
-            remaining_threads = total_threads - (idx + 1)
-            if remaining_threads > 0:
-                print(f"   ⏳ Waiting 2 minutes before next follow-up ({remaining_threads} remaining)...")
-                time.sleep(120)  # 2 minutes
         else:
             send_outcome = _get_followup_send_outcome()
             campaign_suppression_kind = send_outcome.campaign_suppression_kind
@@ -2935,7 +2944,7 @@ def _followup_delivery_transport_for(runtime, headers, base):
     """
     if runtime is not None and getattr(runtime, "outbound", None) is not None:
         return runtime.outbound
-    import requests
+    from .http_pool import pooled_requests as requests
 
     return GraphDraftDeliveryTransport(
         headers=headers,
@@ -2943,6 +2952,8 @@ def _followup_delivery_transport_for(runtime, headers, base):
         request=requests,
         retry=exponential_backoff_request,
         send_max_retries=1,
+        batch=graph_batch_enabled(),
+        inline_create=inline_create_enabled(),
     )
 
 
@@ -2957,7 +2968,7 @@ def _send_followup_email(
     runtime=None,
 ) -> bool:
     """Send a follow-up email for a specific thread."""
-    import requests
+    from .http_pool import pooled_requests as requests
 
     _reset_followup_send_outcome()
     if not _followup_index_is_valid(followup_index):
@@ -3158,16 +3169,20 @@ def _send_followup_email(
         if contact_name_is_missing and "[NAME]" in followup_message:
             try:
                 from .clients import _get_sheet_id_or_fail, _sheets_client
+                from .sheets import _execute_with_retry
                 client_id = thread_data.get("clientId")
                 row_number = thread_data.get("rowNumber")
                 if client_id and row_number:
                     sheet_id = _get_sheet_id_or_fail(user_id, client_id)
                     sheets = _sheets_client()
                     # Fetch the row to get Leasing Contact (column E = index 4)
-                    result = sheets.spreadsheets().values().get(
-                        spreadsheetId=sheet_id,
-                        range=f"A{row_number}:F{row_number}"
-                    ).execute()
+                    result = _execute_with_retry(
+                        sheets.spreadsheets().values().get(
+                            spreadsheetId=sheet_id,
+                            range=f"A{row_number}:F{row_number}"
+                        ),
+                        "followup_contact_row_get",
+                    )
                     row_values = result.get("values", [[]])[0]
                     if len(row_values) >= 5:
                         sheet_contact_name = _safe_followup_contact_name(
@@ -0,0 +1,213 @@
+"""Graph JSON batching: up to 20 requests in one ``POST /$batch``.
+
+Graph answers a batch with one sub-response per request, each with its own
+status, headers and body, so a scan that needs the same read for 50 messages
+makes three HTTP calls instead of 50. Sub-responses come back as
+BatchResponse, which has the ``status_code``/``headers``/``json()``/
+``raise_for_status()`` surface the callers already read from ``requests``.
+
+A throttled sub-request (429) is retried on its own after the longest
+Retry-After in its batch; the rest of the batch is not re-sent. A sub-request
+still throttled after ``max_retries`` is returned as the 429 it is, so the
+caller falls back to its ordinary single read with its own backoff.
+
+An entry may name earlier entries it depends on (``depends_on``, by position
+in the list passed to ``execute``); Graph then runs it only after they
+succeed and answers 424 if one failed. A dependency that landed in an earlier
+chunk has already finished, so it is dropped from the chunk's ``dependsOn``,
+and an entry that got 424 because its dependency was throttled is retried
+with it.
+
+This module is pure: the HTTP ``post`` and the retry wrapper for the batch
+call itself are injected, following message_transport. Batching is off under
+E2E_TEST_MODE and with SITESIFT_GRAPH_BATCH=0.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+from urllib.parse import urlencode
+
+
+GRAPH_ROOT = "https://graph.microsoft.com/v1.0"
+GRAPH_BATCH_URL = f"{GRAPH_ROOT}/$batch"
+GRAPH_BATCH_ENV = "SITESIFT_GRAPH_BATCH"
+# Graph's documented per-batch limit.
+GRAPH_BATCH_MAX_REQUESTS = 20
+GRAPH_BATCH_MAX_RETRIES = 3
+GRAPH_BATCH_MAX_RETRY_AFTER_SECONDS = 60
+
+
+def graph_batch_enabled() -> bool:
+    if os.getenv("E2E_TEST_MODE") == "true":
+        return False
+    return os.getenv(GRAPH_BATCH_ENV, "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def batch_request(
+    method: str,
+    url: str,
+    *,
+    params: Optional[Mapping[str, Any]] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    body: Any = None,
+    depends_on: Sequence[int] = (),
+) -> Dict[str, Any]:
+    """One ``$batch`` entry for an absolute Graph URL."""
+    relative = url[len(GRAPH_ROOT):] if url.startswith(GRAPH_ROOT) else url
+    if params:
+        relative = f"{relative}{'&' if '?' in relative else '?'}{urlencode(params, safe='$,')}"
+    entry: Dict[str, Any] = {"method": method.upper(), "url": relative}
+    entry_headers = dict(headers or {})
+    if body is not None:
+        entry["body"] = body
+        entry_headers.setdefault("Content-Type", "application/json")
+    if entry_headers:
+        entry["headers"] = entry_headers
+    if depends_on:
+        entry["dependsOn"] = [str(index) for index in depends_on]
+    return entry
+
+
+class BatchResponse:
+    """One sub-response of a ``$batch`` call."""
+
+    text = ""
+
+    def __init__(self, status_code: int, headers: Optional[Mapping[str, str]] = None,
+                 body: Any = None, url: str = "") -> None:
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+        self._body = body
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    def json(self) -> Any:
+        return self._body
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            import requests  # imported here so this module needs no network stack at import
+
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} for batched {self.url}", response=self
+            )
+
+
+def _retry_after(response: BatchResponse) -> Optional[float]:
+    for name, value in response.headers.items():
+        if name.lower() == "retry-after":
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+class GraphBatchClient:
+    """Runs Graph requests through ``$batch`` and fans the results back out.
+
+    ``post`` is the HTTP post function (``requests.post``); ``call`` wraps
+    each batch POST, e.g. in exponential_backoff_request, so a throttled or
+    failing batch as a whole keeps the caller's retry policy.
+    ``on_throttled(retry_after)`` is told about every throttled sub-request
+    so a rate governor can slow down.
+    """
+
+    def __init__(
+        self,
+        *,
+        post: Callable[..., Any],
+        call: Optional[Callable[[Callable[[], Any]], Any]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        max_requests: int = GRAPH_BATCH_MAX_REQUESTS,
+        max_retries: int = GRAPH_BATCH_MAX_RETRIES,
+        on_throttled: Optional[Callable[[Optional[float]], None]] = None,
+        url: str = GRAPH_BATCH_URL,
+    ) -> None:
+        self._post = post
+        self._call = call or (lambda func: func())
+        self._sleep = sleep
+        self._max_requests = max(1, min(max_requests, GRAPH_BATCH_MAX_REQUESTS))
+        self._max_retries = max_retries
+        self._on_throttled = on_throttled
+        self._url = url
+        self.batches = 0
+
+    def execute(self, entries: Sequence[Mapping[str, Any]], headers: Mapping[str, str]) -> List[BatchResponse]:
+        """Run ``entries`` (see batch_request); responses come back in the same order."""
+        results: List[Optional[BatchResponse]] = [None] * len(entries)
+        pending = list(range(len(entries)))
+        for attempt in range(self._max_retries + 1):
+            throttled: List[int] = []
+            wait = 0.0
+            for start in range(0, len(pending), self._max_requests):
+                chunk = pending[start:start + self._max_requests]
+                for index, response in self._post_chunk(chunk, entries, headers).items():
+                    results[index] = response
+                    if response.status_code != 429:
+                        continue
+                    retry_after = _retry_after(response)
+                    if self._on_throttled is not None:
+                        self._on_throttled(retry_after)
+                    throttled.append(index)
+                    wait = max(wait, retry_after if retry_after is not None else 2 ** attempt)
+            if throttled:
+                throttled_ids = {str(index) for index in throttled}
+                throttled.extend(
+                    index for index in pending
+                    if results[index] is not None and results[index].status_code == 424
+                    and throttled_ids.intersection(entries[index].get("dependsOn") or ())
+                )
+                throttled.sort()
+            if not throttled or attempt == self._max_retries:
+                break
+            wait = min(wait, GRAPH_BATCH_MAX_RETRY_AFTER_SECONDS)
+            print(f"⏳ {len(throttled)} batched Graph request(s) throttled; retrying after {wait:.0f}s")
+            self._sleep(wait)
+            pending = throttled
+        return [response for response in results]  # type: ignore[misc]
+
+    def _post_chunk(
+        self,
+        chunk: Sequence[int],
+        entries: Sequence[Mapping[str, Any]],
+        headers: Mapping[str, str],
+    ) -> Dict[int, BatchResponse]:
+        in_chunk = {str(index) for index in chunk}
+        requests_payload = []
+        for index in chunk:
+            entry = dict(entries[index], id=str(index))
+            depends_on = [dep for dep in entry.pop("dependsOn", None) or () if dep in in_chunk]
+            if depends_on:
+                entry["dependsOn"] = depends_on
+            requests_payload.append(entry)
+        payload = {"requests": requests_payload}
+        post_headers = dict(headers)
+        post_headers["Content-Type"] = "application/json"
+        self.batches += 1
+        response = self._call(
+            lambda: self._post(self._url, headers=post_headers, json=payload, timeout=60)
+        )
+        response.raise_for_status()
+        by_id = {}
+        for item in (response.json() or {}).get("responses") or []:
+            by_id[str(item.get("id"))] = item
+        out: Dict[int, BatchResponse] = {}
+        for index in chunk:
+            item = by_id.get(str(index))
+            url = entries[index].get("url", "")
+            if item is None:
+                out[index] = BatchResponse(
+                    502, body={"error": {"code": "missingBatchResponse"}}, url=url
+                )
+                continue
+            out[index] = BatchResponse(
+                int(item.get("status") or 0), item.get("headers"), item.get("body"), url=url
+            )
+        return out
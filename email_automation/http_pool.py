@@ -0,0 +1,237 @@
+"""Pooled keep-alive HTTP for Graph, Firebase Storage and asset downloads.
+
+Module-level ``requests.get``/``post`` build a throwaway Session per call, so
+every Graph read, token upload and flyer download paid a fresh TCP and TLS
+handshake. ``pooled_requests`` has the same surface as the ``requests``
+module, and the modules that make those calls bind it under that name::
+
+    from .http_pool import pooled_requests as requests
+
+Their call sites, the Graph read inventory and every test that patches
+``<module>.requests.get`` are therefore unchanged.
+
+Each scheme+host gets one ``requests.Session`` whose adapter keeps up to
+SITESIFT_HTTP_POOL_SIZE connections alive. GET/HEAD/OPTIONS retry a
+connection that failed before a response arrived (typically a keep-alive
+socket the server had already closed); status codes are still left to
+exponential_backoff_request. Sessions keep no cookies, because one session
+serves every mailbox in the run. Per-host request counts, latency and
+connections opened are reported by http_pool_stats().
+
+Pooling is off under E2E_TEST_MODE and with SITESIFT_HTTP_POOL=0. Every call
+then goes to the ``requests`` function of the same name, looked up at call
+time, so a test that patches ``requests.get`` still intercepts it.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+HTTP_POOL_ENV = "SITESIFT_HTTP_POOL"
+HTTP_POOL_SIZE_ENV = "SITESIFT_HTTP_POOL_SIZE"
+DEFAULT_HTTP_POOL_SIZE = 16
+HTTP_POOL_CONNECTION_RETRIES = 2
+IDEMPOTENT_RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Positional parameters after ``url`` in the requests module's helpers.
+_POSITIONAL = {
+    "get": ("params",),
+    "options": (),
+    "head": (),
+    "post": ("data", "json"),
+    "put": ("data",),
+    "patch": ("data",),
+    "delete": (),
+}
+
+
+def _pool_enabled() -> bool:
+    if os.getenv("E2E_TEST_MODE") == "true":
+        return False
+    return os.getenv(HTTP_POOL_ENV, "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _default_pool_size() -> int:
+    try:
+        return max(1, int(os.getenv(HTTP_POOL_SIZE_ENV, "")))
+    except ValueError:
+        return DEFAULT_HTTP_POOL_SIZE
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def _connections_opened(session: requests.Session) -> int:
+    """Connections urllib3 has opened for this session so far."""
+    total = 0
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+        if pools is None:
+            continue
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            total += int(getattr(pool, "num_connections", 0) or 0)
+    return total
+
+
+class PooledRequests:
+    """``requests``-shaped client backed by one keep-alive Session per host.
+
+    Anything other than the HTTP verbs (``exceptions``, ``Response``,
+    ``codes``...) is read from the ``requests`` module itself.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_size: Optional[int] = None,
+        enabled: Callable[[], bool] = _pool_enabled,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._pool_size = pool_size
+        self._enabled = enabled
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(requests, name)
+
+    # -- the requests surface --------------------------------------------
+
+    def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        if not self._enabled():
+            return requests.request(method, url, **kwargs)
+        return self._send(method, url, kwargs)
+
+    def get(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        return self._verb("get", url, args, kwargs)
+
+    def options(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        return self._verb("options", url, args, kwargs)
+
+    def head(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        return self._verb("head", url, args, kwargs)
+
+    def post(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        return self._verb("post", url, args, kwargs)
+
+    def put(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        return self._verb("put", url, args, kwargs)
+
+    def patch(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        return self._verb("patch", url, args, kwargs)
+
+    def delete(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        return self._verb("delete", url, args, kwargs)
+
+    # -- pooling ----------------------------------------------------------
+
+    def _verb(self, method: str, url: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        if not self._enabled():
+            return getattr(requests, method)(url, *args, **kwargs)
+        names = _POSITIONAL[method]
+        if len(args) > len(names):
+            raise TypeError(f"{method}() takes at most {len(names) + 1} positional arguments")
+        kwargs = dict(kwargs)
+        for name, value in zip(names, args):
+            kwargs[name] = value
+        if method == "head":
+            kwargs.setdefault("allow_redirects", False)
+        return self._send(method, url, kwargs)
+
+    def _session(self, origin: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                size = self._pool_size or _default_pool_size()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=size,
+                    max_retries=Retry(
+                        total=HTTP_POOL_CONNECTION_RETRIES,
+                        connect=HTTP_POOL_CONNECTION_RETRIES,
+                        read=HTTP_POOL_CONNECTION_RETRIES,
+                        status=0,
+                        allowed_methods=IDEMPOTENT_RETRY_METHODS,
+                        backoff_factor=0.2,
+                        raise_on_status=False,
+                    ),
+                )
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[origin] = session
+                self._stats[origin] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "latencyMs": 0.0,
+                    "maxLatencyMs": 0.0,
+                }
+            return session
+
+    def _send(self, method: str, url: str, kwargs: Dict[str, Any]) -> Any:
+        origin = _origin(url)
+        session = self._session(origin)
+        started = self._clock()
+        failed = False
+        try:
+            return session.request(method.upper(), url, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (self._clock() - started) * 1000.0
+            with self._lock:
+                # Absent only if close() ran while this request was in flight.
+                stats = self._stats.get(origin)
+                if stats is not None:
+                    stats["requests"] += 1
+                    stats["errors"] += int(failed)
+                    stats["latencyMs"] += elapsed_ms
+                    stats["maxLatencyMs"] = max(stats["maxLatencyMs"], elapsed_ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {origin: (dict(stats), self._sessions[origin]) for origin, stats in self._stats.items()}
+        report = {}
+        for origin, (stats, session) in snapshot.items():
+            count = int(stats["requests"])
+            connections = _connections_opened(session)
+            report[origin] = {
+                "requests": count,
+                "errors": int(stats["errors"]),
+                "connections": connections,
+                "reused": max(0, count - connections),
+                "avgLatencyMs": round(stats["latencyMs"] / count, 1) if count else 0.0,
+                "maxLatencyMs": round(stats["maxLatencyMs"], 1),
+            }
+        return report
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions, self._stats = list(self._sessions.values()), {}, {}
+        for session in sessions:
+            session.close()
+
+
+pooled_requests = PooledRequests()
+
+
+def http_pool_stats() -> Dict[str, Dict[str, float]]:
+    return pooled_requests.stats()
@@ -0,0 +1,144 @@
+"""Derived views of one inbound message body, computed once per text.
+
+The deterministic classifiers in ai_processing and processing each take the
+broker's text as a plain string and re-derive the same views from it: the
+quote-stripped newest segment, the fresh/quoted split, the quoted region, the
+whitespace-normalized form, the significant-word set, the terminal binding
+clauses and the tour segment analysis. One proposal runs those derivations
+dozens of times over the same two or three strings (the raw body, its fresh
+segment, the quoted tail).
+
+``inbound_text_context(text)`` returns the shared, immutable
+``InboundTextContext`` for a text. Each view is a ``cached_property``, so it is
+computed the first time a classifier asks for it and read back afterwards.
+Contexts are kept in a small LRU keyed by the text itself, which is what makes
+them per-message without threading an object through every classifier
+signature: the same body always yields the same context. The views are pure
+functions of the text, so there is nothing to invalidate.
+
+The derivations themselves stay where they were (``_strip_quoted_history``,
+``_split_fresh_and_quoted``, ``_terminal_binding_clauses``, ...); they are
+imported lazily because those modules import this one. The public tour
+classifiers (``classify_tour_intent``, ``subject_bound_tour_segments``) read
+their result from here, so every caller shares one tour analysis per text.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import FrozenSet, Tuple
+
+from . import tour_scheduling
+
+INBOUND_TEXT_CONTEXT_CACHE_SIZE = 64
+
+_contexts: "OrderedDict[str, InboundTextContext]" = OrderedDict()
+_contexts_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class InboundTextContext:
+    """Lazily computed, cached views of one message text."""
+
+    raw: str
+
+    @cached_property
+    def latest(self) -> str:
+        """The newest segment, with quoted and forwarded history dropped."""
+        from .ai_processing import _strip_quoted_history
+
+        return _strip_quoted_history(self.raw)
+
+    @cached_property
+    def _fresh_and_quoted(self) -> Tuple[str, str]:
+        from .ai_processing import _split_fresh_and_quoted
+
+        return _split_fresh_and_quoted(self.raw)
+
+    @property
+    def fresh(self) -> str:
+        """Everything above the first quoted-history or forward marker."""
+        return self._fresh_and_quoted[0]
+
+    @property
+    def quoted(self) -> str:
+        """The first quoted-history marker line and everything after it."""
+        return self._fresh_and_quoted[1]
+
+    @cached_property
+    def quoted_region(self) -> str:
+        """Only the '>'-prefixed lines and anything below a forward divider."""
+        from .ai_processing import _quoted_region
+
+        return _quoted_region(self.raw)
+
+    @cached_property
+    def normalized(self) -> str:
+        """Lowercased, with every whitespace run collapsed to one space."""
+        from .ai_processing import _norm_ws
+
+        return _norm_ws(self.raw)
+
+    @cached_property
+    def tokens(self) -> FrozenSet[str]:
+        """Lowercased words of four or more characters."""
+        from .ai_processing import _significant_words
+
+        return frozenset(_significant_words(self.raw))
+
+    @cached_property
+    def sentences(self) -> Tuple[str, ...]:
+        """Real sentence endings, keeping abbreviation and address periods."""
+        from .processing import _terminal_sentence_fragments
+
+        return tuple(_terminal_sentence_fragments(self.raw))
+
+    @cached_property
+    def clauses(self) -> Tuple[str, ...]:
+        """Independent property assertions, for the terminal binding guards."""
+        from .processing import _terminal_binding_clauses
+
+        return tuple(_terminal_binding_clauses(self.raw))
+
+    @cached_property
+    def _tour_analysis(self) -> Tuple[dict, ...]:
+        return tuple(tour_scheduling._tour_segment_analysis(self.raw))
+
+    @cached_property
+    def tour_segments(self) -> Tuple[str, ...]:
+        """Clauses whose scheduling language is bound to a physical tour."""
+        return tuple(item["text"] for item in self._tour_analysis if item["tourBound"])
+
+    @cached_property
+    def tour_intent(self) -> str:
+        """Actionable, courtesy or unknown, judged on the stripped text."""
+        stripped = self.raw.strip()
+        if not stripped:
+            return tour_scheduling.TOUR_INTENT_UNKNOWN
+        context = self if stripped == self.raw else inbound_text_context(stripped)
+        return tour_scheduling.tour_intent_from_analysis(context._tour_analysis)
+
+
+def inbound_text_context(text: str) -> InboundTextContext:
+    """The shared context for text, built on first use."""
+    text = text or ""
+    with _contexts_lock:
+        context = _contexts.get(text)
+        if context is not None:
+            _contexts.move_to_end(text)
+            return context
+    context = InboundTextContext(text)
+    with _contexts_lock:
+        context = _contexts.setdefault(text, context)
+        _contexts.move_to_end(text)
+        while len(_contexts) > INBOUND_TEXT_CONTEXT_CACHE_SIZE:
+            _contexts.popitem(last=False)
+    return context
+
+
+def clear_inbound_text_contexts() -> None:
+    with _contexts_lock:
+        _contexts.clear()
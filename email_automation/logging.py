@@ -1,13 +1,16 @@
 from datetime import datetime, timezone
 from typing import Optional
 from .clients import _sheets_client, _fs
-from .sheets import _get_first_tab_title
+from .sheets import _execute_with_retry, _get_first_tab_title, invalidate_sheet_snapshot
 from .messaging import _get_thread_messages_chronological, _message_body_content_and_preview
 
 def _ensure_log_tab_exists(sheets, spreadsheet_id: str) -> str:
     """Ensure 'Log' tab exists and return its title."""
     try:
-        meta = sheets.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+        meta = _execute_with_retry(
+            sheets.spreadsheets().get(spreadsheetId=spreadsheet_id),
+            "log_tab_meta_get",
+        )
         sheet_names = [sheet["properties"]["title"] for sheet in meta["sheets"]]
         
         if "Log" in sheet_names:
@@ -23,24 +26,33 @@ def _ensure_log_tab_exists(sheets, spreadsheet_id: str) -> str:
                 }
             }]
         }
-        sheets.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body=request).execute()
+        _execute_with_retry(
+            sheets.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body=request),
+            "log_tab_create",
+        )
         print("📋 Created 'Log' tab")
         return "Log"
         
     except Exception as e:
         print(f"⚠️ Could not create Log tab: {e}")
         # Fallback to first tab
-        meta = sheets.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+        meta = _execute_with_retry(
+            sheets.spreadsheets().get(spreadsheetId=spreadsheet_id),
+            "log_tab_meta_get_fallback",
+        )
         return meta["sheets"][0]["properties"]["title"]
 
 def _get_last_logged_message_id(sheets, spreadsheet_id: str, tab_title: str, thread_id: str) -> Optional[str]:
     """Get the last message ID that was logged for this thread."""
     try:
         # Read all values from Log tab
-        resp = sheets.spreadsheets().values().get(
-            spreadsheetId=spreadsheet_id,
-            range=f"{tab_title}!A:H"
-        ).execute()
+        resp = _execute_with_retry(
+            sheets.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=f"{tab_title}!A:H"
+            ),
+            "log_tab_read",
+        )
         
         rows = resp.get("values", [])
         if not rows:
@@ -157,12 +169,18 @@ def write_message_order_test(uid: str, thread_id: str, sheet_id: str):
             "values": rows_to_append
         }
         
-        sheets.spreadsheets().values().append(
-            spreadsheetId=sheet_id,
-            range=f"{log_tab}!A:H",
-            valueInputOption="RAW",
-            body=request_body
-        ).execute()
+        _execute_with_retry(
+            sheets.spreadsheets().values().append(
+                spreadsheetId=sheet_id,
+                range=f"{log_tab}!A:H",
+                valueInputOption="RAW",
+                body=request_body
+            ),
+            "log_tab_append",
+        )
+        if log_tab != "Log":
+            # Fell back to the first tab, which is the one row lookups snapshot.
+            invalidate_sheet_snapshot(sheet_id)
         
         print(f"📝 Logged {message_count} messages to '{log_tab}' tab for thread {thread_id}")
         
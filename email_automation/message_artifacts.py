@@ -0,0 +1,233 @@
+"""Per-user ledger of the artifacts written for each source message.
+
+The processing-retry guard (processing._find_existing_retry_artifact_for_message)
+has to know whether a broker message already produced visible work before it
+replays the message. Without a ledger it asks every artifact collection
+(outbox, pendingResponses, deadLetterQueue, actionAudit, client notifications)
+one ``where(field == candidate)`` query per source-message field per message
+id candidate, and falls back to 200-doc scans, which is 50+ queries for one
+retried failure.
+
+Every backend writer of those artifacts now also appends
+``{"collection", "id"}`` to ``users/{uid}/messageArtifacts/{b64(messageId)}``
+for each source-message id the artifact carries, in the same batch or
+transaction as the artifact itself. The guard reads the ledger docs for its
+candidates in one ``get_all`` and re-reads the referenced artifacts, so the
+live status (a sent outbox item, a deleted notification) still decides.
+
+Outbox items and action audits are also written by the dashboard, which does
+not append yet, so a ledger miss only proves there is no artifact for
+failures observed after SITESIFT_MESSAGE_ARTIFACTS_SINCE. Until that is set
+(once every writer appends) a miss falls back to the collection scan, and the
+fallback is logged.
+
+Each append re-stamps ``expiresAt`` (retention.MESSAGE_ARTIFACTS_RETENTION),
+and the retention pass deletes ledger docs once it has passed. A miss is
+therefore only trusted for failures observed within that ttl; older ones scan.
+The ledger is a no-op under E2E_TEST_MODE.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+from google.cloud.firestore import SERVER_TIMESTAMP, ArrayUnion
+
+from .retention import MESSAGE_ARTIFACTS_RETENTION, expires_at
+from .utils import b64url_id, normalize_message_id
+
+MESSAGE_ARTIFACTS_COLLECTION = "messageArtifacts"
+MESSAGE_ARTIFACT_LEDGER_ENV = "SITESIFT_MESSAGE_ARTIFACT_LEDGER"
+MESSAGE_ARTIFACTS_SINCE_ENV = "SITESIFT_MESSAGE_ARTIFACTS_SINCE"
+
+# The fields processing._source_message_match reads, at the top level and
+# inside each container.
+SOURCE_MESSAGE_KEYS = (
+    "msgId",
+    "replyToMessageId",
+    "sourceMessageId",
+    "sourceGraphMessageId",
+    "sourceInternetMessageId",
+    "originalMessageId",
+    "currentMsgId",
+    "detectedInMessageId",
+)
+SOURCE_MESSAGE_CONTAINERS = ("meta", "tourInvite", "sourceMessage", "source")
+
+
+def message_artifact_ledger_enabled() -> bool:
+    if os.getenv("E2E_TEST_MODE") == "true":
+        return False
+    return os.getenv(MESSAGE_ARTIFACT_LEDGER_ENV, "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def message_artifacts_since() -> Optional[datetime]:
+    """When every artifact writer started appending to the ledger, if set."""
+    raw = os.getenv(MESSAGE_ARTIFACTS_SINCE_ENV, "").strip()
+    if not raw:
+        return None
+    try:
+        since = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        print(f"⚠️ Ignoring unparseable {MESSAGE_ARTIFACTS_SINCE_ENV}={raw!r}")
+        return None
+    return since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+
+
+def ledger_covers(observed_at: Optional[datetime]) -> bool:
+    """Whether a ledger miss proves no artifact exists for a message seen at observed_at."""
+    since = message_artifacts_since()
+    if not (message_artifact_ledger_enabled() and since and observed_at and observed_at >= since):
+        return False
+    # Ledger docs past their expiresAt may already be gone.
+    return observed_at >= datetime.now(timezone.utc) - MESSAGE_ARTIFACTS_RETENTION.ttl
+
+
+def _identity_values(value: Any, out: Set[str]) -> None:
+    if value is None:
+        return
+    if isinstance(value, dict):
+        for item in value.values():
+            _identity_values(item, out)
+        return
+    if isinstance(value, (list, tuple, set)):
+        for item in value:
+            _identity_values(item, out)
+        return
+    text = str(value).strip()
+    if not text:
+        return
+    out.add(text)
+    normalized = normalize_message_id(text)
+    if normalized:
+        out.add(normalized)
+
+
+def source_message_ids(payload: Any) -> Set[str]:
+    """Every id the retry guard would match this artifact on, raw and normalized."""
+    ids: Set[str] = set()
+    if not isinstance(payload, dict):
+        return ids
+    for key in SOURCE_MESSAGE_KEYS:
+        _identity_values(payload.get(key), ids)
+    for container in SOURCE_MESSAGE_CONTAINERS:
+        nested = payload.get(container)
+        if isinstance(nested, dict):
+            ids |= source_message_ids(nested)
+    return ids
+
+
+def _ledger_ref(user_ref, message_id: str):
+    return user_ref.collection(MESSAGE_ARTIFACTS_COLLECTION).document(b64url_id(message_id))
+
+
+def record_message_artifacts(writer, user_ref, collection_path: str, doc_ref, payload: Any) -> int:
+    """Append doc_ref to the ledger of each source message in payload.
+
+    ``writer`` is the batch or transaction the artifact itself is written in.
+    Returns the number of ledger docs touched.
+    """
+    if not message_artifact_ledger_enabled():
+        return 0
+    doc_id = getattr(doc_ref, "id", None)
+    if not doc_id:
+        return 0
+    entry = {"collection": collection_path, "id": doc_id}
+    message_ids = sorted(source_message_ids(payload))
+    expires = expires_at(MESSAGE_ARTIFACTS_RETENTION)
+    for message_id in message_ids:
+        writer.set(
+            _ledger_ref(user_ref, message_id),
+            {
+                "messageId": message_id,
+                "artifacts": ArrayUnion([entry]),
+                "updatedAt": SERVER_TIMESTAMP,
+                "expiresAt": expires,
+            },
+            merge=True,
+        )
+    return len(message_ids)
+
+
+def set_with_message_artifacts(fs_client, user_ref, collection_path: str, doc_ref, payload: dict) -> None:
+    """``doc_ref.set(payload)`` plus its ledger entries in one batch."""
+    if not message_artifact_ledger_enabled() or not source_message_ids(payload):
+        doc_ref.set(payload)
+        return
+    batch = fs_client.batch()
+    batch.set(doc_ref, payload)
+    record_message_artifacts(batch, user_ref, collection_path, doc_ref, payload)
+    batch.commit()
+
+
+def add_with_message_artifacts(fs_client, user_ref, collection_path: str, collection_ref, payload: dict):
+    """``collection_ref.add(payload)`` plus its ledger entries in one batch.
+
+    Returns what ``add`` returns, an ``(update_time, doc_ref)`` pair.
+    """
+    if not message_artifact_ledger_enabled() or not source_message_ids(payload):
+        return collection_ref.add(payload)
+    doc_ref = collection_ref.document()
+    set_with_message_artifacts(fs_client, user_ref, collection_path, doc_ref, payload)
+    return None, doc_ref
+
+
+def _artifact_ref(user_ref, collection_path: str, doc_id: str):
+    ref = user_ref
+    for index, segment in enumerate(collection_path.split("/")):
+        ref = ref.collection(segment) if index % 2 == 0 else ref.document(segment)
+    return ref.document(doc_id)
+
+
+def _get_all(fs_client, refs: List[Any]) -> List[Any]:
+    """Snapshots for refs, in refs order (get_all returns them in any order)."""
+    get_all = getattr(fs_client, "get_all", None)
+    if not callable(get_all):
+        return [ref.get() for ref in refs]
+    by_path = {snapshot.reference.path: snapshot for snapshot in get_all(refs)}
+    return [by_path.get(ref.path) for ref in refs]
+
+
+def lookup_message_artifacts(
+    fs_client,
+    user_ref,
+    candidates: Iterable[str],
+    collections: Iterable[str],
+) -> Optional[List[Tuple[str, Any]]]:
+    """Live ``(collection_path, snapshot)`` pairs the ledger lists for candidates.
+
+    Only artifacts in ``collections`` are returned; ones deleted since are
+    skipped. Returns None when the ledger is off or could not be read, so the
+    caller falls back to its scan.
+    """
+    if not message_artifact_ledger_enabled():
+        return None
+    allowed = set(collections)
+    try:
+        ledger_refs = [_ledger_ref(user_ref, candidate) for candidate in sorted(set(candidates))]
+        entries = []
+        for snapshot in _get_all(fs_client, ledger_refs):
+            if getattr(snapshot, "exists", False) is not True:
+                continue
+            artifacts = (snapshot.to_dict() or {}).get("artifacts") or []
+            for entry in artifacts if isinstance(artifacts, list) else []:
+                if not isinstance(entry, dict):
+                    continue
+                key = (entry.get("collection"), entry.get("id"))
+                if key[0] in allowed and key[1] and key not in entries:
+                    entries.append(key)
+        if not entries:
+            return []
+        artifact_refs = [_artifact_ref(user_ref, path, doc_id) for path, doc_id in entries]
+        snapshots = _get_all(fs_client, artifact_refs)
+    except Exception as e:
+        print(f"⚠️ Could not read {MESSAGE_ARTIFACTS_COLLECTION} ledger: {e}")
+        return None
+
+    return [
+        (path, snapshot)
+        for (path, _doc_id), snapshot in zip(entries, snapshots)
+        if getattr(snapshot, "exists", False) is True
+    ]
@@ -28,9 +28,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 from enum import Enum
 import html as html_lib
+import os
 import re
 from typing import Any, Callable, Dict, List, Mapping, Optional, Protocol, Tuple
 
+from .graph_batch import GraphBatchClient, batch_request
 from .utils import strip_email_quotes, strip_html_tags
 
 class DeliveryKind(str, Enum):
@@ -500,6 +502,8 @@ class GraphDraftDeliveryTransport:
         max_retries: int = 3,
         send_max_retries: int = 1,
         headers_provider: Optional[Callable[[], Mapping[str, str]]] = None,
+        batch: bool = False,
+        inline_create: bool = False,
     ) -> None:
         self._headers = dict(headers)
         self._base = base.rstrip("/")
@@ -508,6 +512,8 @@ class GraphDraftDeliveryTransport:
         self._max_retries = max_retries
         self._send_max_retries = send_max_retries
         self._headers_provider = headers_provider
+        self._batch = batch
+        self._inline_create = inline_create
 
     # -- plumbing ---------------------------------------------------------
 
@@ -535,40 +541,62 @@ class GraphDraftDeliveryTransport:
     # -- the boundary -----------------------------------------------------
 
     def prepare(self, draft: "OutboundDraft") -> PreparedDelivery:
+        """Create the draft, add its attachments and read its identity.
+
+        With ``inline_create`` the attachments that fit are embedded in the
+        create payload, and the identity is taken from the create response,
+        which Graph returns as the full message. A create response without an
+        ``internetMessageId`` still falls back to the readback.
+        """
         http = self._http()
         headers = self._current_headers()
         message = graph_message_payload(draft)
+        uploads = list(draft.attachments)
+        if self._inline_create and uploads:
+            embedded, uploads = _split_inline_attachments(uploads)
+            if embedded:
+                message["attachments"] = [dict(att) for att in embedded]
 
         create = self._call(
             lambda: http.post(f"{self._base}/me/messages", headers=headers, json=message, timeout=30),
             max_retries=self._max_retries,
         )
         try:
-            draft_id = create.json()["id"]
+            created = create.json()
+            draft_id = created["id"]
         except Exception as exc:  # noqa: BLE001 - a draft with no id cannot be sent or cleaned up
             raise DeliveryPreparationError(f"Graph returned no draft id: {exc}") from exc
+        data = created if self._inline_create and created.get("internetMessageId") else None
 
-        for attachment in draft.attachments:
-            self._call(
-                lambda att=attachment: http.post(
-                    f"{self._base}/me/messages/{draft_id}/attachments",
-                    headers=headers,
-                    json=att,
-                    timeout=30,
-                ),
-                max_retries=self._max_retries,
+        if self._batch and uploads and _fits_in_one_batch(uploads):
+            identified = self._attach_and_identify_batched(
+                http, headers, draft_id, uploads, identify=data is None
             )
-
-        identified = self._call(
-            lambda: http.get(
-                f"{self._base}/me/messages/{draft_id}",
-                headers=headers,
-                params={"$select": "internetMessageId,conversationId,subject,toRecipients"},
-                timeout=30,
-            ),
-            max_retries=self._max_retries,
-        )
-        data = identified.json() or {}
+        else:
+            for attachment in uploads:
+                self._call(
+                    lambda att=attachment: http.post(
+                        f"{self._base}/me/messages/{draft_id}/attachments",
+                        headers=headers,
+                        json=att,
+                        timeout=30,
+                    ),
+                    max_retries=self._max_retries,
+                )
+
+            identified = None
+            if data is None:
+                identified = self._call(
+                    lambda: http.get(
+                        f"{self._base}/me/messages/{draft_id}",
+                        headers=headers,
+                        params={"$select": "internetMessageId,conversationId,subject,toRecipients"},
+                        timeout=30,
+                    ),
+                    max_retries=self._max_retries,
+                )
+        if data is None:
+            data = identified.json() or {}
         internet_message_id = data.get("internetMessageId")
         if not internet_message_id:
             raise DeliveryPreparationError(
@@ -584,6 +612,50 @@ class GraphDraftDeliveryTransport:
             subject=data.get("subject") or draft.subject,
         )
 
+    def _attach_and_identify_batched(
+        self,
+        http: Any,
+        headers: Mapping[str, str],
+        draft_id: str,
+        attachments: Any,
+        *,
+        identify: bool = True,
+    ) -> Any:
+        """The attachment uploads and the identity read of ``prepare`` in one ``$batch``.
+
+        Graph runs batch entries in any order, in parallel, and parallel
+        writes to one draft contend for the mailbox. So each upload depends on
+        the one before it and they run in order, as on the one-by-one path.
+        The identity read depends on nothing. A failed upload raises exactly
+        as the one-by-one path does. Returns the identity response, or None
+        when ``identify`` is off.
+        """
+        client = GraphBatchClient(
+            post=http.post,
+            call=lambda func: self._call(func, max_retries=self._max_retries),
+        )
+        sub_requests = [
+            batch_request(
+                "POST",
+                f"{self._base}/me/messages/{draft_id}/attachments",
+                body=dict(att),
+                depends_on=(index - 1,) if index else (),
+            )
+            for index, att in enumerate(attachments)
+        ]
+        if identify:
+            sub_requests.append(
+                batch_request(
+                    "GET",
+                    f"{self._base}/me/messages/{draft_id}",
+                    params={"$select": "internetMessageId,conversationId,subject,toRecipients"},
+                )
+            )
+        responses = client.execute(sub_requests, headers)
+        for response in responses:
+            response.raise_for_status()
+        return responses[-1] if identify else None
+
     def send_prepared_draft(self, provider_message_id: str) -> Any:
         """THE send call. Every lane routed to this boundary passes through here.
 
@@ -724,6 +796,51 @@ class GraphDraftDeliveryTransport:
         return self.commit(self.prepare(draft))
 
 
+# Graph caps a $batch body at 4 MB; larger uploads keep their own requests.
+GRAPH_BATCH_MAX_ATTACHMENT_BYTES = 3 * 1024 * 1024
+
+
+def _fits_in_one_batch(attachments: Any) -> bool:
+    total = 0
+    for attachment in attachments:
+        total += len(str((attachment or {}).get("contentBytes") or ""))
+    return len(attachments) < 20 and total <= GRAPH_BATCH_MAX_ATTACHMENT_BYTES
+
+
+# Room left for the message body inside Graph's 4 MB request limit.
+GRAPH_INLINE_ATTACHMENT_BYTES = 3 * 1024 * 1024
+GRAPH_INLINE_CREATE_ENV = "SITESIFT_GRAPH_INLINE_CREATE"
+
+
+def inline_create_enabled() -> bool:
+    if os.getenv("E2E_TEST_MODE") == "true":
+        return False
+    return os.getenv(GRAPH_INLINE_CREATE_ENV, "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _split_inline_attachments(attachments: Any) -> Tuple[List[Any], List[Any]]:
+    """(embedded in the create payload, uploaded afterwards), in draft order.
+
+    Only file attachments are embedded, while their encoded bytes fit the
+    create request; anything else (item or reference attachments, the rest
+    of a large flyer set) keeps its own upload.
+    """
+    embedded: List[Any] = []
+    uploads: List[Any] = []
+    budget = GRAPH_INLINE_ATTACHMENT_BYTES
+    for attachment in attachments:
+        size = len(str((attachment or {}).get("contentBytes") or ""))
+        is_file = (attachment or {}).get("@odata.type", "#microsoft.graph.fileAttachment") == (
+            "#microsoft.graph.fileAttachment"
+        )
+        if is_file and size and size <= budget:
+            embedded.append(attachment)
+            budget -= size
+        else:
+            uploads.append(attachment)
+    return embedded, uploads
+
+
 def graph_message_payload(draft: "OutboundDraft") -> Dict[str, Any]:
     """Render an OutboundDraft into the Graph message body.
 
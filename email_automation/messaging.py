@@ -1,11 +1,17 @@
+import os
 import re
-from typing import Optional, Dict, Any, List
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterable, List, Set, Tuple
 from datetime import datetime, timezone
 from google.cloud.firestore import SERVER_TIMESTAMP
 from google.cloud.firestore_v1.field_path import FieldPath
 from .automation_runtime import AutomationRuntime, firestore_for
 from .clients import _fs
 from .property_ref import is_identifying_anchor
+from .retention import CONVERSATION_BODIES_RETENTION, PROCESSED_MESSAGES_RETENTION, expires_at
 from .utils import b64url_id, clean_email_content, normalize_message_id, strip_email_quotes
 
 
@@ -224,6 +230,159 @@ def _message_index_candidates(message_id: str) -> List[str]:
     return lookup_candidates
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Thread resolution cache
+#
+# Matching one reply walks In-Reply-To, every References entry newest-first and
+# then conversationId, with up to two msgIndex reads per candidate. A long broker
+# thread can cost 20+ sequential reads per message, and process_inbox_message
+# repeats the same walk the scan already did. Lookups against the ambient
+# Firestore are remembered here, misses included, for a short TTL; the index_*
+# writers drop the keys they touch so a read-after-write check always goes back
+# to Firestore. Disabled under E2E_TEST_MODE, where each test swaps in its own
+# Firestore double and a process-wide memory would leak between them.
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Firestore caps a write batch at 500 operations; batched reads are chunked to
+# the same size so one oversized page cannot become an enormous BatchGetDocuments.
+_FIRESTORE_BATCH_LIMIT = 500
+
+THREAD_RESOLUTION_TTL_SECONDS = 300
+THREAD_RESOLUTION_NEGATIVE_TTL_SECONDS = 60
+THREAD_RESOLUTION_MAX_ENTRIES = 4096
+
+_MISSING = object()
+
+
+def _thread_resolution_cache_enabled() -> bool:
+    return os.getenv("E2E_TEST_MODE") != "true"
+
+
+class ThreadResolutionCache:
+    """LRU of ``(user_id, index, key) -> threadId or None`` with per-entry TTL.
+
+    ``index`` is ``"msg"`` for msgIndex keys and ``"conv"`` for convIndex keys.
+    A ``None`` value is a cached miss and lives for the shorter negative TTL.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = THREAD_RESOLUTION_TTL_SECONDS,
+        negative_ttl_seconds: float = THREAD_RESOLUTION_NEGATIVE_TTL_SECONDS,
+        max_entries: int = THREAD_RESOLUTION_MAX_ENTRIES,
+        enabled=_thread_resolution_cache_enabled,
+        clock=time.monotonic,
+    ) -> None:
+        self._ttl = ttl_seconds
+        self._negative_ttl = negative_ttl_seconds
+        self._max_entries = max_entries
+        self._enabled = enabled
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Optional[str], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def enabled(self) -> bool:
+        return self._enabled()
+
+    def get(self, user_id: str, index: str, key: str):
+        """Return the cached threadId (``None`` for a cached miss) or ``_MISSING``."""
+        if not self._enabled():
+            return _MISSING
+        cache_key = (user_id, index, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            thread_id, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[cache_key]
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return thread_id
+
+    def put(self, user_id: str, index: str, key: str, thread_id: Optional[str]) -> None:
+        if not self._enabled():
+            return
+        ttl = self._ttl if thread_id else self._negative_ttl
+        cache_key = (user_id, index, key)
+        with self._lock:
+            self._entries[cache_key] = (thread_id or None, self._clock() + ttl)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str, index: str, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop((user_id, index, key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_THREAD_RESOLUTION_CACHE = ThreadResolutionCache()
+
+
+def prewarm_thread_resolution(user_id: str, message_ids: Iterable[str],
+                              conversation_ids: Iterable[str] = ()) -> int:
+    """Resolve every msgIndex/convIndex candidate in one ``get_all`` and cache it.
+
+    Intended for a whole Graph page: pass every In-Reply-To/References id and
+    conversationId the page's messages could match on. Keys already cached are
+    skipped. Returns the number of keys fetched; a failed batch read is logged
+    and leaves the per-key lookups to fetch on demand.
+    """
+    cache = _THREAD_RESOLUTION_CACHE
+    if not cache.enabled():
+        return 0
+    wanted: List[Tuple[str, str]] = []
+    for message_id in message_ids:
+        for candidate in _message_index_candidates(message_id):
+            wanted.append(("msg", candidate))
+    for conversation_id in conversation_ids:
+        if conversation_id:
+            wanted.append(("conv", conversation_id))
+    wanted = [
+        item for item in dict.fromkeys(wanted)
+        if cache.get(user_id, item[0], item[1]) is _MISSING
+    ]
+    if not wanted:
+        return 0
+
+    user_ref = _fs.collection("users").document(user_id)
+    fetched = 0
+    for start in range(0, len(wanted), _FIRESTORE_BATCH_LIMIT):
+        chunk = wanted[start:start + _FIRESTORE_BATCH_LIMIT]
+        by_path = {}
+        refs = []
+        for index, key in chunk:
+            if index == "msg":
+                ref = user_ref.collection("msgIndex").document(b64url_id(key))
+            else:
+                ref = user_ref.collection("convIndex").document(key)
+            by_path[ref.path] = (index, key)
+            refs.append(ref)
+        try:
+            found = {}
+            for snapshot in _fs.get_all(refs):
+                if snapshot.exists:
+                    found[snapshot.reference.path] = (snapshot.to_dict() or {}).get("threadId")
+        except Exception as e:
+            print(f"⚠️ Thread resolution prewarm failed for {len(chunk)} keys: {e}")
+            continue
+        for path, (index, key) in by_path.items():
+            cache.put(user_id, index, key, found.get(path))
+        fetched += len(chunk)
+    return fetched
+
+
 def index_message_id(user_id: str, message_id: str, thread_id: str,
                      runtime: Optional[AutomationRuntime] = None) -> bool:
     """Index message ID for O(1) lookup. Returns True on success, False on failure."""
@@ -236,7 +395,13 @@ def index_message_id(user_id: str, message_id: str, thread_id: str,
         canonical_message_id = lookup_candidates[0]
         encoded_id = b64url_id(canonical_message_id)
         index_ref = fs.collection("users").document(user_id).collection("msgIndex").document(encoded_id)
-        index_ref.set({"threadId": thread_id}, merge=True)
+        # Drop the entry on both sides of the write: a lookup racing the set
+        # could otherwise re-cache the old (or negative) answer for a full TTL.
+        _THREAD_RESOLUTION_CACHE.invalidate(user_id, "msg", lookup_candidates)
+        try:
+            index_ref.set({"threadId": thread_id}, merge=True)
+        finally:
+            _THREAD_RESOLUTION_CACHE.invalidate(user_id, "msg", lookup_candidates)
         print(f"🔍 Indexed message ID: {canonical_message_id[:50]}... -> {thread_id}")
         return True
     except Exception as e:
@@ -248,12 +413,24 @@ def lookup_thread_by_message_id(user_id: str, message_id: str,
     """Look up thread ID by message ID."""
     try:
         fs = firestore_for(runtime, _fs)
+        # Only the ambient client is cached; a runtime's fenced client is a
+        # different store and must never be answered from production memory.
+        cached = fs is _fs
         lookup_candidates = _message_index_candidates(message_id)
         for candidate in lookup_candidates:
+            if cached:
+                thread_id = _THREAD_RESOLUTION_CACHE.get(user_id, "msg", candidate)
+                if thread_id is not _MISSING:
+                    if thread_id:
+                        return thread_id
+                    continue
             encoded_id = b64url_id(candidate)
             doc = fs.collection("users").document(user_id).collection("msgIndex").document(encoded_id).get()
+            thread_id = doc.to_dict().get("threadId") if doc.exists else None
+            if cached:
+                _THREAD_RESOLUTION_CACHE.put(user_id, "msg", candidate, thread_id)
             if doc.exists:
-                return doc.to_dict().get("threadId")
+                return thread_id
         return None
     except Exception as e:
         print(f"❌ Failed to lookup message {message_id}: {e}")
@@ -268,7 +445,11 @@ def index_conversation_id(user_id: str, conversation_id: str, thread_id: str,
     try:
         fs = firestore_for(runtime, _fs)
         conv_ref = fs.collection("users").document(user_id).collection("convIndex").document(conversation_id)
-        conv_ref.set({"threadId": thread_id}, merge=True)
+        _THREAD_RESOLUTION_CACHE.invalidate(user_id, "conv", [conversation_id])
+        try:
+            conv_ref.set({"threadId": thread_id}, merge=True)
+        finally:
+            _THREAD_RESOLUTION_CACHE.invalidate(user_id, "conv", [conversation_id])
         print(f"🔍 Indexed conversation ID: {conversation_id} -> {thread_id}")
         return True
     except Exception as e:
@@ -279,11 +460,14 @@ def lookup_thread_by_conversation_id(user_id: str, conversation_id: str) -> Opti
     """Look up thread ID by conversation ID (fallback)."""
     if not conversation_id:
         return None
+    cached = _THREAD_RESOLUTION_CACHE.get(user_id, "conv", conversation_id)
+    if cached is not _MISSING:
+        return cached
     try:
         doc = _fs.collection("users").document(user_id).collection("convIndex").document(conversation_id).get()
-        if doc.exists:
-            return doc.to_dict().get("threadId")
-        return None
+        thread_id = doc.to_dict().get("threadId") if doc.exists else None
+        _THREAD_RESOLUTION_CACHE.put(user_id, "conv", conversation_id, thread_id)
+        return thread_id
     except Exception as e:
         print(f"❌ Failed to lookup conversation {conversation_id}: {e}")
         return None
@@ -477,6 +661,278 @@ def _message_body_content_and_preview(data: dict) -> tuple[str, str]:
     return "", data.get("bodyPreview") or ""
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Conversation fetch
+# ─────────────────────────────────────────────────────────────────────────────
+#
+# build_conversation_payload used to download the 100 newest messages of the
+# whole mailbox, bodies included, for every processed reply and keep the few
+# that matched the thread. Now:
+#   * the mailbox page is listed without bodies and shared by every reply
+#     processed inside one conversation_page_scope() (one inbox scan),
+#   * a body is fetched only for a message of this conversation, and
+#   * normalized bodies are kept per conversation in
+#     users/{uid}/conversationBodies/{b64url(conversationId)}, so a repeat
+#     reply on the thread fetches only the messages it has not seen. Stored
+#     messages that have since dropped off the mailbox page stay in the
+#     conversation.
+
+CONVERSATION_PAGE_SIZE = 250
+CONVERSATION_PAGE_TTL_SECONDS = 120
+CONVERSATION_CONTENT_CHARS = 2000  # cap to keep prompt small but meaningful
+CONVERSATION_BODIES_COLLECTION = "conversationBodies"
+# Keeps the doc well under Firestore's 1 MiB cap; longer threads are not stored.
+CONVERSATION_BODIES_MAX_MESSAGES = 200
+_CONVERSATION_PAGE_SELECT = (
+    "id,subject,from,toRecipients,sentDateTime,receivedDateTime,"
+    "bodyPreview,internetMessageId,conversationId"
+)
+
+
+def _conversation_fetch_enabled() -> bool:
+    return os.getenv("E2E_TEST_MODE") != "true"
+
+
+class ConversationPageCache:
+    """Thread-scoped ``user_id -> mailbox page`` map for one scan.
+
+    Nothing is cached outside ``scope()``, and a page expires after
+    ``ttl_seconds`` so a long scan still sees replies that arrive during it.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = CONVERSATION_PAGE_TTL_SECONDS,
+        enabled=_conversation_fetch_enabled,
+        clock=time.monotonic,
+    ) -> None:
+        self._ttl = ttl_seconds
+        self._enabled = enabled
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.page_reads = 0
+        self.page_hits = 0
+
+    @contextmanager
+    def scope(self):
+        if not self._enabled() or self.active():
+            yield
+            return
+        self._local.pages = {}
+        try:
+            yield
+        finally:
+            self._local.pages = None
+
+    def active(self) -> bool:
+        return getattr(self._local, "pages", None) is not None
+
+    def get(self, user_id: str) -> Optional[List[dict]]:
+        pages = getattr(self._local, "pages", None)
+        if pages is None:
+            return None
+        entry = pages.get(user_id)
+        if entry is None or entry[1] <= self._clock():
+            pages.pop(user_id, None)
+            return None
+        with self._lock:
+            self.page_hits += 1
+        return entry[0]
+
+    def put(self, user_id: str, page: List[dict]) -> None:
+        with self._lock:
+            self.page_reads += 1
+        pages = getattr(self._local, "pages", None)
+        if pages is not None:
+            pages[user_id] = (page, self._clock() + self._ttl)
+
+
+_CONVERSATION_PAGES = ConversationPageCache()
+
+
+def conversation_page_scope():
+    """Share the mailbox page across the replies processed inside the ``with`` block."""
+    return _CONVERSATION_PAGES.scope()
+
+
+def _graph_messages_get(headers: dict, path: str = "", params: Optional[dict] = None,
+                        prefer: Optional[str] = None) -> Optional[dict]:
+    """GET ``/me/messages{path}``; None unless Graph answers 200."""
+    from .http_pool import pooled_requests as requests
+    from .utils import exponential_backoff_request
+
+    url = f"https://graph.microsoft.com/v1.0/me/messages{path}"
+    request_headers = dict(headers)
+    if prefer:
+        request_headers["Prefer"] = prefer
+    response = exponential_backoff_request(
+        lambda: requests.get(url, headers=request_headers, params=params, timeout=30)
+    )
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+
+def _conversation_mailbox_page(uid: str, headers: dict) -> List[dict]:
+    """The newest mailbox messages, metadata only, shared within a scan."""
+    page = _CONVERSATION_PAGES.get(uid)
+    if page is not None:
+        return page
+    # NOTE: We avoid using conversationId in $filter because Graph API has
+    # issues parsing base64-encoded IDs that end with '=' characters
+    data = _graph_messages_get(headers, params={
+        "$orderby": "sentDateTime desc",
+        "$select": _CONVERSATION_PAGE_SELECT,
+        "$top": CONVERSATION_PAGE_SIZE,
+    }) or {}
+    page = list(data.get("value", []))
+    _CONVERSATION_PAGES.put(uid, page)
+    return page
+
+
+def _fetch_conversation_body(headers: dict, graph_id: str) -> Optional[str]:
+    """Normalized text body of one message, or None if it could not be read."""
+    from .utils import strip_html_tags
+
+    data = _graph_messages_get(
+        headers,
+        f"/{graph_id}",
+        params={"$select": "body"},
+        prefer='outlook.body-content-type="text"',
+    )
+    if data is None:
+        return None
+    body_obj = data.get("body", {}) or {}
+    body_content = body_obj.get("content", "") or ""
+    if body_obj.get("contentType", "Text") == "HTML":
+        body_content = strip_html_tags(body_content)
+    # Always clean content (handles &nbsp; and other entities even in "Text" type)
+    return clean_email_content(body_content)[:CONVERSATION_CONTENT_CHARS]
+
+
+def _conversation_bodies_ref(uid: str, conversation_id: str):
+    return (_fs.collection("users").document(uid)
+            .collection(CONVERSATION_BODIES_COLLECTION).document(b64url_id(conversation_id)))
+
+
+def _load_conversation_bodies(uid: str, conversation_id: str) -> Dict[str, dict]:
+    if not _conversation_fetch_enabled():
+        return {}
+    try:
+        snapshot = _conversation_bodies_ref(uid, conversation_id).get()
+    except Exception as e:
+        print(f"⚠️ Failed to read stored conversation bodies: {e}")
+        return {}
+    if not snapshot.exists:
+        return {}
+    messages = (snapshot.to_dict() or {}).get("messages") or {}
+    return messages if isinstance(messages, dict) else {}
+
+
+def _store_conversation_bodies(uid: str, conversation_id: str, stored_count: int,
+                               entries: Dict[str, dict]) -> None:
+    if not entries or not _conversation_fetch_enabled():
+        return
+    if stored_count + len(entries) > CONVERSATION_BODIES_MAX_MESSAGES:
+        return
+    try:
+        _conversation_bodies_ref(uid, conversation_id).set({
+            "conversationId": conversation_id,
+            "messages": entries,
+            "updatedAt": SERVER_TIMESTAMP,
+            "expiresAt": expires_at(CONVERSATION_BODIES_RETENTION),
+        }, merge=True)
+    except Exception as e:
+        print(f"⚠️ Failed to store conversation bodies: {e}")
+
+
+def _conversation_entry(msg: dict, content: str) -> dict:
+    return {
+        "id": msg.get("id"),
+        "internetMessageId": msg.get("internetMessageId"),
+        "from": _graph_message_from_address(msg),
+        "to": [r.get("emailAddress", {}).get("address", "") for r in msg.get("toRecipients", [])],
+        "subject": msg.get("subject", ""),
+        "sentDateTime": msg.get("sentDateTime"),
+        "receivedDateTime": msg.get("receivedDateTime"),
+        "bodyPreview": (msg.get("bodyPreview") or "")[:200],
+        "content": content,
+    }
+
+
+def _fetch_conversation_messages(
+    uid: str,
+    conversation_id: str,
+    headers: dict,
+    authenticated_mailbox_email: Optional[str],
+) -> List[dict]:
+    """Graph messages of one conversation, in the shape of indexed thread messages."""
+    stored = _load_conversation_bodies(uid, conversation_id)
+    entries = dict(stored)
+    new_entries: Dict[str, dict] = {}
+    fetched = 0
+    try:
+        page = _conversation_mailbox_page(uid, headers)
+    except Exception as e:
+        # Stored bodies still give the model the thread history.
+        print(f"⚠️ Failed to fetch messages from Graph API: {e}")
+        page = []
+
+    for msg in page:
+        if msg.get("conversationId") != conversation_id:
+            continue
+        key = b64url_id(msg.get("internetMessageId") or msg.get("id") or "")
+        if key in stored:
+            continue
+        try:
+            content = _fetch_conversation_body(headers, msg.get("id"))
+        except Exception as e:
+            print(f"⚠️ Failed to fetch message body from Graph API: {e}")
+            content = None
+        if content is None:
+            # Not stored, so the next reply on the thread retries the body.
+            entries[key] = _conversation_entry(msg, clean_email_content(msg.get("bodyPreview") or ""))
+            continue
+        fetched += 1
+        entries[key] = new_entries[key] = _conversation_entry(msg, content)
+
+    _store_conversation_bodies(uid, conversation_id, len(stored), new_entries)
+
+    graph_messages = []
+    for entry in entries.values():
+        direction = _resolve_graph_message_direction(
+            {
+                "from": {"emailAddress": {"address": entry.get("from") or ""}},
+                "sentDateTime": entry.get("sentDateTime"),
+                "receivedDateTime": entry.get("receivedDateTime"),
+            },
+            authenticated_mailbox_email,
+        )
+        graph_messages.append({
+            "data": {
+                "direction": direction,
+                "from": entry.get("from") or "",
+                "to": entry.get("to") or [],
+                "subject": entry.get("subject", ""),
+                "sentDateTime": entry.get("sentDateTime"),
+                "receivedDateTime": entry.get("receivedDateTime"),
+                "body": {
+                    "content": entry.get("content") or "",
+                    "preview": entry.get("bodyPreview") or "",
+                },
+                "internetMessageId": entry.get("internetMessageId"),
+            },
+            "id": entry.get("internetMessageId") or entry.get("id"),
+        })
+    print(
+        f"📧 {len(graph_messages)} Graph messages for conversation {conversation_id} "
+        f"({fetched} bodies fetched, {len(graph_messages) - fetched} reused)"
+    )
+    return graph_messages
+
+
 def build_conversation_payload(
     uid: str,
     thread_id: str,
@@ -507,72 +963,12 @@ def build_conversation_payload(
                     conversation_id = thread_data.get("conversationId")
                     
                     if conversation_id:
-                        # Fetch messages from Graph API and filter by conversationId client-side
-                        # NOTE: We avoid using conversationId in $filter because Graph API has
-                        # issues parsing base64-encoded IDs that end with '=' characters
-                        import requests
-                        from .utils import exponential_backoff_request
-                        from .utils import strip_html_tags
-
-                        try:
-                            response = exponential_backoff_request(
-                                lambda: requests.get(
-                                    "https://graph.microsoft.com/v1.0/me/messages",
-                                    headers=headers,
-                                    params={
-                                        "$orderby": "sentDateTime desc",
-                                        "$select": "id,subject,from,toRecipients,sentDateTime,receivedDateTime,body,bodyPreview,internetMessageId,conversationId",
-                                        "$top": 100  # Fetch more to filter client-side
-                                    },
-                                    timeout=30
-                                )
-                            )
-
-                            if response.status_code == 200:
-                                graph_data = response.json()
-                                # Filter client-side by conversationId
-                                matching_msgs = [m for m in graph_data.get("value", []) if m.get("conversationId") == conversation_id]
-                                for msg in matching_msgs:
-                                    # Determine direction
-                                    from_addr = _graph_message_from_address(msg)
-                                    to_recipients = [r.get("emailAddress", {}).get("address", "") for r in msg.get("toRecipients", [])]
-                                    
-                                    direction = _resolve_graph_message_direction(
-                                        msg,
-                                        authenticated_mailbox_email,
-                                    )
-                                    
-                                    # Get body content
-                                    body_obj = msg.get("body", {}) or {}
-                                    body_content = body_obj.get("content", "")
-                                    body_type = body_obj.get("contentType", "Text")
-                                    if body_type == "HTML":
-                                        body_content = strip_html_tags(body_content)
-                                    # Always clean content (handles &nbsp; and other entities even in "Text" type)
-                                    body_content = clean_email_content(body_content)
-                                    
-                                    graph_messages.append({
-                                        "data": {
-                                            "direction": direction,
-                                            "from": from_addr,
-                                            "to": to_recipients,
-                                            "subject": msg.get("subject", ""),
-                                            "sentDateTime": msg.get("sentDateTime"),
-                                            "receivedDateTime": msg.get("receivedDateTime"),
-                                            "body": {
-                                                "content": body_content,
-                                                "preview": msg.get("bodyPreview", "")[:200]
-                                            },
-                                            "internetMessageId": msg.get("internetMessageId")
-                                        },
-                                        "id": msg.get("internetMessageId") or msg.get("id")
-                                    })
-                                    
-                                print(f"📧 Fetched {len(graph_messages)} messages from Graph API for conversation {conversation_id}")
-                        except Exception as e:
-                            # Don't fail completely if Graph API fetch fails - we still have Firestore messages
-                            print(f"⚠️ Failed to fetch messages from Graph API: {e}")
-                            # Continue with just Firestore messages
+                        graph_messages = _fetch_conversation_messages(
+                            uid,
+                            conversation_id,
+                            headers,
+                            authenticated_mailbox_email,
+                        )
             except Exception as e:
                 print(f"⚠️ Failed to fetch Graph messages: {e}")
         
@@ -615,7 +1011,6 @@ def build_conversation_payload(
         recent = sorted_messages[-limit:] if len(sorted_messages) > limit else sorted_messages
 
         payload = []
-        CUT = 2000  # cap to keep prompt small but meaningful
         for msg_info in recent:
             data = msg_info["data"]
 
@@ -626,7 +1021,7 @@ def build_conversation_payload(
                 ts = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
             raw_content, raw_preview = _message_body_content_and_preview(data)
-            full_text = clean_email_content(raw_content)[:CUT]
+            full_text = clean_email_content(raw_content)[:CONVERSATION_CONTENT_CHARS]
             preview = clean_email_content(raw_preview or "")[:200]
 
             # Strip quoted content from inbound messages for AI processing
@@ -719,13 +1114,36 @@ def mark_processed(user_id: str, key: str):
     """Mark a message as processed."""
     try:
         _processed_ref(user_id, key).set({
-            "processedAt": SERVER_TIMESTAMP
+            "processedAt": SERVER_TIMESTAMP,
+            "expiresAt": expires_at(PROCESSED_MESSAGES_RETENTION),
         }, merge=True)
         return True
     except Exception as e:
         print(f"❌ Failed to mark message as processed {key}: {e}")
         return False
 
+def has_processed_many(user_id: str, keys: Iterable[str]) -> Set[str]:
+    """Return the subset of ``keys`` already marked processed.
+
+    One ``get_all`` per chunk instead of one point read per key, so an inbox page
+    of 50 messages costs a single round trip. If the batched read fails, falls
+    back to per-key ``has_processed`` rather than treating the page as unseen.
+    """
+    unique_keys = [key for key in dict.fromkeys(keys) if key]
+    processed: Set[str] = set()
+    for start in range(0, len(unique_keys), _FIRESTORE_BATCH_LIMIT):
+        chunk = unique_keys[start:start + _FIRESTORE_BATCH_LIMIT]
+        key_by_doc_id = {b64url_id(key): key for key in chunk}
+        try:
+            refs = [_processed_ref(user_id, key) for key in chunk]
+            for snapshot in _fs.get_all(refs):
+                if snapshot.exists and snapshot.id in key_by_doc_id:
+                    processed.add(key_by_doc_id[snapshot.id])
+        except Exception as e:
+            print(f"⚠️ Batched processed lookup failed, checking {len(chunk)} keys individually: {e}")
+            processed.update(key for key in chunk if has_processed(user_id, key))
+    return processed
+
 def _sync_ref(user_id: str):
     """Get reference to sync document."""
     return _fs.collection("users").document(user_id).collection("sync").document("inbox")
@@ -751,6 +1169,27 @@ def set_last_scan_iso(user_id: str, iso_str: str):
     except Exception as e:
         print(f"❌ Failed to set last scan ISO: {e}")
 
+def get_delta_link(user_id: str, folder: str) -> Optional[str]:
+    """Get the stored Graph deltaLink for ``folder`` ("inbox" or "sentItems")."""
+    try:
+        doc = _sync_ref(user_id).get()
+        if doc.exists:
+            return (doc.to_dict() or {}).get(f"{folder}DeltaLink")
+        return None
+    except Exception as e:
+        print(f"❌ Failed to get {folder} delta link: {e}")
+        return None
+
+def set_delta_link(user_id: str, folder: str, link: Optional[str]):
+    """Store (or, with None, clear) the Graph deltaLink for ``folder``."""
+    try:
+        _sync_ref(user_id).set({
+            f"{folder}DeltaLink": link,
+            "updatedAt": SERVER_TIMESTAMP
+        }, merge=True)
+    except Exception as e:
+        print(f"❌ Failed to set {folder} delta link: {e}")
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Handled Events Tracking - Prevents duplicate notifications for same event
@@ -5,6 +5,7 @@ from typing import Optional, List, Dict, Any
 from google.cloud.firestore import SERVER_TIMESTAMP, FieldFilter
 from .clients import _fs
 from .automation_runtime import firestore_for
+from .message_artifacts import record_message_artifacts
 from google.cloud import firestore
 
 logger = logging.getLogger(__name__)
@@ -110,7 +111,8 @@ def write_notification(uid: str, client_id: str, *, kind: str, priority: str, em
             },
         )
         
-        client_ref = _fs.collection("users").document(uid).collection("clients").document(client_id)
+        user_ref = _fs.collection("users").document(uid)
+        client_ref = user_ref.collection("clients").document(client_id)
         # If doc_id is fixed (dedupe), we can safely create a stable ref now
         notif_ref = (client_ref.collection("notifications").document(doc_id)
                      if doc_id else client_ref.collection("notifications").document())
@@ -150,6 +152,9 @@ def write_notification(uid: str, client_id: str, *, kind: str, priority: str, em
 
             # WRITES AFTER ALL READS
             transaction.set(notif_ref, notification_doc)
+            record_message_artifacts(
+                transaction, user_ref, f"clients/{client_id}/notifications", notif_ref, notification_doc
+            )
             transaction.set(
                 client_ref,
                 {
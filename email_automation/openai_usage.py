@@ -5,10 +5,15 @@ from typing import Any, Dict, Optional
 from google.cloud import firestore
 from google.cloud.firestore import SERVER_TIMESTAMP
 
+from .automation_runtime import ScopedFirestore
+
 logger = logging.getLogger(__name__)
 
 PRICING_VERSION = "2026-05-27"
 
+# Global per-month aggregate read by budget_guard: usageMonthly/{YYYY-MM}.
+USAGE_MONTHLY_COLLECTION = "usageMonthly"
+
 MODEL_PRICING_PER_MILLION = {
     "gpt-5.2": {"input": 1.75, "cached_input": 0.175, "output": 14.0},
     "gpt-5.2-2025-12-11": {"input": 1.75, "cached_input": 0.175, "output": 14.0},
@@ -168,6 +173,16 @@ def _rollup_payload(operation: str, model: str, estimate: Dict[str, Any]) -> Dic
     }
 
 
+def _monthly_payload(month_key: str, estimate: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "month": month_key,
+        "calls": firestore.Increment(1),
+        "totalCostUsd": firestore.Increment(estimate["cost"]["totalUsd"]),
+        "updatedAt": SERVER_TIMESTAMP,
+        "pricingVersion": PRICING_VERSION,
+    }
+
+
 def record_openai_usage(
     *,
     db: Any,
@@ -217,9 +232,68 @@ def record_openai_usage(
     if client_id:
         user_ref.collection("clients").document(client_id).collection("openaiUsageDaily").document(date_key).set(rollup, merge=True)
 
+    # A fenced run may only write under its own user prefix; the cross-user
+    # aggregate is production accounting.
+    if not isinstance(db, ScopedFirestore):
+        month_key = date_key[:7]
+        db.collection(USAGE_MONTHLY_COLLECTION).document(month_key).set(
+            _monthly_payload(month_key, estimate), merge=True
+        )
+
     return event
 
 
+def record_avoided_openai_call(
+    *,
+    db: Any,
+    user_id: str,
+    operation: str,
+    model: str,
+    cost_usd: float,
+    client_id: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Count a call a cached response made unnecessary on the daily rollups.
+
+    Kept apart from ``calls``/``totalCostUsd`` (and off usageMonthly) so the
+    budget guard only ever sums billed spend.
+    """
+    if not user_id:
+        raise ValueError("user_id is required for OpenAI usage tracking")
+    if not operation:
+        raise ValueError("operation is required for OpenAI usage tracking")
+
+    event_time = now or datetime.now(timezone.utc)
+    date_key = event_time.date().isoformat()
+    try:
+        cost = max(float(cost_usd or 0.0), 0.0)
+    except (TypeError, ValueError):
+        cost = 0.0
+
+    rollup = {
+        "avoidedCalls": firestore.Increment(1),
+        "avoidedCostUsd": firestore.Increment(cost),
+        f"operations.{operation}.avoidedCalls": firestore.Increment(1),
+        f"operations.{operation}.avoidedCostUsd": firestore.Increment(cost),
+        f"models.{model}.avoidedCalls": firestore.Increment(1),
+        "updatedAt": SERVER_TIMESTAMP,
+        "pricingVersion": PRICING_VERSION,
+    }
+    user_ref = db.collection("users").document(user_id)
+    user_ref.collection("openaiUsageDaily").document(date_key).set(rollup, merge=True)
+    if client_id:
+        user_ref.collection("clients").document(client_id).collection("openaiUsageDaily").document(date_key).set(rollup, merge=True)
+    return {"date": date_key, "operation": operation, "model": model, "avoidedCostUsd": cost}
+
+
+def track_avoided_openai_call_safely(**kwargs: Any) -> Optional[Dict[str, Any]]:
+    try:
+        return record_avoided_openai_call(**kwargs)
+    except Exception as exc:
+        logger.warning("OpenAI avoided-call tracking failed: %s", exc)
+        return None
+
+
 def track_openai_usage_safely(**kwargs: Any) -> Optional[Dict[str, Any]]:
     try:
         return record_openai_usage(**kwargs)
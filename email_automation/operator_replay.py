@@ -12,6 +12,7 @@ import requests
 from google.cloud.firestore import SERVER_TIMESTAMP, FieldFilter
 
 from .campaign_safety import get_client_automation_decision
+from .retention import PROCESSED_MESSAGES_RETENTION, expires_at
 from .sent_mail_guard import coerce_utc_datetime, sent_after_from_retry_data
 from .utils import (
     b64url_id,
@@ -413,6 +414,7 @@ def _begin_replay_claim(fs_client, request: ReplayRequest, failure_ref):
                 "status": "operator_replay_in_progress",
                 "replayAttemptId": attempt_id,
                 "claimedAt": SERVER_TIMESTAMP,
+                "expiresAt": expires_at(PROCESSED_MESSAGES_RETENTION),
             },
         )
     batch.set(
@@ -450,6 +452,7 @@ def _complete_replay_claim(
                 "status": "processed",
                 "replayAttemptId": attempt_id,
                 "processedAt": SERVER_TIMESTAMP,
+                "expiresAt": expires_at(PROCESSED_MESSAGES_RETENTION),
             },
             merge=True,
         )
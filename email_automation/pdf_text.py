@@ -0,0 +1,403 @@
+"""Local PDF text/page-image extraction with no provider clients in scope.
+
+file_handling imports Firestore, OpenAI and Drive clients at module load, so a
+PDF parse worker process must not import it. This module holds only the
+PyMuPDF/pdfplumber pass and the parse pool's worker processes;
+file_handling.extract_pdf_text decides whether it runs in-process or in the
+parse pool.
+
+The document is opened once, from memory. Every page's text comes from
+PyMuPDF; pdfplumber's table finder only runs on pages whose content stream
+draws ruling lines (the only tables its default strategy can find), and stops
+once the prompt budget is spent or the table time budget runs out. Sparse
+pages are rendered only up to the number of images the caller will use.
+"""
+
+import io
+import os
+import pickle
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import pdfplumber
+    HAS_PDFPLUMBER = True
+except ImportError:
+    HAS_PDFPLUMBER = False
+
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+try:
+    from PIL import Image  # noqa: F401 - page rendering needs Pillow present
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+
+# How much PDF text reaches the extraction prompt (ai_processing._clip_for_prompt):
+# the first PDF_PROMPT_CHAR_LIMIT chars, plus up to PROMPT_RETAINED_TAIL_CHARS of
+# field-bearing lines from beyond the cutoff.
+PDF_PROMPT_CHAR_LIMIT = 16000
+PROMPT_RETAINED_TAIL_CHARS = 4000
+PROMPT_FIELD_HINT_RE = re.compile(
+    r"(?:\$|\bsf\b|square\s*f|\bdock|drive[-\s]?in|clear|ceiling|amp|volt|nnn|opex|"
+    r"total\s+sf|\bpsf\b|\b\d{3,}\b)",
+    re.IGNORECASE,
+)
+
+# Bump whenever the text or page images this module produces change, so
+# extraction_cache entries from the old engine are not served.
+PDF_EXTRACTOR_VERSION = "single-pass-1"
+
+MIN_TEXT_PER_PAGE = 50
+PDF_MAX_PAGES = 200
+PDF_TABLE_TIME_BUDGET_SECONDS = 20.0
+# Architectural drawing sets run to hundreds of KB of path operators per page
+# and only ever yield junk "tables" from the drawing grid.
+TABLE_SCAN_MAX_CONTENT_BYTES = 256 * 1024
+TABLE_MIN_RULING_OPS = 4
+_RULING_OP_RE = re.compile(rb"(?<![^\s])(?:re|l)(?=\s)")
+_RENDER_MATRIX_DPI = 150
+
+
+class _PromptBudget:
+    """Tracks whether more page text could still change the clipped prompt."""
+
+    def __init__(self, limit: int = PDF_PROMPT_CHAR_LIMIT, tail_limit: int = PROMPT_RETAINED_TAIL_CHARS):
+        self._limit = limit
+        self._tail_limit = tail_limit
+        self._used = 0
+        self._tail = 0
+
+    def add(self, part: str) -> None:
+        start = self._used + (2 if self._used else 0)  # "\n\n" page separator
+        self._used = start + len(part)
+        if self._used > self._limit:
+            beyond = part[max(0, self._limit - start):]
+            self._tail += sum(len(line) + 1 for line in beyond.splitlines() if PROMPT_FIELD_HINT_RE.search(line))
+
+    @property
+    def spent(self) -> bool:
+        return self._used >= self._limit and self._tail >= self._tail_limit
+
+
+def _page_text_by_lines(page, y_tolerance: float = 3.0) -> str:
+    """PyMuPDF words regrouped into visual lines, as pdfplumber's extract_text does.
+
+    Plain get_text("text") emits each span block on its own line, which splits
+    "Asking Rent: $6.75/SF/yr" label/value cells apart and misleads the
+    line-based fact extractors.
+    """
+    words = page.get_text("words") or []
+    lines: List[List[tuple]] = []
+    tops: List[float] = []
+    for word in sorted(words, key=lambda w: (w[1], w[0])):
+        if lines and abs(word[1] - tops[-1]) <= y_tolerance:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+            tops.append(word[1])
+    return "\n".join(" ".join(w[4] for w in sorted(line, key=lambda w: w[0])) for line in lines)
+
+
+def _looks_like_ruled_table(page) -> bool:
+    """Cheap pre-check for pdfplumber's lines strategy: ruling ops, not a drawing."""
+    try:
+        contents = page.read_contents() or b""
+    except Exception:
+        return False
+    if not contents or len(contents) > TABLE_SCAN_MAX_CONTENT_BYTES:
+        return False
+    return len(_RULING_OP_RE.findall(contents)) >= TABLE_MIN_RULING_OPS
+
+
+def _table_rows_text(plumber_page) -> str:
+    rows = []
+    for table in plumber_page.extract_tables():
+        for row in table:
+            if row:
+                rows.append(" | ".join([str(cell) if cell else "" for cell in row]))
+    return "\n".join(rows)
+
+
+def _extract_with_pdfplumber_only(content: bytes, filename: str, max_pages: int) -> List[str]:
+    """Text and tables for every page when PyMuPDF cannot open the document."""
+    text_parts = []
+    if not HAS_PDFPLUMBER:
+        return text_parts
+    try:
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
+            for page_num, page in enumerate(pdf.pages[:max_pages]):
+                page_text = page.extract_text() or ""
+                tables = _table_rows_text(page)
+                if tables:
+                    page_text += "\n" + tables
+                text_parts.append(f"--- Page {page_num + 1} ---\n{page_text.strip()}")
+    except Exception as e:
+        print(f"⚠️ pdfplumber failed for {filename}: {e}")
+    return text_parts
+
+
+def extract_pdf_text(
+    content: bytes,
+    filename: str = "document.pdf",
+    *,
+    max_images: Optional[int] = None,
+    max_pages: int = PDF_MAX_PAGES,
+    table_time_budget_seconds: float = PDF_TABLE_TIME_BUDGET_SECONDS,
+    clock: Callable[[], float] = time.monotonic,
+    stats: Optional[dict] = None,
+) -> Tuple[str, List[bytes]]:
+    """
+    Extract text from PDF in a single pass over the document.
+
+    ``max_images`` caps how many sparse pages are rendered (None renders all).
+    Pages past ``max_pages`` are not read. Table extraction stops once the
+    prompt budget is spent or ``table_time_budget_seconds`` has elapsed; the
+    remaining pages still contribute their PyMuPDF text, because the property
+    address guards and fact extractors read the whole text, not the clip.
+    A ``stats`` dict, if given, receives the page, table-pass and stop counts.
+
+    Returns:
+        Tuple of (extracted_text, list_of_page_images_as_bytes)
+        - extracted_text: All text found in the PDF
+        - page_images: Images of pages with little/no text (for OCR fallback)
+    """
+    text_parts: List[str] = []
+    page_images: List[bytes] = []
+    table_pages = 0
+    stop_reason = ""
+
+    doc = None
+    if HAS_PYMUPDF:
+        try:
+            doc = fitz.open(stream=content, filetype="pdf")
+        except Exception as e:
+            print(f"⚠️ PyMuPDF failed for {filename}: {e}")
+
+    if doc is None:
+        text_parts = _extract_with_pdfplumber_only(content, filename, max_pages)
+    else:
+        plumber = None
+        budget = _PromptBudget()
+        started = clock()
+        try:
+            page_count = len(doc)
+            if page_count > max_pages:
+                stop_reason = f"page budget ({max_pages} of {page_count} pages read)"
+            for page_num in range(min(page_count, max_pages)):
+                page = doc[page_num]
+                page_text = _page_text_by_lines(page).strip()
+
+                tables_allowed = not budget.spent and clock() - started < table_time_budget_seconds
+                if not tables_allowed and not stop_reason:
+                    stop_reason = "prompt budget" if budget.spent else "table time budget"
+                needs_tables = tables_allowed and _looks_like_ruled_table(page)
+                is_sparse = len(page_text) < MIN_TEXT_PER_PAGE
+                if HAS_PDFPLUMBER and (needs_tables or (is_sparse and tables_allowed)):
+                    try:
+                        if plumber is None:
+                            plumber = pdfplumber.open(io.BytesIO(content))
+                        plumber_page = plumber.pages[page_num]
+                        if is_sparse:
+                            plumber_text = (plumber_page.extract_text() or "").strip()
+                            if len(plumber_text) > len(page_text):
+                                page_text = plumber_text
+                        if needs_tables:
+                            table_pages += 1
+                            tables = _table_rows_text(plumber_page)
+                            if tables:
+                                page_text = f"{page_text}\n{tables}".strip()
+                    except Exception as e:
+                        print(f"⚠️ pdfplumber failed for {filename} page {page_num + 1}: {e}")
+
+                part = f"--- Page {page_num + 1} ---\n{page_text}"
+                text_parts.append(part)
+                budget.add(clean_extracted_text(part))
+
+                # Render pages with little text for the vision fallback, but
+                # only as many as the caller will keep.
+                if (
+                    len(page_text) < MIN_TEXT_PER_PAGE
+                    and HAS_PILLOW
+                    and (max_images is None or len(page_images) < max_images)
+                ):
+                    mat = fitz.Matrix(_RENDER_MATRIX_DPI / 72, _RENDER_MATRIX_DPI / 72)
+                    page_images.append(page.get_pixmap(matrix=mat).tobytes("png"))
+                    print(f"  🖼️ Converted page {page_num + 1} to image for vision analysis")
+        except Exception as e:
+            print(f"⚠️ PyMuPDF failed for {filename}: {e}")
+        finally:
+            if plumber is not None:
+                plumber.close()
+            doc.close()
+
+    # Combine all extracted text
+    full_text = "\n\n".join(text_parts)
+
+    # Clean up text
+    full_text = clean_extracted_text(full_text)
+
+    if stats is not None:
+        stats.update(pages=len(text_parts), table_passes=table_pages, images=len(page_images),
+                     stop_reason=stop_reason or None)
+    if stop_reason:
+        print(f"  ⏱️ {filename}: {stop_reason} reached; later pages kept as plain text")
+    print(
+        f"✅ PDF extraction complete: {len(full_text)} chars text, {len(page_images)} page images "
+        f"({len(text_parts)} pages, {table_pages} table passes)"
+    )
+    return full_text, page_images
+
+
+def clean_extracted_text(text: str) -> str:
+    """Clean up extracted PDF text for better model comprehension."""
+    # Remove excessive whitespace
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+
+    # Remove common PDF artifacts
+    text = re.sub(r'\x00', '', text)  # Null bytes
+    text = re.sub(r'[\x01-\x08\x0b\x0c\x0e-\x1f]', '', text)  # Control chars
+
+    # Fix common OCR/extraction issues
+    text = text.replace('|', ' | ')  # Space around pipe for tables
+    text = re.sub(r'\s+\|', ' |', text)
+    text = re.sub(r'\|\s+', '| ', text)
+
+    return text.strip()
+
+
+# Parse workers run only this module, as ``python -m email_automation.pdf_text``.
+# A multiprocessing spawn or forkserver worker imports the parent's
+# ``__main__`` (main.py), and with it email_automation.clients, which builds
+# Firestore and OpenAI clients in a process that only parses PDFs. A plain
+# child process started on this module has no parent main to import. Calls go
+# to its stdin and results come back on a dedicated pipe, both as pickles, so
+# the callable must be importable by module path, as it would be for a process
+# pool. The child's stdout stays the parent's, so anything it prints is logged.
+_WORKER_MODULE = "email_automation.pdf_text"
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_WORKER_EXIT_TIMEOUT_SECONDS = 5
+
+
+class _Worker:
+    """One parse worker process, serving one call at a time."""
+
+    def __init__(self) -> None:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (_PACKAGE_ROOT, env.get("PYTHONPATH")) if p)
+        read_fd, write_fd = os.pipe()
+        try:
+            self._proc = subprocess.Popen(
+                [sys.executable, "-m", _WORKER_MODULE, str(write_fd)],
+                stdin=subprocess.PIPE,
+                pass_fds=(write_fd,),
+                env=env,
+            )
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        self._replies = os.fdopen(read_fd, "rb")
+
+    def call(self, fn: Callable, args: tuple, kwargs: dict) -> Tuple[bool, object]:
+        try:
+            pickle.dump((fn, args, kwargs), self._proc.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+            self._proc.stdin.flush()
+            return pickle.load(self._replies)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            self.kill()
+            raise BrokenProcessPool(f"PDF parse worker exited: {e}") from e
+
+    def close(self) -> None:
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=_WORKER_EXIT_TIMEOUT_SECONDS)
+        except (OSError, subprocess.TimeoutExpired):
+            self._proc.kill()
+            self._proc.wait()
+        self._replies.close()
+
+    def kill(self) -> None:
+        self._proc.kill()
+        self._proc.wait()
+        self._replies.close()
+
+
+class PdfWorkerPool(Executor):
+    """Executor that runs each call in one of up to ``max_workers`` workers.
+
+    Workers start on first use and are reused. A worker that dies takes only
+    its own call down, which raises BrokenProcessPool like a process pool would.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._lock = threading.Lock()
+        self._idle: List[_Worker] = []
+        self._closed = False
+        self._dispatch = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-parse")
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self._dispatch.submit(self._call, fn, args, kwargs)
+
+    def _call(self, fn: Callable, args: tuple, kwargs: dict):
+        with self._lock:
+            if self._closed:
+                raise BrokenProcessPool("PDF parse pool is shut down")
+            worker = self._idle.pop() if self._idle else None
+        worker = worker or _Worker()
+        ok, value = worker.call(fn, args, kwargs)
+        with self._lock:
+            keep = not self._closed
+            if keep:
+                self._idle.append(worker)
+        if not keep:
+            worker.close()
+        if not ok:
+            raise value
+        return value
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+        self._dispatch.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+def _serve(reply_fd: int) -> None:
+    """Worker loop: run each pickled call from stdin, pickle the outcome to ``reply_fd``."""
+    replies = os.fdopen(reply_fd, "wb")
+    requests = sys.stdin.buffer
+    while True:
+        try:
+            fn, args, kwargs = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            outcome = (True, fn(*args, **kwargs))
+        except Exception as e:
+            outcome = (False, e)
+        try:
+            payload = pickle.dumps(outcome, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            payload = pickle.dumps((False, RuntimeError(f"unpicklable parse result: {e}")))
+        replies.write(payload)
+        replies.flush()
+
+
+if __name__ == "__main__":
+    _serve(int(sys.argv[1]))
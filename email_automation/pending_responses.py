@@ -15,6 +15,7 @@ from .sent_mail_guard import (
     find_matching_sent_message_for_retry,
     sent_after_from_retry_data,
 )
+from .message_artifacts import add_with_message_artifacts, set_with_message_artifacts
 from .outbound_safety import validate_outbound_body
 from .campaign_safety import (
     CAMPAIGN_AUTOMATION_ALLOW,
@@ -90,8 +91,9 @@ def _gate_pending_response(
 def _move_pending_response_to_dead_letter(user_id: str, doc, data: Dict[str, Any], reason: str) -> None:
     from .clients import _fs
 
-    dead_letter_ref = _fs.collection("users").document(user_id).collection("deadLetterQueue")
-    dead_letter_ref.add({
+    user_ref = _fs.collection("users").document(user_id)
+    dead_letter_ref = user_ref.collection("deadLetterQueue")
+    add_with_message_artifacts(_fs, user_ref, "deadLetterQueue", dead_letter_ref, {
         **data,
         "source": "pendingResponses",
         "originalDocId": doc.id,
@@ -147,7 +149,8 @@ def record_sent_unindexed_response(
             "sentDateTime": sent_match.get("sentDateTime"),
         })
 
-    _fs.collection("users").document(user_id).collection("deadLetterQueue").add(payload)
+    user_ref = _fs.collection("users").document(user_id)
+    add_with_message_artifacts(_fs, user_ref, "deadLetterQueue", user_ref.collection("deadLetterQueue"), payload)
 
 
 def queue_pending_response(
@@ -172,7 +175,8 @@ def queue_pending_response(
     """
     from .clients import _fs
 
-    pending_ref = _fs.collection("users").document(user_id).collection("pendingResponses")
+    user_ref = _fs.collection("users").document(user_id)
+    pending_ref = user_ref.collection("pendingResponses")
 
     doc_data = {
         "threadId": thread_id,
@@ -204,10 +208,10 @@ def queue_pending_response(
         existing_data = existing.to_dict()
         doc_data["attempts"] = existing_data.get("attempts", 0) + 1
         doc_data["createdAt"] = existing_data.get("createdAt")  # Preserve original
-        doc_ref.set(doc_data)
+        set_with_message_artifacts(_fs, user_ref, "pendingResponses", doc_ref, doc_data)
         print(f"📝 Updated pending response for thread {thread_id[:30]}... (attempt {doc_data['attempts']})")
     else:
-        doc_ref.set(doc_data)
+        set_with_message_artifacts(_fs, user_ref, "pendingResponses", doc_ref, doc_data)
         print(f"📝 Queued pending response for thread {thread_id[:30]}...")
 
     return doc_ref.id
@@ -1,17 +1,18 @@
 import html as html_module
 import re
 from datetime import datetime as _dt, timezone as _tz
-import requests
+from .http_pool import pooled_requests as requests
 import hashlib
 import json
 import time
 import logging
 from contextlib import contextmanager
-from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import ContextVar, copy_context
 from dataclasses import dataclass, replace
 import os
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from urllib.parse import quote
 from google.cloud.firestore import SERVER_TIMESTAMP, FieldFilter
 
@@ -22,11 +23,12 @@ from .message_transport import (
     GraphDraftDeliveryTransport,
     OutboundDraft,
 )
-from .sheets import AssetLinkWriteError, format_sheet_columns_autosize_with_exceptions, _get_first_tab_title, _read_header_row2, append_links_to_flyer_link_column, append_links_to_floorplan_column, write_property_image_columns, is_floorplan_filename, _header_index_map, _find_row_by_email, clear_row_highlight, highlight_row, ROW_HIGHLIGHT_BLUE
-from .sheet_operations import _find_row_by_anchor, ensure_nonviable_divider, move_row_below_divider, insert_property_row_above_divider, _is_row_below_nonviable, sync_thread_row_numbers_after_move, stop_threads_for_row, complete_threads_for_row
+from .sheets import AssetLinkWriteError, _execute_with_retry, _read_sheet_grid, format_sheet_columns_autosize_with_exceptions, invalidate_sheet_snapshot, sheet_format_fingerprint, sheet_format_memo, SHEET_FORMAT_RULES_VERSION, _get_first_tab_title, _read_header_row2, append_links_to_flyer_link_column, append_links_to_floorplan_column, write_property_image_columns, is_floorplan_filename, _header_index_map, _find_row_by_email, clear_row_highlight, highlight_row, ROW_HIGHLIGHT_BLUE
+from .sheet_operations import _find_row_by_anchor, ensure_nonviable_divider, move_row_below_divider, insert_property_row_above_divider, _is_row_below_nonviable, sync_thread_row_numbers_after_move, stop_threads_for_row, complete_threads_for_row, thread_row_resync_scope, flush_thread_row_resync
 from .messaging import (save_message, save_thread_root, index_message_id, index_conversation_id,
-                       dump_thread_from_firestore, has_processed, mark_processed, set_last_scan_iso,
-                       lookup_thread_by_message_id, lookup_thread_by_conversation_id,
+                       dump_thread_from_firestore, has_processed, has_processed_many, mark_processed, set_last_scan_iso,
+                       get_delta_link, set_delta_link,
+                       lookup_thread_by_message_id, lookup_thread_by_conversation_id, prewarm_thread_resolution,
                        is_event_handled, mark_event_handled, build_event_key,
                        update_thread_status, get_thread_status, THREAD_STATUS)
 from .property_ref import resolve_property_ref
@@ -58,6 +60,8 @@ from .ai_processing import (
     propose_sheet_updates,
 )
 from .file_handling import (
+    asset_ingest_workers,
+    asset_timing_capture,
     fetch_and_process_linked_assets,
     fetch_and_process_pdfs,
     host_first_native_image_manifest_asset,
@@ -73,12 +77,12 @@ from .notification_payloads import (
     build_wrong_contact_suggested_email,
     should_skip_original_reply_for_new_property_referral,
 )
+from .inbound_text import inbound_text_context
 from .tour_scheduling import (
     TOUR_INTENT_ACTIONABLE,
     TOUR_INTENT_COURTESY,
     build_tour_unavailable_reply,
     build_schedule_aware_tour_reply,
-    classify_tour_intent,
     evaluate_alternate_tour_time,
     extract_proposed_tour_options,
     format_tour_date_label,
@@ -86,7 +90,6 @@ from .tour_scheduling import (
     looks_like_explicit_tour_offer_or_request,
     looks_like_tour_only_unavailable,
     parse_tour_time_minutes,
-    subject_bound_tour_segments,
     tour_date_from_thread_data,
 )
 from .outbound_safety import validate_outbound_body
@@ -110,6 +113,10 @@ from .sent_mail_guard import (
     find_sent_conversation_continuation_for_retry,
 )
 from .app_config import INBOX_SCAN_WINDOW_HOURS
+from .rate_governor import current_mailbox, governor as _rate_governor, retry_after_seconds
+from .retention import SHEET_CHANGELOG_RETENTION, expires_at
+from .message_artifacts import MESSAGE_ARTIFACTS_COLLECTION, ledger_covers, lookup_message_artifacts
+from .graph_batch import GRAPH_BATCH_MAX_REQUESTS, GraphBatchClient, batch_request, graph_batch_enabled
 
 
 def _await_index_read_after_write(seconds: float = 0.2) -> None:
@@ -264,7 +271,45 @@ class GraphMailboxReader:
             raise GraphMailboxReadRefused(
                 f"{operation!r} is not an allowed Graph mailbox read for this module"
             )
-        return requests.get(url, **kwargs)
+        mailbox = current_mailbox()
+        _rate_governor().acquire("graph", key=mailbox)
+        response = requests.get(url, **kwargs)
+        if getattr(response, "status_code", None) == 429:
+            _rate_governor().report_rate_limited(
+                "graph",
+                key=mailbox,
+                retry_after=retry_after_seconds(getattr(response, "headers", None)),
+            )
+        else:
+            _rate_governor().report_success("graph", key=mailbox)
+        return response
+
+    def read_many(self, operation: str, urls: List[str], *, headers: Dict[str, str],
+                  params: Optional[Dict[str, str]] = None) -> list:
+        """The same read for several messages through Graph ``$batch``.
+
+        Refused exactly like ``read``. Responses come back in ``urls`` order; a
+        sub-request that still failed is returned as its error response, and
+        the caller falls back to its ordinary single ``read``.
+        """
+        if operation not in GRAPH_MAILBOX_READ_OPERATIONS:
+            raise GraphMailboxReadRefused(
+                f"{operation!r} is not an allowed Graph mailbox read for this module"
+            )
+        mailbox = current_mailbox()
+        _rate_governor().acquire("graph", len(urls), key=mailbox)
+        client = GraphBatchClient(
+            post=requests.post,
+            call=exponential_backoff_request,
+            on_throttled=lambda retry_after: _rate_governor().report_rate_limited(
+                "graph", key=mailbox, retry_after=retry_after
+            ),
+        )
+        responses = client.execute(
+            [batch_request("GET", url, params=params) for url in urls], headers
+        )
+        _rate_governor().report_success("graph", key=mailbox)
+        return responses
 
 
 _DEFAULT_GRAPH_MAILBOX_READER = GraphMailboxReader()
@@ -306,6 +351,109 @@ def graph_mailbox_reader_scope(reader):
         _MAILBOX_READER.reset(token)
 
 
+# Batched reads are only taken on the ordinary production reader. A fenced or
+# injected reader sees every read one by one, exactly as before.
+def _batched_reads_enabled() -> bool:
+    return graph_batch_enabled() and _MAILBOX_READER.get() is None
+
+
+# Everything process_inbox_message and _save_message_to_thread read for a
+# scanned message, so one readahead entry serves either of them.
+INBOX_READAHEAD_SELECT = "body,hasAttachments,sender,replyTo,ccRecipients,internetMessageHeaders"
+
+
+class InboxReadahead:
+    """Full-message reads for the messages one inbox scan is about to process.
+
+    ``register`` queues Graph ids in processing order. The first ``take`` of
+    a queued id reads it and the next ids in one ``$batch`` call, so at most
+    GRAPH_BATCH_MAX_REQUESTS bodies are held at a time. A read that failed is
+    simply not there, and the caller reads the message itself.
+    """
+
+    def __init__(self) -> None:
+        self._headers: Dict[str, str] = {}
+        self._pending: List[str] = []
+        self._ready: Dict[str, dict] = {}
+        self.batched = 0
+
+    def register(self, headers: Dict[str, str], graph_ids: List[str]) -> None:
+        self._headers = dict(headers)
+        self._pending = [graph_id for graph_id in dict.fromkeys(graph_ids) if graph_id]
+        self._ready = {}
+
+    def take(self, graph_id: Optional[str]) -> Optional[dict]:
+        if not graph_id or not _batched_reads_enabled():
+            return None
+        if graph_id not in self._ready and graph_id in self._pending:
+            start = self._pending.index(graph_id)
+            window = self._pending[start:start + GRAPH_BATCH_MAX_REQUESTS]
+            del self._pending[start:start + len(window)]
+            try:
+                responses = _mailbox_reader().read_many(
+                    "inbox_message_body",
+                    [f"https://graph.microsoft.com/v1.0/me/messages/{wid}" for wid in window],
+                    headers=self._headers,
+                    params={"$select": INBOX_READAHEAD_SELECT},
+                )
+            except Exception as e:
+                print(f"⚠️ Batched message read failed; reading one by one: {e}")
+                return None
+            for wid, response in zip(window, responses):
+                if response.status_code == 200:
+                    self._ready[wid] = response.json() or {}
+                    self.batched += 1
+        return self._ready.pop(graph_id, None)
+
+
+_INBOX_READAHEAD: ContextVar = ContextVar("inbox_readahead", default=None)
+
+
+@contextmanager
+def inbox_readahead_scope():
+    """Let the inbox scan inside the block batch its per-message reads."""
+    if not graph_batch_enabled():
+        yield None
+        return
+    token = _INBOX_READAHEAD.set(InboxReadahead())
+    try:
+        yield _INBOX_READAHEAD.get()
+    finally:
+        _INBOX_READAHEAD.reset(token)
+
+
+def _readahead_message(graph_id: Optional[str]) -> Optional[dict]:
+    readahead = _INBOX_READAHEAD.get()
+    return readahead.take(graph_id) if readahead is not None else None
+
+
+def _fill_missing_internet_headers(messages: List[dict], headers: Dict[str, str]) -> None:
+    """Read the headers of every page message that arrived without them in one batch.
+
+    Without this, _match_message_to_thread reads them one message at a time.
+    """
+    if not _batched_reads_enabled():
+        return
+    missing = [msg for msg in messages if not msg.get("internetMessageHeaders") and msg.get("id")]
+    if len(missing) < 2:
+        return
+    try:
+        responses = _mailbox_reader().read_many(
+            "thread_match_headers",
+            [f"https://graph.microsoft.com/v1.0/me/messages/{msg['id']}" for msg in missing],
+            headers=headers,
+            params={"$select": "internetMessageHeaders"},
+        )
+    except Exception as e:
+        print(f"⚠️ Batched header read failed; reading one by one: {e}")
+        return
+    for msg, response in zip(missing, responses):
+        if response.status_code == 200:
+            fetched = (response.json() or {}).get("internetMessageHeaders")
+            if fetched:
+                msg["internetMessageHeaders"] = fetched
+
+
 DEFAULT_AUTOMATIC_INBOX_REPLY_ALLOWLIST = {
     # Emergency launch safety: Baylor test lane only by default.
     "NO7lVYVp6BaplKYEfMlWCgBnpdh2",
@@ -1736,12 +1884,17 @@ def _find_existing_retry_artifact_for_message(
     additional_message_ids: Optional[List[str]] = None,
     *,
     allow_broad_scan: bool = True,
+    observed_at: Optional[datetime] = None,
 ) -> Optional[Dict[str, Any]]:
     """Find visible work already created for the broker message being replayed.
 
     If replaying a failed message would duplicate a pending dashboard action,
     pending response, or already-sent reconciliation item, leave the failure
     visible for manual review instead of silently running the side effects again.
+
+    The messageArtifacts ledger is read first. A miss there ends the check only
+    when the ledger covers ``observed_at`` (when the failure was recorded);
+    otherwise the artifact collections are scanned as before.
     """
     candidates = _message_identity_candidates(message_id, *(additional_message_ids or []))
     if not candidates:
@@ -1762,6 +1915,28 @@ def _find_existing_retry_artifact_for_message(
         ("deadLetterQueue", True),
         ("actionAudit", True),
     )
+    ledger_collections = [name for name, _ in collection_checks]
+    if client_id:
+        ledger_collections.append(f"clients/{client_id}/notifications")
+    ledger_artifacts = lookup_message_artifacts(_fs, user_ref, candidates, ledger_collections)
+    if ledger_artifacts is not None:
+        for collection_name, artifact in ledger_artifacts:
+            match = _artifact_matches_retry_source(
+                artifact,
+                collection_name,
+                candidates,
+                thread_id,
+                include_terminal_outbox=collection_name != "outbox",
+            )
+            if match:
+                return match
+        if ledger_covers(observed_at):
+            return None
+        print(
+            f"🔎 {MESSAGE_ARTIFACTS_COLLECTION} ledger does not cover message {message_id}; "
+            "falling back to the artifact collection scan"
+        )
+
     for collection_name, include_terminal_outbox in collection_checks:
         artifact = _scan_retry_artifact_collection(
             user_ref.collection(collection_name),
@@ -2200,11 +2375,15 @@ def retry_processing_failures(
             result["skipped"] += 1
             continue
 
+        # Not updatedAt: it moves on every retry, and a later time could put a
+        # failure from before the ledger under its coverage.
+        failure_observed_at = _timestamp_to_utc(data.get("createdAt"))
         existing_artifact = _find_existing_retry_artifact_for_message(
             user_id,
             thread_id,
             message_id,
             client_id,
+            observed_at=failure_observed_at,
         )
         if existing_artifact:
             result["skipped"] += 1
@@ -2234,6 +2413,7 @@ def retry_processing_failures(
                     msg.get("internetMessageId"),
                     msg.get("conversationId"),
                 ],
+                observed_at=failure_observed_at,
             )
             if expanded_existing_artifact:
                 result["skipped"] += 1
@@ -2490,6 +2670,7 @@ def _store_pdf_link_sheet_change(
             "source": "pdf_link_write",
             "threadId": thread_id,
             "createdAt": SERVER_TIMESTAMP,
+            "expiresAt": expires_at(SHEET_CHANGELOG_RETENTION),
             "fileIds": file_ids,
             "proposalHash": applied_hash,
         })
@@ -2647,6 +2828,7 @@ def _store_property_image_sheet_change(
             "source": "property_image_write",
             "threadId": thread_id,
             "createdAt": SERVER_TIMESTAMP,
+            "expiresAt": expires_at(SHEET_CHANGELOG_RETENTION),
             "propertyImage": safe_candidate,
             "proposalHash": applied_hash,
         })
@@ -3356,7 +3538,7 @@ def _row_alias_terminal_decision(
     ]
     saw_alias = False
     saw_terminal = False
-    for clause in _terminal_binding_clauses(message_text):
+    for clause in inbound_text_context(message_text).clauses:
         alias_spans = _server_owned_row_alias_spans(clause, row_aliases)
         clause_tokens = re.findall(r"[a-z0-9]+", (clause or "").lower())
         clause_bigrams = set(zip(clause_tokens, clause_tokens[1:]))
@@ -3864,7 +4046,7 @@ def _message_explicitly_keeps_row_viable(message_text: str, row_anchor: str) ->
     last_explicit_binding = None
     last_explicit_kinds = set()
     last_explicit_binding_count = 0
-    for sentence in _terminal_binding_clauses(message_text):
+    for sentence in inbound_text_context(message_text).clauses:
         bindings = _explicit_property_bindings(sentence, row_anchor)
         for viability_match in _VIABILITY_RE.finditer(sentence):
             if _viability_match_is_negated(sentence, bindings, viability_match):
@@ -3994,7 +4176,7 @@ def _property_unavailable_event_applies_to_row(
     terminal_bindings = []
     ancillary_terminal_seen = False
     last_explicit_binding = None
-    for clause in _terminal_binding_clauses(message_text):
+    for clause in inbound_text_context(message_text).clauses:
         explicit_bindings = _explicit_property_bindings(clause, row_anchor)
         ancillary_terminal = bool(
             _clause_has_ancillary_terminal_evidence(clause)
@@ -4494,8 +4676,9 @@ def _classify_tour_invite_reply(
         )
     )
     tour_date = tour_date_from_thread_data(thread_data)
-    tour_intent = classify_tour_intent(clean_text)
-    tour_segments = subject_bound_tour_segments(clean_text)
+    clean_context = inbound_text_context(clean_text)
+    tour_intent = clean_context.tour_intent
+    tour_segments = list(clean_context.tour_segments)
     tour_text = " ".join(tour_segments)
     text = tour_text.lower()
 
@@ -5369,6 +5552,7 @@ def _stage_row_thread_roots_for_terminal_transition(
             .document(user_id)
             .collection("threads")
         )
+        flush_thread_row_resync()
         matching_thread_ids = []
         for thread in threads_ref.stream():
             thread_data = thread.to_dict() or {}
@@ -5872,10 +6056,13 @@ def _property_exists_in_sheet(
     dropped action can hide unresolved user work.
     """
     try:
-        resp = sheets.spreadsheets().values().get(
-            spreadsheetId=sheet_id,
-            range=f"{tab_title}!3:1000",
-        ).execute()
+        resp = _execute_with_retry(
+            sheets.spreadsheets().values().get(
+                spreadsheetId=sheet_id,
+                range=f"{tab_title}!3:1000",
+            ),
+            "read_sheet_rows",
+        )
     except Exception as e:
         print(f"⚠️ Could not check for existing replacement property, creating approval action anyway: {e}")
         return False
@@ -6708,6 +6895,74 @@ def _find_client_id_by_email(uid: str, email: str) -> Optional[str]:
         print(f"   ⚠️ Failed to search clients for email {email_lower}: {e}")
         return None
 
+def _ensure_sheet_formatting(
+    uid: str,
+    client_id: str,
+    sheet_id: str,
+    header: List[str],
+    rows: Sequence[Sequence[Any]] = (),
+    *,
+    force: bool = False,
+) -> bool:
+    """Run the column autosize pass only when row 2, the longest value in any
+    column of the data ``rows`` or the format rules changed.
+
+    The fingerprint of the last pass is kept in this process and on the client
+    doc (``sheetFormat``), so a reply to an unchanged sheet costs no Sheets
+    write. Returns True when the sheet was (re)formatted.
+    """
+    memo = sheet_format_memo()
+    if not memo.enabled():
+        format_sheet_columns_autosize_with_exceptions(sheet_id, header)
+        return True
+
+    fingerprint = sheet_format_fingerprint(header, rows)
+    if not force and memo.is_current(sheet_id, fingerprint):
+        return False
+
+    client_ref = _fs.collection("users").document(uid).collection("clients").document(client_id)
+    client_doc = None
+    try:
+        client_doc = client_ref.get()
+    except Exception as e:
+        print(f"⚠️ Could not read sheet format state for client {client_id}: {e}")
+    client_exists = bool(client_doc is not None and client_doc.exists)
+    stored = ((client_doc.to_dict() or {}).get("sheetFormat") or {}) if client_exists else {}
+    if not force and stored.get("fingerprint") == fingerprint and stored.get("sheetId") == sheet_id:
+        memo.remember(sheet_id, fingerprint)
+        return False
+
+    format_sheet_columns_autosize_with_exceptions(sheet_id, header)
+    memo.remember(sheet_id, fingerprint)
+    # Archived clients keep their state in this process only; writing here
+    # would recreate a stub active-client doc.
+    if client_exists:
+        try:
+            client_ref.set({
+                "sheetFormat": {
+                    "fingerprint": fingerprint,
+                    "rulesVersion": SHEET_FORMAT_RULES_VERSION,
+                    "sheetId": sheet_id,
+                    "formattedAt": SERVER_TIMESTAMP,
+                }
+            }, merge=True)
+        except Exception as e:
+            print(f"⚠️ Could not record sheet format state for client {client_id}: {e}")
+    return True
+
+
+def reformat_client_sheet(uid: str, client_id: str) -> dict:
+    """Admin operation: force the autosize/format pass on one client's sheet."""
+    sheet_id, _column_config, _extraction_fields = _get_client_config(uid, client_id)
+    sheets = _sheets_client()
+    tab_title = _get_first_tab_title(sheets, sheet_id)
+    header = _read_header_row2(sheets, sheet_id, tab_title)
+    rows = _read_sheet_grid(sheets, sheet_id, tab_title, "sheet_format_rows")[1:]
+    _ensure_sheet_formatting(uid, client_id, sheet_id, header, rows, force=True)
+    print(f"🎨 Reformatted sheet {sheet_id} for client {client_id}")
+    return {"sheetId": sheet_id, "tabTitle": tab_title, "fingerprint": sheet_format_fingerprint(header, rows)}
+
+
 def fetch_and_log_sheet_for_thread(uid: str, thread_id: str, counterparty_email: Optional[str]):
     # Read thread (to get clientId)
     tdoc = (_fs.collection("users").document(uid)
@@ -6740,8 +6995,11 @@ def fetch_and_log_sheet_for_thread(uid: str, thread_id: str, counterparty_email:
     tab_title = _get_first_tab_title(sheets, sheet_id)
     header = _read_header_row2(sheets, sheet_id, tab_title)
 
-    # Ensure sizing/behavior is correct on every run (idempotent)
-    format_sheet_columns_autosize_with_exceptions(sheet_id, header)
+    # Column sizing/wrap only needs a Sheets write when row 2, a column's longest
+    # value or the rules changed. Inside the run's snapshot scope the header
+    # read above already loaded these rows.
+    rows = _read_sheet_grid(sheets, sheet_id, tab_title, "sheet_format_rows")[1:]
+    _ensure_sheet_formatting(uid, client_id, sheet_id, header, rows)
 
     print(f"📄 Sheet fetched: title='{tab_title}', sheetId={sheet_id}")
     print(f"   Header (row 2): {header}")
@@ -7006,6 +7264,50 @@ def _validate_operator_replay_claims(
             )
 
 
+def _run_asset_lanes(attachment_lane, linked_lane):
+    """Run one message's attachment and linked-asset lanes side by side.
+
+    With a single ingest worker (always under E2E_TEST_MODE) the lanes run in
+    order exactly as before. Otherwise the linked lane runs on a second thread
+    while the attachment lane runs here. Both finish before anything returns
+    or raises, and an attachment-lane failure wins, as it would serially.
+    """
+    if asset_ingest_workers() <= 1:
+        pdf_manifest = attachment_lane()
+        return pdf_manifest, linked_lane()
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="asset-lane") as pool:
+        linked_future = pool.submit(copy_context().run, linked_lane)
+        try:
+            pdf_manifest = attachment_lane()
+        except BaseException:
+            wait([linked_future])
+            raise
+        return pdf_manifest, linked_future.result()
+
+
+def _log_asset_timings(user_id: str, msg_id: str, timings: list, wall_seconds: float) -> None:
+    if not timings:
+        return
+    ordered = sorted(timings, key=lambda t: (t["lane"] != "attachment", t["position"]))
+    slowest = max(ordered, key=lambda t: t["seconds"])
+    print(
+        f"⏱️ Ingested {len(ordered)} asset(s) in {wall_seconds:.2f}s "
+        f"(slowest: {slowest['name']} {slowest['seconds']:.2f}s)"
+    )
+    logger.info(
+        "assets.ingest_timing",
+        extra={
+            "user_id": user_id,
+            "message_id": msg_id,
+            "wall_seconds": round(wall_seconds, 3),
+            "assets": ordered,
+        },
+    )
+
+
+# Row moves from several events of one reply share one thread rowNumber resync.
+@thread_row_resync_scope()
 def process_inbox_message(
     user_id: str,
     headers: Dict[str, str],
@@ -7063,15 +7365,19 @@ def process_inbox_message(
     # cannot leave it undefined further down.
     full_body_resp = {}
     try:
-        full_msg = exponential_backoff_request(
-            lambda: _mailbox_reader().read(
-                "inbox_message_body",
-                f"https://graph.microsoft.com/v1.0/me/messages/{msg_id}",
-                headers=headers,
-                params={"$select": "body,hasAttachments,sender,replyTo,ccRecipients"},
-                timeout=30
-            )
-        ).json() or {}
+        readahead_msg = _readahead_message(msg_id)
+        if readahead_msg is not None:
+            full_msg = readahead_msg
+        else:
+            full_msg = exponential_backoff_request(
+                lambda: _mailbox_reader().read(
+                    "inbox_message_body",
+                    f"https://graph.microsoft.com/v1.0/me/messages/{msg_id}",
+                    headers=headers,
+                    params={"$select": "body,hasAttachments,sender,replyTo,ccRecipients"},
+                    timeout=30
+                )
+            ).json() or {}
         full_body_resp = full_msg.get("body", {}) or {}
         has_attachments = bool(has_attachments or full_msg.get("hasAttachments"))
         _full_text = normalize_graph_body(full_body_resp)
@@ -7090,8 +7396,8 @@ def process_inbox_message(
     sender_addr = _recipient_email_address(merged_msg.get("sender"))
     source_envelope = _source_message_envelope(merged_msg)
     
-    # Get headers if not present
-    internet_message_headers = msg.get("internetMessageHeaders")
+    # Get headers if not present (a batched readahead already carries them)
+    internet_message_headers = msg.get("internetMessageHeaders") or full_msg.get("internetMessageHeaders")
     if not internet_message_headers:
         try:
             response = exponential_backoff_request(
@@ -7493,13 +7799,33 @@ def process_inbox_message(
             "Property Address",
         )
 
-        # Handle the current message's shared PDF/native Graph snapshot only.
-        pdf_manifest = fetch_and_process_pdfs(
-            headers,
-            msg_id,
-            target_property_hint=native_target_property_hint,
-            attachment_snapshot=attachment_snapshot,
-        )
+        url_texts = []
+        url_pattern = r'https?://[^\s<>"\']+'
+        fresh_url_source, _ = _split_fresh_and_quoted(_full_text)
+        urls_found = re.findall(url_pattern, fresh_url_source)
+        clean_urls = [_sanitize_url(url) for url in urls_found[:3]]  # Limit to 3 URLs to avoid overwhelming
+
+        # The current message's shared PDF/native Graph snapshot, and the
+        # linked-asset lane. The linked lane additionally gets the hyperlinks
+        # that normalize_graph_body destroyed, because that lane binds a
+        # candidate to the target property and refuses what it cannot verify,
+        # and because a hyperlinked flyer currently never reaches the code
+        # written to judge it.
+        ingest_started = time.monotonic()
+        with asset_timing_capture() as asset_timings:
+            pdf_manifest, linked_asset_manifest = _run_asset_lanes(
+                lambda: fetch_and_process_pdfs(
+                    headers,
+                    msg_id,
+                    target_property_hint=native_target_property_hint,
+                    attachment_snapshot=attachment_snapshot,
+                ),
+                lambda: fetch_and_process_linked_assets(
+                    asset_link_candidates(clean_urls, full_body_resp),
+                    target_property_hint=native_target_property_hint,
+                ),
+            )
+        _log_asset_timings(user_id, msg_id, asset_timings, time.monotonic() - ingest_started)
 
         if pdf_manifest:
             # Categorize PDFs into flyers vs floorplans based on filename
@@ -7519,30 +7845,14 @@ def process_inbox_message(
             # If new_property event is detected, links go to the new row, not this one
             # See deferred PDF link writing after event processing
         
-        # URL exploration - find URLs in message and fetch content for AI processing only
-        url_texts = []
-        clean_urls = []
-        url_pattern = r'https?://[^\s<>"\']+'
-        fresh_url_source, _ = _split_fresh_and_quoted(_full_text)
-        urls_found = re.findall(url_pattern, fresh_url_source)
-        
-        for url in urls_found[:3]:  # Limit to 3 URLs to avoid overwhelming
-            clean = _sanitize_url(url)
-            clean_urls.append(clean)
+        # URL exploration - fetch page content for AI processing only. Only URLs
+        # the broker typed as visible text are fetched and read into the
+        # extraction prompt.
+        for clean in clean_urls:
             fetched_text = fetch_url_as_text(clean)
             if fetched_text:
                 url_texts.append({"url": clean, "text": fetched_text})
 
-        # The page-fetch above keeps exactly today's inputs -- only URLs the
-        # broker typed as visible text are fetched and read into the extraction
-        # prompt. The linked-asset lane additionally gets the hyperlinks that
-        # normalize_graph_body destroyed, because that lane binds a candidate to
-        # the target property and refuses what it cannot verify, and because a
-        # hyperlinked flyer currently never reaches the code written to judge it.
-        linked_asset_manifest = fetch_and_process_linked_assets(
-            asset_link_candidates(clean_urls, full_body_resp),
-            target_property_hint=native_target_property_hint,
-        )
         if linked_asset_manifest:
             pdf_manifest.extend(linked_asset_manifest)
             for asset in linked_asset_manifest:
@@ -7655,6 +7965,7 @@ def process_inbox_message(
                         "sourceInternetMessageId": internet_message_id,
                         "replayAttemptId": operator_replay_attempt_id,
                         "createdAt": SERVER_TIMESTAMP,
+                        "expiresAt": expires_at(SHEET_CHANGELOG_RETENTION),
                         "fileIds": file_ids,
                         "proposalHash": applied_hash,
                     })
@@ -8303,10 +8614,13 @@ def process_inbox_message(
                                     )
                                     
                                     # Get existing comments to append to them
-                                    existing_resp = sheets.spreadsheets().values().get(
-                                        spreadsheetId=sheet_id,
-                                        range=f"{tab_title}!{chr(64 + comments_col_idx)}{new_rownum}"
-                                    ).execute()
+                                    existing_resp = _execute_with_retry(
+                                        sheets.spreadsheets().values().get(
+                                            spreadsheetId=sheet_id,
+                                            range=f"{tab_title}!{chr(64 + comments_col_idx)}{new_rownum}"
+                                        ),
+                                        "read_moved_row_comment",
+                                    )
                                     existing_comment = ""
                                     if existing_resp.get("values"):
                                         existing_comment = existing_resp["values"][0][0] if existing_resp["values"][0] else ""
@@ -8318,12 +8632,16 @@ def process_inbox_message(
                                         final_comment = unavailable_comment
                                     
                                     # Update the comments cell
-                                    sheets.spreadsheets().values().update(
-                                        spreadsheetId=sheet_id,
-                                        range=f"{tab_title}!{chr(64 + comments_col_idx)}{new_rownum}",
-                                        valueInputOption="RAW",
-                                        body={"values": [[final_comment]]}
-                                    ).execute()
+                                    _execute_with_retry(
+                                        sheets.spreadsheets().values().update(
+                                            spreadsheetId=sheet_id,
+                                            range=f"{tab_title}!{chr(64 + comments_col_idx)}{new_rownum}",
+                                            valueInputOption="RAW",
+                                            body={"values": [[final_comment]]}
+                                        ),
+                                        "update_moved_row_comment",
+                                    )
+                                    invalidate_sheet_snapshot(sheet_id)
                                     
                                     print(f"💬 Added unavailability comment: {unavailable_comment}")
                                 else:
@@ -8580,10 +8898,13 @@ def process_inbox_message(
                         close_reason = _close_reason_from_event(event)
                         if not _close_event_can_bypass_missing_fields(event):
                             tab_title = _get_first_tab_title(sheets, sheet_id)
-                            current_resp = sheets.spreadsheets().values().get(
-                                spreadsheetId=sheet_id,
-                                range=f"{tab_title}!{rownum}:{rownum}"
-                            ).execute()
+                            current_resp = _execute_with_retry(
+                                sheets.spreadsheets().values().get(
+                                    spreadsheetId=sheet_id,
+                                    range=f"{tab_title}!{rownum}:{rownum}"
+                                ),
+                                "read_current_row",
+                            )
                             current_row = current_resp.get("values", [[]])[0] if current_resp.get("values") else []
                             if len(current_row) < len(header):
                                 current_row.extend([""] * (len(header) - len(current_row)))
@@ -8689,22 +9010,29 @@ def process_inbox_message(
                                 comments_col_idx = find_client_comment_column_index(header)
 
                                 if comments_col_idx:
-                                    existing_resp = sheets.spreadsheets().values().get(
-                                        spreadsheetId=sheet_id,
-                                        range=f"{tab_title}!{chr(64 + comments_col_idx)}{new_rownum}"
-                                    ).execute()
+                                    existing_resp = _execute_with_retry(
+                                        sheets.spreadsheets().values().get(
+                                            spreadsheetId=sheet_id,
+                                            range=f"{tab_title}!{chr(64 + comments_col_idx)}{new_rownum}"
+                                        ),
+                                        "read_moved_row_comment",
+                                    )
                                     existing_comment = ""
                                     if existing_resp.get("values"):
                                         existing_comment = existing_resp["values"][0][0] if existing_resp["values"][0] else ""
 
                                     final_comment = f"{existing_comment.strip()} | {optout_comment}" if existing_comment.strip() else optout_comment
 
-                                    sheets.spreadsheets().values().update(
-                                        spreadsheetId=sheet_id,
-                                        range=f"{tab_title}!{chr(64 + comments_col_idx)}{new_rownum}",
-                                        valueInputOption="RAW",
-                                        body={"values": [[final_comment]]}
-                                    ).execute()
+                                    _execute_with_retry(
+                                        sheets.spreadsheets().values().update(
+                                            spreadsheetId=sheet_id,
+                                            range=f"{tab_title}!{chr(64 + comments_col_idx)}{new_rownum}",
+                                            valueInputOption="RAW",
+                                            body={"values": [[final_comment]]}
+                                        ),
+                                        "update_moved_row_comment",
+                                    )
+                                    invalidate_sheet_snapshot(sheet_id)
 
                                 format_sheet_columns_autosize_with_exceptions(sheet_id, header)
                                 old_row_became_nonviable = True
@@ -8877,22 +9205,29 @@ def process_inbox_message(
                                 current_date = datetime.now().strftime("%m/%d/%Y")
                                 issue_comment = f"[{current_date}] ⚠️ PROPERTY ISSUE ({severity.upper()}): {issue}"
 
-                                existing_resp = sheets.spreadsheets().values().get(
-                                    spreadsheetId=sheet_id,
-                                    range=f"{tab_title}!{chr(64 + comments_col_idx)}{rownum}"
-                                ).execute()
+                                existing_resp = _execute_with_retry(
+                                    sheets.spreadsheets().values().get(
+                                        spreadsheetId=sheet_id,
+                                        range=f"{tab_title}!{chr(64 + comments_col_idx)}{rownum}"
+                                    ),
+                                    "read_row_comment",
+                                )
                                 existing_comment = ""
                                 if existing_resp.get("values"):
                                     existing_comment = existing_resp["values"][0][0] if existing_resp["values"][0] else ""
 
                                 final_comment = f"{existing_comment.strip()} | {issue_comment}" if existing_comment.strip() else issue_comment
 
-                                sheets.spreadsheets().values().update(
-                                    spreadsheetId=sheet_id,
-                                    range=f"{tab_title}!{chr(64 + comments_col_idx)}{rownum}",
-                                    valueInputOption="RAW",
-                                    body={"values": [[final_comment]]}
-                                ).execute()
+                                _execute_with_retry(
+                                    sheets.spreadsheets().values().update(
+                                        spreadsheetId=sheet_id,
+                                        range=f"{tab_title}!{chr(64 + comments_col_idx)}{rownum}",
+                                        valueInputOption="RAW",
+                                        body={"values": [[final_comment]]}
+                                    ),
+                                    "update_row_comment",
+                                )
+                                invalidate_sheet_snapshot(sheet_id)
                                 print(f"💬 Added property issue comment: {issue}")
                         except Exception as comment_err:
                             print(f"⚠️ Could not add issue comment: {comment_err}")
@@ -9251,9 +9586,12 @@ Could you please provide your phone number so I can give you a call?"""
                     
                     # Check if row is below NON-VIABLE divider
                     try:
-                        div_resp = sheets.spreadsheets().values().get(
-                            spreadsheetId=sheet_id, range=f"{tab_title}!A:A"
-                        ).execute()
+                        div_resp = _execute_with_retry(
+                            sheets.spreadsheets().values().get(
+                                spreadsheetId=sheet_id, range=f"{tab_title}!A:A"
+                            ),
+                            "read_divider_column",
+                        )
                         a_col = div_resp.get("values", [])
                         divider_row = None
                         for i, r in enumerate(a_col, start=1):
@@ -9268,10 +9606,13 @@ Could you please provide your phone number so I can give you a call?"""
                         print("ℹ️ Skipping response for non-viable or pending new property row")
                     else:
                         # Re-read row data to check missing fields
-                        resp = sheets.spreadsheets().values().get(
-                            spreadsheetId=sheet_id,
-                            range=f"{tab_title}!{rownum}:{rownum}"
-                        ).execute()
+                        resp = _execute_with_retry(
+                            sheets.spreadsheets().values().get(
+                                spreadsheetId=sheet_id,
+                                range=f"{tab_title}!{rownum}:{rownum}"
+                            ),
+                            "read_current_row",
+                        )
                         current_row = resp.get("values", [[]])[0] if resp.get("values") else []
                         if len(current_row) < len(header):
                             current_row.extend([""] * (len(header) - len(current_row)))
@@ -9418,12 +9759,73 @@ Could you please provide your phone number so I can give you a call?"""
             )
             raise RetryableProcessingError("OpenAI proposal was unavailable or invalid JSON")
 
+MAIL_DELTA_SYNC_ENV = "SITESIFT_MAIL_DELTA_SYNC"
+
+
+def _mail_delta_sync_enabled() -> bool:
+    """Page the Inbox/SentItems scans from a stored Graph deltaLink.
+
+    On by default. Off under E2E_TEST_MODE and while a mailbox read fence is
+    installed, whose fixture lane answers the windowed queries only. Set
+    SITESIFT_MAIL_DELTA_SYNC=0/false/no/off to go back to windowed scans.
+    """
+    if os.getenv("E2E_TEST_MODE") == "true" or _MAILBOX_READER.get() is not None:
+        return False
+    return os.getenv(MAIL_DELTA_SYNC_ENV, "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _delta_token_expired(error: Exception) -> bool:
+    """Graph answers an expired or unknown delta token with 410, or 400 and a sync-state code."""
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status == 410:
+        return True
+    if status != 400:
+        return False
+    try:
+        code = str(((response.json() or {}).get("error") or {}).get("code") or "")
+    except Exception:
+        return False
+    return "syncstate" in code.lower() or "resync" in code.lower()
+
+
+def _delta_first_page(
+    messages_url: str,
+    delta_link: Optional[str],
+    select: str,
+    cutoff_iso: str,
+    top: int,
+    headers: Dict[str, str],
+) -> Tuple[str, Optional[Dict[str, str]], Dict[str, str]]:
+    """(url, params, headers) for the first page of a delta round.
+
+    Without a stored link the round starts a new sync bounded to the scan
+    window, so the first delta pass costs what one windowed scan does.
+    """
+    page_headers = dict(headers)
+    page_headers["Prefer"] = f"odata.maxpagesize={top}"
+    if delta_link:
+        return delta_link, None, page_headers
+    return (
+        f"{messages_url}/delta",
+        {"$select": select, "$filter": f"receivedDateTime ge {cutoff_iso}"},
+        page_headers,
+    )
+
+
 def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread: bool = True, top: int = 50):
     """
     Idempotent scan of inbox for replies with early exit on processed messages.
 
     BATCHING: Groups multiple unprocessed messages in the same thread together
     to prevent conflicting auto-responses when contact sends multiple emails quickly.
+
+    DELTA SYNC: with _mail_delta_sync_enabled(), pages come from the stored
+    Inbox deltaLink, so a run reads only messages added or changed since the
+    last one. The new link is saved only once every in-window message of the
+    round is processed; anything left retryable is delivered again next run,
+    as the windowed scan would have re-listed it. An expired token falls back
+    to the windowed scan and starts a new delta sync on the next run.
     """
     base = "https://graph.microsoft.com/v1.0"
 
@@ -9441,16 +9843,23 @@ def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread:
 
     filter_str = " and ".join(filters)
 
-    params = {
+    select = (
+        "id,subject,from,sender,replyTo,toRecipients,ccRecipients,"
+        "receivedDateTime,sentDateTime,conversationId,internetMessageId,"
+        "internetMessageHeaders,bodyPreview,hasAttachments"
+    )
+    windowed_params = {
         "$top": str(top),
         "$orderby": "receivedDateTime asc",  # CHANGED: oldest first for proper batching
-        "$select": (
-            "id,subject,from,sender,replyTo,toRecipients,ccRecipients,"
-            "receivedDateTime,sentDateTime,conversationId,internetMessageId,"
-            "internetMessageHeaders,bodyPreview,hasAttachments"
-        ),
+        "$select": select,
         "$filter": filter_str
     }
+    params = windowed_params
+    page_headers = headers
+    # Delta sync cannot filter on isRead, so unread-only scans stay windowed.
+    use_delta = not only_unread and _mail_delta_sync_enabled()
+    next_delta_link = None
+    delta_round_keys = []  # in-window keys this delta round delivered
 
     # PHASE 1: Collect all unprocessed messages and group by thread
     from collections import defaultdict
@@ -9459,25 +9868,61 @@ def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread:
 
     scanned_count = 0
     skipped_count = 0
+    # Processed keys known for this scan. Filled with one batched read per Graph
+    # page rather than one processedMessages point read per message.
+    processed_keys = set()
 
     try:
         url = f"{base}/me/mailFolders/Inbox/messages"
+        messages_url = url
+        if use_delta:
+            url, params, page_headers = _delta_first_page(
+                messages_url, get_delta_link(user_id, "inbox"), select, cutoff_iso, top, headers
+            )
+        first_page = True
 
         while url:
-            response = exponential_backoff_request(
-                lambda: _mailbox_reader().read(
-                    "inbox_message_page", url, headers=headers, params=params, timeout=30
+            try:
+                response = exponential_backoff_request(
+                    lambda: _mailbox_reader().read(
+                        "inbox_message_page", url, headers=page_headers, params=params, timeout=30
+                    )
                 )
-            )
+            except requests.exceptions.HTTPError as e:
+                if not (use_delta and first_page and _delta_token_expired(e)):
+                    raise
+                print("🔁 Inbox delta token expired; falling back to the windowed scan")
+                set_delta_link(user_id, "inbox", None)
+                use_delta = False
+                url, params, page_headers = messages_url, windowed_params, headers
+                continue
+            first_page = False
             data = response.json()
-            messages = data.get("value", [])
+            # A delta round also reports deletions; there is nothing to scan in those.
+            messages = [msg for msg in data.get("value", []) if "@removed" not in msg]
+            if use_delta:
+                next_delta_link = data.get("@odata.deltaLink") or next_delta_link
 
             if not messages:
+                if use_delta and data.get("@odata.nextLink"):
+                    url, params = data["@odata.nextLink"], None
+                    continue
                 break
 
             if scanned_count == 0:  # First batch
                 print(f"📥 Found {len(messages)} inbox messages to scan")
 
+            processed_keys |= has_processed_many(
+                user_id,
+                (msg.get("internetMessageId") or msg.get("id") for msg in messages),
+            )
+            unprocessed = [
+                msg for msg in messages
+                if (msg.get("internetMessageId") or msg.get("id")) not in processed_keys
+            ]
+            _fill_missing_internet_headers(unprocessed, headers)
+            _prewarm_thread_matches(user_id, unprocessed)
+
             for msg in messages:
                 scanned_count += 1
 
@@ -9496,9 +9941,11 @@ def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread:
                 if not processed_key:
                     print(f"⚠️ Message has no internetMessageId or id, skipping")
                     continue
+                if use_delta:
+                    delta_round_keys.append(processed_key)
 
                 # Check if already processed
-                if has_processed(user_id, processed_key):
+                if processed_key in processed_keys:
                     skipped_count += 1
                     continue
 
@@ -9528,10 +9975,25 @@ def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread:
         print(f"❌ Failed to scan inbox: {state.get('error')}")
         return state
 
+    # Delta pages arrive in change order, not receivedDateTime order.
+    if use_delta:
+        for messages in thread_messages.values():
+            messages.sort(key=lambda msg: msg.get("receivedDateTime") or "")
+        orphan_messages.sort(key=lambda msg: msg.get("receivedDateTime") or "")
+
     # PHASE 2: Process messages - batched by thread
     processed_count = 0
     batched_count = 0
 
+    # Full-message reads are taken in $batch windows, in processing order.
+    readahead = _INBOX_READAHEAD.get()
+    if readahead is not None:
+        readahead.register(
+            headers,
+            [msg.get("id") for messages in thread_messages.values() for msg in messages]
+            + [msg.get("id") for msg in orphan_messages],
+        )
+
     # Resolve the authenticated mailbox once for the entire scan and share it
     # with every singleton, orphan, batch shortcut, and newest-message path.
     # Without a verified identity, any From/Sender comparison would fail open
@@ -9558,12 +10020,11 @@ def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread:
                 "orphaned": len(orphan_messages),
             }
 
-    # Process thread batches (multiple messages in same thread)
-    # Add delay between processing to avoid Google Sheets rate limits (60 reads/min)
-    RATE_LIMIT_DELAY = 3  # seconds between processing each thread
-
+    # Process thread batches (multiple messages in same thread). There is no
+    # fixed pause between threads: Sheets, Graph and OpenAI calls each draw from
+    # the shared rate governor, so only work that actually consumes a quota waits.
     thread_list = list(thread_messages.items())
-    for idx, (thread_id, messages) in enumerate(thread_list):
+    for thread_id, messages in thread_list:
         if len(messages) > 1:
             # BATCH PROCESSING: Multiple messages in same thread
             print(f"📦 Batching {len(messages)} messages for thread {thread_id[:20]}...")
@@ -9626,8 +10087,6 @@ def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread:
             # thread to the next scan. This prevents a later message from
             # triggering a reply before the predecessor's assets are settled.
             if attachment_predecessor_handled:
-                if idx < len(thread_list) - 1:
-                    time.sleep(RATE_LIMIT_DELAY)
                 continue
 
             # Process the last message (which will see all previous in conversation)
@@ -9699,12 +10158,8 @@ def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread:
                 else:
                     print(f"🔁 Leaving message retryable: {processed_key}")
 
-        # Rate limit delay between threads (skip delay after last one)
-        if idx < len(thread_list) - 1:
-            time.sleep(RATE_LIMIT_DELAY)
-
     # Process orphan messages (couldn't match to thread - will be ignored by process_inbox_message)
-    for idx, msg in enumerate(orphan_messages):
+    for msg in orphan_messages:
         processing_error = None
         processed_key = msg.get("internetMessageId") or msg.get("id")
         try:
@@ -9734,13 +10189,16 @@ def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread:
             else:
                 print(f"🔁 Leaving orphan message retryable: {processed_key}")
 
-        # Rate limit delay between orphan messages (skip delay after last one)
-        if idx < len(orphan_messages) - 1:
-            time.sleep(RATE_LIMIT_DELAY)
-
     # Set last scan timestamp
     set_last_scan_iso(user_id, now_utc.isoformat().replace("+00:00", "Z"))
 
+    if use_delta and next_delta_link:
+        unsettled = set(delta_round_keys) - has_processed_many(user_id, delta_round_keys)
+        if unsettled:
+            print(f"🔁 Keeping the inbox delta link; {len(unsettled)} message(s) still retryable")
+        else:
+            set_delta_link(user_id, "inbox", next_delta_link)
+
     # Summary log
     if batched_count > 0:
         print(f"📥 Scanned {scanned_count}; processed {processed_count}; batched {batched_count} extra messages; skipped {skipped_count}")
@@ -9758,6 +10216,35 @@ def scan_inbox_against_index(user_id: str, headers: Dict[str, str], only_unread:
     }
 
 
+def _reply_header_ids(internet_message_headers) -> Tuple[Optional[str], List[str]]:
+    """Return (normalized In-Reply-To, References oldest-to-newest)."""
+    in_reply_to = None
+    references = []
+    for header in internet_message_headers or []:
+        name = header.get("name", "").lower()
+        value = header.get("value", "")
+        if name == "in-reply-to":
+            in_reply_to = normalize_message_id(value)
+        elif name == "references":
+            references = parse_references_header(value)
+    return in_reply_to, references
+
+
+def _prewarm_thread_matches(user_id: str, messages: List[dict]) -> None:
+    """Fetch every msgIndex/convIndex key a page could match on in one batched read."""
+    message_ids = []
+    conversation_ids = []
+    for msg in messages:
+        in_reply_to, references = _reply_header_ids(msg.get("internetMessageHeaders"))
+        if in_reply_to:
+            message_ids.append(in_reply_to)
+        message_ids.extend(normalize_message_id(ref) for ref in references)
+        if msg.get("conversationId"):
+            conversation_ids.append(msg["conversationId"])
+    if message_ids or conversation_ids:
+        prewarm_thread_resolution(user_id, message_ids, conversation_ids)
+
+
 def _match_message_to_thread(user_id: str, msg: dict, headers: dict) -> Optional[str]:
     """
     Try to match an inbox message to an existing thread.
@@ -9780,18 +10267,7 @@ def _match_message_to_thread(user_id: str, msg: dict, headers: dict) -> Optional
         except Exception:
             internet_message_headers = []
 
-    # Extract reply headers
-    in_reply_to = None
-    references = []
-
-    for header in internet_message_headers or []:
-        name = header.get("name", "").lower()
-        value = header.get("value", "")
-        if name == "in-reply-to":
-            in_reply_to = normalize_message_id(value)
-        elif name == "references":
-            references = parse_references_header(value)
-
+    in_reply_to, references = _reply_header_ids(internet_message_headers)
     conversation_id = msg.get("conversationId")
 
     # Try In-Reply-To first
@@ -9846,20 +10322,24 @@ def _save_message_to_thread(
     merged_msg = dict(msg)
     # Fetch full body
     try:
-        full_msg = exponential_backoff_request(
-            lambda: _mailbox_reader().read(
-                "thread_message_body",
-                f"https://graph.microsoft.com/v1.0/me/messages/{msg.get('id')}",
-                headers=headers,
-                params={
-                    "$select": (
-                        "body,hasAttachments,sender,replyTo,ccRecipients,"
-                        "internetMessageHeaders"
-                    )
-                },
-                timeout=30
-            )
-        ).json() or {}
+        readahead_msg = _readahead_message(msg.get("id"))
+        if readahead_msg is not None:
+            full_msg = readahead_msg
+        else:
+            full_msg = exponential_backoff_request(
+                lambda: _mailbox_reader().read(
+                    "thread_message_body",
+                    f"https://graph.microsoft.com/v1.0/me/messages/{msg.get('id')}",
+                    headers=headers,
+                    params={
+                        "$select": (
+                            "body,hasAttachments,sender,replyTo,ccRecipients,"
+                            "internetMessageHeaders"
+                        )
+                    },
+                    timeout=30
+                )
+            ).json() or {}
         merged_msg = merge_readback(msg, full_msg)
         cc_recipients = _recipient_email_addresses(merged_msg.get("ccRecipients"))
         reply_to_recipients = _recipient_email_addresses(merged_msg.get("replyTo"))
@@ -10011,29 +10491,57 @@ def scan_sent_items_for_manual_replies(user_id: str, headers: Dict[str, str], to
         print(f"📤 Scanning SentItems for manual replies in {len(tracked_conversation_ids)} tracked conversations...")
         
         # Scan SentItems for messages in tracked conversations
-        params = {
+        select = "id,subject,from,toRecipients,sentDateTime,conversationId,internetMessageId,body,bodyPreview"
+        windowed_params = {
             "$top": str(top),
             "$orderby": "sentDateTime desc",
-            "$select": "id,subject,from,toRecipients,sentDateTime,conversationId,internetMessageId,body,bodyPreview",
+            "$select": select,
             "$filter": f"sentDateTime ge {cutoff_iso}"
         }
+        params = windowed_params
+        page_headers = headers
+        # Indexing a sent message is idempotent, so the SentItems delta link
+        # always advances once the round is read.
+        use_delta = _mail_delta_sync_enabled()
+        next_delta_link = None
         
         processed_count = 0
         scanned_count = 0
         
         try:
             url = f"{base}/me/mailFolders/SentItems/messages"
+            messages_url = url
+            if use_delta:
+                url, params, page_headers = _delta_first_page(
+                    messages_url, get_delta_link(user_id, "sentItems"), select, cutoff_iso, top, headers
+                )
+            first_page = True
             
             while url:
-                response = exponential_backoff_request(
-                    lambda: _mailbox_reader().read(
-                        "sent_items_page", url, headers=headers, params=params, timeout=30
+                try:
+                    response = exponential_backoff_request(
+                        lambda: _mailbox_reader().read(
+                            "sent_items_page", url, headers=page_headers, params=params, timeout=30
+                        )
                     )
-                )
+                except requests.exceptions.HTTPError as e:
+                    if not (use_delta and first_page and _delta_token_expired(e)):
+                        raise
+                    print("🔁 SentItems delta token expired; falling back to the windowed scan")
+                    set_delta_link(user_id, "sentItems", None)
+                    use_delta = False
+                    url, params, page_headers = messages_url, windowed_params, headers
+                    continue
+                first_page = False
                 data = response.json()
-                messages = data.get("value", [])
+                messages = [msg for msg in data.get("value", []) if "@removed" not in msg]
+                if use_delta:
+                    next_delta_link = data.get("@odata.deltaLink") or next_delta_link
                 
                 if not messages:
+                    if use_delta and data.get("@odata.nextLink"):
+                        url, params = data["@odata.nextLink"], None
+                        continue
                     break
                 
                 for msg in messages:
@@ -10045,6 +10553,8 @@ def scan_sent_items_for_manual_replies(user_id: str, headers: Dict[str, str], to
                         try:
                             msg_time = datetime.fromisoformat(sent_dt.replace('Z', '+00:00'))
                             if msg_time < cutoff_time:
+                                if use_delta:
+                                    continue  # delta pages are not in sentDateTime order
                                 url = None  # Stop pagination
                                 break
                         except Exception as e:
@@ -10148,6 +10658,9 @@ def scan_sent_items_for_manual_replies(user_id: str, headers: Dict[str, str], to
                 else:
                     url = None
             
+            if use_delta and next_delta_link:
+                set_delta_link(user_id, "sentItems", next_delta_link)
+
             if processed_count > 0:
                 print(f"📤 Indexed {processed_count} manual reply(s) from SentItems")
             else:
@@ -0,0 +1,161 @@
+"""Reuse of a propose_sheet_updates model response across retries.
+
+A message that fails after the extraction call (a Sheets write, a
+reply-review projection, a transient Graph error) is re-run by
+retry_processing_failures or the next inbox scan, which used to send, and
+pay for, the identical gpt-5.2 request again. The validated response text is
+kept in ``users/{uid}/proposalCache/{digest}`` for PROPOSAL_CACHE_TTL_SECONDS;
+the retention pass deletes expired docs (retention.PROPOSAL_CACHE_RETENTION).
+
+The digest is certification.canonical_json.canonical_digest over the model,
+temperature, the full input (inline images by their SHA-256) and the column
+rules, so any change to the conversation, attachments or config misses. The
+deterministic post-processing in propose_sheet_updates still runs on every
+pass; only the model call is skipped.
+
+Inert under E2E_TEST_MODE.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from google.cloud.firestore import SERVER_TIMESTAMP
+
+from .certification.canonical_json import CanonicalJSONError, canonical_digest
+
+
+PROPOSAL_CACHE_COLLECTION = "proposalCache"
+PROPOSAL_CACHE_TTL_ENV = "PROPOSAL_CACHE_TTL_SECONDS"
+PROPOSAL_CACHE_TTL_DEFAULT_SECONDS = 6 * 60 * 60
+# Keeps the doc well under Firestore's 1 MiB cap; longer replies are re-requested.
+PROPOSAL_CACHE_MAX_OUTPUT_CHARS = 200_000
+_DIGEST_SCHEMA = "propose-sheet-updates-request-v1"
+
+
+def _proposal_cache_enabled() -> bool:
+    return os.getenv("E2E_TEST_MODE") != "true"
+
+
+def _ttl_seconds() -> int:
+    try:
+        return max(0, int(os.getenv(PROPOSAL_CACHE_TTL_ENV, "")))
+    except ValueError:
+        return PROPOSAL_CACHE_TTL_DEFAULT_SECONDS
+
+
+def _digestable_content(item: Mapping[str, Any]) -> Dict[str, Any]:
+    if item.get("type") == "input_image":
+        image_url = str(item.get("image_url") or "")
+        return {"type": "input_image", "sha256": hashlib.sha256(image_url.encode("utf-8")).hexdigest()}
+    return dict(item)
+
+
+def proposal_request_digest(request: Mapping[str, Any], *, column_rules: str) -> Optional[str]:
+    """Canonical digest of a Responses request, or None if it cannot be digested."""
+    try:
+        return canonical_digest({
+            "schema": _DIGEST_SCHEMA,
+            "model": request.get("model"),
+            # canonical JSON refuses floats; the repr is exact for a literal.
+            "temperature": repr(request.get("temperature")),
+            "input": [
+                {
+                    "role": message.get("role"),
+                    "content": [_digestable_content(item) for item in message.get("content") or []],
+                }
+                for message in request.get("input") or []
+            ],
+            "columnRules": column_rules,
+        })
+    except (CanonicalJSONError, AttributeError, TypeError) as e:
+        print(f"⚠️ proposal cache: request not digestable, calling the model: {e}")
+        return None
+
+
+class ProposalCache:
+    """Firestore-backed store of validated extraction responses, per user."""
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: Optional[int] = None,
+        enabled: Callable[[], bool] = _proposal_cache_enabled,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._enabled = enabled
+        self._clock = clock
+
+    def enabled(self) -> bool:
+        return self._enabled() and self._ttl() > 0
+
+    def _ttl(self) -> int:
+        return self._ttl_seconds if self._ttl_seconds is not None else _ttl_seconds()
+
+    def _doc(self, db: Any, uid: str, digest: str):
+        return db.collection("users").document(uid).collection(PROPOSAL_CACHE_COLLECTION).document(digest)
+
+    def get(self, db: Any, uid: str, digest: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The stored ``{outputText, model, costUsd}``, or None on miss/expiry."""
+        if not digest or not uid or not self.enabled():
+            return None
+        try:
+            snapshot = self._doc(db, uid, digest).get()
+        except Exception as e:  # noqa: BLE001 — a miss just calls the model
+            print(f"⚠️ proposal cache: read failed, calling the model: {e}")
+            return None
+        if not getattr(snapshot, "exists", False):
+            return None
+        data = snapshot.to_dict() or {}
+        expires_at = data.get("expiresAt")
+        if not isinstance(expires_at, datetime) or expires_at <= self._clock():
+            return None
+        output_text = data.get("outputText")
+        if not isinstance(output_text, str) or not output_text.strip():
+            return None
+        return {
+            "outputText": output_text,
+            "model": data.get("model"),
+            "costUsd": data.get("costUsd") or 0.0,
+        }
+
+    def put(
+        self,
+        db: Any,
+        uid: str,
+        digest: Optional[str],
+        *,
+        output_text: str,
+        model: str,
+        cost_usd: float,
+        thread_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> None:
+        if not digest or not uid or not self.enabled():
+            return
+        if len(output_text or "") > PROPOSAL_CACHE_MAX_OUTPUT_CHARS:
+            return
+        now = self._clock()
+        try:
+            self._doc(db, uid, digest).set({
+                "outputText": output_text,
+                "model": model,
+                "costUsd": cost_usd,
+                "threadId": thread_id,
+                "requestId": request_id,
+                "createdAt": SERVER_TIMESTAMP,
+                "expiresAt": now + timedelta(seconds=self._ttl()),
+            })
+        except Exception as e:  # noqa: BLE001 — the next retry just pays again
+            print(f"⚠️ proposal cache: write failed: {e}")
+
+
+_PROPOSAL_CACHE = ProposalCache()
+
+
+def proposal_cache() -> ProposalCache:
+    return _PROPOSAL_CACHE
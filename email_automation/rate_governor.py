@@ -0,0 +1,292 @@
+"""Shared per-API token-bucket rate governor.
+
+Replaces the blind ``time.sleep(RATE_LIMIT_DELAY)`` the inbox scan used to pay
+between every thread. A thread that never touched Sheets paid the same 3s as
+one that did a dozen reads, so a 50-message burst spent minutes asleep. Now the
+call sites that actually consume a quota draw from a bucket for THAT quota, and
+everything else runs immediately:
+
+  * ``sheets_read`` / ``sheets_write`` - Sheets per-user per-minute quotas,
+    drawn by ``sheets._execute_with_retry``.
+  * ``graph`` - keyed per mailbox, drawn by ``GraphMailboxReader.read``.
+  * ``openai_tpm`` - tokens per minute, drawn by the ambient AI transports with
+    an estimate of the request size.
+
+Buckets are adaptive (AIMD): a real 429 halves the bucket's refill rate and
+drains it, honouring Retry-After when given; every success then nudges the rate
+back toward its configured ceiling. The configured rate is therefore a ceiling,
+not a promise - the provider's actual answer wins.
+
+Budgets are configurable with ``SITESIFT_RATE_<API>_PER_MINUTE`` (e.g.
+``SITESIFT_RATE_SHEETS_READ_PER_MINUTE=60``). The governor is a no-op under
+E2E_TEST_MODE, read live for the same reason as
+``processing._await_index_read_after_write``: the suite drives hundreds of
+in-memory Sheets calls per module and must not wait on a real quota.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class BucketSpec:
+    per_minute: float
+    burst: float
+
+
+# Ceilings, not targets. Sheets: 60 reads and 60 writes per minute per user per
+# project. Graph: 10,000 requests per 10 minutes per app per mailbox, so 1,000/min
+# with headroom for the send path. OpenAI TPM depends on the org tier; the
+# default is deliberately below the tier we run on so a burst of large flyer
+# prompts queues here instead of being rejected there.
+DEFAULT_BUCKETS: Dict[str, BucketSpec] = {
+    "sheets_read": BucketSpec(per_minute=60, burst=20),
+    "sheets_write": BucketSpec(per_minute=60, burst=20),
+    "graph": BucketSpec(per_minute=900, burst=100),
+    "openai_tpm": BucketSpec(per_minute=800_000, burst=200_000),
+}
+
+# A 429 never shrinks a bucket below this fraction of its configured rate; a
+# provider that stays angry is better handled by the per-call retry loops than
+# by starving the whole run.
+MIN_RATE_FRACTION = 0.1
+# Fraction of the configured rate restored on each success after a 429.
+RECOVERY_FRACTION = 0.05
+# No single acquire waits longer than this. A caller that cannot get a token in
+# this long proceeds and lets the provider's own 429 handling take over, so a
+# mis-sized bucket can slow a run but never hang it.
+MAX_WAIT_SECONDS = 120.0
+_TOKEN_EPSILON = 1e-6
+
+
+def governor_enabled() -> bool:
+    if os.getenv("E2E_TEST_MODE") == "true":
+        return False
+    value = os.getenv("SITESIFT_RATE_GOVERNOR", "").strip().lower()
+    return value not in {"0", "false", "no", "off"}
+
+
+def _spec_from_env(api: str, default: BucketSpec) -> BucketSpec:
+    raw = os.getenv(f"SITESIFT_RATE_{api.upper()}_PER_MINUTE", "")
+    if not raw.strip():
+        return default
+    try:
+        per_minute = float(raw)
+    except ValueError:
+        return default
+    if per_minute <= 0:
+        return default
+    burst = min(default.burst, per_minute) if default.burst else per_minute
+    return BucketSpec(per_minute=per_minute, burst=max(1.0, burst))
+
+
+class TokenBucket:
+    """Thread-safe token bucket with adaptive (AIMD) refill rate."""
+
+    def __init__(
+        self,
+        spec: BucketSpec,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.spec = spec
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._rate = spec.per_minute / 60.0
+        self._tokens = float(spec.burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self.waited_seconds = 0.0
+        self.rate_limited = 0
+
+    @property
+    def rate_per_minute(self) -> float:
+        return self._rate * 60.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(float(self.spec.burst), self._tokens + elapsed * self._rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, *, max_wait: float = MAX_WAIT_SECONDS) -> float:
+        """Take ``tokens``, sleeping only as long as the bucket requires.
+
+        Returns the seconds waited. A request larger than the burst is clamped to
+        the burst so it can still be admitted once the bucket is full.
+        """
+        tokens = min(max(0.0, float(tokens)), float(self.spec.burst))
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                delay = max(0.0, self._blocked_until - now)
+                if not delay:
+                    # Tolerate float residue from refill arithmetic; without it a
+                    # wait computed to the exact deficit can fall a hair short
+                    # forever.
+                    if self._tokens >= tokens - _TOKEN_EPSILON:
+                        self._tokens -= tokens
+                        self.waited_seconds += waited
+                        return waited
+                    delay = (tokens - self._tokens) / self._rate
+            if waited + delay > max_wait:
+                with self._lock:
+                    # Admit anyway and go into debt, so the next caller still
+                    # waits for what this one borrowed.
+                    self._tokens -= tokens
+                    self.waited_seconds += waited
+                return waited
+            self._sleep(delay)
+            waited += delay
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        floor = self.spec.per_minute / 60.0 * MIN_RATE_FRACTION
+        with self._lock:
+            now = self._clock()
+            self._rate = max(floor, self._rate / 2.0)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = now
+            if retry_after and retry_after > 0:
+                self._blocked_until = max(self._blocked_until, now + float(retry_after))
+            self.rate_limited += 1
+
+    def on_success(self) -> None:
+        ceiling = self.spec.per_minute / 60.0
+        with self._lock:
+            if self._rate < ceiling:
+                self._rate = min(ceiling, self._rate + ceiling * RECOVERY_FRACTION)
+
+
+class RateGovernor:
+    """Registry of buckets keyed by ``(api, key)``; one per process by default."""
+
+    def __init__(
+        self,
+        specs: Optional[Mapping[str, BucketSpec]] = None,
+        *,
+        enabled: Optional[Callable[[], bool]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._specs = dict(specs) if specs is not None else None
+        self._enabled = enabled or governor_enabled
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def _spec(self, api: str) -> BucketSpec:
+        if self._specs is not None:
+            return self._specs[api]
+        return _spec_from_env(api, DEFAULT_BUCKETS[api])
+
+    def bucket(self, api: str, key: Optional[str] = None) -> TokenBucket:
+        bucket_key = (api, key or "")
+        with self._lock:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = TokenBucket(self._spec(api), clock=self._clock, sleep=self._sleep)
+                self._buckets[bucket_key] = bucket
+            return bucket
+
+    def acquire(self, api: str, tokens: float = 1.0, *, key: Optional[str] = None) -> float:
+        if not self._enabled():
+            return 0.0
+        waited = self.bucket(api, key).acquire(tokens)
+        if waited >= 1.0:
+            print(f"⏳ Rate governor held {api}{'/' + key if key else ''} for {waited:.1f}s")
+        return waited
+
+    def report_rate_limited(
+        self,
+        api: str,
+        *,
+        key: Optional[str] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        if not self._enabled():
+            return
+        bucket = self.bucket(api, key)
+        bucket.on_rate_limited(retry_after)
+        print(
+            f"🐢 {api}{'/' + key if key else ''} returned 429; "
+            f"governor rate now {bucket.rate_per_minute:.0f}/min"
+        )
+
+    def report_success(self, api: str, *, key: Optional[str] = None) -> None:
+        if not self._enabled():
+            return
+        self.bucket(api, key).on_success()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            items = list(self._buckets.items())
+        return {
+            f"{api}/{key}" if key else api: {
+                "ratePerMinute": round(bucket.rate_per_minute, 2),
+                "waitedSeconds": round(bucket.waited_seconds, 3),
+                "rateLimited": bucket.rate_limited,
+            }
+            for (api, key), bucket in items
+        }
+
+
+_GOVERNOR = RateGovernor()
+
+# The mailbox the current run is acting for. Context-local so the concurrent
+# user pool (main._run_users_concurrently) keeps each worker on its own Graph
+# bucket without threading a key through every read.
+_CURRENT_MAILBOX: ContextVar = ContextVar("rate_governor_mailbox", default=None)
+
+
+def governor() -> RateGovernor:
+    return _GOVERNOR
+
+
+def bind_mailbox(mailbox_key: Optional[str]) -> None:
+    """Key this context's Graph bucket to ``mailbox_key`` (the user id)."""
+    _CURRENT_MAILBOX.set(mailbox_key)
+
+
+def current_mailbox() -> Optional[str]:
+    return _CURRENT_MAILBOX.get()
+
+
+def retry_after_seconds(headers: Any) -> Optional[float]:
+    try:
+        value = (headers or {}).get("Retry-After")
+    except AttributeError:
+        return None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_openai_tokens(request: Mapping[str, Any]) -> int:
+    """Cheap upper-ish estimate of a request's TPM cost: ~4 chars per token of
+    prompt plus the output allowance. Precision is not the point; the bucket
+    only needs big prompts to weigh more than small ones."""
+    try:
+        prompt = json.dumps(
+            {k: v for k, v in dict(request).items() if k in {"input", "messages", "instructions"}},
+            default=str,
+        )
+    except (TypeError, ValueError):
+        prompt = str(request)
+    output = request.get("max_output_tokens") or request.get("max_completion_tokens") or 0
+    try:
+        output = int(output)
+    except (TypeError, ValueError):
+        output = 0
+    return len(prompt) // 4 + output
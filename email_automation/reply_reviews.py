@@ -14,6 +14,8 @@ from typing import Any, Dict, Mapping, Optional
 from google.cloud import firestore
 from google.cloud.firestore import SERVER_TIMESTAMP
 
+from .message_artifacts import record_message_artifacts
+
 
 # Kept overrideable for hermetic tests; production resolves the shared client
 # lazily so importing this pure contract module never initializes credentials.
@@ -381,6 +383,7 @@ def _apply_projection_transaction(
     review_id: str,
     notification_id: str,
     source_pending_ref=None,
+    user_ref=None,
 ) -> ReplyReviewProjection:
     if not client_snapshot.exists:
         raise ReplyReviewProjectionError("reply review client does not exist")
@@ -430,6 +433,15 @@ def _apply_projection_transaction(
 
     transaction.set(review_ref, review_document)
     transaction.set(notification_ref, notification_document)
+    if user_ref is not None:
+        record_message_artifacts(transaction, user_ref, "deadLetterQueue", review_ref, review_document)
+        record_message_artifacts(
+            transaction,
+            user_ref,
+            f"clients/{intent['clientId']}/notifications",
+            notification_ref,
+            notification_document,
+        )
     transaction.set(client_ref, client_rollups, merge=True)
     transaction.update(thread_ref, thread_pause)
     if source_pending_ref is not None:
@@ -509,6 +521,7 @@ def create_policy_blocked_reply_review(
             intent=intent,
             review_id=review_id,
             notification_id=notification_id,
+            user_ref=user_ref,
         )
 
     try:
@@ -612,6 +625,7 @@ def convert_legacy_policy_blocked_pending_response(
             review_id=review_id,
             notification_id=notification_id,
             source_pending_ref=pending_ref,
+            user_ref=user_ref,
         )
 
     try:
@@ -0,0 +1,238 @@
+"""Retention for the processedMessages, sheetChangeLog, conversationBodies,
+messageArtifacts, extractionCache and proposalCache collections.
+
+The old cleanup ran inline at the end of every user run: it read up to
+threshold+1 docs to detect overflow, then streamed the whole collection,
+sorted it in Python on whichever timestamp field each doc happened to carry
+and deleted the excess one doc at a time.
+
+Every insert into these collections now writes ``expiresAt`` (insert time
+plus the policy's ttl), so one field orders the whole collection oldest
+first. enforce_retention() counts the collection with an aggregation query,
+reads only the oldest ``count - keep`` doc references through a paged
+``order_by("expiresAt")`` query and deletes them with a BulkWriter. It runs
+from the job's own ``--retention`` pass (main.run_retention_pass), not from
+the per-user run.
+
+Docs written before ``expiresAt`` existed are not in that ordering. While a
+collection still has any, the pass falls back to the old full read, deletes
+the oldest excess and stamps ``expiresAt`` on the survivors, so the next
+pass takes the indexed path.
+
+With SITESIFT_RETENTION_TTL=1 the count cap is left to a Firestore TTL
+policy on ``expiresAt`` (see deploy/README.md): stamped collections are not
+read at all, and the pass only migrates unstamped docs.
+
+A policy without a ``keep`` count (the messageArtifacts ledger, the
+extraction and proposal caches) has no cap: the pass deletes only docs whose ``expiresAt``
+has passed, the same docs a TTL policy would.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from google.cloud.firestore import FieldFilter
+
+
+RETENTION_TTL_ENV = "SITESIFT_RETENTION_TTL"
+EXPIRES_AT_FIELD = "expiresAt"
+RETENTION_PAGE_SIZE = 300
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    collection: str
+    # Newest docs kept; None keeps every doc until its expiresAt passes.
+    keep: Optional[int]
+    ttl: timedelta
+    # Fields the pre-expiresAt docs were ordered by, first present wins.
+    legacy_timestamp_fields: Tuple[str, ...]
+
+
+# Thresholds chosen to stay within the Firebase free tier.
+PROCESSED_MESSAGES_RETENTION = RetentionPolicy(
+    "processedMessages", 500, timedelta(days=30), ("processedAt", "timestamp", "createdAt")
+)
+SHEET_CHANGELOG_RETENTION = RetentionPolicy(
+    "sheetChangeLog", 100, timedelta(days=30), ("timestamp", "createdAt", "updatedAt")
+)
+# One doc per conversation, re-stamped on every write, so the oldest
+# expiresAt is the conversation that has been quiet longest.
+CONVERSATION_BODIES_RETENTION = RetentionPolicy(
+    "conversationBodies", 200, timedelta(days=30), ("updatedAt",)
+)
+# A ledger miss is read as "no artifact", so the ledger is never trimmed by
+# count: an entry lives until 30 days after the last artifact was appended.
+MESSAGE_ARTIFACTS_RETENTION = RetentionPolicy(
+    "messageArtifacts", None, timedelta(days=30), ("updatedAt",)
+)
+# Durable process_pdf_for_ai results (extraction_cache.DURABLE_ENTRY_TTL).
+# Readers already ignore expired entries; this deletes them.
+EXTRACTION_CACHE_RETENTION = RetentionPolicy(
+    "extractionCache", None, timedelta(days=30), ("createdAt",)
+)
+# Cached propose_sheet_updates responses. expiresAt follows
+# PROPOSAL_CACHE_TTL_SECONDS; the ttl here is its default.
+PROPOSAL_CACHE_RETENTION = RetentionPolicy(
+    "proposalCache", None, timedelta(hours=6), ("createdAt",)
+)
+RETENTION_POLICIES = (
+    PROCESSED_MESSAGES_RETENTION,
+    SHEET_CHANGELOG_RETENTION,
+    CONVERSATION_BODIES_RETENTION,
+    MESSAGE_ARTIFACTS_RETENTION,
+    EXTRACTION_CACHE_RETENTION,
+    PROPOSAL_CACHE_RETENTION,
+)
+
+
+def retention_ttl_mode() -> bool:
+    return os.getenv(RETENTION_TTL_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def expires_at(policy: RetentionPolicy, now: Optional[datetime] = None) -> datetime:
+    """The ``expiresAt`` value for a doc inserted into ``policy.collection`` now."""
+    return (now or datetime.now(timezone.utc)) + policy.ttl
+
+
+def _legacy_timestamp(data: Dict[str, Any], fields: Iterable[str]) -> Optional[float]:
+    for field in fields:
+        value = data.get(field)
+        if value is None:
+            continue
+        if hasattr(value, "timestamp"):
+            return value.timestamp()
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                return None
+        return None
+    return None
+
+
+def _insert_time(data: Dict[str, Any], policy: RetentionPolicy) -> float:
+    """Seconds since the epoch the doc was written, 0 when unknown."""
+    stamped = data.get(EXPIRES_AT_FIELD)
+    if hasattr(stamped, "timestamp"):
+        return stamped.timestamp() - policy.ttl.total_seconds()
+    return _legacy_timestamp(data, policy.legacy_timestamp_fields) or 0
+
+
+def _count(query) -> Optional[int]:
+    """Aggregation count, or None where the backend has no count queries."""
+    try:
+        results = query.count(alias="n").get()
+        return int(results[0][0].value)
+    except Exception as e:
+        print(f"⚠️ Retention count query unavailable: {e}")
+        return None
+
+
+def _result(policy: RetentionPolicy, mode: str, deleted: int = 0, stamped: int = 0) -> Dict[str, Any]:
+    return {"collection": policy.collection, "mode": mode, "deleted": deleted, "stamped": stamped}
+
+
+def _delete_oldest_stamped(fs_client, collection_ref, excess: int, page_size: int) -> int:
+    query = collection_ref.order_by(EXPIRES_AT_FIELD).select([EXPIRES_AT_FIELD])
+    writer = fs_client.bulk_writer()
+    deleted = 0
+    last = None
+    try:
+        while deleted < excess:
+            page = query.limit(min(page_size, excess - deleted))
+            if last is not None:
+                page = page.start_after(last)
+            docs = list(page.stream())
+            if not docs:
+                break
+            for doc in docs:
+                writer.delete(doc.reference)
+            deleted += len(docs)
+            last = docs[-1]
+    finally:
+        writer.close()
+    return deleted
+
+
+def _migrate_unstamped(fs_client, collection_ref, policy: RetentionPolicy, *, enforce_keep: bool, now: datetime):
+    """The old full read: delete the oldest excess and stamp the survivors."""
+    docs: List[Any] = list(collection_ref.stream())
+    entries = [(doc, doc.to_dict() or {}) for doc in docs]
+    entries.sort(key=lambda entry: _insert_time(entry[1], policy))
+    excess = max(0, len(entries) - policy.keep) if enforce_keep else 0
+
+    writer = fs_client.bulk_writer()
+    stamped = 0
+    try:
+        for doc, _data in entries[:excess]:
+            writer.delete(doc.reference)
+        for doc, data in entries[excess:]:
+            if hasattr(data.get(EXPIRES_AT_FIELD), "timestamp"):
+                continue
+            written = _legacy_timestamp(data, policy.legacy_timestamp_fields)
+            inserted = datetime.fromtimestamp(written, timezone.utc) if written else now
+            writer.update(doc.reference, {EXPIRES_AT_FIELD: expires_at(policy, inserted)})
+            stamped += 1
+    finally:
+        writer.close()
+    return excess, stamped
+
+
+def enforce_retention(
+    fs_client,
+    user_id: str,
+    policy: RetentionPolicy,
+    *,
+    ttl_mode: Optional[bool] = None,
+    page_size: int = RETENTION_PAGE_SIZE,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Trim one user's ``policy.collection`` to its newest ``policy.keep`` docs."""
+    ttl_mode = retention_ttl_mode() if ttl_mode is None else ttl_mode
+    now = now or datetime.now(timezone.utc)
+    collection_ref = fs_client.collection("users").document(user_id).collection(policy.collection)
+
+    total = _count(collection_ref)
+    stamped = None
+    if total is not None:
+        stamped = _count(collection_ref.where(filter=FieldFilter(EXPIRES_AT_FIELD, ">=", _EPOCH)))
+
+    if total is None or stamped is None:
+        if policy.keep is None:
+            deleted, migrated = _migrate_unstamped(fs_client, collection_ref, policy, enforce_keep=False, now=now)
+            return _result(policy, "legacy", deleted, migrated)
+        if len(list(collection_ref.limit(policy.keep + 1).stream())) <= policy.keep:
+            return _result(policy, "legacy")
+        deleted, migrated = _migrate_unstamped(fs_client, collection_ref, policy, enforce_keep=True, now=now)
+        return _result(policy, "legacy", deleted, migrated)
+
+    if stamped < total:
+        deleted, migrated = _migrate_unstamped(
+            fs_client, collection_ref, policy,
+            enforce_keep=policy.keep is not None and total > policy.keep, now=now,
+        )
+        return _result(policy, "migrate", deleted, migrated)
+
+    if ttl_mode:
+        return _result(policy, "ttl")
+
+    if policy.keep is None:
+        # expiresAt orders the collection, so the expired docs are the oldest.
+        expired = _count(collection_ref.where(filter=FieldFilter(EXPIRES_AT_FIELD, "<", now)))
+        if not expired:
+            return _result(policy, "expired")
+        return _result(policy, "expired", _delete_oldest_stamped(fs_client, collection_ref, expired, page_size))
+
+    excess = total - policy.keep
+    if excess <= 0:
+        return _result(policy, "indexed")
+    return _result(policy, "indexed", _delete_oldest_stamped(fs_client, collection_ref, excess, page_size))
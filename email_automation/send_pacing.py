@@ -0,0 +1,319 @@
+"""Durable per-mailbox send pacing.
+
+The outbox and follow-up lanes used to ``time.sleep(120)`` between sends, so
+a run spent most of its 2400s timeout idle and could deliver only about 20
+emails. Each mailbox now has one schedule doc,
+``users/{uid}/sync/sendPacing``, whose ``notBefore`` is the earliest time its
+next send may go out. A lane claims the slot in a transaction immediately
+before each send; if the slot is not due, the lane stops, leaves the rest of
+its queue in place and reports the slot to the surrounding
+``paced_send_scope``. Inbox processing is no longer held up behind the wait.
+
+The scheduled job then runs a PacedSendDispatcher over every mailbox that
+deferred a send. It waits only for the earliest due slot across all
+mailboxes and re-runs that mailbox's send lanes, until
+SITESIFT_SEND_WINDOW_SECONDS after the run started; anything later waits for
+the next run. Outside the job (the webhook service) nothing is registered,
+so a request sends what is due and returns. The daily and global send caps
+are still enforced by the lanes themselves before each send.
+
+Pacing is off under E2E_TEST_MODE and for request-scoped runtimes, whose
+sends are captured rather than delivered.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from google.cloud.firestore import transactional
+
+
+SEND_PACING_SECONDS_ENV = "SITESIFT_SEND_PACING_SECONDS"
+SEND_PACING_JITTER_SECONDS_ENV = "SITESIFT_SEND_PACING_JITTER_SECONDS"
+SEND_WINDOW_SECONDS_ENV = "SITESIFT_SEND_WINDOW_SECONDS"
+DEFAULT_SEND_PACING_SECONDS = 120
+DEFAULT_SEND_PACING_JITTER_SECONDS = 30
+# The job is killed at 2400s; leave room for the last sends and shutdown.
+DEFAULT_SEND_WINDOW_SECONDS = 1800
+SEND_PACING_DOC_ID = "sendPacing"
+
+
+def _pacing_enabled() -> bool:
+    return os.getenv("E2E_TEST_MODE") != "true"
+
+
+def _env_seconds(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, "")))
+    except ValueError:
+        return default
+
+
+def send_window_seconds() -> int:
+    return _env_seconds(SEND_WINDOW_SECONDS_ENV, DEFAULT_SEND_WINDOW_SECONDS)
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, float] = {
+    "granted": 0,
+    "deferred": 0,
+    "drains": 0,
+    "waitSeconds": 0.0,
+    "pastWindow": 0,
+}
+
+
+def _count(name: str, amount: float = 1) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += amount
+
+
+def send_pacing_stats() -> Dict[str, float]:
+    with _STATS_LOCK:
+        stats = dict(_STATS)
+    stats["waitSeconds"] = round(stats["waitSeconds"], 3)
+    return stats
+
+
+# -- per-run deferral scope -------------------------------------------------
+
+
+class PacingScope:
+    """What the send lanes left for later in one pass over a mailbox."""
+
+    def __init__(self) -> None:
+        self.deferred = 0
+        self.lanes: Set[str] = set()
+        self.not_before: Optional[datetime] = None
+
+    def note(self, lane: str, not_before: datetime) -> None:
+        self.deferred += 1
+        self.lanes.add(lane)
+        if self.not_before is None or not_before < self.not_before:
+            self.not_before = not_before
+
+
+_CURRENT_SCOPE: ContextVar = ContextVar("send_pacing_scope", default=None)
+
+
+@contextmanager
+def paced_send_scope(scope: Optional[PacingScope] = None) -> Iterator[PacingScope]:
+    """Collect the deferrals of the send lanes run inside; pass ``scope`` to add to one."""
+    scope = scope if scope is not None else PacingScope()
+    token = _CURRENT_SCOPE.set(scope)
+    try:
+        yield scope
+    finally:
+        _CURRENT_SCOPE.reset(token)
+
+
+# -- the per-mailbox slot ---------------------------------------------------
+
+
+@dataclass(frozen=True)
+class SendSlot:
+    granted: bool
+    # When granted, the slot booked for the following send; when deferred,
+    # the earliest time this mailbox may send again.
+    not_before: Optional[datetime] = None
+
+
+class SendPacer:
+    """Transactional claim on ``users/{uid}/sync/sendPacing``."""
+
+    def __init__(
+        self,
+        *,
+        interval_seconds: Optional[int] = None,
+        jitter_seconds: Optional[int] = None,
+        enabled: Callable[[], bool] = _pacing_enabled,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self._interval_seconds = interval_seconds
+        self._jitter_seconds = jitter_seconds
+        self._enabled = enabled
+        self._clock = clock
+        self._rng = rng
+
+    def enabled(self) -> bool:
+        return self._enabled()
+
+    def _interval(self) -> timedelta:
+        base = (
+            self._interval_seconds
+            if self._interval_seconds is not None
+            else _env_seconds(SEND_PACING_SECONDS_ENV, DEFAULT_SEND_PACING_SECONDS)
+        )
+        jitter = (
+            self._jitter_seconds
+            if self._jitter_seconds is not None
+            else _env_seconds(SEND_PACING_JITTER_SECONDS_ENV, DEFAULT_SEND_PACING_JITTER_SECONDS)
+        )
+        return timedelta(seconds=base + jitter * self._rng())
+
+    def _doc(self, fs: Any, uid: str):
+        return fs.collection("users").document(uid).collection("sync").document(SEND_PACING_DOC_ID)
+
+    def claim(self, fs: Any, uid: str, *, lane: str) -> SendSlot:
+        """Book the mailbox's next send, or report when it may send again.
+
+        Fail-closed: if the schedule cannot be read or written the send is
+        deferred by one interval rather than going out unpaced.
+        """
+        if not self.enabled():
+            return SendSlot(True)
+
+        doc_ref = self._doc(fs, uid)
+
+        @transactional
+        def claim_transaction(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            now = self._clock()
+            not_before = _as_utc(data.get("notBefore"))
+            if not_before is not None and not_before > now:
+                return SendSlot(False, not_before)
+            next_slot = now + self._interval()
+            transaction.set(
+                doc_ref,
+                {"notBefore": next_slot, "lastSendAt": now, "lastLane": lane},
+                merge=True,
+            )
+            return SendSlot(True, next_slot)
+
+        try:
+            slot = claim_transaction(fs.transaction())
+        except Exception as e:  # noqa: BLE001 - fail closed: retain the queue
+            print(f"🛑 Send pacing unavailable for {uid} — retaining {lane} queue (fail-closed): {e}")
+            slot = SendSlot(False, self._clock() + self._interval())
+
+        if slot.granted:
+            _count("granted")
+        else:
+            _count("deferred")
+            scope = _CURRENT_SCOPE.get()
+            if scope is not None:
+                scope.note(lane, slot.not_before)
+            print(
+                f"⏳ Next {lane} send for {uid} is paced to "
+                f"{slot.not_before.strftime('%H:%M:%S')} UTC; leaving the rest queued"
+            )
+        return slot
+
+
+_SEND_PACER = SendPacer()
+
+
+def send_pacer() -> SendPacer:
+    return _SEND_PACER
+
+
+# -- run-level dispatch -----------------------------------------------------
+
+
+class PacedSendDispatcher:
+    """Earliest-slot-first drain of deferred sends across mailboxes.
+
+    ``drain`` re-runs one mailbox's send lanes and returns its next slot, or
+    None once nothing is left waiting. ``runner(uid, drain)`` wraps each
+    drain, e.g. in the per-user lease; it returns the drain's result.
+    """
+
+    def __init__(
+        self,
+        *,
+        deadline: datetime,
+        runner: Optional[Callable[[str, Callable[[], Optional[datetime]]], Optional[datetime]]] = None,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._deadline = deadline
+        self._runner = runner
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self._heap: List[Tuple[datetime, int, str, Callable[[], Optional[datetime]]]] = []
+
+    def register(self, uid: str, not_before: datetime, drain: Callable[[], Optional[datetime]]) -> None:
+        with self._lock:
+            heapq.heappush(self._heap, (not_before, next(self._order), uid, drain))
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    def _pop(self):
+        with self._lock:
+            return heapq.heappop(self._heap) if self._heap else None
+
+    def run(self) -> None:
+        while True:
+            entry = self._pop()
+            if entry is None:
+                return
+            not_before, _, uid, drain = entry
+            if not_before > self._deadline:
+                _count("pastWindow")
+                print(
+                    f"⏭️ Next paced send for {uid} ({not_before.strftime('%H:%M:%S')} UTC) "
+                    "is past this run's send window; leaving it for the next run"
+                )
+                continue
+            wait = (not_before - self._clock()).total_seconds()
+            if wait > 0:
+                print(f"⏳ Waiting {int(wait)}s for {uid}'s next paced send")
+                self._sleep(wait)
+                _count("waitSeconds", wait)
+            try:
+                next_slot = self._runner(uid, drain) if self._runner else drain()
+            except Exception as e:  # noqa: BLE001 - one mailbox must not stop the rest
+                print(f"💥 Paced send drain failed for {uid}: {e}")
+                continue
+            _count("drains")
+            if next_slot is not None:
+                self.register(uid, next_slot, drain)
+
+
+_ACTIVE_DISPATCHER: Optional[PacedSendDispatcher] = None
+_ACTIVE_LOCK = threading.Lock()
+
+
+@contextmanager
+def paced_send_dispatch(dispatcher: PacedSendDispatcher) -> Iterator[PacedSendDispatcher]:
+    """Collect deferred mailboxes into ``dispatcher`` for the duration of a run."""
+    global _ACTIVE_DISPATCHER
+    with _ACTIVE_LOCK:
+        previous, _ACTIVE_DISPATCHER = _ACTIVE_DISPATCHER, dispatcher
+    try:
+        yield dispatcher
+    finally:
+        with _ACTIVE_LOCK:
+            _ACTIVE_DISPATCHER = previous
+
+
+def register_paced_sends(uid: str, not_before: datetime, drain: Callable[[], Optional[datetime]]) -> bool:
+    """Hand a mailbox's deferred sends to the active run; False outside one."""
+    with _ACTIVE_LOCK:
+        dispatcher = _ACTIVE_DISPATCHER
+    if dispatcher is None:
+        return False
+    dispatcher.register(uid, not_before, drain)
+    return True
@@ -10,7 +10,7 @@ import re
 from typing import Any, Dict, Optional
 from urllib.parse import urlsplit
 
-import requests
+from .http_pool import pooled_requests as requests
 
 from .utils import exponential_backoff_request, strip_html_tags
 
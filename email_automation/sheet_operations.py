@@ -1,12 +1,157 @@
 import re
-from typing import Optional, List, Dict, Any
-from google.cloud.firestore import SERVER_TIMESTAMP
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Tuple
+from google.cloud.firestore import SERVER_TIMESTAMP, FieldFilter
 from .clients import _fs, _sheets_client
-from .sheets import _get_first_tab_title, _read_header_row2, _header_index_map, _first_sheet_props, _execute_with_retry, _col_letter
+from .sheets import _get_first_tab_title, _read_header_row2, _header_index_map, _first_sheet_props, _execute_with_retry, _col_letter, _read_sheet_grid, _snapshot_for_rows
 from .utils import _subject_to_address_city
 from .outbound_safety import find_unresolved_placeholders
 
 
+# Firestore caps a write batch at 500 operations.
+_THREAD_ROW_BATCH_LIMIT = 500
+
+
+class ThreadRowResync:
+    """Pending rowNumber shifts for one user's threads, applied in one pass.
+
+    Each shift is ("move", src_row, divider_row, new_row) or
+    ("insert", insert_row), in the order the sheet changed. ``flush`` reads
+    only the threads whose rowNumber lies in the range the shifts can touch
+    (scoped to clientId when given; composite index clientId + rowNumber in
+    firestore.indexes.json), runs every shift over each row in order, and
+    writes the changed rowNumbers in batches.
+    """
+
+    def __init__(self, user_id: str, client_id: Optional[str] = None) -> None:
+        self.user_id = user_id
+        self.client_id = client_id
+        self.shifts: List[Tuple] = []
+
+    def add_move(self, src_row: int, divider_row: int, new_row: int) -> None:
+        self.shifts.append(("move", src_row, divider_row, new_row))
+
+    def add_insert(self, insert_row: int) -> None:
+        self.shifts.append(("insert", insert_row))
+
+    def row_range(self) -> Tuple[int, Optional[int]]:
+        """Lowest and highest rowNumber any shift can change (None: unbounded).
+
+        A row outside every shift's own range is never touched by any of
+        them, so it keeps its number through the whole sequence.
+        """
+        lows, highs = [], []
+        for shift in self.shifts:
+            if shift[0] == "move":
+                _, src_row, divider_row, _new_row = shift
+                lows.append(min(src_row, divider_row))
+                highs.append(max(src_row, divider_row))
+            else:
+                lows.append(shift[1])
+                highs.append(None)
+        return min(lows), (None if None in highs else max(highs))
+
+    def apply(self, row: int) -> int:
+        for shift in self.shifts:
+            if shift[0] == "move":
+                _, src_row, divider_row, new_row = shift
+                if row == src_row:
+                    row = new_row
+                elif src_row < row <= divider_row:
+                    row -= 1
+            elif row >= shift[1]:
+                row += 1
+        return row
+
+    def flush(self) -> int:
+        """Write the pending shifts; returns the number of threads updated."""
+        if not self.shifts:
+            return 0
+        try:
+            threads_ref = _fs.collection("users").document(self.user_id).collection("threads")
+            low, high = self.row_range()
+            query = threads_ref
+            if self.client_id:
+                query = query.where(filter=FieldFilter("clientId", "==", self.client_id))
+            query = query.where(filter=FieldFilter("rowNumber", ">=", low))
+            if high is not None:
+                query = query.where(filter=FieldFilter("rowNumber", "<=", high))
+
+            changes = []
+            for thread in query.stream():
+                current_row = (thread.to_dict() or {}).get("rowNumber")
+                if current_row is None:
+                    continue
+                new_row_num = self.apply(current_row)
+                if new_row_num != current_row:
+                    changes.append((thread.id, current_row, new_row_num))
+
+            for start in range(0, len(changes), _THREAD_ROW_BATCH_LIMIT):
+                batch = _fs.batch()
+                for thread_id, current_row, new_row_num in changes[start:start + _THREAD_ROW_BATCH_LIMIT]:
+                    batch.update(threads_ref.document(thread_id), {"rowNumber": new_row_num})
+                    print(f"   📍 Updated thread rowNumber: {current_row} -> {new_row_num}")
+                batch.commit()
+
+            if changes:
+                print(f"✅ Synchronized {len(changes)} thread rowNumbers after {len(self.shifts)} row change(s)")
+            return len(changes)
+
+        except Exception as e:
+            print(f"⚠️ Failed to sync thread row numbers: {e}")
+            return 0
+        finally:
+            self.shifts = []
+
+
+_PENDING_ROW_RESYNC: ContextVar = ContextVar("pending_thread_row_resync", default=None)
+
+
+@contextmanager
+def thread_row_resync_scope():
+    """Coalesce the rowNumber resyncs requested inside the block into one pass.
+
+    Usable as a decorator. Pending shifts are written when the outermost
+    scope exits, before stop_threads_for_row/complete_threads_for_row read
+    rowNumbers, and whenever a shift for another user or campaign arrives.
+    """
+    if _PENDING_ROW_RESYNC.get() is not None:
+        yield
+        return
+    holder: Dict[str, Optional[ThreadRowResync]] = {"resync": None}
+    token = _PENDING_ROW_RESYNC.set(holder)
+    try:
+        yield
+    finally:
+        _PENDING_ROW_RESYNC.reset(token)
+        if holder["resync"] is not None:
+            holder["resync"].flush()
+
+
+def flush_thread_row_resync() -> int:
+    """Write any shifts pending in the active scope now."""
+    holder = _PENDING_ROW_RESYNC.get()
+    if holder is None or holder["resync"] is None:
+        return 0
+    resync, holder["resync"] = holder["resync"], None
+    return resync.flush()
+
+
+def _resync_for(user_id: str, client_id: Optional[str]) -> Tuple[ThreadRowResync, bool]:
+    """The resync to add a shift to, and whether it is deferred to a scope."""
+    holder = _PENDING_ROW_RESYNC.get()
+    if holder is None:
+        return ThreadRowResync(user_id, client_id), False
+    pending = holder["resync"]
+    if pending is not None and (pending.user_id, pending.client_id) != (user_id, client_id):
+        flush_thread_row_resync()
+        pending = None
+    if pending is None:
+        pending = holder["resync"] = ThreadRowResync(user_id, client_id)
+    return pending, True
+
+
 def sync_thread_row_numbers_after_move(
     user_id: str,
     src_row: int,
@@ -21,42 +166,12 @@ def sync_thread_row_numbers_after_move(
     - All threads with rowNumber > src_row AND rowNumber <= divider_row shift UP by 1
     - The moved thread itself gets updated to new_row
 
-    Returns the number of threads updated.
+    Returns the number of threads updated; 0 when the shift is deferred to an
+    active thread_row_resync_scope().
     """
-    try:
-        updated_count = 0
-        threads_ref = _fs.collection("users").document(user_id).collection("threads")
-        threads = list(threads_ref.stream())
-
-        for thread in threads:
-            data = thread.to_dict()
-            if client_id and data.get("clientId") != client_id:
-                continue
-
-            current_row = data.get("rowNumber")
-
-            if current_row is None:
-                continue
-
-            # If this thread was at the source row, update to new row
-            if current_row == src_row:
-                threads_ref.document(thread.id).update({"rowNumber": new_row})
-                print(f"   📍 Updated thread rowNumber: {src_row} -> {new_row} (moved row)")
-                updated_count += 1
-            # If this thread was between src and divider, shift up by 1
-            elif current_row > src_row and current_row <= divider_row:
-                new_row_num = current_row - 1
-                threads_ref.document(thread.id).update({"rowNumber": new_row_num})
-                print(f"   📍 Updated thread rowNumber: {current_row} -> {new_row_num} (shifted up)")
-                updated_count += 1
-
-        if updated_count > 0:
-            print(f"✅ Synchronized {updated_count} thread rowNumbers after row move")
-        return updated_count
-
-    except Exception as e:
-        print(f"⚠️ Failed to sync thread row numbers: {e}")
-        return 0
+    resync, deferred = _resync_for(user_id, client_id)
+    resync.add_move(src_row, divider_row, new_row)
+    return 0 if deferred else resync.flush()
 
 
 def stop_threads_for_row(
@@ -75,6 +190,7 @@ def stop_threads_for_row(
     if row_number is None:
         return 0
 
+    flush_thread_row_resync()
     try:
         updated_count = 0
         threads_ref = _fs.collection("users").document(user_id).collection("threads")
@@ -126,6 +242,7 @@ def complete_threads_for_row(
     if row_number is None:
         return 0
 
+    flush_thread_row_resync()
     try:
         updated_count = 0
         threads_ref = _fs.collection("users").document(user_id).collection("threads")
@@ -177,34 +294,12 @@ def sync_thread_row_numbers_after_insert(user_id: str, insert_row: int, client_i
     Update thread rowNumbers after a new sheet row is inserted.
 
     Every existing tracked thread at or below insert_row shifts down by one.
-    Optional client_id narrows the update to a single campaign.
+    Optional client_id narrows the update to a single campaign. Returns the
+    number of threads updated; 0 when deferred to a thread_row_resync_scope().
     """
-    try:
-        updated_count = 0
-        threads_ref = _fs.collection("users").document(user_id).collection("threads")
-        threads = list(threads_ref.stream())
-
-        for thread in threads:
-            data = thread.to_dict() or {}
-            if client_id and data.get("clientId") != client_id:
-                continue
-
-            current_row = data.get("rowNumber")
-            if current_row is None or current_row < insert_row:
-                continue
-
-            new_row_num = current_row + 1
-            threads_ref.document(thread.id).update({"rowNumber": new_row_num})
-            print(f"   📍 Updated thread rowNumber: {current_row} -> {new_row_num} (insert shifted down)")
-            updated_count += 1
-
-        if updated_count > 0:
-            print(f"✅ Synchronized {updated_count} thread rowNumbers after row insert")
-        return updated_count
-
-    except Exception as e:
-        print(f"⚠️ Failed to sync thread row numbers after insert: {e}")
-        return 0
+    resync, deferred = _resync_for(user_id, client_id)
+    resync.add_insert(insert_row)
+    return 0 if deferred else resync.flush()
 
 
 def _normalize_header_key(name: str) -> str:
@@ -731,14 +826,7 @@ def _find_row_by_subject_anchor(
     if not addr:
         return None, None
 
-    resp = _execute_with_retry(
-        sheets.spreadsheets().values().get(
-            spreadsheetId=spreadsheet_id,
-            range=f"{tab_title}!A2:ZZZ"
-        ),
-        "find_row_by_subject_anchor"
-    )
-    rows = resp.get("values", [])
+    rows = _read_sheet_grid(sheets, spreadsheet_id, tab_title, "find_row_by_subject_anchor")
     data_rows = rows[1:] if rows else []
 
     # Snapshot non-empty rows with both their positional row number and their
@@ -767,18 +855,15 @@ def _find_row_by_subject_anchor(
     return None, None
 
 
+def _casefold_cell(value) -> str:
+    return (value or "").strip().lower()
+
+
 def _find_unique_row_by_email(sheets, spreadsheet_id: str, tab_title: str, header: List[str], email: str):
     if not email:
         return None, None
 
-    resp = _execute_with_retry(
-        sheets.spreadsheets().values().get(
-            spreadsheetId=spreadsheet_id,
-            range=f"{tab_title}!A2:ZZZ"
-        ),
-        "find_unique_row_by_email"
-    )
-    rows = resp.get("values", [])
+    rows = _read_sheet_grid(sheets, spreadsheet_id, tab_title, "find_unique_row_by_email")
     if not rows:
         return None, None
 
@@ -794,7 +879,16 @@ def _find_unique_row_by_email(sheets, spreadsheet_id: str, tab_title: str, heade
     needle = (email or "").strip().lower()
     matches = []
 
-    for sheet_rownum, row in enumerate(rows[1:], start=3):
+    # Inside a snapshot scope the prebuilt email index narrows the scan to the
+    # rows whose email cell already matches.
+    snapshot = _snapshot_for_rows(sheets, spreadsheet_id, tab_title)
+    if snapshot is not None and email_idx and needle:
+        index = snapshot.column_index(email_idx - 1, _casefold_cell)
+        data_rows = [(rownum, snapshot.row(rownum)) for rownum in index.get(needle) or []]
+    else:
+        data_rows = enumerate(rows[1:], start=3)
+
+    for sheet_rownum, row in data_rows:
         padded = row + [""] * (max(0, len(header) - len(row)))
         if email_idx:
             candidate = padded[email_idx - 1] if email_idx - 1 < len(padded) else ""
@@ -1,16 +1,23 @@
+import os
 import re
+import json
+import hashlib
 import time
 import random
 import errno
 import socket
 import ssl
-from typing import Optional, List, Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Callable, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
 import httplib2
 from google.auth.exceptions import TransportError
 from googleapiclient.errors import HttpError
 from requests import exceptions as requests_exceptions
 from .automation_runtime import sheets_for
 from .clients import _sheets_client
+from .rate_governor import governor as _rate_governor
 from .column_config import (
     CANONICAL_FIELDS,
     canonical_field_for_column,
@@ -75,6 +82,12 @@ def _execute_with_retry(request, operation_name: str = "Sheets API"):
     insert, or move twice. Callers that can safely restart a larger idempotent
     operation may still use ``is_retryable_sheets_error`` to schedule that retry.
 
+    Every attempt draws from the shared ``sheets_read``/``sheets_write`` bucket
+    (GET is a read, anything else a write) and a 429 shrinks that bucket, so
+    callers no longer need their own fixed sleeps between Sheets-touching work.
+    A successful write also patches or drops any open ``SheetSnapshot`` of the
+    spreadsheet it touched.
+
     Args:
         request: The prepared API request (before .execute())
         operation_name: Human-readable name for logging
@@ -85,11 +98,18 @@ def _execute_with_retry(request, operation_name: str = "Sheets API"):
     Raises:
         HttpError: If all retries are exhausted or non-retryable error occurs
     """
+    quota = "sheets_read" if getattr(request, "method", None) == "GET" else "sheets_write"
     for attempt in range(MAX_RETRIES):
+        _rate_governor().acquire(quota)
         try:
-            return request.execute()
+            response = request.execute()
+            _rate_governor().report_success(quota)
+            if quota == "sheets_write":
+                _note_sheet_write(request)
+            return response
         except HttpError as e:
             if getattr(e.resp, "status", None) == 429:
+                _rate_governor().report_rate_limited(quota)
                 delay = min(BASE_DELAY_SECONDS * (2 ** attempt), MAX_DELAY_SECONDS)
                 jitter = random.uniform(0, delay * 0.25)
                 total_delay = delay + jitter
@@ -182,15 +202,371 @@ def _col_letter(n: int) -> str:
         s = chr(65 + r) + s
     return s
 
-def _get_first_tab_title(sheets, spreadsheet_id: str) -> str:
+# ---------------------------------------------------------------------------
+# Per-run spreadsheet snapshot
+# ---------------------------------------------------------------------------
+# Processing one reply used to read the same client sheet several times: tab
+# metadata, row 2, then one or two full A2:ZZZ scans for the row lookup, and
+# the tab title again when applying the proposal. Inside a
+# ``sheet_snapshot_scope()`` the first read of a spreadsheet is kept and later
+# lookups in the same run are answered from it. Writes that go through
+# ``_execute_with_retry`` patch single RAW cells in place and drop the grid for
+# anything else on the first tab; structural batchUpdates drop the snapshot.
+
+SHEET_SNAPSHOT_TTL_SECONDS = 60.0
+
+
+def _sheet_snapshot_enabled() -> bool:
+    return os.getenv("E2E_TEST_MODE") != "true"
+
+
+class SheetSnapshot:
+    """First-tab metadata, row 2 and data rows of one spreadsheet.
+
+    ``rows`` mirrors the ``A2:ZZZ`` values response: ``rows[0]`` is the header
+    and ``rows[n]`` is sheet row ``n + 2``. Callers must treat it as read-only.
+    """
+
+    def __init__(self, client, spreadsheet_id: str, expires_at: float) -> None:
+        self.client = client
+        self.spreadsheet_id = spreadsheet_id
+        self.expires_at = expires_at
+        self.tab_title: Optional[str] = None
+        self.tab_sheet_id: Optional[int] = None
+        self.rows: Optional[List[List[Any]]] = None
+        self._indexes: Dict[Tuple[int, Callable], Dict[str, List[int]]] = {}
+
+    def set_rows(self, tab_title: str, rows: List[List[Any]]) -> None:
+        self.tab_title = tab_title
+        self.rows = rows
+        self._indexes = {}
+
+    def drop_rows(self) -> None:
+        self.rows = None
+        self._indexes = {}
+
+    def column_index(self, col_idx: int, normalize: Callable[[Any], str]) -> Dict[str, List[int]]:
+        """Map normalized values of 0-based column ``col_idx`` to sheet row numbers."""
+        key = (col_idx, normalize)
+        index = self._indexes.get(key)
+        if index is None:
+            index = {}
+            for sheet_rownum, row in enumerate((self.rows or [])[1:], start=3):
+                value = normalize(row[col_idx] if col_idx < len(row) else "")
+                if value:
+                    index.setdefault(value, []).append(sheet_rownum)
+            self._indexes[key] = index
+        return index
+
+    def row(self, sheet_rownum: int) -> List[Any]:
+        offset = sheet_rownum - 2
+        rows = self.rows or []
+        return list(rows[offset]) if 0 <= offset < len(rows) else []
+
+    def patch_cell(self, sheet_rownum: int, col_idx: int, value: Any) -> None:
+        offset = sheet_rownum - 2
+        if self.rows is None or offset < 1:
+            self.drop_rows()
+            return
+        while len(self.rows) <= offset:
+            self.rows.append([])
+        row = list(self.rows[offset])
+        if len(row) <= col_idx:
+            row.extend([""] * (col_idx + 1 - len(row)))
+        row[col_idx] = value
+        self.rows[offset] = row
+        self._indexes = {}
+
+
+class SheetSnapshotCache:
+    """Thread-scoped ``spreadsheetId -> SheetSnapshot`` map for one run.
+
+    Nothing is cached outside ``scope()``, a snapshot is only served back to the
+    Sheets client that loaded it (a runtime's fenced client never sees the
+    ambient one), and every snapshot expires after ``ttl_seconds`` so human
+    edits made during a long run are picked up.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = SHEET_SNAPSHOT_TTL_SECONDS,
+        enabled=_sheet_snapshot_enabled,
+        clock=time.monotonic,
+    ) -> None:
+        self._ttl = ttl_seconds
+        self._enabled = enabled
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.grid_reads = 0
+        self.grid_hits = 0
+
+    @contextmanager
+    def scope(self):
+        if not self._enabled() or self.active():
+            yield
+            return
+        self._local.snapshots = {}
+        try:
+            yield
+        finally:
+            self._local.snapshots = None
+
+    def active(self) -> bool:
+        return getattr(self._local, "snapshots", None) is not None
+
+    def get(self, client, spreadsheet_id: str) -> Optional[SheetSnapshot]:
+        snapshots = getattr(self._local, "snapshots", None)
+        if snapshots is None:
+            return None
+        snapshot = snapshots.get(spreadsheet_id)
+        if snapshot is None or snapshot.client is not client:
+            return None
+        if snapshot.expires_at <= self._clock():
+            del snapshots[spreadsheet_id]
+            return None
+        return snapshot
+
+    def ensure(self, client, spreadsheet_id: str) -> Optional[SheetSnapshot]:
+        snapshots = getattr(self._local, "snapshots", None)
+        if snapshots is None:
+            return None
+        snapshot = self.get(client, spreadsheet_id)
+        if snapshot is None:
+            snapshot = SheetSnapshot(client, spreadsheet_id, self._clock() + self._ttl)
+            snapshots[spreadsheet_id] = snapshot
+        return snapshot
+
+    def peek(self, spreadsheet_id: str) -> Optional[SheetSnapshot]:
+        snapshots = getattr(self._local, "snapshots", None)
+        return snapshots.get(spreadsheet_id) if snapshots else None
+
+    def invalidate(self, spreadsheet_id: Optional[str] = None, *, structural: bool = False) -> None:
+        """Drop cached rows (``structural`` also drops tab metadata).
+
+        ``spreadsheet_id=None`` applies to every snapshot in the scope.
+        """
+        snapshots = getattr(self._local, "snapshots", None)
+        if not snapshots:
+            return
+        targets = [spreadsheet_id] if spreadsheet_id else list(snapshots)
+        for target in targets:
+            if structural:
+                snapshots.pop(target, None)
+            elif target in snapshots:
+                snapshots[target].drop_rows()
+
+    def count_grid_read(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.grid_hits += 1
+            else:
+                self.grid_reads += 1
+
+
+_SHEET_SNAPSHOTS = SheetSnapshotCache()
+
+
+def sheet_snapshot_scope():
+    """Share spreadsheet reads across the work done inside the ``with`` block."""
+    return _SHEET_SNAPSHOTS.scope()
+
+
+def invalidate_sheet_snapshot(spreadsheet_id: Optional[str] = None) -> None:
+    """Forget cached rows after a write that bypassed ``_execute_with_retry``."""
+    _SHEET_SNAPSHOTS.invalidate(spreadsheet_id)
+
+
+_A1_CELL_RE = re.compile(r"^\$?([A-Za-z]+)\$?(\d+)$")
+
+
+def _range_tab(a1_range: str) -> Optional[str]:
+    """Tab named by an A1 range, or None when it defaults to the first tab."""
+    if "!" not in a1_range:
+        return None
+    tab = a1_range.rsplit("!", 1)[0]
+    if len(tab) >= 2 and tab[0] == tab[-1] == "'":
+        tab = tab[1:-1].replace("''", "'")
+    return tab
+
+
+def _col_index_from_letters(letters: str) -> int:
+    """A1 column letters -> 0-based index (A->0)."""
+    n = 0
+    for ch in letters.upper():
+        n = n * 26 + (ord(ch) - 64)
+    return n - 1
+
+
+def _apply_values_write(snapshot: SheetSnapshot, a1_range: str, values, raw: bool) -> None:
+    tab = _range_tab(a1_range)
+    if tab is not None and tab != snapshot.tab_title:
+        return  # another tab (AI_META, Log, ...) - the first-tab grid is unchanged
+    if snapshot.rows is None:
+        return
+    cell = _A1_CELL_RE.match(a1_range.rsplit("!", 1)[-1])
+    single = values if isinstance(values, list) and len(values) == 1 else None
+    single = single[0] if single and isinstance(single[0], list) and len(single[0]) == 1 else None
+    value = single[0] if single else None
+    # RAW strings read back unchanged. Numbers are kept in their raw form; the
+    # sheet may display them formatted, which sheet_values_equal_for_column
+    # already treats as equal.
+    if raw and cell and (isinstance(value, str) or (isinstance(value, (int, float)) and not isinstance(value, bool))):
+        snapshot.patch_cell(int(cell.group(2)), _col_index_from_letters(cell.group(1)), str(value))
+        return
+    snapshot.drop_rows()
+
+
+# spreadsheets.batchUpdate requests that never change a cell value or the tab
+# list. Column autosize, row highlights and similar formatting keep the grid.
+_VALUE_NEUTRAL_BATCH_REQUESTS = {
+    "updateDimensionProperties",
+    "autoResizeDimensions",
+    "updateBorders",
+    "mergeCells",
+    "unmergeCells",
+    "setDataValidation",
+    "addConditionalFormatRule",
+    "updateConditionalFormatRule",
+    "deleteConditionalFormatRule",
+    "addBanding",
+    "updateBanding",
+    "deleteBanding",
+    "addProtectedRange",
+    "updateProtectedRange",
+    "deleteProtectedRange",
+    "addNamedRange",
+    "updateNamedRange",
+    "deleteNamedRange",
+}
+_TAB_LIST_BATCH_REQUESTS = {"addSheet", "deleteSheet", "duplicateSheet", "updateSheetProperties"}
+
+
+def _batch_update_effect(body: dict) -> str:
+    """``"none"``, ``"rows"`` or ``"tabs"``: what a spreadsheets.batchUpdate may change."""
+    effect = "none"
+    for item in body.get("requests") or [{"unknown": {}}]:
+        for kind, payload in (item or {}).items():
+            if kind in _TAB_LIST_BATCH_REQUESTS:
+                return "tabs"
+            if kind in _VALUE_NEUTRAL_BATCH_REQUESTS:
+                continue
+            if kind == "repeatCell":
+                fields = str((payload or {}).get("fields") or "*")
+                if "*" not in fields and "userEnteredValue" not in fields:
+                    continue
+            effect = "rows"
+    return effect
+
+
+def _note_sheet_write(request) -> None:
+    """Keep open snapshots consistent with a Sheets write that just succeeded."""
+    if not _SHEET_SNAPSHOTS.active():
+        return
+    uri = getattr(request, "uri", None)
+    if not isinstance(uri, str):
+        _SHEET_SNAPSHOTS.invalidate()
+        return
+    parts = urlsplit(uri)
+    match = re.search(r"/spreadsheets/([^/:]+)(.*)$", parts.path)
+    if not match:
+        _SHEET_SNAPSHOTS.invalidate()
+        return
+    spreadsheet_id, rest = unquote(match.group(1)), match.group(2)
+    snapshot = _SHEET_SNAPSHOTS.peek(spreadsheet_id)
+    if snapshot is None:
+        return
+    try:
+        body = json.loads(getattr(request, "body", None) or "{}")
+    except (TypeError, ValueError):
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+    if not rest.startswith("/values"):
+        effect = _batch_update_effect(body) if rest == ":batchUpdate" else "tabs"
+        if effect != "none":
+            _SHEET_SNAPSHOTS.invalidate(spreadsheet_id, structural=(effect == "tabs"))
+        return
+    if rest.startswith("/values/"):
+        a1_range, _, verb = unquote(rest[len("/values/"):]).rpartition(":")
+        if verb not in {"append", "clear"}:
+            a1_range = f"{a1_range}:{verb}" if a1_range else verb
+            verb = "update"
+        option = (parse_qs(parts.query).get("valueInputOption") or [""])[0]
+        if verb == "append":
+            # Appends land after the last row of whatever table the range names.
+            if _range_tab(a1_range) in (None, snapshot.tab_title):
+                snapshot.drop_rows()
+            return
+        writes = [(a1_range, body.get("values") if verb == "update" else None)]
+    elif rest.startswith("/values:batchUpdate"):
+        option = body.get("valueInputOption") or ""
+        writes = [(item.get("range") or "", item.get("values")) for item in body.get("data") or []]
+    else:  # values:batchClear and anything newer
+        option = ""
+        writes = [(a1_range, None) for a1_range in body.get("ranges") or [""]]
+
+    for a1_range, values in writes:
+        _apply_values_write(snapshot, a1_range, values, raw=(option == "RAW"))
+
+
+def _snapshot_tab(sheets, spreadsheet_id: str, operation_name: str) -> Tuple[Optional[int], str]:
+    snapshot = _SHEET_SNAPSHOTS.get(sheets, spreadsheet_id)
+    if snapshot is not None and snapshot.tab_title is not None and snapshot.tab_sheet_id is not None:
+        return snapshot.tab_sheet_id, snapshot.tab_title
     meta = _execute_with_retry(
         sheets.spreadsheets().get(spreadsheetId=spreadsheet_id),
-        "get_first_tab_title"
+        operation_name
     )
-    return meta["sheets"][0]["properties"]["title"]
+    p = meta["sheets"][0]["properties"]
+    snapshot = _SHEET_SNAPSHOTS.ensure(sheets, spreadsheet_id)
+    if snapshot is not None:
+        if snapshot.tab_title not in (None, p["title"]):
+            snapshot.drop_rows()
+        snapshot.tab_title = p["title"]
+        snapshot.tab_sheet_id = p.get("sheetId")
+    return p.get("sheetId"), p["title"]
+
+
+def _read_sheet_grid(sheets, spreadsheet_id: str, tab_title: str, operation_name: str) -> List[List[Any]]:
+    """Row 2 and every data row of ``tab_title`` (the ``A2:ZZZ`` values)."""
+    snapshot = _SHEET_SNAPSHOTS.get(sheets, spreadsheet_id)
+    if snapshot is not None and snapshot.rows is not None and snapshot.tab_title == tab_title:
+        _SHEET_SNAPSHOTS.count_grid_read(hit=True)
+        return snapshot.rows
+    resp = _execute_with_retry(
+        sheets.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id,
+            range=f"{tab_title}!A2:ZZZ"
+        ),
+        operation_name
+    )
+    rows = resp.get("values", [])
+    snapshot = _SHEET_SNAPSHOTS.ensure(sheets, spreadsheet_id)
+    if snapshot is not None:
+        _SHEET_SNAPSHOTS.count_grid_read(hit=False)
+        if snapshot.tab_title in (None, tab_title):
+            snapshot.set_rows(tab_title, rows)
+    return rows
+
+
+def _snapshot_for_rows(sheets, spreadsheet_id: str, tab_title: str) -> Optional[SheetSnapshot]:
+    snapshot = _SHEET_SNAPSHOTS.get(sheets, spreadsheet_id)
+    if snapshot is not None and snapshot.rows is not None and snapshot.tab_title == tab_title:
+        return snapshot
+    return None
+
+
+def _get_first_tab_title(sheets, spreadsheet_id: str) -> str:
+    return _snapshot_tab(sheets, spreadsheet_id, "get_first_tab_title")[1]
 
 def _read_header_row2(sheets, spreadsheet_id: str, tab_title: str) -> list[str]:
-    # Entire row 2 regardless of width
+    # Entire row 2 regardless of width. Inside a snapshot scope this loads the
+    # whole grid once so the row lookup that follows needs no further read.
+    if _SHEET_SNAPSHOTS.active():
+        rows = _read_sheet_grid(sheets, spreadsheet_id, tab_title, "read_header_row2")
+        return list(rows[0]) if rows else []
     resp = _execute_with_retry(
         sheets.spreadsheets().values().get(
             spreadsheetId=spreadsheet_id,
@@ -202,12 +578,7 @@ def _read_header_row2(sheets, spreadsheet_id: str, tab_title: str) -> list[str]:
     return vals[0] if vals else []
 
 def _first_sheet_props(sheets, spreadsheet_id):
-    meta = _execute_with_retry(
-        sheets.spreadsheets().get(spreadsheetId=spreadsheet_id),
-        "first_sheet_props"
-    )
-    p = meta["sheets"][0]["properties"]
-    return p["sheetId"], p["title"]
+    return _snapshot_tab(sheets, spreadsheet_id, "first_sheet_props")
 
 def _guess_email_col_idx(header: list[str]) -> int:
     candidates = {"email", "email address", "contact email", "e-mail", "e mail"}
@@ -225,14 +596,7 @@ def _find_row_by_email(sheets, spreadsheet_id: str, tab_title: str, header: list
         return None, None
 
     # Pull header + all data rows with a very wide column cap
-    resp = _execute_with_retry(
-        sheets.spreadsheets().values().get(
-            spreadsheetId=spreadsheet_id,
-            range=f"{tab_title}!A2:ZZZ"
-        ),
-        "find_row_by_email"
-    )
-    rows = resp.get("values", [])
+    rows = _read_sheet_grid(sheets, spreadsheet_id, tab_title, "find_row_by_email")
     if not rows:
         return None, None
 
@@ -241,6 +605,14 @@ def _find_row_by_email(sheets, spreadsheet_id: str, tab_title: str, header: list
     email_idx = _guess_email_col_idx(header)
     needle = _normalize_email(email)
 
+    snapshot = _snapshot_for_rows(sheets, spreadsheet_id, tab_title)
+    if snapshot is not None and email_idx >= 0 and needle:
+        matches = snapshot.column_index(email_idx, _normalize_email).get(needle)
+        if not matches:
+            return None, None
+        row = snapshot.row(matches[0])
+        return matches[0], row + [""] * (max(0, len(header) - len(row)))
+
     for offset, row in enumerate(data_rows, start=3):  # sheet row numbers
         # pad row to header length so indexing is safe
         padded = row + [""] * (max(0, len(header) - len(row)))
@@ -270,20 +642,20 @@ def _find_row_by_address_city(sheets, spreadsheet_id: str, tab_title: str,
     if not addr_idx:
         return None, None
 
-    resp = _execute_with_retry(
-        sheets.spreadsheets().values().get(
-            spreadsheetId=spreadsheet_id,
-            range=f"{tab_title}!A2:ZZZ"
-        ),
-        "find_row_by_address_city"
-    )
-    rows = resp.get("values", [])
+    rows = _read_sheet_grid(sheets, spreadsheet_id, tab_title, "find_row_by_address_city")
     data_rows = rows[1:] if rows else []  # row 3+
 
     want_addr = _norm_txt(address)
     want_city = _norm_txt(city)
 
-    for sheet_rownum, row in enumerate(data_rows, start=3):
+    snapshot = _snapshot_for_rows(sheets, spreadsheet_id, tab_title)
+    if snapshot is not None and want_addr:
+        candidates = snapshot.column_index(addr_idx - 1, _norm_txt).get(want_addr) or []
+        data_rows = {sheet_rownum: snapshot.row(sheet_rownum) for sheet_rownum in candidates}
+    else:
+        data_rows = dict(enumerate(data_rows, start=3))
+
+    for sheet_rownum, row in data_rows.items():
         row = row + [""] * (max(0, len(header) - len(row)))
         got_addr = _norm_txt(row[addr_idx-1]) if addr_idx else ""
         if got_addr != want_addr:
@@ -296,6 +668,75 @@ def _find_row_by_address_city(sheets, spreadsheet_id: str, tab_title: str,
 
     return None, None
 
+# Bump whenever the width/wrap/number-format rules below change so every client
+# sheet is reformatted once on its next reply.
+SHEET_FORMAT_RULES_VERSION = 1
+
+
+def sheet_format_fingerprint(header: list[str], rows: Sequence[Sequence[Any]] = ()) -> str:
+    """Hash of row 2, the longest value in each column of ``rows`` (the data
+    rows, sheet row 3 on) and the formatting-rule version.
+
+    The autosize pass sizes columns from the data as well as the header, so a
+    longer value written into any column has to change the fingerprint.
+    """
+    widths: List[int] = []
+    for row in rows or ():
+        for c, value in enumerate(row):
+            if c >= len(widths):
+                widths.append(0)
+            if value not in (None, ""):
+                widths[c] = max(widths[c], len(str(value)))
+    payload = json.dumps(
+        {
+            "rules": SHEET_FORMAT_RULES_VERSION,
+            "header": [str(h or "").strip() for h in header or []],
+            "widths": widths,
+        },
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _sheet_format_memo_enabled() -> bool:
+    return os.getenv("E2E_TEST_MODE") != "true"
+
+
+class SheetFormatMemo:
+    """Per-process ``spreadsheetId -> fingerprint`` of the last autosize pass."""
+
+    def __init__(self, *, enabled=_sheet_format_memo_enabled) -> None:
+        self._enabled = enabled
+        self._lock = threading.Lock()
+        self._fingerprints: Dict[str, str] = {}
+
+    def enabled(self) -> bool:
+        return self._enabled()
+
+    def is_current(self, spreadsheet_id: str, fingerprint: str) -> bool:
+        if not self._enabled():
+            return False
+        with self._lock:
+            return self._fingerprints.get(spreadsheet_id) == fingerprint
+
+    def remember(self, spreadsheet_id: str, fingerprint: str) -> None:
+        if not self._enabled():
+            return
+        with self._lock:
+            self._fingerprints[spreadsheet_id] = fingerprint
+
+    def forget(self, spreadsheet_id: str) -> None:
+        with self._lock:
+            self._fingerprints.pop(spreadsheet_id, None)
+
+
+_SHEET_FORMAT_MEMO = SheetFormatMemo()
+
+
+def sheet_format_memo() -> SheetFormatMemo:
+    return _SHEET_FORMAT_MEMO
+
+
 def format_sheet_columns_autosize_with_exceptions(spreadsheet_id: str, header: list[str]) -> None:
     """
     Auto-size all columns to the longest visible value + padding, with exceptions:
@@ -4,7 +4,7 @@ import os
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
-from google.cloud.firestore import SERVER_TIMESTAMP
+from google.cloud.firestore import SERVER_TIMESTAMP, FieldFilter, Or
 
 from .clients import _fs
 
@@ -70,7 +70,59 @@ def _count_error_queues(queues: Dict[str, int]) -> List[str]:
     return [name for name, value in queues.items() if isinstance(value, int) and value < 0]
 
 
+def _aggregate_count(query) -> Optional[int]:
+    """Firestore ``count()`` aggregation, or None where the client has none.
+
+    Billed as one read per 1000 index entries, so a health write costs a
+    handful of reads however long the queues get. None sends the caller back
+    to streaming the capped page; a read outage surfaces there as COUNT_ERROR.
+    """
+    try:
+        value = query.count(alias="n").get()[0][0].value
+    except Exception:
+        return None
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _aggregate_count_excluding(collection_ref, excluded) -> Optional[int]:
+    """Docs in ``collection_ref`` that do not match the ``excluded`` OR filter."""
+    total = _aggregate_count(collection_ref)
+    if total is None:
+        return None
+    try:
+        excluded_count = _aggregate_count(collection_ref.where(filter=excluded))
+    except Exception:
+        return None
+    if excluded_count is None:
+        return None
+    return max(0, total - excluded_count)
+
+
+# Served by the automatic single-field indexes on retryable, status and
+# recoveryStatus; each OR stays well under Firestore's 30-disjunct limit.
+def _terminal_dead_letter_filter() -> Or:
+    statuses = sorted(TERMINAL_DEAD_LETTER_STATUSES)
+    return Or([
+        FieldFilter("retryable", "==", False),
+        FieldFilter("status", "in", statuses),
+        FieldFilter("recoveryStatus", "in", statuses),
+    ])
+
+
+def _non_actionable_processing_failure_filter() -> Or:
+    return Or([
+        FieldFilter("retryable", "==", False),
+        FieldFilter("recoveryStatus", "in", sorted(NON_ACTIONABLE_PROCESSING_FAILURE_RECOVERY_STATUSES)),
+    ])
+
+
 def _count_collection(user_ref, collection_name: str, limit: int = 500) -> int:
+    try:
+        counted = _aggregate_count(user_ref.collection(collection_name))
+        if counted is not None:
+            return counted
+    except Exception:
+        pass
     try:
         collection_ref = user_ref.collection(collection_name)
         query = collection_ref.limit(limit) if hasattr(collection_ref, "limit") else collection_ref
@@ -109,6 +161,14 @@ def _is_actionable_processing_failure(data: Dict) -> bool:
 
 
 def _count_active_dead_letters(user_ref, limit: int = 500) -> int:
+    try:
+        counted = _aggregate_count_excluding(
+            user_ref.collection("deadLetterQueue"), _terminal_dead_letter_filter()
+        )
+        if counted is not None:
+            return counted
+    except Exception:
+        pass
     try:
         collection_ref = user_ref.collection("deadLetterQueue")
         query = collection_ref.limit(limit) if hasattr(collection_ref, "limit") else collection_ref
@@ -123,6 +183,14 @@ def _count_active_dead_letters(user_ref, limit: int = 500) -> int:
 
 
 def _count_actionable_processing_failures(user_ref, limit: int = 500) -> int:
+    try:
+        counted = _aggregate_count_excluding(
+            user_ref.collection("processingFailures"), _non_actionable_processing_failure_filter()
+        )
+        if counted is not None:
+            return counted
+    except Exception:
+        pass
     try:
         collection_ref = user_ref.collection("processingFailures")
         query = collection_ref.limit(limit) if hasattr(collection_ref, "limit") else collection_ref
@@ -214,3 +282,45 @@ def record_user_health(
     )
     write_user_health(user_id, payload, fs_client=fs_client)
     return payload
+
+
+def _exact_queue_count(user_ref, name: str) -> int:
+    """Uncapped full read with the Python predicates the health doc is defined by."""
+    snapshots = user_ref.collection(name).stream()
+    if name == "deadLetterQueue":
+        return sum(1 for snapshot in snapshots if not _is_terminal_dead_letter(_snapshot_data(snapshot)))
+    if name == "processingFailures":
+        return sum(1 for snapshot in snapshots if _is_actionable_processing_failure(_snapshot_data(snapshot)))
+    return sum(1 for _snapshot in snapshots)
+
+
+def reconcile_queue_counts(user_id: str, *, fs_client=None, now: Optional[datetime] = None) -> Dict:
+    """Periodic check of the aggregation counts against a full read of each queue.
+
+    The aggregation filters match status values exactly, while the health
+    predicates normalise case and whitespace, so a doc written with an
+    unnormalised status is counted differently. Any difference is recorded as
+    ``queueCountCheck.drift`` on the health doc and logged; the next health
+    write still uses the aggregation counts.
+    """
+    fs_client = fs_client or _fs
+    now = now or _utc_now()
+    user_ref = fs_client.collection("users").document(user_id)
+    counted = collect_user_health(user_id, fs_client=fs_client, now=now)["queues"]
+    drift = {}
+    for name in QUEUE_COLLECTIONS:
+        try:
+            exact = _exact_queue_count(user_ref, name)
+        except Exception as exc:
+            print(f"⚠️ Could not reconcile {name} for {user_id}: {exc}")
+            continue
+        if counted.get(name) != exact:
+            drift[name] = {"counted": counted.get(name), "exact": exact}
+    if drift:
+        print(f"⚠️ Health queue count drift for {user_id}: {drift}")
+    check = {"checkedAt": now, "drift": drift}
+    (
+        user_ref.collection(HEALTH_COLLECTION).document(HEALTH_DOC_ID)
+        .set({"queueCountCheck": check}, merge=True)
+    )
+    return check
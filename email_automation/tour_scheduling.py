@@ -695,7 +695,9 @@ def _tour_segment_analysis(text: str = "") -> List[Dict[str, Any]]:
 
 def subject_bound_tour_segments(text: str = "") -> List[str]:
     """Return only clauses whose scheduling semantics are bound to a physical tour."""
-    return [item["text"] for item in _tour_segment_analysis(text) if item["tourBound"]]
+    from .inbound_text import inbound_text_context
+
+    return list(inbound_text_context(str(text or "")).tour_segments)
 
 
 def looks_like_tour_scheduling_reply(text: str = "") -> bool:
@@ -710,11 +712,13 @@ def classify_tour_intent(text: str = "") -> str:
     event without erasing it during normalization. Only proven boilerplate or
     virtual-resource language is labeled ``courtesy``.
     """
-    latest = str(text or "").strip()
-    if not latest:
-        return TOUR_INTENT_UNKNOWN
+    from .inbound_text import inbound_text_context
+
+    return inbound_text_context(str(text or "")).tour_intent
+
 
-    analysis = _tour_segment_analysis(latest)
+def tour_intent_from_analysis(analysis: List[Dict[str, Any]]) -> str:
+    """Reduce a ``_tour_segment_analysis`` result to one tour intent."""
     if any(
         item["intent"] == TOUR_INTENT_ACTIONABLE and item["tourBound"]
         for item in analysis
@@ -3,10 +3,15 @@ import base64
 import html as html_lib
 import io
 import time
-import requests
+import hashlib
+import json
+import threading
+from .http_pool import pooled_requests as requests
 import os
 import logging
 from bs4 import BeautifulSoup
+from collections import OrderedDict
+from dataclasses import dataclass
 from functools import lru_cache
 from typing import Any, Dict, Optional, List, Tuple
 
@@ -401,11 +406,9 @@ def _upload_logo_to_drive(image_filename: str = "mohr-partners-logo.png", runtim
 
     try:
         from .file_handling import ensure_drive_folder
-        from .clients import _helper_google_creds
-        from googleapiclient.discovery import build
+        from .clients import _drive_client
 
-        creds = _helper_google_creds()
-        drive = build("drive", "v3", credentials=creds, cache_discovery=False)
+        drive = _drive_client()
         folder_id = ensure_drive_folder()
 
         # Search for existing file by name in our folder
@@ -1046,13 +1049,13 @@ def get_signature_attachments(custom_signature: str = None, signature_mode: str
 
     User-created professional signatures can include uploaded logo data URLs.
     Those are converted to CID attachments. Company defaults are resolved into
-    the active signature HTML before this helper is called.
+    the active signature HTML before this helper is called. Returns copies of
+    the compiled entries, so callers may mutate them.
     """
-    custom_attachments = _custom_signature_attachment_entries(custom_signature)
-    if custom_attachments:
-        return custom_attachments
-
-    return []
+    if not signature_cache_enabled():
+        return _custom_signature_attachment_entries(custom_signature)
+    compiled = compile_signature(custom_signature, signature_mode, user_email)
+    return [dict(attachment) for attachment in compiled.attachments]
 
 def convert_plain_text_signature_to_html(plain_text_signature: str) -> str:
     """
@@ -1079,22 +1082,23 @@ def _is_legacy_mohr_signature_user(user_email: str = None) -> bool:
     return False
 
 
-def _apply_signature_website_policy(footer_html: str) -> str:
+def _apply_signature_website_policy(footer_html: str, finding_codes: Optional[List[str]] = None) -> str:
     """Tier-1 (offline) signature-website gate. Inert unless the flag is on.
 
     Fail-open by construction: the validator returns the input unchanged on any
     error, and this wrapper swallows even an import failure. A dangerous link is
-    de-linked (text preserved); the message still sends.
+    de-linked (text preserved); the message still sends. Finding codes are
+    appended to ``finding_codes`` when a list is passed.
     """
     try:
         from .signature_website_validation import apply_signature_website_policy
 
         cleaned, findings = apply_signature_website_policy(footer_html)
         if findings:
-            logger.warning(
-                "Signature website neutralised before send: %s",
-                ", ".join(sorted({f.code for f in findings})),
-            )
+            codes = sorted({f.code for f in findings})
+            if finding_codes is not None:
+                finding_codes.extend(codes)
+            logger.warning("Signature website neutralised before send: %s", ", ".join(codes))
             print(f"⚠️ Signature website link neutralised ({len(findings)} finding(s))")
         return cleaned
     except Exception:
@@ -1102,9 +1106,14 @@ def _apply_signature_website_policy(footer_html: str) -> str:
         return footer_html
 
 
-def get_email_footer(custom_signature: str = None, signature_mode: str = None, user_email: str = None) -> str:
+def _render_email_footer(
+    custom_signature: str = None,
+    signature_mode: str = None,
+    user_email: str = None,
+    finding_codes: Optional[List[str]] = None,
+) -> str:
     """
-    Returns HTML formatted email footer.
+    Builds the HTML email footer. Send paths go through get_email_footer.
 
     Args:
         custom_signature: Optional plain text signature from user settings.
@@ -1134,7 +1143,8 @@ def get_email_footer(custom_signature: str = None, signature_mode: str = None, u
             return _apply_signature_website_policy(
                 convert_plain_text_signature_to_html(
                     _strip_signature_placeholders_preserving_lines(custom_signature)
-                )
+                ),
+                finding_codes,
             )
         # Custom mode but no signature text - return empty
         return ""
@@ -1154,7 +1164,8 @@ def get_email_footer(custom_signature: str = None, signature_mode: str = None, u
             return _apply_signature_website_policy(
                 convert_plain_text_signature_to_html(
                     _strip_signature_placeholders_preserving_lines(custom_signature)
-                )
+                ),
+                finding_codes,
             )
         return ""
     else:
@@ -1162,12 +1173,114 @@ def get_email_footer(custom_signature: str = None, signature_mode: str = None, u
         return ""
 
 
+# Compiled signatures, keyed by a hash of the signature settings. Building a
+# footer sanitizes the signature HTML, runs the website policy and decodes and
+# recompresses any uploaded logo; an outbox drain or follow-up run sends many
+# messages with the same settings, so that work is done once per settings hash.
+SIGNATURE_CACHE_ENV = "SITESIFT_SIGNATURE_CACHE"
+SIGNATURE_CACHE_MAX_ENTRIES = 64
+
+_signature_cache: "OrderedDict[str, CompiledSignature]" = OrderedDict()
+_signature_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CompiledSignature:
+    footer_html: str
+    # Inline CID logo attachments with their compressed contentBytes.
+    attachments: Tuple[dict, ...]
+    # Website-policy finding codes raised while building footer_html.
+    website_findings: Tuple[str, ...]
+
+
+def signature_cache_enabled() -> bool:
+    if os.getenv("E2E_TEST_MODE") == "true":
+        return False
+    return os.getenv(SIGNATURE_CACHE_ENV, "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _signature_website_policy_state() -> str:
+    """Part of the cache key: the website flag changes footer_html."""
+    try:
+        from .signature_website_validation import signature_website_validation_enabled
+
+        return "on" if signature_website_validation_enabled() else "off"
+    except Exception:
+        return "unavailable"
+
+
+def _signature_settings_key(custom_signature: Optional[str], signature_mode: Optional[str], user_email: Optional[str]) -> str:
+    settings = [custom_signature, signature_mode, user_email, _signature_website_policy_state()]
+    return hashlib.sha256(json.dumps(settings).encode("utf-8")).hexdigest()
+
+
+def _compile_signature(custom_signature: Optional[str], signature_mode: Optional[str], user_email: Optional[str]) -> CompiledSignature:
+    finding_codes: List[str] = []
+    footer_html = _render_email_footer(custom_signature, signature_mode, user_email, finding_codes)
+    return CompiledSignature(
+        footer_html=footer_html,
+        attachments=tuple(_custom_signature_attachment_entries(custom_signature)),
+        website_findings=tuple(finding_codes),
+    )
+
+
+def _cached_signature(custom_signature: Optional[str], signature_mode: Optional[str],
+                      user_email: Optional[str]) -> Tuple[CompiledSignature, bool]:
+    """(compiled signature, whether it came from the cache)."""
+    if not signature_cache_enabled():
+        return _compile_signature(custom_signature, signature_mode, user_email), False
+
+    key = _signature_settings_key(custom_signature, signature_mode, user_email)
+    with _signature_cache_lock:
+        compiled = _signature_cache.get(key)
+        if compiled is not None:
+            _signature_cache.move_to_end(key)
+            return compiled, True
+
+    compiled = _compile_signature(custom_signature, signature_mode, user_email)
+    with _signature_cache_lock:
+        _signature_cache[key] = compiled
+        _signature_cache.move_to_end(key)
+        while len(_signature_cache) > SIGNATURE_CACHE_MAX_ENTRIES:
+            _signature_cache.popitem(last=False)
+    return compiled, False
+
+
+def compile_signature(custom_signature: str = None, signature_mode: str = None, user_email: str = None) -> CompiledSignature:
+    """Footer HTML, inline logo attachments and website findings for one set of signature settings."""
+    return _cached_signature(custom_signature, signature_mode, user_email)[0]
+
+
+def clear_signature_cache() -> None:
+    with _signature_cache_lock:
+        _signature_cache.clear()
+
+
+def get_email_footer(custom_signature: str = None, signature_mode: str = None, user_email: str = None) -> str:
+    """
+    Returns HTML formatted email footer.
+
+    Args:
+        custom_signature: Optional plain text signature from user settings.
+        signature_mode: Signature mode - "none", "custom", or "professional".
+        user_email: Sender profile email used to gate the legacy Jill footer.
+
+    See _render_email_footer for the per-mode rules; the result is cached per
+    settings hash (compile_signature). A cached footer still logs the website
+    findings it was built with, so every send that carries a neutralised link
+    is in the log, not only the one that filled the cache.
+    """
+    compiled, cached = _cached_signature(custom_signature, signature_mode, user_email)
+    if cached and compiled.website_findings:
+        logger.warning("Signature website neutralised before send: %s", ", ".join(compiled.website_findings))
+    return compiled.footer_html
+
+
 def needs_signature_attachments(signature_mode: str, custom_signature: str = None, user_email: str = None) -> bool:
     """Check if the signature mode requires inline image attachments."""
-    if _custom_signature_attachment_entries(custom_signature):
-        return True
-
-    return False
+    if not signature_cache_enabled():
+        return bool(_custom_signature_attachment_entries(custom_signature))
+    return bool(compile_signature(custom_signature, signature_mode, user_email).attachments)
 
 
 def format_email_body_with_footer(
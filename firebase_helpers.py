@@ -1,6 +1,6 @@
 import os
 
-import requests
+from email_automation.http_pool import pooled_requests as requests
 
 # Env-parameterizable for the Cloud Run Job runtime. Defaults to the historical
 # hardcoded bucket so behavior is unchanged when FIREBASE_BUCKET is unset.
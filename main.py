@@ -1,34 +1,55 @@
 import atexit
 import json
 import os
+import shutil
 import signal
 import sys
+import tempfile
+import time
 import traceback
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from msal import ConfidentialClientApplication, SerializableTokenCache
 from firebase_helpers import download_token, upload_token
-from email_automation.clients import list_user_ids, decode_token_payload, _fs
+from email_automation.clients import list_user_ids, decode_token_payload, google_client_stats, _fs
 from email_automation.email import process_outbox_item as process_exact_outbox_item
+from email_automation.extraction_cache import extraction_cache_stats
+from email_automation.http_pool import http_pool_stats
 from email_automation.email import send_outboxes
 from email_automation.processing import (
     _graph_operation_error_state,
+    inbox_readahead_scope,
     reconcile_stale_processing_failures,
     retry_processing_failures,
     scan_inbox_against_index,
     scan_sent_items_for_manual_replies,
 )
 from email_automation.followup import check_and_send_followups
+from email_automation.messaging import conversation_page_scope
 from email_automation.pending_responses import process_pending_responses
+from email_automation.rate_governor import bind_mailbox
+from email_automation.retention import RETENTION_POLICIES, enforce_retention
+from email_automation.send_pacing import (
+    PacedSendDispatcher,
+    PacingScope,
+    paced_send_dispatch,
+    paced_send_scope,
+    register_paced_sends,
+    send_pacing_stats,
+    send_window_seconds,
+)
+from email_automation.sheets import sheet_snapshot_scope
 from email_automation.app_config import CLIENT_ID, CLIENT_SECRET, AUTHORITY, SCOPES, TOKEN_CACHE, FIREBASE_API_KEY
-from email_automation.scheduler_lease import run_with_scheduler_lease
+from email_automation.scheduler_lease import run_with_scheduler_lease, run_with_user_lease
 from email_automation.scheduler_scope import SchedulerScopeError, resolve_scheduler_user_ids
-from email_automation.system_health import record_user_health
+from email_automation.system_health import reconcile_queue_counts, record_user_health
 
-# Thresholds for auto-cleanup (to stay within Firebase free tier)
-PROCESSED_MESSAGES_THRESHOLD = 500
-SHEET_CHANGELOG_THRESHOLD = 100
+RETENTION_LEASE_ID = "emailAutomationRetention"
 GRAPH_TOKEN_REFRESH_BUFFER_SECONDS = 15 * 60
 PROCESSING_FAILURE_RETRY_DEFAULT_MAX_AGE_HOURS = 6
+USER_CONCURRENCY_ENV = "SITESIFT_USER_CONCURRENCY"
+USER_CONCURRENCY_MAX = 8
 
 
 def _processing_failure_retry_enabled() -> bool:
@@ -49,6 +70,24 @@ def _processing_failure_retry_max_age_hours() -> float:
     return max(0.0, hours)
 
 
+def _user_concurrency() -> int:
+    """Number of users processed at once by run_all_users.
+
+    Defaults to 1, which keeps the legacy strictly-sequential walk (shared
+    TOKEN_CACHE file, no per-user lease). Values above 1 opt into the bounded
+    worker pool; the pool is capped at USER_CONCURRENCY_MAX so a typo cannot
+    fan a run out across every mailbox at once.
+    """
+    value = os.getenv(USER_CONCURRENCY_ENV, "")
+    if not value.strip():
+        return 1
+    try:
+        workers = int(value)
+    except ValueError:
+        return 1
+    return max(1, min(workers, USER_CONCURRENCY_MAX))
+
+
 def _headers_from_access_token(access_token: str) -> dict:
     return {
         "Authorization": f"Bearer {access_token}",
@@ -63,71 +102,26 @@ def _expires_in_seconds(token_result) -> int:
         return 0
 
 
-def _timestamp_sort_value(doc, fields):
-    data = doc.to_dict() or {}
-    for field in fields:
-        value = data.get(field)
-        if value is None:
-            continue
-        if hasattr(value, "timestamp"):
-            return value.timestamp()
-        if isinstance(value, (int, float)):
-            return float(value)
-        if isinstance(value, str):
-            try:
-                return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
-            except ValueError:
-                return 0
-        return 0
-    return 0
-
+def auto_cleanup_firestore(user_id: str) -> list:
+    """Trim the retained collections (retention.RETENTION_POLICIES).
 
-def _delete_oldest_excess_docs(collection_ref, threshold: int, timestamp_fields) -> int:
-    docs = list(collection_ref.stream())
-    excess_count = max(0, len(docs) - threshold)
-    if excess_count <= 0:
-        return 0
-
-    docs.sort(key=lambda doc: _timestamp_sort_value(doc, timestamp_fields))
-    for doc in docs[:excess_count]:
-        doc.reference.delete()
-    return excess_count
-
-
-def auto_cleanup_firestore(user_id: str):
+    Runs from run_retention_pass, not from the per-user run; the production
+    workflow (.github/workflows/email.yml) runs that pass once a day.
     """
-    Automatically clean up Firestore collections if they exceed thresholds.
-    This helps stay within Firebase free tier limits.
-    """
-    try:
-        # Check processedMessages count
-        pm_ref = _fs.collection("users").document(user_id).collection("processedMessages")
-        pm_docs = list(pm_ref.limit(PROCESSED_MESSAGES_THRESHOLD + 1).stream())
-
-        if len(pm_docs) > PROCESSED_MESSAGES_THRESHOLD:
-            print(f"🧹 Auto-cleanup: processedMessages ({len(pm_docs)}+) exceeds threshold ({PROCESSED_MESSAGES_THRESHOLD})")
-            deleted = _delete_oldest_excess_docs(
-                pm_ref,
-                PROCESSED_MESSAGES_THRESHOLD,
-                ["processedAt", "timestamp", "createdAt"],
-            )
-            print(f"   ✅ Deleted {deleted} oldest processedMessages docs")
-
-        # Check sheetChangeLog count
-        cl_ref = _fs.collection("users").document(user_id).collection("sheetChangeLog")
-        cl_docs = list(cl_ref.limit(SHEET_CHANGELOG_THRESHOLD + 1).stream())
-
-        if len(cl_docs) > SHEET_CHANGELOG_THRESHOLD:
-            print(f"🧹 Auto-cleanup: sheetChangeLog ({len(cl_docs)}+) exceeds threshold ({SHEET_CHANGELOG_THRESHOLD})")
-            deleted = _delete_oldest_excess_docs(
-                cl_ref,
-                SHEET_CHANGELOG_THRESHOLD,
-                ["timestamp", "createdAt", "updatedAt"],
+    results = []
+    for policy in RETENTION_POLICIES:
+        try:
+            result = enforce_retention(_fs, user_id, policy)
+        except Exception as e:
+            print(f"⚠️ Auto-cleanup error for {user_id}/{policy.collection}: {e}")
+            continue
+        results.append(result)
+        if result["deleted"] or result["stamped"]:
+            print(
+                f"🧹 Auto-cleanup ({result['mode']}): {policy.collection} for {user_id}: "
+                f"deleted {result['deleted']} oldest, stamped {result['stamped']} with expiresAt"
             )
-            print(f"   ✅ Deleted {deleted} oldest sheetChangeLog docs")
-
-    except Exception as e:
-        print(f"⚠️ Auto-cleanup error for {user_id}: {e}")
+    return results
 
 
 SEND_HEALTH_ESCALATION_ENV = "SITESIFT_SEND_HEALTH_ESCALATION"
@@ -232,20 +226,29 @@ def process_outbox_item(user_id: str, outbox_id: str):
     return {"status": status if isinstance(status, str) else None}
 
 
-def refresh_and_process_user(user_id: str):
+def refresh_and_process_user(user_id: str, token_cache_path: Optional[str] = None):
+    """Run the full per-user pipeline.
+
+    ``token_cache_path`` isolates the MSAL cache file for this user. The
+    sequential scheduler and the webhook service leave it unset and share
+    TOKEN_CACHE; the concurrent pool passes a per-user path so two workers
+    never deserialize or upload each other's cache.
+    """
     print(f"\n🔄 Processing user: {user_id}")
+    token_cache_path = token_cache_path or TOKEN_CACHE
+    bind_mailbox(user_id)
 
-    download_token(FIREBASE_API_KEY, output_file=TOKEN_CACHE, user_id=user_id)
+    download_token(FIREBASE_API_KEY, output_file=token_cache_path, user_id=user_id)
 
     cache = SerializableTokenCache()
-    with open(TOKEN_CACHE, "r") as f:
+    with open(token_cache_path, "r") as f:
         cache.deserialize(f.read())
 
     def _save_cache():
         if cache.has_state_changed:
-            with open(TOKEN_CACHE, "w") as f:
+            with open(token_cache_path, "w") as f:
                 f.write(cache.serialize())
-            upload_token(FIREBASE_API_KEY, input_file=TOKEN_CACHE, user_id=user_id)
+            upload_token(FIREBASE_API_KEY, input_file=token_cache_path, user_id=user_id)
             print(f"✅ Token cache uploaded for {user_id}")
 
     atexit.unregister(_save_cache)
@@ -352,24 +355,31 @@ def refresh_and_process_user(user_id: str):
         return
 
     graph_operation_states = []
+    # Sends the per-mailbox pacing slot held back; see _drain_paced_sends.
+    pacing = PacingScope()
 
     # Process outbound emails (now with indexing). Rail 5 (#18) feeds the send path
     # into graph health with fail-closed exception handling; #20 returns per-item send
     # failures as op-states so a swallowed failure also escalates the health rail.
-    _, send_states = _run_graph_send_operation(
-        "outbox_send",
-        send_outboxes,
-        user_id,
-        headers,
-        headers_provider=get_graph_headers,
-    )
+    with paced_send_scope(pacing):
+        _, send_states = _run_graph_send_operation(
+            "outbox_send",
+            send_outboxes,
+            user_id,
+            headers,
+            headers_provider=get_graph_headers,
+        )
     graph_operation_states.extend(send_states)
 
-    # Scan for client replies (inbox - catch all replies, not just unread)
+    # Scan for client replies (inbox - catch all replies, not just unread).
+    # Replies in one scan share each client sheet's snapshot instead of
+    # re-reading the whole grid for every message, and one mailbox page for
+    # their conversation history; their bodies are read in $batch windows.
     print("\n🔍 Scanning inbox for client replies...")
-    graph_operation_states.append(
-        scan_inbox_against_index(user_id, get_graph_headers(), only_unread=False, top=50)
-    )
+    with sheet_snapshot_scope(), conversation_page_scope(), inbox_readahead_scope():
+        graph_operation_states.append(
+            scan_inbox_against_index(user_id, get_graph_headers(), only_unread=False, top=50)
+        )
 
     # Scan for Jill's manual replies (SentItems - catch manual replies we didn't index)
     print(f"\n📤 Scanning SentItems for manual replies...")
@@ -396,17 +406,15 @@ def refresh_and_process_user(user_id: str):
     graph_operation_states.extend(pending_states)
 
     # Check and send follow-up emails for threads without responses (send path).
-    _, followup_states = _run_graph_send_operation(
-        "followup_send",
-        check_and_send_followups,
-        user_id,
-        get_graph_headers(),
-    )
+    with paced_send_scope(pacing):
+        _, followup_states = _run_graph_send_operation(
+            "followup_send",
+            check_and_send_followups,
+            user_id,
+            get_graph_headers(),
+        )
     graph_operation_states.extend(followup_states)
 
-    # Auto-cleanup Firestore if collections are getting large (stay within free tier)
-    auto_cleanup_firestore(user_id)
-
     # Keep dashboard health from staying red after a retry eventually succeeds.
     reconcile_stale_processing_failures(user_id)
 
@@ -416,6 +424,159 @@ def refresh_and_process_user(user_id: str):
         graph_state=_combine_graph_operation_states(graph_operation_states),
     )
 
+    if pacing.not_before is not None:
+        lanes = set(pacing.lanes)
+
+        def drain():
+            return _drain_paced_sends(user_id, lanes, get_graph_headers, lambda: latest_token_state)
+
+        if register_paced_sends(user_id, pacing.not_before, drain):
+            print(f"📮 Paced sends for {user_id} resume at {pacing.not_before.strftime('%H:%M:%S')} UTC")
+
+
+def _drain_paced_sends(user_id, lanes, get_graph_headers, token_state):
+    """Re-run the send lanes a mailbox's pacing slot held back.
+
+    Called by the run's PacedSendDispatcher once the slot is due. Returns the
+    mailbox's next slot, or None once nothing is left waiting. A failed send
+    escalates the health doc the main pass already wrote.
+    """
+    bind_mailbox(user_id)
+    states = []
+    pacing = PacingScope()
+    with paced_send_scope(pacing):
+        if "outbox" in lanes:
+            _, send_states = _run_graph_send_operation(
+                "outbox_send",
+                send_outboxes,
+                user_id,
+                get_graph_headers(),
+                headers_provider=get_graph_headers,
+            )
+            states.extend(send_states)
+        if "followup" in lanes:
+            _, followup_states = _run_graph_send_operation(
+                "followup_send",
+                check_and_send_followups,
+                user_id,
+                get_graph_headers(),
+            )
+            states.extend(followup_states)
+
+    graph_state = _combine_graph_operation_states(states)
+    if graph_state["status"] == "error":
+        record_user_health(user_id, token_state=token_state(), graph_state=graph_state)
+    lanes.intersection_update(pacing.lanes)
+    return pacing.not_before
+
+
+def _drain_under_user_lease(uid, drain):
+    """Concurrent runs hold the per-user lease for a drain, as for the main pass."""
+    outcome = {}
+    run_with_user_lease(uid, lambda: outcome.update(next_slot=drain()))
+    return outcome.get("next_slot")
+
+
+def _record_user_run_error(uid: str, error: Exception) -> None:
+    print(f"💥 Error for user {uid}:", str(error))
+    record_user_health(
+        uid,
+        token_state={"status": "unknown"},
+        graph_state={"status": "error", "error": str(error)},
+    )
+
+
+def _process_user_in_pool(uid: str, token_cache_dir: str) -> dict:
+    """Worker body for the concurrent pool: one user, own lease, own cache file.
+
+    Never raises — a failure is recorded on the user's health doc and returned
+    as an ``error`` outcome so one mailbox cannot cancel its neighbours.
+    """
+    token_cache_path = os.path.join(token_cache_dir, f"{uid}.msal_token_cache.bin")
+    started = time.monotonic()
+    status = "processed"
+    error = None
+    try:
+        acquired = run_with_user_lease(
+            uid,
+            lambda: refresh_and_process_user(uid, token_cache_path=token_cache_path),
+        )
+        if not acquired:
+            status = "skipped_lease_held"
+    except Exception as e:
+        status = "error"
+        error = str(e)
+        _record_user_run_error(uid, e)
+    return {
+        "uid": uid,
+        "status": status,
+        "error": error,
+        "wallSeconds": round(time.monotonic() - started, 3),
+    }
+
+
+def _run_users_concurrently(user_ids, workers: int) -> list:
+    # Per-user cache files live in a private temp dir. The rmtree is registered
+    # BEFORE any worker registers its _save_cache, and atexit runs LIFO, so the
+    # token-cache uploads still find their files at shutdown.
+    token_cache_dir = tempfile.mkdtemp(prefix="msal_caches_")
+    atexit.register(shutil.rmtree, token_cache_dir, ignore_errors=True)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="user") as pool:
+        futures = [pool.submit(_process_user_in_pool, uid, token_cache_dir) for uid in user_ids]
+        for future in as_completed(futures):
+            outcome = future.result()
+            print(f"⏱️ User {outcome['uid']}: {outcome['status']} in {outcome['wallSeconds']}s")
+            results.append(outcome)
+
+    order = {uid: index for index, uid in enumerate(user_ids)}
+    results.sort(key=lambda outcome: order.get(outcome["uid"], len(order)))
+    return results
+
+
+def _run_users_sequentially(user_ids) -> list:
+    results = []
+    for uid in user_ids:
+        started = time.monotonic()
+        status = "processed"
+        error = None
+        try:
+            refresh_and_process_user(uid)
+        except Exception as e:
+            status = "error"
+            error = str(e)
+            _record_user_run_error(uid, e)
+        results.append({
+            "uid": uid,
+            "status": status,
+            "error": error,
+            "wallSeconds": round(time.monotonic() - started, 3),
+        })
+    return results
+
+
+def _summarize_user_run(results, workers: int, wall_seconds: float) -> dict:
+    user_seconds = sum(outcome["wallSeconds"] for outcome in results)
+    return {
+        "workers": workers,
+        "users": len(results),
+        "processed": sum(1 for outcome in results if outcome["status"] == "processed"),
+        "errors": sum(1 for outcome in results if outcome["status"] == "error"),
+        "skipped": sum(1 for outcome in results if outcome["status"] == "skipped_lease_held"),
+        "wallSeconds": round(wall_seconds, 3),
+        "userSeconds": round(user_seconds, 3),
+        # users/minute is what sizes the pool against the job timeout;
+        # userSeconds/wallSeconds is the effective parallelism achieved.
+        "usersPerMinute": round(len(results) * 60.0 / wall_seconds, 2) if wall_seconds > 0 else None,
+        "parallelism": round(user_seconds / wall_seconds, 2) if wall_seconds > 0 else None,
+        "extractionCache": extraction_cache_stats(),
+        "sendPacing": send_pacing_stats(),
+        "httpPool": http_pool_stats(),
+        "googleClients": google_client_stats(),
+        "perUser": results,
+    }
+
 
 def run_all_users():
     all_users = list_user_ids()
@@ -428,16 +589,81 @@ def run_all_users():
 
     print(f"🛡️ Scheduler scope: {scope.mode}; processing users: {scope.user_ids}")
 
+    workers = min(_user_concurrency(), max(1, len(scope.user_ids)))
+    started = time.monotonic()
+    dispatcher = PacedSendDispatcher(
+        deadline=datetime.now(timezone.utc) + timedelta(seconds=send_window_seconds()),
+        runner=_drain_under_user_lease if workers > 1 else None,
+    )
+    with paced_send_dispatch(dispatcher):
+        if workers > 1:
+            print(f"🧵 Processing {len(scope.user_ids)} users with {workers} concurrent workers")
+            results = _run_users_concurrently(scope.user_ids, workers)
+        else:
+            results = _run_users_sequentially(scope.user_ids)
+    wall_seconds = time.monotonic() - started
+
+    # Inbox work for every mailbox is done; now wait out the pacing slots.
+    if dispatcher.pending():
+        print(f"📮 Dispatching paced sends for {dispatcher.pending()} mailbox(es)")
+        dispatcher.run()
+
+    summary = _summarize_user_run(results, workers, wall_seconds)
+    print(
+        f"📊 Run summary: {summary['users']} users "
+        f"({summary['processed']} processed, {summary['errors']} errors, "
+        f"{summary['skipped']} skipped) in {summary['wallSeconds']}s "
+        f"with {workers} worker(s); {summary['usersPerMinute']} users/min, "
+        f"parallelism {summary['parallelism']}"
+    )
+    cache = summary["extractionCache"]
+    print(
+        f"📊 Extraction cache: {cache['hits']} hits ({cache['diskHits']} disk, "
+        f"{cache['durableHits']} durable), {cache['misses']} misses, "
+        f"{cache['bytesRead']} bytes read, {cache['bytesWritten']} bytes written, "
+        f"{cache['evictions']} evictions"
+    )
+    pacing = summary["sendPacing"]
+    print(
+        f"📊 Send pacing: {pacing['granted']} sends granted, {pacing['deferred']} deferred, "
+        f"{pacing['drains']} drains after {pacing['waitSeconds']}s waiting, "
+        f"{pacing['pastWindow']} left for the next run"
+    )
+    google = summary["googleClients"]
+    print(
+        f"📊 Google clients: {google['serviceBuilds']} service builds "
+        f"({google['buildsAvoided']} reused), {google['credentialRefreshes']} credential refreshes "
+        f"({google['refreshesAvoided']} skipped)"
+    )
+    return summary
+
+
+def run_retention_pass():
+    """Scheduled ``--retention`` pass for every user in scope.
+
+    Trims the retained collections and reconciles the health queue counts
+    against a full read of each queue.
+    """
+    all_users = list_user_ids()
+    try:
+        scope = resolve_scheduler_user_ids(all_users)
+    except SchedulerScopeError as e:
+        raise SystemExit(f"🚫 Scheduler scope blocked: {e}") from e
+
+    deleted = stamped = drifted = 0
     for uid in scope.user_ids:
+        for result in auto_cleanup_firestore(uid):
+            deleted += result["deleted"]
+            stamped += result["stamped"]
         try:
-            refresh_and_process_user(uid)
+            drifted += int(bool(reconcile_queue_counts(uid)["drift"]))
         except Exception as e:
-            print(f"💥 Error for user {uid}:", str(e))
-            record_user_health(
-                uid,
-                token_state={"status": "unknown"},
-                graph_state={"status": "error", "error": str(e)},
-            )
+            print(f"⚠️ Health queue reconciliation error for {uid}: {e}")
+    print(
+        f"📊 Retention: {len(scope.user_ids)} users, {deleted} docs deleted, "
+        f"{stamped} legacy docs stamped with expiresAt, {drifted} users with queue count drift"
+    )
+    return {"users": len(scope.user_ids), "deleted": deleted, "stamped": stamped, "drifted": drifted}
 
 
 EXPECTED_AZURE_APP_ID_PREFIX = "54cec"
@@ -502,4 +728,7 @@ def _install_sigterm_atexit_bridge() -> None:
 if __name__ == "__main__":
     _validate_startup_env()
     _install_sigterm_atexit_bridge()
-    run_with_scheduler_lease(run_all_users)
+    if "--retention" in sys.argv[1:]:
+        run_with_scheduler_lease(run_retention_pass, lease_id=RETENTION_LEASE_ID)
+    else:
+        run_with_scheduler_lease(run_all_users)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Time the memoized ColumnTermMatcher against the per-call field-term matcher.
+
+The old path rebuilt the field groups from the columnConfig and every alias
+pattern for every response body, then scanned the body once per alias. The
+baseline column here does exactly that; the matcher column reuses the groups
+and compiled terms for the config and skips aliases whose literals are not in
+the body:
+
+    python3 scripts/benchmark_column_term_matcher.py
+    python3 scripts/benchmark_column_term_matcher.py --rounds 200 --json
+
+Both paths must find the same mentions; a mismatch exits non-zero.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from email_automation import column_config  # noqa: E402
+
+
+SAMPLE_BODIES = {
+    "ask_rent_and_size": (
+        "Hi Mark,\n\nThanks for sending the flyer over. Could you confirm the asking rent "
+        "and the total SF for Suite 200? Also, what are the NNN / OpEx estimates for 2026?\n\n"
+        "Thanks,\nJill"
+    ),
+    "factual_reply": (
+        "Hi Jill - the space is 12,500 SF with 24' clear height, 2 dock doors and 1 drive-in. "
+        "Asking $14.50/SF NNN, OpEx around $3.25/SF. Power is 800 amps 3-phase. "
+        "Available 3/1. Flyer attached."
+    ),
+    "list_request": (
+        "Hello,\n\nA few items we still need for the client:\n"
+        "- Clear height\n- Number of dock doors and drive-ins\n- Power (amps/volts)\n"
+        "- Parking ratio\n- Rail access\n\nPlease send when you can.\n\nBest,\nSam"
+    ),
+    "nonrequestable_probe": (
+        "Can you tell me the cap rate and the price per square foot on the sale side? "
+        "Also the landlord's listing comments would help, and the total annual rent."
+    ),
+    "long_thread_quote": (
+        "Perfect, thank you.\n\n"
+        + "> On Tue, the broker wrote: The building has sprinklers (ESFR), LED lighting, "
+        "a fenced yard and 40 car parking spaces. Taxes are included in the OpEx figure. "
+        "Ceiling height varies from 22' to 26' clear. Office build-out is 1,800 SF.\n" * 6
+    ),
+    "no_field_terms": (
+        "Sounds good, I'll loop back with the client tomorrow morning and let you know "
+        "whether we want to set up a tour next week. Appreciate the quick turnaround!"
+    ),
+}
+
+
+def benchmark_config() -> dict:
+    config = column_config.get_default_column_config()
+    config["customFields"] = {
+        "Loading Dock Levelers": {"mode": "ask_optional", "description": "Pit or edge levelers"},
+        "Truck Court Depth": {"mode": "ask_required", "description": "Feet"},
+        "Zoning Notes": {"mode": "note", "description": "Do not request"},
+    }
+    return config
+
+
+def legacy_mentions(text: str, config: dict) -> list:
+    """The old path: groups, patterns and one scan per alias, every call."""
+    field_groups = column_config._configured_field_groups(config)
+    build = column_config._compiled_field_term.__wrapped__
+    raw_mentions = []
+    for group_index, (_kind, _header, terms) in enumerate(field_groups):
+        spans = [
+            match.span()
+            for term in terms
+            for compiled in (build((term or "").strip()),)
+            if compiled is not None
+            for match in compiled.matches(text, disambiguate_sf=True)
+        ]
+        raw_mentions.extend((start, end, group_index) for start, end in column_config._maximal_spans(spans))
+    return column_config._resolve_field_mentions(raw_mentions, field_groups)
+
+
+def matcher_mentions(text: str, config: dict) -> list:
+    return column_config.column_term_matcher(config).mentions(text)
+
+
+def _time(fn, text: str, config: dict, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(text, config)
+    return (time.perf_counter() - started) / rounds
+
+
+def benchmark_body(name: str, text: str, config: dict, rounds: int) -> dict:
+    expected = legacy_mentions(text, config)
+    actual = matcher_mentions(text, config)
+    return {
+        "body": name,
+        "chars": len(text),
+        "mentions": len(actual),
+        "legacyMs": round(_time(legacy_mentions, text, config, rounds) * 1000, 3),
+        "matcherMs": round(_time(matcher_mentions, text, config, rounds) * 1000, 3),
+        "identical": expected == actual,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=50, help="Timed calls per body and path")
+    parser.add_argument("--json", action="store_true", help="Print one JSON document instead of a table")
+    args = parser.parse_args(argv)
+
+    config = benchmark_config()
+    field_groups = column_config._configured_field_groups(config)
+    rows = [benchmark_body(name, text, config, max(1, args.rounds)) for name, text in SAMPLE_BODIES.items()]
+    if args.json:
+        print(json.dumps({
+            "fieldGroups": len(field_groups),
+            "terms": sum(len(terms) for _kind, _header, terms in field_groups),
+            "bodies": rows,
+        }, indent=2))
+    else:
+        print(f"{len(field_groups)} field groups, {sum(len(t) for _k, _h, t in field_groups)} terms")
+        print(f"{'legacy ms':>9} {'matcher':>8} {'chars':>6} {'found':>5}  body")
+        for row in rows:
+            print(
+                f"{row['legacyMs']:9.3f} {row['matcherMs']:8.3f} {row['chars']:6d} {row['mentions']:5d}  {row['body']}"
+                + ("" if row["identical"] else "  [MISMATCH]")
+            )
+        print(f"{sum(r['legacyMs'] for r in rows):9.3f} {sum(r['matcherMs'] for r in rows):8.3f}  total")
+    return 0 if all(row["identical"] for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
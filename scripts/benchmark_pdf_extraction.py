@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Time the single-pass PDF extraction engine against a full pdfplumber pass.
+
+The old engine ran pdfplumber text + table extraction on every page and then
+reopened the file in PyMuPDF. The baseline column here is that pdfplumber
+pass alone (a lower bound on the old cost):
+
+    python3 scripts/benchmark_pdf_extraction.py                 # test_pdfs/
+    python3 scripts/benchmark_pdf_extraction.py path/to/a.pdf path/to/dir --json
+
+Per file it reports wall time for both, pages read, table passes, text chars,
+rendered page images and any budget that stopped the table scan.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from email_automation import pdf_text  # noqa: E402
+
+
+def _pdf_paths(targets):
+    paths = []
+    for target in targets:
+        target = Path(target)
+        if target.is_dir():
+            paths.extend(sorted(target.rglob("*.pdf")))
+        elif target.is_file():
+            paths.append(target)
+    return paths
+
+
+def benchmark_file(path: Path, *, max_images=None) -> dict:
+    content = path.read_bytes()
+    stats: dict = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        text, images = pdf_text.extract_pdf_text(content, path.name, max_images=max_images, stats=stats)
+        single_pass = time.perf_counter() - started
+
+        started = time.perf_counter()
+        pdf_text._extract_with_pdfplumber_only(content, path.name, pdf_text.PDF_MAX_PAGES)
+        plumber_pass = time.perf_counter() - started
+
+    return {
+        "file": str(path),
+        "seconds": round(single_pass, 3),
+        "pdfplumberSeconds": round(plumber_pass, 3),
+        "pages": stats.get("pages", 0),
+        "tablePasses": stats.get("table_passes", 0),
+        "chars": len(text),
+        "images": len(images),
+        "stopReason": stats.get("stop_reason"),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", default=[str(REPO_ROOT / "test_pdfs")],
+                        help="PDF files or directories (default: test_pdfs/)")
+    parser.add_argument("--max-images", type=int, default=None,
+                        help="Cap rendered page images, as process_pdf_for_ai does")
+    parser.add_argument("--json", action="store_true", help="Print one JSON document instead of a table")
+    args = parser.parse_args(argv)
+
+    paths = _pdf_paths(args.targets)
+    if not paths:
+        print("REFUSED: no PDFs found", file=sys.stderr)
+        return 2
+
+    rows = [benchmark_file(path, max_images=args.max_images) for path in paths]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(f"{'single':>8} {'plumber':>8} {'pages':>5} {'tables':>6} {'chars':>7} {'images':>6}  file")
+    for row in rows:
+        print(
+            f"{row['seconds']:8.2f} {row['pdfplumberSeconds']:8.2f} {row['pages']:5d} {row['tablePasses']:6d} "
+            f"{row['chars']:7d} {row['images']:6d}  {Path(row['file']).name}"
+            + (f"  [{row['stopReason']}]" if row["stopReason"] else "")
+        )
+    print(f"{sum(r['seconds'] for r in rows):8.2f} {sum(r['pdfplumberSeconds'] for r in rows):8.2f}  total")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -42,6 +42,9 @@ COLLECTIONS_TO_WIPE = [
     "processedMessages",
     "optedOutContacts",
     "sheetChangeLog",
+    "extractionCache",
+    "proposalCache",
+    "conversationBodies",
     "sync",
     "archivedClients",
     "archivedThreads",
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Force the column autosize/format pass on one client's sheet.
+
+Replies only reformat a sheet when row 2 or SHEET_FORMAT_RULES_VERSION changes.
+Use this after a manual layout change (or to repair widths by hand):
+
+    python3 scripts/reformat_client_sheet.py --uid <uid> --client-id <clientId>
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from email_automation.processing import reformat_client_sheet  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uid", required=True)
+    parser.add_argument("--client-id", required=True)
+    args = parser.parse_args(argv)
+
+    try:
+        result = reformat_client_sheet(args.uid, args.client_id)
+    except RuntimeError as exc:
+        print(f"REFUSED: {exc}", file=sys.stderr)
+        return 2
+
+    print(json.dumps(result, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Recompute the global usageMonthly/{YYYY-MM} OpenAI spend aggregate.
+
+budget_guard reads that one document per check. record_openai_usage keeps it
+current, but it only counts calls made after the counter shipped, so run this
+once after deploying mid-month, or whenever it drifts from the dashboard. Until
+the doc carries the reconciledAt marker this writes, the guard ignores it and
+scans the rollups instead:
+
+    GOOGLE_APPLICATION_CREDENTIALS=/tmp/firebase_sa.json \\
+        python3 scripts/repair_usage_monthly.py --month 2026-10          # dry run
+    GOOGLE_APPLICATION_CREDENTIALS=/tmp/firebase_sa.json \\
+        python3 scripts/repair_usage_monthly.py --month 2026-10 --apply
+
+Totals come from every user's openaiUsageDaily rollups for that month.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from email_automation.budget_guard import recompute_month_usage, repair_month_usage  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--month", default=datetime.now(timezone.utc).strftime("%Y-%m"),
+                        help="YYYY-MM (default: the current UTC month)")
+    parser.add_argument("--apply", action="store_true",
+                        help="Overwrite the aggregate. Omit for a read-only dry run.")
+    args = parser.parse_args(argv)
+
+    if not re.fullmatch(r"\d{4}-\d{2}", args.month):
+        print(f"REFUSED: --month must be YYYY-MM, got {args.month!r}", file=sys.stderr)
+        return 2
+    if not os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
+        print("REFUSED: GOOGLE_APPLICATION_CREDENTIALS is not set", file=sys.stderr)
+        return 2
+
+    from google.cloud import firestore
+
+    db = firestore.Client()
+    before = db.collection("usageMonthly").document(args.month).get()
+    current = (before.to_dict() or {}) if before.exists else None
+
+    totals = repair_month_usage(db, args.month) if args.apply else recompute_month_usage(db, args.month)
+    print(json.dumps({
+        "month": args.month,
+        "applied": args.apply,
+        "aggregateBefore": {
+            "totalCostUsd": current.get("totalCostUsd"),
+            "calls": current.get("calls"),
+        } if current is not None else None,
+        "recomputed": totals,
+    }, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""Bounded concurrent ingestion of one message's attachments and linked assets.
+
+Pins the contract the concurrent stage must keep with the serial walk it
+replaced:
+  * per-asset work overlaps, but the manifest comes out in input order,
+  * the linked-asset cap and manifest are exactly the serial ones,
+  * the first failing asset (in input order) is the exception raised, and only
+    after every asset has finished; an attachment-lane failure still wins,
+  * request-scoped ContextVars reach the worker threads,
+  * each asset's wall time is recorded,
+  * PDF parsing in the process pool matches the in-process parse, and a broken
+    pool falls back to parsing in-process,
+  * pool workers never import email_automation.clients, even when the parent's
+    __main__ does (as main.py does),
+  * a worker's exception reaches the caller, and a worker that dies breaks
+    only its own call,
+  * concurrent first uploads create a single Drive folder,
+  * everything stays serial under E2E_TEST_MODE.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import threading
+import time
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar
+from unittest import mock
+
+from email_automation import file_handling, pdf_text, processing
+
+
+_REQUEST_TAG: ContextVar = ContextVar("test_request_tag", default=None)
+
+
+def _pdf_with_text(text):
+    import fitz
+
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_text((72, 72), text)
+    try:
+        return document.tobytes()
+    finally:
+        document.close()
+
+
+class MapAssetsInOrderTests(unittest.TestCase):
+    def test_work_overlaps_and_results_keep_input_order(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def work(item):
+            barrier.wait()  # deadlocks (and times out) unless all three overlap
+            time.sleep(0.01 * (3 - item))
+            return item * 10
+
+        self.assertEqual([0, 10, 20], file_handling.map_assets_in_order(work, [0, 1, 2], workers=3))
+
+    def test_first_failure_in_input_order_is_raised_after_all_finish(self):
+        finished = []
+
+        def work(item):
+            if item == 1:
+                time.sleep(0.05)
+                raise ValueError("first")
+            if item == 2:
+                raise KeyError("second")
+            time.sleep(0.1)
+            finished.append(item)
+            return item
+
+        with self.assertRaisesRegex(ValueError, "first"):
+            file_handling.map_assets_in_order(work, [0, 1, 2, 3], workers=4)
+        self.assertEqual([0, 3], sorted(finished))
+
+    def test_context_vars_follow_the_work_into_the_pool(self):
+        token = _REQUEST_TAG.set("mailbox-a")
+        try:
+            seen = file_handling.map_assets_in_order(lambda _: _REQUEST_TAG.get(), [1, 2, 3], workers=3)
+        finally:
+            _REQUEST_TAG.reset(token)
+        self.assertEqual(["mailbox-a"] * 3, seen)
+
+    def test_e2e_test_mode_runs_serially_on_the_calling_thread(self):
+        with mock.patch.dict(os.environ, {"E2E_TEST_MODE": "true", "ASSET_INGEST_WORKERS": "8"}):
+            self.assertEqual(1, file_handling.asset_ingest_workers())
+            self.assertEqual(0, file_handling.pdf_parse_processes())
+            threads = file_handling.map_assets_in_order(lambda _: threading.get_ident(), [1, 2])
+        self.assertEqual({threading.get_ident()}, set(threads))
+
+
+class PdfAttachmentBatchTests(unittest.TestCase):
+    def test_concurrent_batch_matches_serial_order_and_records_timing(self):
+        delays = {"a.pdf": 0.05, "b.pdf": 0.0, "c.pdf": 0.02}
+
+        def fake_process(content, name):
+            time.sleep(delays[name])
+            return {"text": name * 40, "images": [], "method": "local_extraction", "file_id": None, "id": None}
+
+        attachments = [
+            {"name": "a.pdf", "bytes": b"%PDF a", "_snapshot_index": 4},
+            {"name": "empty.pdf", "bytes": b""},
+            {"name": "b.pdf", "bytes": b"%PDF b", "_snapshot_index": 0},
+            {"name": "c.pdf", "bytes": b"%PDF c"},
+        ]
+        with mock.patch.object(file_handling, "process_pdf_for_ai", side_effect=fake_process), \
+             mock.patch.object(file_handling, "upload_pdf_to_drive", side_effect=lambda name, _c: f"drive:{name}"), \
+             mock.patch.object(file_handling, "_attach_pdf_property_preview"), \
+             mock.patch.object(file_handling, "asset_ingest_workers", return_value=4), \
+             file_handling.asset_timing_capture() as timings:
+            batch = file_handling._process_pdf_attachment_batch(attachments)
+
+        self.assertEqual([4, 0, 3], [position for position, _ in batch])
+        self.assertEqual(["drive:a.pdf", "drive:b.pdf", "drive:c.pdf"], [e["drive_link"] for _, e in batch])
+        by_name = {t["name"]: t for t in timings}
+        self.assertEqual({"a.pdf", "empty.pdf", "b.pdf", "c.pdf"}, set(by_name))
+        self.assertEqual("skipped", by_name["empty.pdf"]["status"])
+        self.assertGreaterEqual(by_name["a.pdf"]["seconds"], 0.05)
+        self.assertEqual("attachment", by_name["a.pdf"]["lane"])
+
+
+class LinkedAssetWaveTests(unittest.TestCase):
+    URLS = [
+        "https://cdn.example.test/one.pdf",
+        "https://cdn.example.test/dead.pdf",
+        "https://cdn.example.test/one.pdf",
+        "https://cdn.example.test/broken.png",
+        "https://cdn.example.test/two.pdf",
+        "https://cdn.example.test/three.pdf",
+    ]
+
+    def _run(self, workers):
+        def candidate(url, **_kwargs):
+            source_type = "direct_image" if url.endswith(".png") else "direct_pdf"
+            return {"sourceUrl": url, "downloadUrl": url, "sourceType": source_type}
+
+        def download(url):
+            time.sleep(0.03 if "one" in url else 0.0)
+            if "dead" in url:
+                raise RuntimeError("404")
+            return (b"img" if url.endswith(".png") else b"%PDF", "application/octet-stream")
+
+        with mock.patch("email_automation.property_images.build_download_candidate", side_effect=candidate), \
+             mock.patch.object(file_handling, "_download_linked_asset", side_effect=download), \
+             mock.patch.object(file_handling, "process_pdf_for_ai", side_effect=lambda _c, name: {"text": name, "images": []}), \
+             mock.patch.object(file_handling, "upload_pdf_to_drive", return_value=None), \
+             mock.patch.object(file_handling, "_attach_pdf_property_preview"), \
+             mock.patch.object(file_handling, "_image_link_to_png_preview", return_value=None), \
+             mock.patch.object(file_handling, "asset_ingest_workers", return_value=workers):
+            return file_handling.fetch_and_process_linked_assets(self.URLS, max_assets=3)
+
+    def test_concurrent_waves_reproduce_the_serial_manifest_and_cap(self):
+        serial = self._run(workers=1)
+        concurrent = self._run(workers=4)
+
+        self.assertEqual(serial, concurrent)
+        self.assertEqual(["one.pdf", "dead.pdf", "two.pdf"], [entry["name"] for entry in concurrent])
+        self.assertTrue(concurrent[1]["download_failed"])
+
+
+class AssetLaneTests(unittest.TestCase):
+    def test_lanes_overlap_and_return_both_manifests(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def lane(result):
+            def run():
+                barrier.wait()
+                return result
+            return run
+
+        with mock.patch.object(processing, "asset_ingest_workers", return_value=4):
+            self.assertEqual((["pdf"], ["link"]), processing._run_asset_lanes(lane(["pdf"]), lane(["link"])))
+
+    def test_attachment_failure_waits_for_the_linked_lane_and_wins(self):
+        finished = []
+
+        def linked_lane():
+            time.sleep(0.05)
+            finished.append("linked")
+            raise RuntimeError("linked failure")
+
+        def attachment_lane():
+            raise ValueError("attachment failure")
+
+        with mock.patch.object(processing, "asset_ingest_workers", return_value=4):
+            with self.assertRaisesRegex(ValueError, "attachment failure"):
+                processing._run_asset_lanes(attachment_lane, linked_lane)
+        self.assertEqual(["linked"], finished)
+
+    def test_single_worker_keeps_the_serial_fail_closed_order(self):
+        linked_lane = mock.MagicMock(return_value=[])
+        with mock.patch.object(processing, "asset_ingest_workers", return_value=1):
+            with self.assertRaises(ValueError):
+                processing._run_asset_lanes(mock.MagicMock(side_effect=ValueError), linked_lane)
+        linked_lane.assert_not_called()
+
+
+class PdfParsePoolTests(unittest.TestCase):
+    def test_process_pool_parse_matches_in_process_parse(self):
+        content = _pdf_with_text("Total SF: 18,500 " * 6)
+        pool = file_handling.PdfParsePool(processes=lambda: 1)
+        self.addCleanup(pool.shutdown)
+
+        self.assertEqual(pdf_text.extract_pdf_text(content, "flyer.pdf"), pool.extract(content, "flyer.pdf"))
+
+    def test_broken_pool_falls_back_to_in_process_parse(self):
+        broken = mock.MagicMock()
+        broken.submit.return_value.result.side_effect = BrokenProcessPool("worker died")
+        pool = file_handling.PdfParsePool(processes=lambda: 2)
+        with mock.patch.object(pool, "_pool", return_value=broken), \
+             mock.patch.object(pdf_text, "extract_pdf_text", return_value=("text", [])) as local:
+            self.assertEqual(("text", []), pool.extract(b"%PDF", "flyer.pdf"))
+        local.assert_called_once_with(b"%PDF", "flyer.pdf")
+        broken.shutdown.assert_called_once_with(wait=False)
+
+    def test_workers_do_not_import_the_clients_module(self):
+        repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {repo!r})
+            import email_automation.clients  # what main.py pulls in at import
+            from email_automation import file_handling
+
+            if __name__ == "__main__":
+                pool = file_handling.PdfParsePool(processes=lambda: 1)
+                probe = "'email_automation.clients' in __import__('sys').modules"
+                print(pool._pool(1).submit(eval, probe).result())
+                pool.shutdown()
+        """)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "fake_main.py")
+            with open(path, "w") as f:
+                f.write(script)
+            done = subprocess.run([sys.executable, path], capture_output=True, text=True, timeout=120)
+
+        self.assertEqual(0, done.returncode, done.stderr)
+        self.assertEqual("False", done.stdout.strip().splitlines()[-1])
+
+    def test_worker_errors_reach_the_caller_and_a_dead_worker_is_replaced(self):
+        pool = pdf_text.PdfWorkerPool(1)
+        self.addCleanup(pool.shutdown)
+
+        with self.assertRaises(ValueError):
+            pool.submit(int, "x").result()
+        with self.assertRaises(BrokenProcessPool):
+            pool.submit(os._exit, 1).result()
+        self.assertEqual(3, pool.submit(int, "3").result())
+
+    def test_zero_processes_parses_in_the_calling_thread(self):
+        pool = file_handling.PdfParsePool(processes=lambda: 0)
+        with mock.patch.object(pdf_text, "extract_pdf_text", return_value=("text", [])) as local, \
+             mock.patch.object(pdf_text, "PdfWorkerPool") as executor:
+            pool.extract(b"%PDF", "flyer.pdf")
+        local.assert_called_once()
+        executor.assert_not_called()
+
+
+class DriveFolderTests(unittest.TestCase):
+    def test_concurrent_first_uploads_create_one_folder(self):
+        created = []
+        lock = threading.Lock()
+
+        class Files:
+            def list(self, **_kwargs):
+                folders = [{"id": "folder-1"}] if created else []
+                time.sleep(0.02)
+                return mock.MagicMock(execute=mock.MagicMock(return_value={"files": folders}))
+
+            def create(self, body):
+                with lock:
+                    created.append(body)
+                return mock.MagicMock(execute=mock.MagicMock(return_value={"id": "folder-1"}))
+
+        drive = mock.MagicMock()
+        drive.files.return_value = Files()
+        with mock.patch.object(file_handling, "_drive_client", return_value=drive):
+            ids = file_handling.map_assets_in_order(lambda _: file_handling.ensure_drive_folder(), range(4), workers=4)
+
+        self.assertEqual(["folder-1"] * 4, ids)
+        self.assertEqual(1, len(created))
+
+
+if __name__ == "__main__":
+    unittest.main()
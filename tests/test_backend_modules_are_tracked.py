@@ -28,6 +28,16 @@ SUPPORT_MODULES = {
     "email_automation/email_operations.py": "LEGACY disabled send path; kept dead and guarded by tests/test_legacy_email_operations_disabled.py",
     "email_automation/operator_replay.py": "local, Baylor/BP21-only operator recovery utility; not deployed or normal-user callable",
     "email_automation/automation_runtime.py": "pure request-scoped runtime bundle: immutable dependency set plus counter store, effect scope, and provider transports. Owns no product feature - it is the isolation seam that keeps a certification run and an ordinary production run from sharing a capture, clock, counter, source, transport, run id, or scope. Resolves provider clients lazily so building one needs no credential.",
+    "email_automation/rate_governor.py": "shared per-API token buckets (Sheets, Graph, OpenAI TPM) drawn by the provider call sites. Owns no product feature - it only paces calls those features already make, and is a no-op under E2E_TEST_MODE.",
+    "email_automation/pdf_text.py": "pure pdfplumber/PyMuPDF text and page-image pass behind file_handling.extract_pdf_text. Owns no product feature - it is split out only so the PDF parse worker processes can import it without loading Firestore, OpenAI or Drive clients.",
+    "email_automation/extraction_cache.py": "content-addressed cache of process_pdf_for_ai results (disk LRU plus a per-user Firestore tier). Owns no product feature - it only skips re-parsing and re-uploading bytes already extracted, and is a no-op under E2E_TEST_MODE.",
+    "email_automation/proposal_cache.py": "per-user store of validated propose_sheet_updates replies keyed by the canonical request digest. Owns no product feature - it only lets a retried message skip re-paying for an identical model call, and is a no-op under E2E_TEST_MODE.",
+    "email_automation/send_pacing.py": "durable per-mailbox notBefore slot plus the run-level dispatcher that waits for due slots. Owns no product feature - it only spaces the sends the outbox and follow-up lanes already make, and is a no-op under E2E_TEST_MODE.",
+    "email_automation/graph_batch.py": "pure Graph $batch client that combines up to 20 reads or draft writes into one HTTP call and retries throttled sub-requests. Owns no product feature - the scan and delivery boundaries use it to make fewer round trips, and it is off under E2E_TEST_MODE.",
+    "email_automation/http_pool.py": "requests-shaped client backed by one keep-alive Session per host, bound as `requests` by the Graph, Storage and download call sites. Owns no product feature - it only reuses connections for calls those modules already make, and passes straight through to requests under E2E_TEST_MODE.",
+    "email_automation/message_artifacts.py": "per-user messageArtifacts ledger the artifact writers append to and the processing-retry guard point-reads. Owns no product feature - it only indexes outbox, pendingResponses, deadLetterQueue and notification writes those features already make, and is a no-op under E2E_TEST_MODE.",
+    "email_automation/retention.py": "expiresAt stamping plus the count-capped, expiresAt-ordered BulkWriter trim behind the job's --retention pass. Owns no product feature - it only bounds the processedMessages and sheetChangeLog collections the scan and sheet-update paths already write.",
+    "email_automation/inbound_text.py": "per-text InboundTextContext of the quote-stripped, normalized, tokenized, clause and tour views the deterministic classifiers read. Owns no product feature - it only memoizes derivations those classifiers already run, keyed by the message text.",
     "email_automation/message_transport.py": "pure acquisition boundary: canonical inbound/conversation projection plus source and transport protocols. Owns no product feature - it is the seam that lets the Graph lane and the certification fixture lane produce byte-equal state. Deliberately imports no provider client so certification tests collect without credentials.",
 }
 
@@ -1278,7 +1278,7 @@ class NativeImageThreadBatchingTests(unittest.TestCase):
                 "exponential_backoff_request",
                 return_value=self._response({"value": messages}),
             ),
-            mock.patch.object(proc, "has_processed", return_value=False),
+            mock.patch.object(proc, "has_processed_many", return_value=set()),
             mock.patch.object(
                 proc,
                 "_match_message_to_thread",
@@ -1372,7 +1372,7 @@ class NativeImageThreadBatchingTests(unittest.TestCase):
                 "exponential_backoff_request",
                 side_effect=lambda _request: next(graph_responses),
             ),
-            mock.patch.object(proc, "has_processed", return_value=False),
+            mock.patch.object(proc, "has_processed_many", return_value=set()),
             mock.patch.object(
                 proc,
                 "_match_message_to_thread",
@@ -1488,7 +1488,7 @@ class NativeImageThreadBatchingTests(unittest.TestCase):
                 "exponential_backoff_request",
                 side_effect=lambda _request: next(graph_responses),
             ),
-            mock.patch.object(proc, "has_processed", return_value=False),
+            mock.patch.object(proc, "has_processed_many", return_value=set()),
             mock.patch.object(
                 proc,
                 "_match_message_to_thread",
@@ -76,15 +76,16 @@ def kept_addresses(result):
 class BrokerWrongContactReplyAllSafety(unittest.TestCase):
     def setUp(self):
         # Isolation: _filter_reply_all_draft_recipients caches the operator in a
-        # module global (email_mod._LAST_KNOWN_OPERATOR_EMAIL). Left over from a
+        # module global (email_mod._LAST_KNOWN_OPERATOR_EMAILS). Left over from a
         # prior test it makes cross-test coupling silently mask real failures.
         # Reset it before every test so each case stands on its own, and restore
         # it after so the wider suite is unaffected.
-        self._saved_operator = email_mod._LAST_KNOWN_OPERATOR_EMAIL
-        email_mod._LAST_KNOWN_OPERATOR_EMAIL = None
+        self._saved_operators = dict(email_mod._LAST_KNOWN_OPERATOR_EMAILS)
+        email_mod._LAST_KNOWN_OPERATOR_EMAILS.clear()
 
     def tearDown(self):
-        email_mod._LAST_KNOWN_OPERATOR_EMAIL = self._saved_operator
+        email_mod._LAST_KNOWN_OPERATOR_EMAILS.clear()
+        email_mod._LAST_KNOWN_OPERATOR_EMAILS.update(self._saved_operators)
 
     # ------------------------------------------------------------------ #
     # REAL-THREAT GROUP A: safe teammate cc MUST be KEPT (stopIf #2)
@@ -306,8 +307,8 @@ class BrokerWrongContactReplyAllSafety(unittest.TestCase):
         # Seed the fallback explicitly (mirrors an earlier call that DID thread
         # user_email through and cached the operator). This test must stand on
         # its own — it must not depend on another test having run first to set
-        # email_mod._LAST_KNOWN_OPERATOR_EMAIL. setUp() clears it; we set it here.
-        email_mod._LAST_KNOWN_OPERATOR_EMAIL = email_mod._normalize_email(OPERATOR)
+        # email_mod._LAST_KNOWN_OPERATOR_EMAILS. setUp() clears it; we set it here.
+        email_mod._LAST_KNOWN_OPERATOR_EMAILS["user-123"] = email_mod._normalize_email(OPERATOR)
         draft = {
             "toRecipients": [graph_recipient("broker@brokerage.com")],
             "ccRecipients": [graph_recipient(OPERATOR)],
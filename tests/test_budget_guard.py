@@ -1,8 +1,13 @@
 """Unit tests for the flag-gated global monthly OpenAI budget guard. No live API,
 no Firestore — an injected fake db supplies per-user openaiUsageDaily rollups."""
+import importlib.util
+import io
+import json
 import os
 import sys
 import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
 from datetime import datetime, timezone
 from unittest import mock
 
@@ -38,16 +43,53 @@ class _UserSnap:
         self.reference = _Ref(daily)
 
 
+class _MonthSnap:
+    def __init__(self, data):
+        self._d = data
+        self.exists = data is not None
+    def to_dict(self):
+        return self._d
+
+
+class _MonthRef:
+    def __init__(self, db, month):
+        self._db = db
+        self._month = month
+    def get(self):
+        self._db.monthly_reads += 1
+        return _MonthSnap(self._db.monthly.get(self._month))
+    def set(self, payload, merge=False):
+        self._db.monthly[self._month] = dict(payload)
+    def create(self, payload):
+        if self._month in self._db.monthly:
+            raise RuntimeError("409 Document already exists")
+        self._db.monthly[self._month] = dict(payload)
+
+
+class _MonthlyColl:
+    def __init__(self, db):
+        self._db = db
+    def document(self, month):
+        return _MonthRef(self._db, month)
+
+
 class FakeDb:
-    """users = list of {date_key: {"totalCostUsd": float}} dicts, one per user."""
-    def __init__(self, users, raise_on_users=False):
+    """users = list of {date_key: {"totalCostUsd": float}} dicts, one per user.
+    monthly = optional {YYYY-MM: usageMonthly doc} for the aggregate path."""
+    def __init__(self, users, raise_on_users=False, monthly=None):
         self._users = users
         self._raise = raise_on_users
+        self.monthly = dict(monthly or {})
+        self.monthly_reads = 0
+        self.user_scans = 0
     def collection(self, name):
         if name == "users":
+            self.user_scans += 1
             if self._raise:
                 raise RuntimeError("firestore down")
             return _Coll([_UserSnap([_DaySnap(k, v) for k, v in u.items()]) for u in self._users])
+        if name == "usageMonthly":
+            return _MonthlyColl(self)
         return _Coll([])
 
 
@@ -134,5 +176,123 @@ class AggregationTests(unittest.TestCase):
         self.assertIn("error", s)
 
 
+class MonthlyAggregateTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = [100.0]
+        memo = bg.MonthlySpendMemo(ttl_seconds=60, enabled=lambda: True, clock=lambda: self.clock[0])
+        patcher = mock.patch.object(bg, "_SPEND_MEMO", memo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_guard_reads_one_aggregate_doc_without_scanning_users(self):
+        db = FakeDb([{"2026-07-01": {"totalCostUsd": 999.0}}], monthly={"2026-07": {"totalCostUsd": 12.5, "reconciledAt": "t"}})
+        with mock.patch.dict(os.environ, {"ENFORCE_OPENAI_BUDGET": "1", "USAGE_MONTHLY_BUDGET_USD": "10"}):
+            self.assertTrue(bg.should_block_openai_call(db, now=NOW))
+        self.assertEqual(1, db.monthly_reads)
+        self.assertEqual(0, db.user_scans)
+
+    def test_aggregate_is_memoized_for_the_ttl_per_db(self):
+        db = FakeDb([], monthly={"2026-07": {"totalCostUsd": 1.0, "reconciledAt": "t"}})
+        for _ in range(5):
+            self.assertEqual(1.0, bg.month_spend_usd(db, now=NOW))
+        self.assertEqual(1, db.monthly_reads)
+
+        other = FakeDb([], monthly={"2026-07": {"totalCostUsd": 2.0, "reconciledAt": "t"}})
+        self.assertEqual(2.0, bg.month_spend_usd(other, now=NOW))
+
+        db.monthly["2026-07"] = {"totalCostUsd": 3.0, "reconciledAt": "t"}
+        self.clock[0] += 61
+        self.assertEqual(3.0, bg.month_spend_usd(db, now=NOW))
+
+    def test_missing_aggregate_falls_back_to_the_rollup_scan(self):
+        db = _db_july_spend(4.0)
+        status = bg.budget_status(db, now=NOW)
+        self.assertAlmostEqual(4.0, status["spentUsd"])
+        self.assertEqual("scan", status["source"])
+
+    def test_missing_aggregate_is_seeded_from_the_scan(self):
+        db = _db_july_spend(4.0)
+        bg.month_spend_usd(db, now=NOW)
+
+        self.assertEqual(4.0, db.monthly["2026-07"]["totalCostUsd"])
+        self.assertIn("reconciledAt", db.monthly["2026-07"])
+        self.clock[0] += 61
+        self.assertEqual("aggregate", bg.budget_status(db, now=NOW)["source"])
+        self.assertEqual(1, db.user_scans)
+
+    def test_unreconciled_aggregate_keeps_scanning(self):
+        # The first Increment after a mid-month deploy creates the doc with
+        # post-deploy spend only; the pre-deploy rollups still count.
+        db = FakeDb([{"2026-07-01": {"totalCostUsd": 9.0}}], monthly={"2026-07": {"totalCostUsd": 0.5}})
+        with mock.patch.dict(os.environ, {"ENFORCE_OPENAI_BUDGET": "1", "USAGE_MONTHLY_BUDGET_USD": "5"}):
+            self.assertTrue(bg.should_block_openai_call(db, now=NOW))
+            self.clock[0] += 61
+            self.assertTrue(bg.should_block_openai_call(db, now=NOW))
+        self.assertEqual(2, db.user_scans)
+        self.assertEqual({"totalCostUsd": 0.5}, db.monthly["2026-07"])
+
+    def test_repair_rebuilds_the_aggregate_from_daily_rollups(self):
+        db = FakeDb(
+            [
+                {"2026-07-01": {"totalCostUsd": 3.0, "calls": 4}, "2026-06-30": {"totalCostUsd": 100.0, "calls": 9}},
+                {"2026-07-02": {"totalCostUsd": 1.5, "calls": 2}},
+            ],
+            monthly={"2026-07": {"totalCostUsd": 0.5, "calls": 1}},
+        )
+        self.assertEqual(4.5, bg.month_spend_usd(db, now=NOW))
+
+        totals = bg.repair_month_usage(db, "2026-07")
+
+        self.assertEqual({"month": "2026-07", "totalCostUsd": 4.5, "calls": 6}, totals)
+        self.assertEqual(4.5, db.monthly["2026-07"]["totalCostUsd"])
+        self.assertEqual((4.5, "aggregate"), bg._month_spend(db, NOW))
+
+    def test_memo_is_inert_under_e2e_test_mode(self):
+        db = FakeDb([], monthly={"2026-07": {"totalCostUsd": 1.0, "reconciledAt": "t"}})
+        with mock.patch.dict(os.environ, {"E2E_TEST_MODE": "true"}), \
+             mock.patch.object(bg, "_SPEND_MEMO", bg.MonthlySpendMemo()):
+            bg.month_spend_usd(db, now=NOW)
+            bg.month_spend_usd(db, now=NOW)
+        self.assertEqual(2, db.monthly_reads)
+
+
+_SPEC = importlib.util.spec_from_file_location(
+    "repair_usage_monthly", Path(__file__).resolve().parents[1] / "scripts" / "repair_usage_monthly.py"
+)
+repair_script = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(repair_script)
+
+
+class RepairScriptTests(unittest.TestCase):
+    def _run(self, argv, db):
+        out = io.StringIO()
+        with mock.patch.dict(os.environ, {"GOOGLE_APPLICATION_CREDENTIALS": "/tmp/sa.json"}), \
+             mock.patch("google.cloud.firestore.Client", return_value=db), \
+             mock.patch.object(bg, "_SPEND_MEMO", bg.MonthlySpendMemo(enabled=lambda: False)), \
+             redirect_stdout(out):
+            code = repair_script.main(argv)
+        return code, json.loads(out.getvalue())
+
+    def test_dry_run_reports_without_writing(self):
+        db = FakeDb([{"2026-07-01": {"totalCostUsd": 2.0, "calls": 3}}], monthly={"2026-07": {"totalCostUsd": 0.5, "calls": 1}})
+        code, report = self._run(["--month", "2026-07"], db)
+        self.assertEqual(0, code)
+        self.assertEqual({"totalCostUsd": 0.5, "calls": 1}, report["aggregateBefore"])
+        self.assertEqual(2.0, report["recomputed"]["totalCostUsd"])
+        self.assertEqual(0.5, db.monthly["2026-07"]["totalCostUsd"])
+
+    def test_apply_overwrites_the_aggregate(self):
+        db = FakeDb([{"2026-07-01": {"totalCostUsd": 2.0, "calls": 3}}])
+        code, report = self._run(["--month", "2026-07", "--apply"], db)
+        self.assertEqual(0, code)
+        self.assertIsNone(report["aggregateBefore"])
+        self.assertEqual(2.0, db.monthly["2026-07"]["totalCostUsd"])
+        self.assertEqual(3, db.monthly["2026-07"]["calls"])
+
+    def test_bad_month_is_refused(self):
+        with redirect_stdout(io.StringIO()), mock.patch("sys.stderr", io.StringIO()):
+            self.assertEqual(2, repair_script.main(["--month", "July"]))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,27 @@
+"""Retention for processedMessages and sheetChangeLog.
+
+Pins:
+  * a fully stamped collection is counted, and only the oldest
+    ``count - keep`` docs are read, in expiresAt order and in pages, and
+    deleted through one BulkWriter,
+  * a collection with unstamped legacy docs falls back to the full read,
+    deletes the oldest excess on mixed legacy timestamps and stamps the
+    survivors,
+  * without count queries the old limit(keep + 1) overflow check still gates
+    the full read,
+  * TTL mode leaves stamped collections to Firestore,
+  * a policy without a keep count (the messageArtifacts ledger, the
+    extraction and proposal caches) deletes only docs past expiresAt, however many there
+    are,
+  * the inserts stamp expiresAt, and cleanup runs from the --retention pass
+    rather than the per-user run,
+  * the production workflow actually runs that pass.
+"""
+
+import inspect
 import os
 import unittest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
 os.environ.setdefault("E2E_TEST_MODE", "true")
@@ -10,97 +31,279 @@ os.environ.setdefault(
 )
 
 import main
+from email_automation import messaging, retention
+from email_automation.retention import (
+    PROCESSED_MESSAGES_RETENTION,
+    SHEET_CHANGELOG_RETENTION,
+    RetentionPolicy,
+    enforce_retention,
+)
 
 
-class FakeDocRef:
-    def __init__(self, doc_id, deleted_ids):
-        self.doc_id = doc_id
-        self.deleted_ids = deleted_ids
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+POLICY = RetentionPolicy("processedMessages", 2, timedelta(days=30), ("processedAt", "timestamp"))
 
-    def delete(self):
-        self.deleted_ids.append(self.doc_id)
+
+def _stamped(days_ago):
+    return {"expiresAt": retention.expires_at(POLICY, NOW - timedelta(days=days_ago))}
+
+
+class FakeDocRef:
+    def __init__(self, doc_id):
+        self.id = doc_id
 
 
 class FakeDoc:
-    def __init__(self, doc_id, data, deleted_ids):
+    def __init__(self, doc_id, data):
         self.id = doc_id
         self._data = data
-        self.reference = FakeDocRef(doc_id, deleted_ids)
+        self.reference = FakeDocRef(doc_id)
 
     def to_dict(self):
-        return self._data
+        return dict(self._data)
+
+
+class FakeAggregation:
+    def __init__(self, value):
+        self.value = value
 
 
 class FakeCollection:
-    def __init__(self, docs):
+    def __init__(self, store, docs, *, counts=True, stamped_only=False, ordered=False, limit=None, after=None,
+                 expired_by=None):
+        self.store = store
         self.docs = docs
-        self._limit = None
+        self.counts = counts
+        self.stamped_only = stamped_only
+        self.ordered = ordered
+        self._limit = limit
+        self._after = after
+        self._expired_by = expired_by
+
+    def _clone(self, **changes):
+        state = dict(counts=self.counts, stamped_only=self.stamped_only, ordered=self.ordered,
+                     limit=self._limit, after=self._after, expired_by=self._expired_by)
+        state.update(changes)
+        return FakeCollection(self.store, self.docs, **state)
+
+    def where(self, filter):
+        assert filter.field_path == "expiresAt" and filter.op_string in (">=", "<")
+        if filter.op_string == "<":
+            return self._clone(stamped_only=True, expired_by=filter.value)
+        return self._clone(stamped_only=True)
+
+    def order_by(self, field):
+        assert field == "expiresAt"
+        return self._clone(ordered=True)
+
+    def select(self, fields):
+        return self
 
     def limit(self, count):
-        clone = FakeCollection(self.docs)
-        clone._limit = count
-        return clone
+        return self._clone(limit=count)
+
+    def start_after(self, snapshot):
+        return self._clone(after=snapshot.id)
+
+    def count(self, alias):
+        if not self.counts:
+            raise AttributeError("count")
+        matched = [d for d in self.docs if not self.stamped_only or "expiresAt" in d.to_dict()]
+        if self._expired_by is not None:
+            matched = [d for d in matched if d.to_dict()["expiresAt"] < self._expired_by]
+
+        class _Query:
+            def get(_self):
+                self.store.counts += 1
+                return [[FakeAggregation(len(matched))]]
+
+        return _Query()
 
     def stream(self):
-        if self._limit is None:
-            return list(self.docs)
-        return list(self.docs[:self._limit])
+        docs = list(self.docs)
+        if self.ordered:
+            docs = sorted((d for d in docs if "expiresAt" in d.to_dict()), key=lambda d: d.to_dict()["expiresAt"])
+            if self._after is not None:
+                docs = docs[[d.id for d in docs].index(self._after) + 1:]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        self.store.streamed.append((self.ordered, self._limit, len(docs)))
+        return docs
+
+
+class FakeBulkWriter:
+    def __init__(self, store):
+        self.store = store
+
+    def delete(self, ref):
+        self.store.deleted_ids.append(ref.id)
+
+    def update(self, ref, payload):
+        self.store.updates[ref.id] = payload
+
+    def close(self):
+        self.store.writers_closed += 1
 
 
 class FakeFirestore:
-    def __init__(self):
+    def __init__(self, docs_by_collection, *, counts=True):
         self.deleted_ids = []
+        self.updates = {}
+        self.streamed = []
+        self.counts = 0
+        self.writers_closed = 0
         self.collections = {
-            "processedMessages": FakeCollection([
-                FakeDoc("processed-oldest", {"processedAt": 1}, self.deleted_ids),
-                FakeDoc("processed-old", {"processedAt": 2}, self.deleted_ids),
-                FakeDoc("processed-kept", {"processedAt": 3}, self.deleted_ids),
-                FakeDoc("processed-newest", {"processedAt": 4}, self.deleted_ids),
-            ]),
-            "sheetChangeLog": FakeCollection([
-                FakeDoc("change-oldest", {"timestamp": 1}, self.deleted_ids),
-                FakeDoc("change-kept", {"timestamp": 2}, self.deleted_ids),
-                FakeDoc("change-newest", {"timestamp": 3}, self.deleted_ids),
-            ]),
+            name: FakeCollection(self, [FakeDoc(doc_id, data) for doc_id, data in docs], counts=counts)
+            for name, docs in docs_by_collection.items()
         }
 
-    def collection(self, name):
-        return self
-
     def document(self, name):
         return self
 
     def collection(self, name):
         return self.collections[name] if name in self.collections else self
 
+    def bulk_writer(self):
+        return FakeBulkWriter(self)
+
+
+class IndexedRetentionTests(unittest.TestCase):
+    def test_only_the_oldest_excess_is_read_in_pages_and_bulk_deleted(self):
+        fs = FakeFirestore({"processedMessages": [
+            ("newest", _stamped(0)), ("oldest", _stamped(9)), ("kept", _stamped(3)),
+            ("old", _stamped(7)), ("older", _stamped(8)),
+        ]})
 
-class CleanupRetentionTests(unittest.TestCase):
-    def test_auto_cleanup_deletes_only_oldest_excess_docs(self):
-        fake_fs = FakeFirestore()
+        result = enforce_retention(fs, "uid-1", POLICY, ttl_mode=False, page_size=2, now=NOW)
 
-        with patch.object(main, "_fs", fake_fs), \
-             patch.object(main, "PROCESSED_MESSAGES_THRESHOLD", 2), \
-             patch.object(main, "SHEET_CHANGELOG_THRESHOLD", 2):
-            main.auto_cleanup_firestore("uid-1")
+        self.assertEqual({"collection": "processedMessages", "mode": "indexed", "deleted": 3, "stamped": 0}, result)
+        self.assertEqual(["oldest", "older", "old"], fs.deleted_ids)
+        self.assertEqual([(True, 2, 2), (True, 1, 1)], fs.streamed)
+        self.assertEqual(1, fs.writers_closed)
 
+    def test_under_the_cap_reads_nothing(self):
+        fs = FakeFirestore({"processedMessages": [("a", _stamped(1)), ("b", _stamped(2))]})
+
+        result = enforce_retention(fs, "uid-1", POLICY, ttl_mode=False, now=NOW)
+
+        self.assertEqual(0, result["deleted"])
+        self.assertEqual([], fs.streamed)
+        self.assertEqual(2, fs.counts)
+
+    def test_ttl_mode_leaves_stamped_collections_to_firestore(self):
+        fs = FakeFirestore({"processedMessages": [(f"d{n}", _stamped(n)) for n in range(5)]})
+
+        result = enforce_retention(fs, "uid-1", POLICY, ttl_mode=True, now=NOW)
+
+        self.assertEqual("ttl", result["mode"])
+        self.assertEqual(([], []), (fs.deleted_ids, fs.streamed))
+
+
+    def test_policy_without_a_cap_deletes_only_expired_docs(self):
+        ledger = RetentionPolicy("messageArtifacts", None, timedelta(days=30), ("updatedAt",))
+        fs = FakeFirestore({"messageArtifacts": [
+            (f"live-{n}", _stamped(n)) for n in range(5)
+        ] + [("expired", _stamped(31)), ("long-expired", _stamped(60))]})
+
+        result = enforce_retention(fs, "uid-1", ledger, ttl_mode=False, now=NOW)
+
+        self.assertEqual({"collection": "messageArtifacts", "mode": "expired", "deleted": 2, "stamped": 0}, result)
+        self.assertEqual(["long-expired", "expired"], fs.deleted_ids)
+        self.assertIn(retention.MESSAGE_ARTIFACTS_RETENTION, retention.RETENTION_POLICIES)
+        self.assertIsNone(retention.MESSAGE_ARTIFACTS_RETENTION.keep)
+
+    def test_extraction_cache_docs_are_expired_by_the_pass(self):
+        from email_automation import extraction_cache
+
+        policy = retention.EXTRACTION_CACHE_RETENTION
+        self.assertIn(policy, retention.RETENTION_POLICIES)
+        self.assertEqual(extraction_cache.EXTRACTION_CACHE_COLLECTION, policy.collection)
+        self.assertIsNone(policy.keep)
+        self.assertEqual(extraction_cache.DURABLE_ENTRY_TTL, policy.ttl)
+
+    def test_proposal_cache_docs_are_expired_by_the_pass(self):
+        from email_automation import proposal_cache
+
+        policy = retention.PROPOSAL_CACHE_RETENTION
+        self.assertIn(policy, retention.RETENTION_POLICIES)
+        self.assertEqual(proposal_cache.PROPOSAL_CACHE_COLLECTION, policy.collection)
+        self.assertIsNone(policy.keep)
+        self.assertEqual(proposal_cache.PROPOSAL_CACHE_TTL_DEFAULT_SECONDS, policy.ttl.total_seconds())
+
+
+class LegacyRetentionTests(unittest.TestCase):
+    def test_unstamped_docs_take_the_full_read_and_survivors_are_stamped(self):
+        fs = FakeFirestore({"processedMessages": [
+            ("missing-time", {}),
+            ("iso-time", {"timestamp": "2026-06-05T08:00:00Z"}),
+            ("datetime-time", {"processedAt": datetime(2026, 6, 5, 9, 0, tzinfo=timezone.utc)}),
+            ("numeric-time", {"timestamp": 3}),
+            ("stamped", _stamped(0)),
+        ]})
+
+        result = enforce_retention(fs, "uid-1", POLICY, ttl_mode=True, now=NOW)
+
+        self.assertEqual({"collection": "processedMessages", "mode": "migrate", "deleted": 3, "stamped": 1}, result)
+        self.assertEqual(["missing-time", "numeric-time", "iso-time"], fs.deleted_ids)
         self.assertEqual(
-            fake_fs.deleted_ids,
-            ["processed-oldest", "processed-old", "change-oldest"],
+            {"datetime-time": {"expiresAt": datetime(2026, 7, 5, 9, 0, tzinfo=timezone.utc)}}, fs.updates
+        )
+
+    def test_without_count_queries_the_overflow_check_gates_the_full_read(self):
+        fs = FakeFirestore({"processedMessages": [("a", {"processedAt": 1}), ("b", {"processedAt": 2})]}, counts=False)
+        self.assertEqual(0, enforce_retention(fs, "uid-1", POLICY, now=NOW)["deleted"])
+        self.assertEqual([(False, 3, 2)], fs.streamed)
+
+        fs = FakeFirestore({"processedMessages": [
+            ("processed-oldest", {"processedAt": 1}), ("processed-old", {"processedAt": 2}),
+            ("processed-kept", {"processedAt": 3}), ("processed-newest", {"processedAt": 4}),
+        ]}, counts=False)
+        self.assertEqual(2, enforce_retention(fs, "uid-1", POLICY, now=NOW)["deleted"])
+        self.assertEqual(["processed-oldest", "processed-old"], fs.deleted_ids)
+
+
+class RetentionPassTests(unittest.TestCase):
+    def test_auto_cleanup_applies_both_policies(self):
+        fs = FakeFirestore({
+            "processedMessages": [(f"p{n}", {"processedAt": n}) for n in range(3)],
+            "sheetChangeLog": [(f"c{n}", {"timestamp": n}) for n in range(3)],
+        })
+        policies = (
+            RetentionPolicy("processedMessages", 2, timedelta(days=30), ("processedAt",)),
+            RetentionPolicy("sheetChangeLog", 2, timedelta(days=30), ("timestamp",)),
         )
 
-    def test_cleanup_timestamp_sort_handles_mixed_legacy_values(self):
-        deleted_ids = []
-        docs = [
-            FakeDoc("missing-time", {}, deleted_ids),
-            FakeDoc("iso-time", {"timestamp": "2026-06-05T08:00:00Z"}, deleted_ids),
-            FakeDoc("datetime-time", {"timestamp": datetime(2026, 6, 5, 9, 0, tzinfo=timezone.utc)}, deleted_ids),
-            FakeDoc("numeric-time", {"timestamp": 3}, deleted_ids),
-        ]
+        with patch.object(main, "_fs", fs), patch.object(main, "RETENTION_POLICIES", policies):
+            results = main.auto_cleanup_firestore("uid-1")
+
+        self.assertEqual(["p0", "c0"], fs.deleted_ids)
+        self.assertEqual(["processedMessages", "sheetChangeLog"], [r["collection"] for r in results])
+
+    def test_cleanup_is_not_part_of_the_per_user_run(self):
+        self.assertNotIn("auto_cleanup_firestore", inspect.getsource(main.refresh_and_process_user))
+        self.assertIn("run_retention_pass", inspect.getsource(main))
+
+    def test_production_workflow_runs_the_retention_pass(self):
+        workflow = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".github", "workflows", "email.yml"
+        )
+        with open(workflow, encoding="utf-8") as fh:
+            text = fh.read()
+        self.assertIn("python main.py --retention", text)
+
+    def test_inserts_stamp_expires_at(self):
+        self.assertEqual(
+            (500, 100), (PROCESSED_MESSAGES_RETENTION.keep, SHEET_CHANGELOG_RETENTION.keep)
+        )
+        written = []
 
-        deleted = main._delete_oldest_excess_docs(FakeCollection(docs), 2, ["timestamp"])
+        class _Ref:
+            def set(self, payload, merge=False):
+                written.append(payload)
 
-        self.assertEqual(deleted, 2)
-        self.assertEqual(deleted_ids, ["missing-time", "numeric-time"])
+        with patch.object(messaging, "_processed_ref", return_value=_Ref()):
+            messaging.mark_processed("uid-1", "msg-1")
+        self.assertIsInstance(written[0]["expiresAt"], datetime)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+"""ColumnTermMatcher: field-term matching compiled once per columnConfig.
+
+Pins:
+  * the matcher finds exactly the mentions the per-call matcher found, on the
+    benchmark's broker emails and on case-folding and SF-unit edge cases,
+  * the literal prefilter never skips a term IGNORECASE would match,
+  * one matcher per columnConfig fingerprint, LRU-bounded,
+  * the benchmark script reports identical results.
+"""
+
+import importlib.util
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+from email_automation import column_config
+from email_automation.column_config import (
+    _compiled_field_term,
+    _fold_field_text,
+    column_term_matcher,
+    get_default_column_config,
+    response_requests_nonrequestable_fields,
+)
+
+
+_SPEC = importlib.util.spec_from_file_location(
+    "benchmark_column_term_matcher",
+    Path(__file__).resolve().parents[1] / "scripts" / "benchmark_column_term_matcher.py",
+)
+benchmark_script = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(benchmark_script)
+
+EDGE_BODIES = (
+    "What is the ſquare feet and the İnsurance cost?",
+    "Rent is $12/SF; can you confirm the SF of the suite?",
+    "Please send the dock-doors count,\nclear\nheight and parking ratios.",
+    "",
+)
+
+
+class MatcherParityTests(unittest.TestCase):
+    def test_matches_the_per_call_matcher(self):
+        config = benchmark_script.benchmark_config()
+        for body in (*benchmark_script.SAMPLE_BODIES.values(), *EDGE_BODIES):
+            with self.subTest(body=body[:40]):
+                self.assertEqual(
+                    benchmark_script.legacy_mentions(body, config),
+                    column_term_matcher(config).mentions(body),
+                )
+
+    def test_prefilter_keeps_case_folded_matches(self):
+        compiled = _compiled_field_term("square feet")
+        body = "ſQUARE FOOT"
+        self.assertTrue(compiled.regex.search(body))
+        self.assertTrue(compiled.may_match(_fold_field_text(body)))
+        self.assertFalse(compiled.may_match(_fold_field_text("square meters")))
+
+    def test_request_classification_is_unchanged(self):
+        config = benchmark_script.benchmark_config()
+        self.assertTrue(response_requests_nonrequestable_fields(
+            benchmark_script.SAMPLE_BODIES["nonrequestable_probe"], config
+        ))
+        self.assertFalse(response_requests_nonrequestable_fields(
+            benchmark_script.SAMPLE_BODIES["no_field_terms"], config
+        ))
+
+
+class MatcherCacheTests(unittest.TestCase):
+    def setUp(self):
+        column_config._column_term_matchers.clear()
+        self.addCleanup(column_config._column_term_matchers.clear)
+
+    def test_one_matcher_per_config_fingerprint(self):
+        config = get_default_column_config()
+        matcher = column_term_matcher(config)
+
+        self.assertIs(matcher, column_term_matcher(get_default_column_config()))
+        config["customFields"] = {"Truck Court Depth": {"mode": "ask_required"}}
+        self.assertIsNot(matcher, column_term_matcher(config))
+
+    def test_cache_is_bounded(self):
+        with patch.object(column_config, "COLUMN_TERM_MATCHER_CACHE_SIZE", 2):
+            for header in ("Alpha Beta", "Gamma Delta", "Epsilon Zeta"):
+                config = get_default_column_config()
+                config["customFields"] = {header: {"mode": "ask_optional"}}
+                column_term_matcher(config)
+        self.assertEqual(2, len(column_config._column_term_matchers))
+
+
+class BenchmarkScriptTests(unittest.TestCase):
+    def test_reports_identical_results(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(0, benchmark_script.main(["--rounds", "1", "--json"]))
+        self.assertIn('"identical": true', out.getvalue())
+        self.assertNotIn('"identical": false', out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
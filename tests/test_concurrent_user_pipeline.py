@@ -0,0 +1,175 @@
+"""Concurrent per-user pipeline in main.run_all_users.
+
+SITESIFT_USER_CONCURRENCY > 1 switches run_all_users from the sequential walk
+to a bounded worker pool. These tests pin:
+  * the default stays sequential (shared TOKEN_CACHE, no per-user lease),
+  * pooled users each run under their own per-user lease,
+  * pooled users get distinct token-cache files (never the shared one),
+  * a failing user records its own health and does not cancel neighbours,
+  * the run summary reports per-user wall time and throughput,
+  * the reply-all operator fallback is remembered per user, so one pooled
+    mailbox never strips (or sends as) another's operator address.
+"""
+
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import main
+from email_automation import email as email_mod
+from email_automation.scheduler_scope import SchedulerUserScope
+
+
+USERS = ["uid-a", "uid-b", "uid-c", "uid-d"]
+
+
+def _scope(user_ids):
+    return SchedulerUserScope(mode="all_users", user_ids=list(user_ids))
+
+
+class UserConcurrencyConfigTests(unittest.TestCase):
+    def test_default_is_sequential(self):
+        with patch.dict(os.environ, {main.USER_CONCURRENCY_ENV: ""}):
+            self.assertEqual(1, main._user_concurrency())
+
+    def test_invalid_value_falls_back_to_sequential(self):
+        with patch.dict(os.environ, {main.USER_CONCURRENCY_ENV: "lots"}):
+            self.assertEqual(1, main._user_concurrency())
+
+    def test_value_is_capped(self):
+        with patch.dict(os.environ, {main.USER_CONCURRENCY_ENV: "500"}):
+            self.assertEqual(main.USER_CONCURRENCY_MAX, main._user_concurrency())
+
+
+class ConcurrentRunAllUsersTests(unittest.TestCase):
+    def _run(self, concurrency, process, lease=None):
+        lease = lease or (lambda uid, callback: (callback(), True)[1])
+        with patch.dict(os.environ, {main.USER_CONCURRENCY_ENV: str(concurrency)}), \
+             patch.object(main, "list_user_ids", return_value=USERS), \
+             patch.object(main, "resolve_scheduler_user_ids", return_value=_scope(USERS)), \
+             patch.object(main, "refresh_and_process_user", side_effect=process) as proc, \
+             patch.object(main, "run_with_user_lease", side_effect=lease) as user_lease, \
+             patch.object(main, "record_user_health") as health:
+            summary = main.run_all_users()
+        return summary, proc, user_lease, health
+
+    def test_sequential_default_uses_shared_cache_and_no_user_lease(self):
+        summary, proc, user_lease, _ = self._run(1, lambda uid, **kwargs: None)
+
+        self.assertEqual(USERS, [c.args[0] for c in proc.call_args_list])
+        self.assertTrue(all(not c.kwargs for c in proc.call_args_list))
+        user_lease.assert_not_called()
+        self.assertEqual(1, summary["workers"])
+
+    def test_pool_runs_users_in_parallel_with_isolated_caches_and_leases(self):
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+        cache_paths = {}
+
+        def process(uid, token_cache_path=None):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                cache_paths[uid] = token_cache_path
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+
+        summary, _, user_lease, _ = self._run(3, process)
+
+        self.assertGreater(peak, 1)
+        self.assertLessEqual(peak, 3)
+        self.assertEqual(sorted(USERS), sorted(c.args[0] for c in user_lease.call_args_list))
+        self.assertEqual(len(USERS), len(set(cache_paths.values())))
+        self.assertNotIn(main.TOKEN_CACHE, cache_paths.values())
+        for uid, path in cache_paths.items():
+            self.assertIn(uid, os.path.basename(path))
+
+        self.assertEqual(3, summary["workers"])
+        self.assertEqual(USERS, [outcome["uid"] for outcome in summary["perUser"]])
+        self.assertEqual(len(USERS), summary["processed"])
+        self.assertTrue(all(outcome["wallSeconds"] >= 0.05 for outcome in summary["perUser"]))
+        self.assertGreater(summary["usersPerMinute"], 0)
+        self.assertGreater(summary["parallelism"], 1)
+
+    def test_failing_user_records_health_without_cancelling_neighbours(self):
+        def process(uid, token_cache_path=None):
+            if uid == "uid-b":
+                raise RuntimeError("graph exploded")
+
+        summary, _, _, health = self._run(2, process)
+
+        self.assertEqual(1, summary["errors"])
+        self.assertEqual(3, summary["processed"])
+        health.assert_called_once()
+        self.assertEqual("uid-b", health.call_args.args[0])
+        self.assertEqual("graph exploded", health.call_args.kwargs["graph_state"]["error"])
+
+    def test_user_with_held_lease_is_reported_skipped(self):
+        def lease(uid, callback):
+            if uid == "uid-c":
+                return False
+            callback()
+            return True
+
+        summary, proc, _, _ = self._run(2, lambda uid, **kwargs: None, lease=lease)
+
+        self.assertEqual(1, summary["skipped"])
+        self.assertNotIn("uid-c", [c.args[0] for c in proc.call_args_list])
+        statuses = {outcome["uid"]: outcome["status"] for outcome in summary["perUser"]}
+        self.assertEqual("skipped_lease_held", statuses["uid-c"])
+
+
+class PerUserOperatorFallbackTests(unittest.TestCase):
+    def setUp(self):
+        saved = dict(email_mod._LAST_KNOWN_OPERATOR_EMAILS)
+        email_mod._LAST_KNOWN_OPERATOR_EMAILS.clear()
+
+        def restore():
+            email_mod._LAST_KNOWN_OPERATOR_EMAILS.clear()
+            email_mod._LAST_KNOWN_OPERATOR_EMAILS.update(saved)
+
+        self.addCleanup(restore)
+
+    def test_concurrent_users_do_not_share_the_operator_fallback(self):
+        operators = {"uid-a": "agent.a@firm-a.com", "uid-b": "agent.b@firm-b.com"}
+        barrier = threading.Barrier(2)
+        kept = {}
+
+        def process(uid, token_cache_path=None):
+            draft = {"toRecipients": [{"emailAddress": {"address": "broker@brokerage.com"}}],
+                     "ccRecipients": [{"emailAddress": {"address": address}} for address in operators.values()]}
+            email_mod._filter_reply_all_draft_recipients(uid, draft, user_email=operators[uid])
+            barrier.wait(timeout=5)
+            # The second filter omits user_email and must fall back to this
+            # user's own operator only.
+            result = email_mod._filter_reply_all_draft_recipients(uid, draft)
+            kept[uid] = set(result["sentRecipients"])
+
+        users = list(operators)
+        with patch.dict(os.environ, {main.USER_CONCURRENCY_ENV: "2"}), \
+             patch.object(main, "list_user_ids", return_value=users), \
+             patch.object(main, "resolve_scheduler_user_ids", return_value=_scope(users)), \
+             patch.object(main, "refresh_and_process_user", side_effect=process), \
+             patch.object(main, "run_with_user_lease", side_effect=lambda uid, callback: (callback(), True)[1]), \
+             patch.object(main, "record_user_health"), \
+             patch("email_automation.processing.is_contact_opted_out", return_value=None):
+            summary = main.run_all_users()
+
+        self.assertEqual(0, summary["errors"])
+        self.assertEqual({"broker@brokerage.com", operators["uid-b"]}, kept["uid-a"])
+        self.assertEqual({"broker@brokerage.com", operators["uid-a"]}, kept["uid-b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
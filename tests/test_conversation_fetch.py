@@ -0,0 +1,256 @@
+"""Conversation-scoped Graph fetch for build_conversation_payload.
+
+Pins:
+  * the mailbox page is listed without bodies and shared by every reply
+    built inside one conversation_page_scope(), until its TTL,
+  * a body is fetched only for a message of the thread's conversation,
+  * stored conversation bodies are reused, only new ones are fetched and
+    written, and stored messages that left the page stay in the payload,
+  * a body that cannot be read falls back to the preview and is not stored,
+  * every write re-stamps expiresAt, and the retention pass trims the
+    collection,
+  * the store is inert under E2E_TEST_MODE.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from email_automation import messaging, retention
+from email_automation.messaging import ConversationPageCache, _conversation_fetch_enabled
+from email_automation.utils import b64url_id
+
+
+CONVERSATION = "conv-1="
+BODIES_DOC = f"users/uid-1/conversationBodies/{b64url_id(CONVERSATION)}"
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+
+    def get(self):
+        return FakeSnapshot(self._store.docs.get(self.path))
+
+    def set(self, payload, merge=False):
+        self._store.writes.append((self.path, payload))
+        current = self._store.docs.get(self.path) if merge else None
+        merged = {**(current or {}), **payload}
+        if merge and current and isinstance(current.get("messages"), dict):
+            merged["messages"] = {**current["messages"], **payload.get("messages", {})}
+        self._store.docs[self.path] = merged
+
+    def collection(self, name):
+        return FakeCollection(self._store, f"{self.path}/{name}")
+
+
+class FakeCollection:
+    def __init__(self, store, path):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id):
+        return FakeDocRef(self._store, f"{self._path}/{doc_id}")
+
+    def stream(self):
+        return []
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {"users/uid-1/threads/thread-1": {"conversationId": CONVERSATION}}
+        self.writes = []
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+
+def _message(n, conversation=CONVERSATION):
+    return {
+        "id": f"graph-{n}",
+        "internetMessageId": f"<m{n}@example.test>",
+        "conversationId": conversation,
+        "from": {"emailAddress": {"address": "broker@example.test"}},
+        "receivedDateTime": f"2026-08-01T10:0{n}:00Z",
+        "subject": "Re: 123 Main St",
+        "bodyPreview": f"preview {n}",
+    }
+
+
+class FakeGraph:
+    def __init__(self, page, bodies=None):
+        self.page = page
+        self.bodies = bodies or {}
+        self.calls = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls.append((url, params, headers))
+        graph_id = url.rsplit("/me/messages", 1)[1].lstrip("/")
+        if not graph_id:
+            return FakeResponse({"value": self.page})
+        if graph_id not in self.bodies:
+            return FakeResponse({}, status_code=404)
+        return FakeResponse({"body": {"contentType": "Text", "content": self.bodies[graph_id]}})
+
+    def listings(self):
+        return [call for call in self.calls if call[0].endswith("/me/messages")]
+
+    def body_reads(self):
+        return [call[0].rsplit("/", 1)[1] for call in self.calls if not call[0].endswith("/me/messages")]
+
+
+class ConversationFetchTestCase(unittest.TestCase):
+    store_enabled = True
+
+    def setUp(self):
+        self.fs = FakeFirestore()
+        self.pages = ConversationPageCache(enabled=lambda: True)
+        patchers = [
+            patch.object(messaging, "_fs", self.fs),
+            patch.object(messaging, "_CONVERSATION_PAGES", self.pages),
+            patch.object(messaging, "_conversation_fetch_enabled", return_value=self.store_enabled),
+            patch("email_automation.utils.exponential_backoff_request",
+                  side_effect=lambda request, **_kwargs: request()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def build(self, graph):
+        with patch("requests.get", side_effect=graph.get):
+            return messaging.build_conversation_payload(
+                "uid-1", "thread-1", headers={"Authorization": "Bearer t"},
+                authenticated_mailbox_email="me@example.test",
+            )
+
+
+class MailboxPageTests(ConversationFetchTestCase):
+    store_enabled = False
+
+    def test_page_is_listed_without_bodies_and_only_matches_are_read(self):
+        graph = FakeGraph([_message(1), _message(2, conversation="other")], {"graph-1": "The space is 18,500 SF."})
+
+        payload = self.build(graph)
+
+        (_, params, _), = graph.listings()
+        self.assertNotIn("body,", params["$select"] + ",")
+        self.assertEqual(["graph-1"], graph.body_reads())
+        body_call = graph.calls[-1]
+        self.assertEqual({"$select": "body"}, body_call[1])
+        self.assertEqual('outlook.body-content-type="text"', body_call[2]["Prefer"])
+        self.assertEqual(["The space is 18,500 SF."], [item["content"] for item in payload])
+
+    def test_page_is_shared_within_a_scope_until_its_ttl(self):
+        now = [0.0]
+        self.pages = ConversationPageCache(ttl_seconds=60, enabled=lambda: True, clock=lambda: now[0])
+        graph = FakeGraph([_message(1)], {"graph-1": "body"})
+
+        with patch.object(messaging, "_CONVERSATION_PAGES", self.pages):
+            self.build(graph)
+            with messaging.conversation_page_scope():
+                self.build(graph)
+                self.build(graph)
+                now[0] = 61.0
+                self.build(graph)
+
+        self.assertEqual(3, len(graph.listings()))
+
+    def test_unreadable_body_falls_back_to_the_preview(self):
+        graph = FakeGraph([_message(1)])
+
+        payload = self.build(graph)
+
+        self.assertEqual(["preview 1"], [item["content"] for item in payload])
+        self.assertEqual([], self.fs.writes)
+
+
+class ConversationBodiesStoreTests(ConversationFetchTestCase):
+    def test_repeat_reply_fetches_only_new_bodies(self):
+        graph = FakeGraph([_message(1)], {"graph-1": "first reply", "graph-2": "second reply"})
+        self.build(graph)
+
+        graph.page = [_message(2), _message(1)]
+        payload = self.build(graph)
+
+        self.assertEqual(["graph-1", "graph-2"], graph.body_reads())
+        self.assertEqual(["first reply", "second reply"], [item["content"] for item in payload])
+        _, second_write = self.fs.writes[-1]
+        self.assertEqual([b64url_id("<m2@example.test>")], list(second_write["messages"]))
+
+    def test_every_write_restamps_expires_at_for_the_retention_pass(self):
+        graph = FakeGraph([_message(1)], {"graph-1": "first reply", "graph-2": "second reply"})
+        self.build(graph)
+        graph.page = [_message(2), _message(1)]
+        self.build(graph)
+
+        self.assertEqual(2, len(self.fs.writes))
+        for _, payload in self.fs.writes:
+            self.assertIsInstance(payload["expiresAt"], datetime)
+        self.assertIn(retention.CONVERSATION_BODIES_RETENTION, retention.RETENTION_POLICIES)
+        self.assertEqual(messaging.CONVERSATION_BODIES_COLLECTION,
+                         retention.CONVERSATION_BODIES_RETENTION.collection)
+
+    def test_stored_message_that_left_the_page_is_kept(self):
+        graph = FakeGraph([_message(1)], {"graph-1": "older reply"})
+        self.build(graph)
+
+        graph.page = []
+        payload = self.build(graph)
+
+        self.assertEqual(["older reply"], [item["content"] for item in payload])
+        self.assertEqual("inbound", payload[0]["direction"])
+
+    def test_unreadable_body_is_retried_rather_than_stored(self):
+        graph = FakeGraph([_message(1)])
+        self.build(graph)
+        graph.bodies["graph-1"] = "full body"
+
+        payload = self.build(graph)
+
+        self.assertEqual(["full body"], [item["content"] for item in payload])
+        self.assertIn(b64url_id("<m1@example.test>"), self.fs.docs[BODIES_DOC]["messages"])
+
+    def test_e2e_test_mode_never_reads_or_writes_the_store(self):
+        self.fs.docs[BODIES_DOC] = {"messages": {"stale": {"id": "stale", "content": "stale body"}}}
+        graph = FakeGraph([_message(1)], {"graph-1": "body"})
+
+        with patch.object(messaging, "_conversation_fetch_enabled", _conversation_fetch_enabled), \
+             patch.dict(os.environ, {"E2E_TEST_MODE": "true"}):
+            payload = self.build(graph)
+
+        self.assertEqual(["body"], [item["content"] for item in payload])
+        self.assertEqual([], self.fs.writes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -289,7 +289,7 @@ def _default_audience():
 class ReplyAllPrivacyBoundaryCrossFeatureTests(unittest.TestCase):
     def setUp(self):
         # Reset the module-global operator memo so tests don't cross-contaminate.
-        email_mod._LAST_KNOWN_OPERATOR_EMAIL = None
+        email_mod._LAST_KNOWN_OPERATOR_EMAILS.clear()
         # Retry posture so the Sent-Items preflight (the guard) actually runs.
         self.retry_data = {
             "attempts": 1,
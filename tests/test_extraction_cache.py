@@ -0,0 +1,216 @@
+"""Content-addressed extraction cache in front of process_pdf_for_ai.
+
+Pins:
+  * keys follow the bytes and the extractor variant, not the filename,
+  * the disk tier survives a new process and evicts least-recently-used, and
+    is off unless EXTRACTION_CACHE_DIR names a directory (Cloud Run's temp dir
+    is RAM),
+  * a durable hit is promoted to disk; durable entries are per-user, expire,
+    and skip anything too large for one Firestore document,
+  * failed extractions are never cached,
+  * a forwarded or replayed PDF skips parsing and the OpenAI upload,
+  * hit/miss/byte counters reach the run summary,
+  * the cache is inert under E2E_TEST_MODE.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from email_automation import extraction_cache as ec
+from email_automation import file_handling
+
+
+ENTRY = {"text": "Total SF: 18,500", "images": [], "method": "local_extraction", "file_id": None}
+
+
+class FakeDurable:
+    def __init__(self):
+        self.docs = {}
+        self.puts = []
+
+    def get(self, uid, key):
+        return self.docs.get((uid, key))
+
+    def put(self, uid, key, entry, size):
+        self.puts.append((uid, key, size))
+        self.docs[(uid, key)] = dict(entry)
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.durable = FakeDurable()
+
+    def cache(self, **kwargs):
+        options = {
+            "directory": self.dir,
+            "max_bytes": 1024 * 1024,
+            "durable": self.durable,
+            "owner": lambda: "uid-1",
+            "enabled": lambda: True,
+        }
+        options.update(kwargs)
+        return ec.ExtractionCache(**options)
+
+
+class KeyTests(unittest.TestCase):
+    def test_key_follows_bytes_and_variant(self):
+        key = ec.extraction_cache_key(b"%PDF flyer", "v1")
+        self.assertEqual(key, ec.extraction_cache_key(b"%PDF flyer", "v1"))
+        self.assertNotEqual(key, ec.extraction_cache_key(b"%PDF flyer", "v2"))
+        self.assertNotEqual(key, ec.extraction_cache_key(b"%PDF other", "v1"))
+
+
+class DiskTierTests(CacheTestCase):
+    def test_entry_survives_a_new_cache_instance(self):
+        self.cache().put("k1", ENTRY)
+
+        fresh = self.cache(durable=mock.MagicMock())
+        self.assertEqual(ENTRY, fresh.get("k1"))
+        fresh._durable.get.assert_not_called()
+        stats = fresh.stats()
+        self.assertEqual((1, 1, 0), (stats["hits"], stats["diskHits"], stats["misses"]))
+        self.assertGreater(stats["bytesRead"], 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        size = len(ec.json.dumps(ENTRY).encode("utf-8"))
+        cache = self.cache(max_bytes=size * 2, owner=lambda: None)
+        cache.put("a", ENTRY)
+        cache.put("b", ENTRY)
+        cache.get("a")
+        cache.put("c", ENTRY)
+
+        self.assertEqual(["a.json", "c.json"], sorted(n for n in os.listdir(self.dir) if n.endswith(".json")))
+        self.assertEqual(1, cache.stats()["evictions"])
+        self.assertIsNone(cache.get("b"))
+
+    def test_unreadable_entry_is_dropped(self):
+        cache = self.cache(owner=lambda: None)
+        cache.put("k1", ENTRY)
+        with open(os.path.join(self.dir, "k1.json"), "w") as handle:
+            handle.write("{truncated")
+
+        self.assertIsNone(cache.get("k1"))
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "k1.json")))
+
+
+    def test_disk_tier_is_off_without_a_configured_directory(self):
+        with mock.patch.dict(os.environ, {ec.EXTRACTION_CACHE_DIR_ENV: ""}), \
+             mock.patch.object(ec.tempfile, "mkstemp") as mkstemp:
+            cache = self.cache(directory=None)
+            cache.put("k1", ENTRY)
+            self.assertEqual(ENTRY, cache.get("k1"))
+        mkstemp.assert_not_called()
+        self.assertEqual((0, 1), (cache.stats()["diskHits"], cache.stats()["durableHits"]))
+
+        with mock.patch.dict(os.environ, {ec.EXTRACTION_CACHE_DIR_ENV: self.dir}):
+            self.cache(directory=None).put("k2", ENTRY)
+        self.assertTrue(os.path.exists(os.path.join(self.dir, "k2.json")))
+
+
+class DurableTierTests(CacheTestCase):
+    def test_durable_hit_is_promoted_to_disk(self):
+        self.durable.docs[("uid-1", "k1")] = dict(ENTRY)
+        cache = self.cache()
+
+        self.assertEqual(ENTRY, cache.get("k1"))
+        self.assertEqual(ENTRY, cache.get("k1"))
+        stats = cache.stats()
+        self.assertEqual((1, 1, 0), (stats["durableHits"], stats["diskHits"], stats["misses"]))
+
+    def test_durable_entries_are_scoped_to_the_acting_user(self):
+        self.cache().put("k1", ENTRY)
+        self.assertEqual([("uid-1", "k1")], [(uid, key) for uid, key, _ in self.durable.puts])
+
+        other_disk = tempfile.mkdtemp(dir=self.dir)
+        self.assertIsNone(self.cache(directory=other_disk, owner=lambda: "uid-2").get("k1"))
+
+    def test_no_durable_write_without_a_user_or_past_the_document_cap(self):
+        self.cache(owner=lambda: None).put("k1", ENTRY)
+        big = dict(ENTRY, images=["A" * (ec.DURABLE_ENTRY_MAX_BYTES + 1)])
+        self.cache(max_bytes=4 * ec.DURABLE_ENTRY_MAX_BYTES).put("k2", big)
+
+        self.assertEqual([], self.durable.puts)
+        self.assertTrue(os.path.exists(os.path.join(self.dir, "k2.json")))
+
+    def test_durable_read_failure_counts_as_a_miss(self):
+        durable = mock.MagicMock()
+        durable.get.side_effect = RuntimeError("unavailable")
+        self.assertIsNone(self.cache(durable=durable).get("k1"))
+
+    def test_failed_extraction_is_not_cached(self):
+        cache = self.cache()
+        cache.put("k1", dict(ENTRY, method="failed"))
+
+        self.assertEqual([], os.listdir(self.dir))
+        self.assertEqual([], self.durable.puts)
+
+    def test_firestore_store_ignores_expired_docs(self):
+        docs = {}
+        db = mock.MagicMock()
+        doc_ref = db.collection.return_value.document.return_value.collection.return_value.document.return_value
+        doc_ref.set.side_effect = lambda payload: docs.update(payload)
+        doc_ref.get.side_effect = lambda: mock.MagicMock(exists=True, to_dict=lambda: dict(docs))
+        store = ec.FirestoreExtractionStore(db)
+
+        store.put("uid-1", "k1", dict(ENTRY, file_id="file-1"), 10)
+        self.assertEqual(dict(ENTRY, file_id="file-1"), store.get("uid-1", "k1"))
+        db.collection.return_value.document.assert_called_with("uid-1")
+
+        docs["expiresAt"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+        self.assertIsNone(store.get("uid-1", "k1"))
+
+
+class ProcessPdfForAiTests(CacheTestCase):
+    def test_repeated_bytes_skip_parse_and_upload(self):
+        cache = self.cache()
+        with mock.patch.object(file_handling, "extraction_cache", return_value=cache), \
+             mock.patch.object(file_handling, "extract_pdf_text", return_value=("", [b"png"])) as extract, \
+             mock.patch.object(file_handling, "upload_pdf_user_data", return_value="file-1") as upload:
+            first = file_handling.process_pdf_for_ai(b"%PDF scan", "original.pdf")
+            again = file_handling.process_pdf_for_ai(b"%PDF scan", "forwarded.pdf")
+
+        extract.assert_called_once()
+        upload.assert_called_once()
+        self.assertEqual("forwarded.pdf", again["filename"])
+        self.assertEqual(
+            {k: first[k] for k in ("text", "images", "method", "file_id", "id")},
+            {k: again[k] for k in ("text", "images", "method", "file_id", "id")},
+        )
+        self.assertEqual("openai_upload+images", again["method"])
+
+    def test_e2e_test_mode_never_reads_or_writes(self):
+        with mock.patch.dict(os.environ, {"E2E_TEST_MODE": "true"}):
+            cache = self.cache(enabled=ec._cache_enabled)
+            cache.put("k1", ENTRY)
+            self.assertIsNone(cache.get("k1"))
+
+        self.assertEqual([], os.listdir(self.dir))
+        self.assertEqual(0, cache.stats()["misses"])
+
+
+class RunSummaryTests(unittest.TestCase):
+    def test_summary_reports_cache_counters(self):
+        import main
+
+        stats = {"hits": 3, "diskHits": 2, "durableHits": 1, "misses": 4,
+                 "bytesRead": 10, "bytesWritten": 20, "evictions": 0}
+        with mock.patch.object(main, "extraction_cache_stats", return_value=stats):
+            summary = main._summarize_user_run([], 1, 1.0)
+        self.assertEqual(stats, summary["extractionCache"])
+
+
+if __name__ == "__main__":
+    unittest.main()
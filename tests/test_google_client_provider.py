@@ -0,0 +1,125 @@
+"""Process-wide Google Sheets/Drive client provider.
+
+_sheets_client() used to refresh the helper token and rebuild the service on
+every call. These tests pin the replacement's contract:
+  * credentials refresh only when google-auth says they are no longer valid,
+  * each thread builds a service once and reuses it,
+  * discovery documents are loaded once per process,
+  * a reset forces new credentials and a rebuilt service.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import threading
+import unittest
+from unittest import mock
+
+from email_automation import clients
+from email_automation.clients import GoogleClientProvider
+
+
+class FakeCredentials:
+    def __init__(self):
+        self.valid = False
+        self.refreshes = 0
+
+    def refresh(self, _request):
+        self.refreshes += 1
+        self.valid = True
+
+
+class GoogleClientProviderTests(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+        def factory():
+            creds = FakeCredentials()
+            self.created.append(creds)
+            return creds
+
+        self.provider = GoogleClientProvider(credentials_factory=factory)
+        patches = [
+            mock.patch.object(clients, "get_static_doc", return_value="{}"),
+            mock.patch.object(clients, "build_from_document", side_effect=lambda doc, http: object()),
+            mock.patch.object(clients, "AuthorizedHttp"),
+            mock.patch.object(clients, "build_http"),
+        ]
+        self.get_static_doc = patches[0].start()
+        self.build = patches[1].start()
+        for patcher in patches[2:]:
+            patcher.start()
+        for patcher in patches:
+            self.addCleanup(patcher.stop)
+
+    def test_credentials_refresh_only_when_no_longer_valid(self):
+        creds = self.provider.credentials()
+        self.provider.credentials()
+        self.provider.credentials()
+        self.assertEqual(1, creds.refreshes)
+
+        creds.valid = False  # inside google-auth's expiry margin
+        self.provider.credentials()
+        self.assertEqual(2, creds.refreshes)
+        self.assertEqual(1, len(self.created))
+
+        stats = self.provider.stats()
+        self.assertEqual(2, stats["credentialRefreshes"])
+        self.assertEqual(2, stats["refreshesAvoided"])
+
+    def test_service_is_built_once_per_thread_and_api(self):
+        sheets = self.provider.service("sheets", "v4")
+        self.assertIs(sheets, self.provider.service("sheets", "v4"))
+        drive = self.provider.service("drive", "v3")
+        self.assertIsNot(sheets, drive)
+
+        other_thread = {}
+        worker = threading.Thread(target=lambda: other_thread.update(svc=self.provider.service("sheets", "v4")))
+        worker.start()
+        worker.join()
+        self.assertIsNot(sheets, other_thread["svc"])
+
+        stats = self.provider.stats()
+        self.assertEqual(3, stats["serviceBuilds"])
+        self.assertEqual(1, stats["buildsAvoided"])
+        self.assertEqual(1, self.created[0].refreshes)
+
+    def test_discovery_document_is_loaded_once_per_api(self):
+        for _ in range(3):
+            worker = threading.Thread(target=lambda: self.provider.service("sheets", "v4"))
+            worker.start()
+            worker.join()
+        self.assertEqual(1, self.get_static_doc.call_count)
+
+    def test_reset_rebuilds_with_new_credentials(self):
+        first = self.provider.service("sheets", "v4")
+        self.provider.reset()
+        second = self.provider.service("sheets", "v4")
+        self.assertIsNot(first, second)
+        self.assertEqual(2, len(self.created))
+
+    def test_module_helpers_share_the_process_provider(self):
+        with mock.patch.object(clients, "_GOOGLE_CLIENTS", self.provider):
+            self.assertIs(clients._sheets_client(), clients._sheets_client())
+            self.assertIs(clients._helper_google_creds(), self.created[0])
+            clients._drive_client()
+        self.assertEqual(2, self.provider.stats()["serviceBuilds"])
+
+    def test_run_summary_reports_the_process_provider(self):
+        import main
+
+        with mock.patch.object(clients, "_GOOGLE_CLIENTS", self.provider):
+            clients._sheets_client()
+            clients._sheets_client()
+            summary = main._summarize_user_run([], 1, 1.0)
+        self.assertEqual(self.provider.stats(), summary["googleClients"])
+        self.assertEqual(1, summary["googleClients"]["buildsAvoided"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,377 @@
+"""Graph JSON $batch for per-message reads and draft attachment uploads.
+
+Pins:
+  * GraphBatchClient sends at most 20 requests per POST, returns the
+    sub-responses in input order, and re-sends only the throttled ones after
+    their Retry-After,
+  * read_many is refused like read for an operation outside the allowlist,
+  * the inbox readahead batches a window of message reads and a failed
+    sub-request falls back to the ordinary single read,
+  * page messages without headers get them in one batch,
+  * dependsOn stays inside a chunk, and an entry whose dependency was
+    throttled is retried with it,
+  * the draft transport uploads signature images and reads the identity in
+    one batch, each upload chained on the one before, and a failed upload
+    still raises,
+  * with inline_create the attachments that fit ride in the create payload,
+    the identity comes from the create response, the rest are uploaded in
+    one batch, and a create response without internetMessageId still falls
+    back to the readback,
+  * batching and inline create are off under E2E_TEST_MODE, by env and
+    behind a read fence.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from email_automation import graph_batch, message_transport, processing
+from email_automation.graph_batch import BatchResponse, GraphBatchClient, batch_request
+from email_automation.message_transport import (
+    DeliveryKind,
+    GraphDraftDeliveryTransport,
+    OutboundDraft,
+)
+
+
+GRAPH = "https://graph.microsoft.com/v1.0"
+
+
+class _PostResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}", response=self)
+
+
+class FakeBatchEndpoint:
+    """Answers each sub-request with ``answer(entry)`` -> (status, headers, body)."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.posts = []
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.posts.append((url, json))
+        responses = []
+        for entry in json["requests"]:
+            status, sub_headers, body = self.answer(entry)
+            responses.append({"id": entry["id"], "status": status, "headers": sub_headers, "body": body})
+        # Graph does not promise sub-responses in request order.
+        return _PostResponse({"responses": list(reversed(responses))})
+
+
+def _ok(entry):
+    return 200, {}, {"url": entry["url"]}
+
+
+class GraphBatchClientTests(unittest.TestCase):
+    def test_chunks_by_twenty_and_keeps_input_order(self):
+        endpoint = FakeBatchEndpoint(_ok)
+        client = GraphBatchClient(post=endpoint.post)
+
+        responses = client.execute(
+            [batch_request("GET", f"{GRAPH}/me/messages/m{n}") for n in range(45)], {"Authorization": "Bearer t"}
+        )
+
+        self.assertEqual([20, 20, 5], [len(body["requests"]) for _, body in endpoint.posts])
+        self.assertEqual(3, client.batches)
+        self.assertEqual([f"/me/messages/m{n}" for n in range(45)], [r.json()["url"] for r in responses])
+
+    def test_only_throttled_requests_are_retried_after_retry_after(self):
+        throttled = {"/me/messages/m1"}
+
+        def answer(entry):
+            if entry["url"] in throttled:
+                throttled.discard(entry["url"])
+                return 429, {"Retry-After": "7"}, {"error": {"code": "TooManyRequests"}}
+            return _ok(entry)
+
+        endpoint = FakeBatchEndpoint(answer)
+        sleeps, reported = [], []
+        client = GraphBatchClient(post=endpoint.post, sleep=sleeps.append, on_throttled=reported.append)
+
+        responses = client.execute([batch_request("GET", f"{GRAPH}/me/messages/m{n}") for n in range(3)], {})
+
+        self.assertEqual([200, 200, 200], [r.status_code for r in responses])
+        self.assertEqual(["/me/messages/m1"], [e["url"] for e in endpoint.posts[1][1]["requests"]])
+        self.assertEqual([7.0], sleeps)
+        self.assertEqual([7.0], reported)
+
+    def test_still_throttled_request_is_returned_as_its_429(self):
+        endpoint = FakeBatchEndpoint(lambda entry: (429, {}, {}))
+        client = GraphBatchClient(post=endpoint.post, sleep=lambda _s: None, max_retries=1)
+
+        response, = client.execute([batch_request("GET", f"{GRAPH}/me/messages/m1")], {})
+
+        self.assertEqual(429, response.status_code)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            response.raise_for_status()
+
+    def test_depends_on_is_kept_inside_the_chunk(self):
+        endpoint = FakeBatchEndpoint(_ok)
+        client = GraphBatchClient(post=endpoint.post, max_requests=2)
+
+        client.execute(
+            [batch_request("POST", f"{GRAPH}/me/messages/d1/attachments", body={"n": n},
+                           depends_on=(n - 1,) if n else ()) for n in range(3)],
+            {},
+        )
+
+        first, second = [body["requests"] for _, body in endpoint.posts]
+        self.assertEqual([None, ["0"]], [entry.get("dependsOn") for entry in first])
+        self.assertNotIn("dependsOn", second[0])
+
+    def test_dependent_of_a_throttled_request_is_retried_with_it(self):
+        throttled = {"0"}
+
+        def answer(entry):
+            if entry["id"] in throttled:
+                throttled.discard(entry["id"])
+                return 429, {"Retry-After": "1"}, {}
+            if entry.get("dependsOn") and entry["id"] == "1" and len(endpoint.posts) == 1:
+                return 424, {}, {"error": {"code": "FailedDependency"}}
+            return _ok(entry)
+
+        endpoint = FakeBatchEndpoint(answer)
+        client = GraphBatchClient(post=endpoint.post, sleep=lambda _s: None)
+
+        responses = client.execute(
+            [batch_request("POST", f"{GRAPH}/me/messages/d1/attachments", body={"n": n},
+                           depends_on=(n - 1,) if n else ()) for n in range(2)]
+            + [batch_request("GET", f"{GRAPH}/me/messages/d1")],
+            {},
+        )
+
+        self.assertEqual([200, 200, 200], [r.status_code for r in responses])
+        retried = endpoint.posts[1][1]["requests"]
+        self.assertEqual([("0", None), ("1", ["0"])], [(e["id"], e.get("dependsOn")) for e in retried])
+
+    def test_batch_request_carries_params_and_json_body(self):
+        entry = batch_request("POST", f"{GRAPH}/me/messages/d1/attachments", body={"name": "sig.png"})
+        self.assertEqual({"method": "POST", "url": "/me/messages/d1/attachments", "body": {"name": "sig.png"},
+                          "headers": {"Content-Type": "application/json"}}, entry)
+        self.assertEqual("/me/messages/m1?$select=body,sender",
+                         batch_request("GET", f"{GRAPH}/me/messages/m1", params={"$select": "body,sender"})["url"])
+
+
+class ProcessingBatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bodies = {}
+        self.endpoint = FakeBatchEndpoint(self._answer)
+        patchers = [
+            patch.object(processing, "graph_batch_enabled", return_value=True),
+            patch.object(processing, "_rate_governor", return_value=MagicMock()),
+            patch.object(processing, "exponential_backoff_request", side_effect=lambda request, **_k: request()),
+            patch("requests.post", side_effect=self.endpoint.post),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _answer(self, entry):
+        graph_id = entry["url"].split("?", 1)[0].rsplit("/", 1)[1]
+        if graph_id not in self.bodies:
+            return 404, {}, {"error": {"code": "ErrorItemNotFound"}}
+        return 200, {}, self.bodies[graph_id]
+
+
+class ReadManyTests(ProcessingBatchTestCase):
+    def test_operation_outside_the_allowlist_is_refused(self):
+        with self.assertRaises(processing.GraphMailboxReadRefused):
+            processing.GraphMailboxReader().read_many("mailbox_dump", [f"{GRAPH}/me/messages"], headers={})
+        self.assertEqual([], self.endpoint.posts)
+
+
+class InboxReadaheadTests(ProcessingBatchTestCase):
+    def test_window_is_read_in_one_batch_and_misses_fall_back(self):
+        self.bodies = {"g1": {"body": {"content": "one"}}, "g3": {"body": {"content": "three"}}}
+        with processing.inbox_readahead_scope() as readahead:
+            readahead.register({"Authorization": "Bearer t"}, ["g1", "g2", "g3"])
+            self.assertEqual({"body": {"content": "one"}}, processing._readahead_message("g1"))
+            self.assertIsNone(processing._readahead_message("g2"))
+            self.assertEqual({"body": {"content": "three"}}, processing._readahead_message("g3"))
+            self.assertIsNone(processing._readahead_message("g3"))
+
+        self.assertEqual(1, len(self.endpoint.posts))
+        self.assertIn("internetMessageHeaders", self.endpoint.posts[0][1]["requests"][0]["url"])
+        self.assertEqual(2, readahead.batched)
+
+    def test_no_readahead_outside_a_scope(self):
+        self.assertIsNone(processing._readahead_message("g1"))
+        self.assertEqual([], self.endpoint.posts)
+
+    def test_missing_headers_are_filled_in_one_batch(self):
+        headers = [{"name": "In-Reply-To", "value": "<x@example.test>"}]
+        self.bodies = {"g1": {"internetMessageHeaders": headers}, "g2": {"internetMessageHeaders": headers}}
+        messages = [{"id": "g1"}, {"id": "g2"}, {"id": "g3"}, {"id": "g4", "internetMessageHeaders": [{}]}]
+
+        processing._fill_missing_internet_headers(messages, {"Authorization": "Bearer t"})
+
+        self.assertEqual(1, len(self.endpoint.posts))
+        self.assertEqual(3, len(self.endpoint.posts[0][1]["requests"]))
+        self.assertEqual([headers, headers], [m.get("internetMessageHeaders") for m in messages[:2]])
+        self.assertNotIn("internetMessageHeaders", messages[2])
+
+
+def _draft(**overrides):
+    payload = dict(
+        kind=DeliveryKind.NEW,
+        subject="100 Fixture Way",
+        body="Hi Pat, could you share the asking rent?",
+        to=("broker@fixture.example.com",),
+        cc=(),
+        bcc=(),
+        attachments=({"name": "sig-1.png", "contentBytes": "aGk="}, {"name": "sig-2.png", "contentBytes": "aGk="}),
+        idempotency_key="outbox-1:broker@fixture.example.com",
+    )
+    payload.update(overrides)
+    return OutboundDraft(**payload)
+
+
+class BatchedDraftPreparationTests(unittest.TestCase):
+    def _transport(self, answer):
+        endpoint = FakeBatchEndpoint(answer)
+        http = MagicMock()
+        http.post.side_effect = lambda url, **kwargs: (
+            endpoint.post(url, **kwargs) if url.endswith("/$batch") else _PostResponse({"id": "draft-1"})
+        )
+        transport = GraphDraftDeliveryTransport(
+            headers={"Authorization": "Bearer fixture"}, base=GRAPH, request=http, batch=True
+        )
+        return transport, endpoint, http
+
+    def test_uploads_and_identity_share_one_batch(self):
+        def answer(entry):
+            if entry["method"] == "POST":
+                return 201, {}, {"id": "att"}
+            return 200, {}, {"internetMessageId": "<outreach-1@example.com>", "conversationId": "conv-1"}
+
+        transport, endpoint, http = self._transport(answer)
+        prepared = transport.prepare(_draft())
+
+        self.assertEqual("<outreach-1@example.com>", prepared.internet_message_id)
+        (_, body), = endpoint.posts
+        self.assertEqual(["POST", "POST", "GET"], [entry["method"] for entry in body["requests"]])
+        self.assertEqual([None, ["0"], None], [entry.get("dependsOn") for entry in body["requests"]])
+        self.assertEqual(2, http.post.call_count)
+        http.get.assert_not_called()
+
+    def test_failed_upload_raises(self):
+        transport, _endpoint, _http = self._transport(
+            lambda entry: (500, {}, {}) if entry["method"] == "POST" else (200, {}, {"internetMessageId": "<x>"})
+        )
+        with self.assertRaises(requests.exceptions.HTTPError):
+            transport.prepare(_draft())
+
+    def test_oversized_attachments_keep_their_own_requests(self):
+        transport, endpoint, http = self._transport(_ok)
+        http.get.return_value = _PostResponse({"internetMessageId": "<x>"})
+        big = "A" * (message_transport.GRAPH_BATCH_MAX_ATTACHMENT_BYTES + 1)
+        transport.prepare(_draft(attachments=({"name": "big.pdf", "contentBytes": big},)))
+
+        self.assertEqual([], endpoint.posts)
+        http.get.assert_called_once()
+
+
+class InlineCreateTests(unittest.TestCase):
+    CREATED = {"id": "draft-1", "internetMessageId": "<outreach-1@example.com>", "conversationId": "conv-1"}
+
+    def _transport(self, created, *, batch=True):
+        endpoint = FakeBatchEndpoint(lambda entry: (201, {}, {"id": "att"}))
+        http = MagicMock()
+        http.post.side_effect = lambda url, **kwargs: (
+            endpoint.post(url, **kwargs) if url.endswith("/$batch") else _PostResponse(created)
+        )
+        http.get.return_value = _PostResponse({"internetMessageId": "<read-back@example.com>"})
+        transport = GraphDraftDeliveryTransport(
+            headers={"Authorization": "Bearer fixture"}, base=GRAPH, request=http, batch=batch, inline_create=True
+        )
+        return transport, endpoint, http
+
+    def test_small_attachments_and_identity_ride_the_create_call(self):
+        transport, endpoint, http = self._transport(self.CREATED)
+
+        prepared = transport.prepare(_draft())
+
+        self.assertEqual(("<outreach-1@example.com>", "conv-1"), (prepared.internet_message_id, prepared.conversation_id))
+        (url,), kwargs = http.post.call_args
+        self.assertEqual(f"{GRAPH}/me/messages", url)
+        self.assertEqual(["sig-1.png", "sig-2.png"], [a["name"] for a in kwargs["json"]["attachments"]])
+        self.assertEqual(1, http.post.call_count)
+        http.get.assert_not_called()
+        self.assertEqual([], endpoint.posts)
+
+    def test_attachments_past_the_inline_budget_are_uploaded_in_one_batch(self):
+        transport, endpoint, http = self._transport(self.CREATED)
+        big = "A" * (message_transport.GRAPH_INLINE_ATTACHMENT_BYTES - 10)
+        transport.prepare(_draft(attachments=(
+            {"name": "flyer.pdf", "contentBytes": big},
+            {"name": "sig.png", "contentBytes": "aGk="},
+            {"name": "plan.pdf", "contentBytes": "A" * 20},
+        )))
+
+        create_payload = http.post.call_args_list[0].kwargs["json"]
+        self.assertEqual(["flyer.pdf", "sig.png"], [a["name"] for a in create_payload["attachments"]])
+        (_, body), = endpoint.posts
+        self.assertEqual([("POST", "/me/messages/draft-1/attachments")],
+                         [(entry["method"], entry["url"]) for entry in body["requests"]])
+        http.get.assert_not_called()
+
+    def test_missing_identity_in_the_create_response_falls_back_to_the_readback(self):
+        transport, _endpoint, http = self._transport({"id": "draft-1"}, batch=False)
+
+        prepared = transport.prepare(_draft())
+
+        self.assertEqual("<read-back@example.com>", prepared.internet_message_id)
+        http.get.assert_called_once()
+
+    def test_a_draft_that_cannot_be_indexed_is_still_refused(self):
+        transport, _endpoint, http = self._transport({"id": "draft-1"}, batch=False)
+        http.get.return_value = _PostResponse({})
+
+        with self.assertRaises(message_transport.DeliveryPreparationError):
+            transport.prepare(_draft())
+
+
+class BatchSwitchTests(unittest.TestCase):
+    def test_off_under_e2e_by_env_and_behind_a_fence(self):
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "true"}):
+            self.assertFalse(graph_batch.graph_batch_enabled())
+            self.assertFalse(message_transport.inline_create_enabled())
+            with processing.inbox_readahead_scope() as readahead:
+                self.assertIsNone(readahead)
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "false"}):
+            self.assertTrue(processing._batched_reads_enabled())
+            with processing.graph_mailbox_reader_scope(MagicMock()):
+                self.assertFalse(processing._batched_reads_enabled())
+            with patch.dict(os.environ, {graph_batch.GRAPH_BATCH_ENV: "0"}):
+                self.assertFalse(processing._batched_reads_enabled())
+            self.assertTrue(message_transport.inline_create_enabled())
+            with patch.dict(os.environ, {message_transport.GRAPH_INLINE_CREATE_ENV: "off"}):
+                self.assertFalse(message_transport.inline_create_enabled())
+
+    def test_missing_sub_response_is_an_error(self):
+        client = GraphBatchClient(post=lambda *a, **k: _PostResponse({"responses": []}))
+        response, = client.execute([batch_request("GET", f"{GRAPH}/me/messages/m1")], {})
+        self.assertIsInstance(response, BatchResponse)
+        self.assertFalse(response.ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""Pooled keep-alive sessions behind the ``requests`` name.
+
+Pins:
+  * calls to one host reuse a single kept-alive connection, and the per-host
+    stats count the requests, errors and connections opened,
+  * each host gets its own session, and no session carries cookies between
+    calls,
+  * only idempotent methods retry a dropped connection,
+  * with pooling off (E2E_TEST_MODE, SITESIFT_HTTP_POOL=0) every call is the
+    ``requests`` function of the same name, so patching ``requests.get`` and
+    patching a module's ``requests.get`` both still intercept it,
+  * the Graph, Storage and download modules bind the pooled client.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+from email_automation.http_pool import PooledRequests, pooled_requests
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.cookies.append(self.headers.get("Cookie"))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "session=mailbox-a; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.server.bodies.append(self.rfile.read(length))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *_args):
+        pass
+
+
+class LocalServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.cookies = []
+        self.server.bodies = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.port = self.server.server_address[1]
+        self.pool = PooledRequests(pool_size=2, enabled=lambda: True)
+        self.addCleanup(self.pool.close)
+
+    def url(self, host="127.0.0.1", path="/me/messages"):
+        return f"http://{host}:{self.port}{path}"
+
+
+class PooledSessionTests(LocalServerTestCase):
+    def test_one_host_reuses_one_connection(self):
+        for _ in range(3):
+            self.assertEqual({"ok": True}, self.pool.get(self.url(), {"$top": "1"}, timeout=5).json())
+        self.assertEqual(201, self.pool.post(self.url(), json={"a": 1}, timeout=5).status_code)
+
+        stats = self.pool.stats()[f"http://127.0.0.1:{self.port}"]
+        self.assertEqual((4, 0, 1, 3), (stats["requests"], stats["errors"], stats["connections"], stats["reused"]))
+        self.assertEqual([b'{"a": 1}'], self.server.bodies)
+
+    def test_hosts_get_their_own_session_and_no_cookies_are_kept(self):
+        self.pool.get(self.url(), timeout=5)
+        self.pool.get(self.url(), timeout=5)
+        self.pool.get(self.url(host="localhost"), timeout=5)
+
+        self.assertEqual([None, None, None], self.server.cookies)
+        self.assertEqual(
+            {f"http://127.0.0.1:{self.port}", f"http://localhost:{self.port}"}, set(self.pool.stats())
+        )
+
+    def test_failed_request_is_counted_and_raised(self):
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.pool.get("http://127.0.0.1:9/unreachable", timeout=1)
+        self.assertEqual(1, self.pool.stats()["http://127.0.0.1:9"]["errors"])
+
+    def test_only_idempotent_methods_retry_a_dropped_connection(self):
+        self.pool.get(self.url(), timeout=5)
+        retry = self.pool._session(f"http://127.0.0.1:{self.port}").get_adapter(self.url()).max_retries
+        self.assertEqual(frozenset({"GET", "HEAD", "OPTIONS"}), retry.allowed_methods)
+        # Status codes stay with exponential_backoff_request.
+        self.assertFalse(retry.is_retry("GET", 503))
+
+
+class PassThroughTests(unittest.TestCase):
+    def test_off_under_e2e_and_by_env(self):
+        pool = PooledRequests()
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "true"}):
+            self.assertFalse(pool._enabled())
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "false", "SITESIFT_HTTP_POOL": "0"}):
+            self.assertFalse(pool._enabled())
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "false", "SITESIFT_HTTP_POOL": ""}):
+            self.assertTrue(pool._enabled())
+
+    def test_disabled_pool_calls_the_requests_function_as_given(self):
+        with patch("requests.get", return_value="response") as get:
+            self.assertEqual("response", pooled_requests.get("https://example.test", {"a": "1"}, timeout=3))
+        get.assert_called_once_with("https://example.test", {"a": "1"}, timeout=3)
+        self.assertEqual({}, pooled_requests.stats())
+
+    def test_module_bindings_are_the_pooled_client_and_stay_patchable(self):
+        import firebase_helpers
+        from email_automation import clients, email, file_handling, processing, sent_mail_guard, utils
+
+        for module in (firebase_helpers, clients, email, file_handling, processing, sent_mail_guard, utils):
+            self.assertIs(pooled_requests, module.requests, module.__name__)
+        self.assertIs(requests.exceptions.HTTPError, processing.requests.exceptions.HTTPError)
+        with patch.object(processing.requests, "get", return_value="patched"):
+            self.assertEqual("patched", utils.requests.get("https://example.test"))
+        self.assertNotIn("get", vars(pooled_requests))
+
+    def test_run_summary_reports_pool_stats(self):
+        import main
+
+        self.assertIn("httpPool", main._summarize_user_run([], 1, 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
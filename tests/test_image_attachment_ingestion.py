@@ -6421,7 +6421,7 @@ class NativeImageProcessingIntegrationTests(unittest.TestCase):
         native_host_output = io.StringIO()
         with mock.patch.object(
             file_handling,
-            "_helper_google_creds",
+            "_drive_client",
             side_effect=RuntimeError(private_host_exception),
         ), contextlib.redirect_stdout(native_host_output):
             self.assertIsNone(
@@ -6444,12 +6444,8 @@ class NativeImageProcessingIntegrationTests(unittest.TestCase):
         nested_folder_output = io.StringIO()
         with mock.patch.object(
             file_handling,
-            "_helper_google_creds",
-            side_effect=[object(), RuntimeError(private_folder_exception)],
-        ), mock.patch.object(
-            file_handling,
-            "build",
-            return_value=fake_drive,
+            "_drive_client",
+            side_effect=[fake_drive, RuntimeError(private_folder_exception)],
         ), contextlib.redirect_stdout(nested_folder_output):
             nested_result = (
                 file_handling.host_first_native_image_manifest_asset(
@@ -6470,7 +6466,7 @@ class NativeImageProcessingIntegrationTests(unittest.TestCase):
         legacy_exception_detail = "LEGACY_PROPERTY_PREVIEW_FAILURE_DETAIL"
         with mock.patch.object(
             file_handling,
-            "_helper_google_creds",
+            "_drive_client",
             side_effect=RuntimeError(legacy_exception_detail),
         ), contextlib.redirect_stdout(legacy_host_output):
             self.assertIsNone(file_handling.upload_property_image_to_drive(
@@ -452,7 +452,7 @@ class BatchedInboundAuthorityTests(unittest.TestCase):
             processing,
             "exponential_backoff_request",
             return_value=inbox_response,
-        ), patch.object(processing, "has_processed", return_value=False), patch.object(
+        ), patch.object(processing, "has_processed_many", return_value=set()), patch.object(
             processing,
             "_match_message_to_thread",
             side_effect=["thread-1", "thread-2"],
@@ -516,7 +516,7 @@ class BatchedInboundAuthorityTests(unittest.TestCase):
             processing,
             "exponential_backoff_request",
             return_value=_GraphResponse({"value": messages}),
-        ), patch.object(processing, "has_processed", return_value=False), patch.object(
+        ), patch.object(processing, "has_processed_many", return_value=set()), patch.object(
             processing,
             "_match_message_to_thread",
             side_effect=["thread-1", "thread-2"],
@@ -592,8 +592,8 @@ class BatchedInboundAuthorityTests(unittest.TestCase):
             side_effect=lambda _request: next(graph_responses),
         ), patch.object(processing.requests, "get", side_effect=get_side_effect) as graph_get, patch.object(
             processing,
-            "has_processed",
-            return_value=False,
+            "has_processed_many",
+            return_value=set(),
         ), patch.object(
             processing,
             "_match_message_to_thread",
@@ -685,7 +685,7 @@ class BatchedInboundAuthorityTests(unittest.TestCase):
             processing,
             "exponential_backoff_request",
             side_effect=lambda _request: next(graph_responses),
-        ), patch.object(processing, "has_processed", return_value=False), patch.object(
+        ), patch.object(processing, "has_processed_many", return_value=set()), patch.object(
             processing,
             "_match_message_to_thread",
             return_value="thread-1",
@@ -770,7 +770,7 @@ class BatchedInboundAuthorityTests(unittest.TestCase):
             processing,
             "exponential_backoff_request",
             side_effect=lambda _request: next(graph_responses),
-        ), patch.object(processing, "has_processed", return_value=False), patch.object(
+        ), patch.object(processing, "has_processed_many", return_value=set()), patch.object(
             processing,
             "_match_message_to_thread",
             return_value="thread-1",
@@ -0,0 +1,154 @@
+"""InboundTextContext: each derived view of a message text is computed once.
+
+Pins:
+  * the context's views equal the derivations they cache, including the
+    tour intent of a CRLF-terminated body,
+  * the context is immutable and shared per text, in a bounded LRU,
+  * the deterministic event pass splits, strips and tour-analyses each
+    distinct text once, and a repeat pass over the same message derives nothing,
+  * the row terminal guard segments the message once for every event it checks,
+    where it used to segment it up to three times per event.
+"""
+
+import dataclasses
+import os
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+from email_automation import ai_processing, inbound_text, processing, tour_scheduling
+from email_automation.inbound_text import clear_inbound_text_contexts, inbound_text_context
+
+
+QUOTED_REPLY = (
+    "Thanks for the follow up. The space is still available and we can tour "
+    "Tuesday at 2pm if that works.\n\n"
+    "> On Mon, Jun 2, Jill wrote:\n"
+    "> Is 100 Main St still available? It was leased last year, right?\n"
+)
+TERMINAL_MESSAGE = (
+    "100 Main St is leased. We do have another suite at 200 Oak Ave that is still available."
+)
+
+
+def _counting(module, name):
+    calls = Counter()
+    original = getattr(module, name)
+
+    def wrapper(text, *args, **kwargs):
+        calls[text] += 1
+        return original(text, *args, **kwargs)
+
+    return patch.object(module, name, wrapper), calls
+
+
+class ContextViewTests(unittest.TestCase):
+    def setUp(self):
+        clear_inbound_text_contexts()
+        self.addCleanup(clear_inbound_text_contexts)
+
+    def test_views_match_the_derivations(self):
+        context = inbound_text_context(QUOTED_REPLY)
+
+        self.assertEqual(ai_processing._strip_quoted_history(QUOTED_REPLY), context.latest)
+        self.assertEqual(ai_processing._split_fresh_and_quoted(QUOTED_REPLY), (context.fresh, context.quoted))
+        self.assertEqual(ai_processing._quoted_region(QUOTED_REPLY), context.quoted_region)
+        self.assertEqual(ai_processing._norm_ws(QUOTED_REPLY), context.normalized)
+        self.assertEqual(ai_processing._significant_words(QUOTED_REPLY), context.tokens)
+        self.assertEqual(processing._terminal_binding_clauses(TERMINAL_MESSAGE),
+                         list(inbound_text_context(TERMINAL_MESSAGE).clauses))
+        for body in (context.fresh, "Can we tour Tuesday at 2pm?\r\n", "  ", "Virtual tour link attached."):
+            with self.subTest(body=body):
+                analysis = tour_scheduling._tour_segment_analysis(body.strip())
+                intent = tour_scheduling.tour_intent_from_analysis(analysis) if body.strip() else "unknown"
+                self.assertEqual(intent, inbound_text_context(body).tour_intent)
+                self.assertEqual(
+                    [item["text"] for item in tour_scheduling._tour_segment_analysis(body) if item["tourBound"]],
+                    list(inbound_text_context(body).tour_segments),
+                )
+
+    def test_context_is_immutable_shared_and_bounded(self):
+        context = inbound_text_context(QUOTED_REPLY)
+        self.assertIs(context, inbound_text_context(QUOTED_REPLY))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            context.raw = "other"
+
+        with patch.object(inbound_text, "INBOUND_TEXT_CONTEXT_CACHE_SIZE", 2):
+            for body in ("one", "two", "three"):
+                inbound_text_context(body)
+        self.assertEqual(["two", "three"], list(inbound_text._contexts))
+
+
+class RegexWorkPerMessageTests(unittest.TestCase):
+    def setUp(self):
+        clear_inbound_text_contexts()
+        self.addCleanup(clear_inbound_text_contexts)
+
+    def _run_event_pass(self):
+        conversation = [
+            {"direction": "outbound", "content": "Is 100 Main St still available?"},
+            {"direction": "inbound", "content": QUOTED_REPLY, "from": "broker@example.com"},
+        ]
+        proposal = {
+            "updates": [],
+            "events": [
+                {"type": "property_unavailable", "reason": "leased", "notes": "leased last year"},
+                {"type": "tour_requested", "question": "we can tour Tuesday at 2pm"},
+            ],
+            "response_email": "Thanks!",
+        }
+        proposal = ai_processing._suppress_quote_only_events(proposal, conversation)
+        return ai_processing._augment_events_with_deterministic_signals(
+            proposal, conversation, target_anchor="100 Main St, Augusta",
+            sender_email="broker@example.com",
+        )
+
+    def test_event_pass_derives_each_text_once(self):
+        split_patch, split_calls = _counting(ai_processing, "_split_fresh_and_quoted")
+        strip_patch, strip_calls = _counting(ai_processing, "_strip_quoted_history")
+        tour_patch, tour_calls = _counting(tour_scheduling, "_tour_segment_analysis")
+        with split_patch, strip_patch, tour_patch:
+            first = self._run_event_pass()
+            counted = (sum(split_calls.values()), sum(strip_calls.values()), sum(tour_calls.values()))
+            second = self._run_event_pass()
+
+        self.assertEqual(first, second)
+        self.assertNotIn("property_unavailable", [e["type"] for e in first["events"]])
+        self.assertEqual(1, split_calls[QUOTED_REPLY])
+        for calls in (split_calls, strip_calls, tour_calls):
+            self.assertTrue(calls)
+            self.assertEqual(1, max(calls.values()), calls)
+        self.assertEqual(
+            counted,
+            (sum(split_calls.values()), sum(strip_calls.values()), sum(tour_calls.values())),
+        )
+
+    def test_row_guard_segments_the_message_once(self):
+        fragments_patch, fragment_calls = _counting(processing, "_terminal_sentence_fragments")
+        events = [
+            {"type": "property_unavailable", "reason": "leased"},
+            {"type": "property_unavailable", "reason": "off_market"},
+        ]
+        with fragments_patch:
+            verdicts = [
+                processing._property_unavailable_event_applies_to_row(
+                    event,
+                    row_anchor="100 Main St, Augusta",
+                    row_aliases=["100 Main St"],
+                    message_text=TERMINAL_MESSAGE,
+                )
+                for event in events
+            ]
+
+        self.assertEqual([True, True], verdicts)
+        self.assertEqual({TERMINAL_MESSAGE: 1}, dict(fragment_calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+"""Delta-query paging for the Inbox and SentItems scans.
+
+Pins:
+  * a first delta round starts a sync bounded to the scan window, follows
+    nextLinks, ignores removals and saves the deltaLink beside lastScanISO,
+  * a stored deltaLink is fetched as-is, so a run reads only new changes,
+  * the inbox link does not advance while a message of the round is still
+    retryable,
+  * an expired token falls back to the windowed scan and clears the link,
+  * SentItems delta pages are not assumed to be in sentDateTime order,
+  * delta sync is off under E2E_TEST_MODE, behind a read fence, and by env.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from email_automation import processing
+
+
+GRAPH = "https://graph.microsoft.com/v1.0"
+INBOX = f"{GRAPH}/me/mailFolders/Inbox/messages"
+SENT = f"{GRAPH}/me/mailFolders/SentItems/messages"
+
+
+def _iso(delta=timedelta(0)):
+    return (datetime.now(timezone.utc) - delta).isoformat().replace("+00:00", "Z")
+
+
+def _response(payload=None, status_code=200):
+    response = MagicMock(status_code=status_code, headers={})
+    response.json.return_value = payload or {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            f"HTTP {status_code}", response=response
+        )
+    return response
+
+
+class FakeReader:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def read(self, operation, url, **kwargs):
+        self.calls.append((operation, url, kwargs.get("params"), kwargs.get("headers")))
+        return self.responses.pop(0)
+
+
+def _message(n, received=None):
+    return {"id": f"graph-{n}", "internetMessageId": f"<m{n}@example.test>",
+            "receivedDateTime": received or _iso()}
+
+
+class InboxDeltaTests(unittest.TestCase):
+    def setUp(self):
+        self.links = {}
+        patchers = [
+            patch.object(processing, "_mail_delta_sync_enabled", return_value=True),
+            patch.object(processing, "get_delta_link", side_effect=lambda uid, folder: self.links.get(folder)),
+            patch.object(processing, "set_delta_link",
+                         side_effect=lambda uid, folder, link: self.links.__setitem__(folder, link)),
+            patch.object(processing, "set_last_scan_iso"),
+            patch.object(processing, "_prewarm_thread_matches"),
+            patch.object(processing, "_match_message_to_thread", return_value=None),
+            patch.object(processing, "_resolve_current_mailbox_email", return_value="me@example.test"),
+            patch.object(processing, "process_inbox_message"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _scan(self, reader, processed):
+        with patch.object(processing, "_mailbox_reader", return_value=reader), \
+             patch.object(processing, "has_processed_many",
+                          side_effect=lambda uid, keys: set(keys) & processed), \
+             patch.object(processing, "mark_processed", side_effect=lambda uid, key: processed.add(key) or True):
+            return processing.scan_inbox_against_index("uid-1", {"Authorization": "Bearer t"}, only_unread=False, top=25)
+
+    def test_first_round_is_bounded_to_the_window_and_saves_the_link(self):
+        reader = FakeReader(
+            _response({"value": [_message(1), {"id": "gone", "@removed": {"reason": "deleted"}}],
+                       "@odata.nextLink": f"{INBOX}/delta?$skiptoken=a"}),
+            _response({"value": [], "@odata.deltaLink": f"{INBOX}/delta?$deltatoken=b"}),
+        )
+
+        result = self._scan(reader, processed=set())
+
+        (_, first_url, first_params, first_headers), (_, second_url, second_params, _) = reader.calls
+        self.assertEqual(f"{INBOX}/delta", first_url)
+        self.assertTrue(first_params["$filter"].startswith("receivedDateTime ge "))
+        self.assertEqual("odata.maxpagesize=25", first_headers["Prefer"])
+        self.assertEqual(f"{INBOX}/delta?$skiptoken=a", second_url)
+        self.assertFalse(second_params)
+        self.assertEqual(1, result["scanned"])
+        processing.process_inbox_message.assert_called_once()
+        self.assertEqual(f"{INBOX}/delta?$deltatoken=b", self.links["inbox"])
+
+    def test_stored_link_is_fetched_as_is(self):
+        self.links["inbox"] = f"{INBOX}/delta?$deltatoken=old"
+        reader = FakeReader(_response({"value": [], "@odata.deltaLink": f"{INBOX}/delta?$deltatoken=new"}))
+
+        result = self._scan(reader, processed=set())
+
+        self.assertEqual([("inbox_message_page", f"{INBOX}/delta?$deltatoken=old", None)],
+                         [call[:3] for call in reader.calls])
+        self.assertEqual(0, result["scanned"])
+        self.assertEqual(f"{INBOX}/delta?$deltatoken=new", self.links["inbox"])
+
+    def test_link_waits_for_retryable_messages(self):
+        self.links["inbox"] = f"{INBOX}/delta?$deltatoken=old"
+        reader = FakeReader(_response({"value": [_message(1)], "@odata.deltaLink": f"{INBOX}/delta?$deltatoken=new"}))
+
+        with patch.object(processing, "_should_mark_processed_after_error", return_value=False), \
+             patch.object(processing, "_record_inbox_processing_failure"):
+            processing.process_inbox_message.side_effect = RuntimeError("sheet write failed")
+            self._scan(reader, processed=set())
+
+        self.assertEqual(f"{INBOX}/delta?$deltatoken=old", self.links["inbox"])
+
+    def test_expired_token_falls_back_to_the_windowed_scan(self):
+        self.links["inbox"] = f"{INBOX}/delta?$deltatoken=stale"
+        reader = FakeReader(
+            _response({"error": {"code": "SyncStateNotFound"}}, status_code=400),
+            _response({"value": [_message(1)]}),
+        )
+
+        result = self._scan(reader, processed={"<m1@example.test>"})
+
+        _, windowed_url, windowed_params, windowed_headers = reader.calls[1]
+        self.assertEqual(INBOX, windowed_url)
+        self.assertEqual("receivedDateTime asc", windowed_params["$orderby"])
+        self.assertNotIn("Prefer", windowed_headers)
+        self.assertEqual("healthy", result["status"])
+        self.assertIsNone(self.links["inbox"])
+
+    def test_other_errors_are_not_treated_as_expiry(self):
+        self.links["inbox"] = f"{INBOX}/delta?$deltatoken=old"
+        reader = FakeReader(_response({"error": {"code": "ErrorAccessDenied"}}, status_code=403))
+
+        result = self._scan(reader, processed=set())
+
+        self.assertEqual("error", result["status"])
+        self.assertEqual(f"{INBOX}/delta?$deltatoken=old", self.links["inbox"])
+
+
+class SentItemsDeltaTests(unittest.TestCase):
+    def test_out_of_window_change_does_not_stop_the_round(self):
+        links = {}
+        old = {"id": "old", "conversationId": "conv-1", "internetMessageId": "<old@x>",
+               "sentDateTime": _iso(timedelta(days=30))}
+        new = {"id": "new", "conversationId": "conv-1", "internetMessageId": "<new@x>", "sentDateTime": _iso()}
+        reader = FakeReader(_response({"value": [old, new], "@odata.deltaLink": f"{SENT}/delta?$deltatoken=b"}))
+        thread = MagicMock()
+        thread.to_dict.return_value = {"conversationId": "conv-1"}
+        fs = MagicMock()
+        fs.collection.return_value.document.return_value.collection.return_value.stream.return_value = [thread]
+
+        with patch.object(processing, "_fs", fs), \
+             patch.object(processing, "_mail_delta_sync_enabled", return_value=True), \
+             patch.object(processing, "_mailbox_reader", return_value=reader), \
+             patch.object(processing, "get_delta_link", return_value=None), \
+             patch.object(processing, "set_delta_link",
+                          side_effect=lambda uid, folder, link: links.__setitem__(folder, link)), \
+             patch("email_automation.messaging.lookup_thread_by_message_id", return_value="thread-1") as lookup:
+            result = processing.scan_sent_items_for_manual_replies("uid-1", {"Authorization": "Bearer t"})
+
+        self.assertEqual(f"{SENT}/delta", reader.calls[0][1])
+        lookup.assert_called_once_with("uid-1", "<new@x>")
+        self.assertEqual(2, result["scanned"])
+        self.assertEqual(f"{SENT}/delta?$deltatoken=b", links["sentItems"])
+
+
+class DeltaSyncSwitchTests(unittest.TestCase):
+    def test_off_under_e2e_behind_a_fence_and_by_env(self):
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "true"}):
+            self.assertFalse(processing._mail_delta_sync_enabled())
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "false"}):
+            self.assertTrue(processing._mail_delta_sync_enabled())
+            with processing.graph_mailbox_reader_scope(FakeReader()):
+                self.assertFalse(processing._mail_delta_sync_enabled())
+            with patch.dict(os.environ, {processing.MAIL_DELTA_SYNC_ENV: "off"}):
+                self.assertFalse(processing._mail_delta_sync_enabled())
+
+    def test_expiry_is_410_or_a_sync_state_code(self):
+        def error(status, code=None):
+            return requests.exceptions.HTTPError(response=_response({"error": {"code": code}}, status))
+
+        self.assertTrue(processing._delta_token_expired(error(410)))
+        self.assertTrue(processing._delta_token_expired(error(400, "SyncStateNotFound")))
+        self.assertFalse(processing._delta_token_expired(error(400, "BadRequest")))
+        self.assertFalse(processing._delta_token_expired(error(500)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+"""messageArtifacts ledger behind the processing-retry guard.
+
+Pins:
+  * artifact writes append {collection, id} to the ledger doc of every source
+    message id they carry, raw and normalized, in the artifact's own batch,
+  * the guard resolves a ledger hit with two get_all reads and no collection
+    query, and still applies the live status (a sent outbox item is skipped),
+  * ledger docs carry expiresAt for the retention pass,
+  * a ledger miss ends the check only for failures recorded after
+    SITESIFT_MESSAGE_ARTIFACTS_SINCE and within the ledger ttl; others fall
+    back to the scan,
+  * the ledger is off under E2E_TEST_MODE.
+"""
+
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+from google.cloud.firestore import ArrayUnion
+
+from email_automation import clients, message_artifacts, processing
+from email_automation.message_artifacts import MESSAGE_ARTIFACTS_SINCE_ENV, source_message_ids
+from email_automation.pending_responses import queue_pending_response
+from email_automation.utils import b64url_id
+
+
+_NOW = datetime.now(timezone.utc)
+LEDGER_ON = {"E2E_TEST_MODE": "", MESSAGE_ARTIFACTS_SINCE_ENV: (_NOW - timedelta(days=60)).isoformat()}
+AFTER = _NOW - timedelta(days=1)
+BEFORE = _NOW - timedelta(days=90)
+PAST_LEDGER_TTL = _NOW - timedelta(days=45)
+
+
+class FakeSnapshot:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return FakeCollection(self._store, f"{self.path}/{name}")
+
+    def get(self, transaction=None):
+        return FakeSnapshot(self, self._store.docs.get(self.path))
+
+    def set(self, data, merge=False):
+        current = dict(self._store.docs.get(self.path) or {}) if merge else {}
+        for key, value in data.items():
+            if isinstance(value, ArrayUnion):
+                existing = list(current.get(key) or [])
+                value = existing + [item for item in value.values if item not in existing]
+            current[key] = value
+        self._store.docs[self.path] = current
+
+
+class FakeCollection:
+    def __init__(self, store, path, filters=()):
+        self._store = store
+        self.path = path
+        self._filters = filters
+
+    def document(self, doc_id=None):
+        if doc_id is None:
+            self._store.auto_ids += 1
+            doc_id = f"auto-{self._store.auto_ids}"
+        return FakeDocRef(self._store, f"{self.path}/{doc_id}")
+
+    def where(self, filter):
+        return FakeCollection(self._store, self.path, self._filters + (filter,))
+
+    def limit(self, count):
+        return self
+
+    def stream(self):
+        self._store.queries.append((self.path, tuple((f.field_path, f.value) for f in self._filters)))
+        prefix = f"{self.path}/"
+        return [
+            FakeSnapshot(FakeDocRef(self._store, path), data)
+            for path, data in self._store.docs.items()
+            if path.startswith(prefix) and "/" not in path[len(prefix):]
+            and all(data.get(f.field_path) == f.value for f in self._filters)
+        ]
+
+
+class FakeBatch:
+    def __init__(self, store):
+        self._store = store
+        self._writes = []
+
+    def set(self, ref, data, merge=False):
+        self._writes.append((ref, data, merge))
+
+    def commit(self):
+        self._store.commits.append(len(self._writes))
+        for ref, data, merge in self._writes:
+            ref.set(data, merge=merge)
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+        self.queries = []
+        self.commits = []
+        self.get_all_calls = 0
+        self.auto_ids = 0
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, refs):
+        self.get_all_calls += 1
+        return [ref.get() for ref in reversed(list(refs))]
+
+
+class LedgerWriteTests(unittest.TestCase):
+    def setUp(self):
+        self.fs = FakeFirestore()
+        for patcher in (patch.dict(os.environ, LEDGER_ON), patch.object(clients, "_fs", self.fs)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_pending_response_and_its_ledger_entries_share_one_batch(self):
+        queue_pending_response("uid-1", "thread-1", "<msg-1@example.com>", "broker@example.com", "Thanks")
+
+        self.assertEqual([3], self.fs.commits)
+        self.assertEqual("<msg-1@example.com>", self.fs.docs["users/uid-1/pendingResponses/thread-1"]["msgId"])
+        for message_id in ("<msg-1@example.com>", "msg-1@example.com"):
+            ledger = self.fs.docs[f"users/uid-1/messageArtifacts/{b64url_id(message_id)}"]
+            self.assertEqual([{"collection": "pendingResponses", "id": "thread-1"}], ledger["artifacts"])
+            self.assertGreater(ledger["expiresAt"], _NOW + timedelta(days=29))
+
+    def test_source_ids_are_read_from_the_fields_the_guard_matches(self):
+        ids = source_message_ids({
+            "msgId": "a",
+            "meta": {"replyToMessageId": ["b"]},
+            "tourInvite": {"sourceInternetMessageId": "<c@x>"},
+            "threadId": "not-a-message",
+        })
+        self.assertEqual({"a", "b", "<c@x>", "c@x"}, ids)
+
+    def test_writes_are_plain_under_test_mode(self):
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "true"}):
+            queue_pending_response("uid-1", "thread-1", "msg-1", "broker@example.com", "Thanks")
+
+        self.assertEqual([], self.fs.commits)
+        self.assertEqual(["users/uid-1/pendingResponses/thread-1"], list(self.fs.docs))
+
+
+class RetryGuardLedgerTests(unittest.TestCase):
+    def setUp(self):
+        self.fs = FakeFirestore()
+        for patcher in (
+            patch.dict(os.environ, LEDGER_ON),
+            patch.object(clients, "_fs", self.fs),
+            patch.object(processing, "_fs", self.fs),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user_ref = self.fs.collection("users").document("uid-1")
+
+    def _write(self, collection, doc_id, payload):
+        message_artifacts.set_with_message_artifacts(
+            self.fs, self.user_ref, collection, self.user_ref.collection(collection).document(doc_id), payload
+        )
+
+    def _guard(self, observed_at):
+        self.fs.queries.clear()
+        self.fs.get_all_calls = 0
+        return processing._find_existing_retry_artifact_for_message(
+            "uid-1", "thread-1", "msg-1", observed_at=observed_at
+        )
+
+    def _artifact_queries(self):
+        return [path for path, _ in self.fs.queries if not path.endswith("/threads")]
+
+    def test_ledger_hit_is_two_reads_and_no_queries(self):
+        self._write("pendingResponses", "thread-1", {"threadId": "thread-1", "msgId": "msg-1"})
+
+        artifact = self._guard(AFTER)
+
+        self.assertEqual({"collection": "pendingResponses", "id": "thread-1", "status": None}, artifact)
+        self.assertEqual(2, self.fs.get_all_calls)
+        self.assertEqual([], self._artifact_queries())
+
+    def test_live_status_still_decides(self):
+        self._write("outbox", "out-1", {"threadId": "thread-1", "replyToMessageId": "msg-1", "status": "queued"})
+        self.assertEqual("out-1", self._guard(AFTER)["id"])
+
+        self.fs.docs["users/uid-1/outbox/out-1"]["status"] = "sent"
+        self.assertIsNone(self._guard(AFTER))
+
+        del self.fs.docs["users/uid-1/outbox/out-1"]
+        self.assertIsNone(self._guard(AFTER))
+
+    def test_covered_miss_skips_the_scan(self):
+        self.assertIsNone(self._guard(AFTER))
+        self.assertEqual([], self._artifact_queries())
+
+    def test_uncovered_miss_falls_back_to_the_scan(self):
+        self.fs.docs["users/uid-1/outbox/dashboard-1"] = {
+            "threadId": "thread-1", "replyToMessageId": "msg-1", "status": "queued",
+        }
+
+        for observed_at in (BEFORE, PAST_LEDGER_TTL, None):
+            self.assertEqual("dashboard-1", self._guard(observed_at)["id"])
+            self.assertIn("users/uid-1/outbox", self._artifact_queries())
+
+        with patch.dict(os.environ, {MESSAGE_ARTIFACTS_SINCE_ENV: ""}):
+            self.assertEqual("dashboard-1", self._guard(AFTER)["id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
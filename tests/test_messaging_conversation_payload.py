@@ -89,7 +89,19 @@ class MessagingConversationPayloadTests(unittest.TestCase):
         firestore_messages=None,
         authenticated_mailbox_email=_MAILBOX_UNSET,
     ):
-        graph_response = _FakeGraphResponse({"value": graph_messages})
+        # The mailbox page is listed without bodies; each body is read by id.
+        listing = [
+            {key: value for key, value in message.items() if key != "body"}
+            for message in graph_messages
+        ]
+        bodies = {message["id"]: message.get("body") for message in graph_messages}
+
+        def graph_get(url, **_kwargs):
+            message_id = url.rsplit("/me/messages", 1)[1].lstrip("/")
+            if message_id:
+                return _FakeGraphResponse({"body": bodies[message_id]})
+            return _FakeGraphResponse({"value": listing})
+
         fake_fs = _FakeFirestore({"conversationId": "conversation-1"})
         with patch.object(
             messaging,
@@ -97,8 +109,8 @@ class MessagingConversationPayloadTests(unittest.TestCase):
             return_value=firestore_messages or [],
         ), patch.object(messaging, "_fs", fake_fs), patch(
             "email_automation.utils.exponential_backoff_request",
-            return_value=graph_response,
-        ):
+            side_effect=lambda request, **_kwargs: request(),
+        ), patch("requests.get", side_effect=graph_get):
             kwargs = {
                 "headers": {"Authorization": "Bearer test-token"},
             }
@@ -131,6 +131,11 @@ class OpenAIUsageTrackingTests(unittest.TestCase):
         self.assertEqual(daily_ref.writes[0][1]["calls"], ("inc", 1))
         self.assertGreater(daily_ref.writes[0][1]["totalCostUsd"][1], 0)
 
+        monthly_ref = fake_db.collections["usageMonthly"].docs["2026-05"]
+        self.assertEqual(monthly_ref.writes[0][2], True)
+        self.assertEqual(monthly_ref.writes[0][1]["calls"], ("inc", 1))
+        self.assertEqual(monthly_ref.writes[0][1]["totalCostUsd"], daily_ref.writes[0][1]["totalCostUsd"])
+
     def test_track_openai_usage_safely_swallows_metering_failures(self):
         class BrokenDb:
             def collection(self, _name):
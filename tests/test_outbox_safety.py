@@ -636,7 +636,7 @@ class OutboxSafetyTests(unittest.TestCase):
 
         self.assertEqual(provider_calls, [1, 2])
         self.assertEqual(send_headers, ["Bearer fresh-token-1", "Bearer fresh-token-2"])
-        sleep.assert_called_once_with(120)
+        sleep.assert_not_called()
 
     def test_send_outboxes_bounds_each_request_to_four_recipients(self):
         docs = [
@@ -666,7 +666,7 @@ class OutboxSafetyTests(unittest.TestCase):
             sent_doc_ids,
         )
         self.assertFalse(docs[-1].reference.deleted)
-        self.assertEqual(3, sleep.call_count)
+        sleep.assert_not_called()
 
     def test_outbox_batch_override_cannot_exceed_lease_safe_ceiling(self):
         with patch.dict(
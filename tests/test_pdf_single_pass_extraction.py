@@ -0,0 +1,188 @@
+"""Single-pass PDF extraction engine (email_automation.pdf_text).
+
+Pins what replaced the pdfplumber-then-PyMuPDF double parse:
+  * the document is read from memory, never through a temp file,
+  * label/value cells on one visual line stay on one line,
+  * pdfplumber's table finder only runs on pages that draw ruling lines, and
+    never on drawing-sized content streams,
+  * sparse-page rendering stops at max_images,
+  * the page, table-time and prompt budgets stop the table scan, not the text,
+  * a PDF PyMuPDF cannot open still goes through pdfplumber.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import importlib.util
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import fitz
+
+from email_automation import pdf_text
+
+
+def _build_pdf(pages):
+    """pages: list of "text", "table", "label_value" or "blank"."""
+    document = fitz.open()
+    try:
+        for index, kind in enumerate(pages):
+            page = document.new_page()
+            if kind == "text":
+                page.insert_text((72, 72), f"Page {index + 1} warehouse narrative with enough words to count.")
+            elif kind == "label_value":
+                page.insert_text((72, 72), "Asking Rent:")
+                page.insert_text((220, 72), "$6.75/SF/yr")
+                page.insert_text((72, 100), "Operating Expenses:")
+                page.insert_text((220, 100), "$2.25/SF/yr")
+            elif kind == "table":
+                for x in (72, 222, 372):
+                    page.draw_line((x, 72), (x, 172))
+                for y in (72, 122, 172):
+                    page.draw_line((72, y), (372, y))
+                page.insert_text((80, 100), "Total SF")
+                page.insert_text((230, 100), "18,500")
+                page.insert_text((80, 150), "Clear Height")
+                page.insert_text((230, 150), "32 ft")
+        return document.tobytes()
+    finally:
+        document.close()
+
+
+def _extract(content, **kwargs):
+    stats = {}
+    with redirect_stdout(io.StringIO()):
+        text, images = pdf_text.extract_pdf_text(content, "flyer.pdf", stats=stats, **kwargs)
+    return text, images, stats
+
+
+class SinglePassTests(unittest.TestCase):
+    def test_reads_from_memory_without_a_temp_file(self):
+        with mock.patch("tempfile.NamedTemporaryFile", side_effect=AssertionError("temp file")), \
+             mock.patch("tempfile.mkstemp", side_effect=AssertionError("temp file")):
+            text, _, stats = _extract(_build_pdf(["text", "table"]))
+
+        self.assertIn("--- Page 1 ---", text)
+        self.assertEqual(2, stats["pages"])
+
+    def test_label_and_value_cells_share_a_line(self):
+        text, _, _ = _extract(_build_pdf(["label_value"]))
+
+        self.assertIn("Asking Rent: $6.75/SF/yr", text)
+        self.assertIn("Operating Expenses: $2.25/SF/yr", text)
+
+    def test_table_pass_only_runs_on_ruled_pages(self):
+        real_open = pdf_text.pdfplumber.open
+        with mock.patch.object(pdf_text.pdfplumber, "open", side_effect=real_open) as plumber_open:
+            _, _, text_only = _extract(_build_pdf(["text", "text"]))
+        plumber_open.assert_not_called()
+        self.assertEqual(0, text_only["table_passes"])
+
+        text, _, stats = _extract(_build_pdf(["text", "table", "text"]))
+        self.assertEqual(1, stats["table_passes"])
+        self.assertIn("Total SF | 18,500", text)
+
+    def test_drawing_sized_content_is_not_scanned_for_tables(self):
+        page = mock.MagicMock()
+        page.read_contents.return_value = b"0 0 m 10 10 l S\n" * (pdf_text.TABLE_SCAN_MAX_CONTENT_BYTES // 8)
+        self.assertFalse(pdf_text._looks_like_ruled_table(page))
+
+        page.read_contents.return_value = b"0 0 m 10 10 l S\n" * 8
+        self.assertTrue(pdf_text._looks_like_ruled_table(page))
+
+    def test_sparse_page_rendering_stops_at_max_images(self):
+        content = _build_pdf(["blank"] * 4)
+
+        _, all_images, _ = _extract(content)
+        text, capped, stats = _extract(content, max_images=2)
+
+        self.assertEqual(4, len(all_images))
+        self.assertEqual(2, len(capped))
+        self.assertEqual(4, stats["pages"])
+        self.assertIn("--- Page 4 ---", text)
+
+
+class BudgetTests(unittest.TestCase):
+    def test_page_budget_stops_reading(self):
+        text, _, stats = _extract(_build_pdf(["text"] * 5), max_pages=3)
+
+        self.assertEqual(3, stats["pages"])
+        self.assertNotIn("--- Page 4 ---", text)
+        self.assertIn("page budget", stats["stop_reason"])
+
+    def test_table_time_budget_skips_tables_but_keeps_text(self):
+        ticks = iter(range(0, 1000, 30))
+        text, _, stats = _extract(
+            _build_pdf(["table", "table"]), table_time_budget_seconds=20.0, clock=lambda: next(ticks)
+        )
+
+        self.assertEqual(0, stats["table_passes"])
+        self.assertEqual("table time budget", stats["stop_reason"])
+        self.assertIn("Total SF", text)
+
+    def test_prompt_budget_is_spent_by_field_bearing_tail(self):
+        budget = pdf_text._PromptBudget(limit=100, tail_limit=50)
+        budget.add("x" * 150)
+        self.assertFalse(budget.spent)  # past the head, but nothing the clip would keep
+
+        budget.add("\n".join(["Total SF 18,500 at $6.75"] * 4))
+        self.assertTrue(budget.spent)
+
+    def test_spent_prompt_budget_skips_later_table_pages(self):
+        with mock.patch.object(pdf_text, "PDF_PROMPT_CHAR_LIMIT", 10), \
+             mock.patch.object(pdf_text._PromptBudget.__init__, "__defaults__", (10, 10)):
+            _, _, stats = _extract(_build_pdf(["table", "table", "table"]))
+
+        self.assertEqual(1, stats["table_passes"])
+        self.assertEqual("prompt budget", stats["stop_reason"])
+
+
+class FallbackTests(unittest.TestCase):
+    def test_pdfplumber_reads_what_pymupdf_cannot_open(self):
+        content = _build_pdf(["table"])
+        with mock.patch.object(pdf_text.fitz, "open", side_effect=RuntimeError("cannot open")):
+            text, images, stats = _extract(content)
+
+        self.assertIn("Total SF | 18,500", text)
+        self.assertEqual([], images)
+        self.assertEqual(1, stats["pages"])
+
+
+_SPEC = importlib.util.spec_from_file_location(
+    "benchmark_pdf_extraction", Path(__file__).resolve().parents[1] / "scripts" / "benchmark_pdf_extraction.py"
+)
+benchmark_script = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(benchmark_script)
+
+
+class BenchmarkScriptTests(unittest.TestCase):
+    def test_reports_each_pdf(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, "flyer.pdf").write_bytes(_build_pdf(["text", "table"]))
+            out = io.StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(0, benchmark_script.main([tmp, "--json"]))
+
+        (row,) = json.loads(out.getvalue())
+        self.assertEqual(2, row["pages"])
+        self.assertEqual(1, row["tablePasses"])
+        self.assertGreater(row["chars"], 0)
+
+    def test_empty_target_is_refused(self):
+        with mock.patch("sys.stderr", io.StringIO()):
+            self.assertEqual(2, benchmark_script.main(["/nonexistent-dir-for-benchmark"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
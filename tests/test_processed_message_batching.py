@@ -0,0 +1,147 @@
+"""Batched processedMessages lookup for inbox scans.
+
+Phase 1 of scan_inbox_against_index used to issue one processedMessages point
+read per inbox message. These tests pin the batched replacement:
+  * has_processed_many answers a whole page with one get_all,
+  * a failed batched read falls back to per-key reads instead of reprocessing,
+  * the scan skips already-processed messages without any per-message read.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from email_automation import messaging, processing
+from email_automation.utils import b64url_id
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+
+class FakeDocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def get(self):
+        self._store.point_reads += 1
+        return FakeSnapshot(self.id, self._store.docs.get(self.path))
+
+    def set(self, payload, merge=False):
+        self._store.docs.setdefault(self.path, {}).update(payload)
+
+    def collection(self, name):
+        return FakeCollection(self._store, f"{self.path}/{name}")
+
+
+class FakeCollection:
+    def __init__(self, store, path):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id):
+        return FakeDocRef(self._store, f"{self._path}/{doc_id}")
+
+
+class FakeFirestore:
+    def __init__(self, fail_get_all=False):
+        self.docs = {}
+        self.point_reads = 0
+        self.get_all_calls = 0
+        self._fail_get_all = fail_get_all
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def get_all(self, refs):
+        self.get_all_calls += 1
+        if self._fail_get_all:
+            raise RuntimeError("batch get unavailable")
+        return [FakeSnapshot(ref.id, self.docs.get(ref.path)) for ref in refs]
+
+    def mark(self, user_id, key):
+        self.docs[f"users/{user_id}/processedMessages/{b64url_id(key)}"] = {"processedAt": "now"}
+
+
+class ProcessedManyTests(unittest.TestCase):
+    def test_page_is_answered_with_one_batched_read(self):
+        fake_fs = FakeFirestore()
+        fake_fs.mark("uid-1", "<a@example.test>")
+        fake_fs.mark("uid-1", "<c@example.test>")
+
+        with patch.object(messaging, "_fs", fake_fs):
+            processed = messaging.has_processed_many(
+                "uid-1",
+                ["<a@example.test>", "<b@example.test>", "<c@example.test>", "<a@example.test>", None],
+            )
+
+        self.assertEqual({"<a@example.test>", "<c@example.test>"}, processed)
+        self.assertEqual(1, fake_fs.get_all_calls)
+        self.assertEqual(0, fake_fs.point_reads)
+
+    def test_failed_batched_read_falls_back_to_point_reads(self):
+        fake_fs = FakeFirestore(fail_get_all=True)
+        fake_fs.mark("uid-1", "<a@example.test>")
+
+        with patch.object(messaging, "_fs", fake_fs):
+            processed = messaging.has_processed_many("uid-1", ["<a@example.test>", "<b@example.test>"])
+
+        self.assertEqual({"<a@example.test>"}, processed)
+        self.assertEqual(2, fake_fs.point_reads)
+
+    def test_empty_input_issues_no_rpc(self):
+        fake_fs = FakeFirestore()
+        with patch.object(messaging, "_fs", fake_fs):
+            self.assertEqual(set(), messaging.has_processed_many("uid-1", []))
+        self.assertEqual(0, fake_fs.get_all_calls)
+
+
+class ScanUsesBatchedLookupTests(unittest.TestCase):
+    def test_scan_skips_processed_page_without_per_message_reads(self):
+        received_now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        response = MagicMock()
+        response.json.return_value = {
+            "value": [
+                {"id": f"graph-{n}", "internetMessageId": f"<m{n}@example.test>", "receivedDateTime": received_now}
+                for n in range(3)
+            ]
+        }
+        already = {f"<m{n}@example.test>" for n in range(3)}
+
+        with patch.object(processing, "exponential_backoff_request", return_value=response), \
+             patch.object(processing, "has_processed_many", return_value=already) as has_many, \
+             patch.object(processing, "has_processed") as has_processed, \
+             patch.object(processing, "_match_message_to_thread") as match_thread, \
+             patch.object(processing, "set_last_scan_iso"):
+            result = processing.scan_inbox_against_index(
+                "uid-1",
+                {"Authorization": "Bearer fake"},
+                only_unread=False,
+                top=3,
+            )
+
+        has_many.assert_called_once()
+        self.assertEqual(sorted(already), sorted(has_many.call_args.args[1]))
+        has_processed.assert_not_called()
+        match_thread.assert_not_called()
+        self.assertEqual(3, result["skipped"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -257,7 +257,7 @@ class ProcessingRetryabilityTests(unittest.TestCase):
 
         with patch.object(processing, "_fs", fake_fs), \
              patch.object(processing, "exponential_backoff_request", return_value=response), \
-             patch.object(processing, "has_processed", return_value=False), \
+             patch.object(processing, "has_processed_many", return_value=set()), \
              patch.object(processing, "_match_message_to_thread", return_value="thread-1"), \
              patch.object(processing, "_resolve_current_mailbox_email", return_value="operator@example.test"), \
              patch.object(processing, "_has_processing_failure_record", return_value=False), \
@@ -322,7 +322,7 @@ class ProcessingRetryabilityTests(unittest.TestCase):
 
         with patch.object(processing, "_fs", fake_fs), \
              patch.object(processing, "exponential_backoff_request", return_value=response), \
-             patch.object(processing, "has_processed", return_value=False), \
+             patch.object(processing, "has_processed_many", return_value=set()), \
              patch.object(processing, "_match_message_to_thread", return_value="thread-1"), \
              patch.object(processing, "_resolve_current_mailbox_email", return_value="operator@example.test"), \
              patch.object(processing, "_has_processing_failure_record", return_value=False), \
@@ -401,7 +401,7 @@ class ProcessingRetryabilityTests(unittest.TestCase):
 
         with patch.object(processing, "_fs", fake_fs), \
              patch.object(processing, "exponential_backoff_request", return_value=response), \
-             patch.object(processing, "has_processed", return_value=False), \
+             patch.object(processing, "has_processed_many", return_value=set()), \
              patch.object(processing, "_match_message_to_thread", return_value=thread_id), \
              patch.object(processing, "_resolve_current_mailbox_email", return_value="operator@example.test"), \
              patch.object(processing, "process_inbox_message") as process_message, \
@@ -511,7 +511,7 @@ class ProcessingRetryabilityTests(unittest.TestCase):
 
         with patch.object(processing, "_fs", fake_fs), \
              patch.object(processing, "exponential_backoff_request", return_value=response), \
-             patch.object(processing, "has_processed", return_value=False), \
+             patch.object(processing, "has_processed_many", return_value=set()), \
              patch.object(processing, "_match_message_to_thread", return_value="thread-1"), \
              patch.object(processing, "_resolve_current_mailbox_email", return_value="operator@example.test"), \
              patch.object(processing, "_has_processing_failure_record", return_value=True, create=True), \
@@ -0,0 +1,238 @@
+"""Memoized extraction replies for retried messages in propose_sheet_updates.
+
+Pins:
+  * the request digest follows model, temperature, every input part and the
+    column rules, and stays bounded when large page images are attached,
+  * a stored reply is served until its TTL, then the model is called again,
+  * a retry of an identical request skips the paid call and records the
+    avoided call and cost instead of billed usage,
+  * a changed conversation, an unparseable reply or a certification runtime
+    never reuses a reply,
+  * the cache is inert under E2E_TEST_MODE.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from email_automation import ai_processing, openai_usage, proposal_cache
+from email_automation.column_config import get_default_column_config
+from email_automation.proposal_cache import ProposalCache, proposal_request_digest
+
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+
+    def get(self):
+        return FakeSnapshot(self._store.docs.get(self.path))
+
+    def set(self, payload, merge=False):
+        self._store.writes.append((self.path, payload))
+        current = self._store.docs.get(self.path) if merge else None
+        self._store.docs[self.path] = {**(current or {}), **payload}
+
+    def collection(self, name):
+        return FakeCollection(self._store, f"{self.path}/{name}")
+
+
+class FakeCollection:
+    def __init__(self, store, path):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id):
+        return FakeDocRef(self._store, f"{self._path}/{doc_id}")
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+        self.writes = []
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+
+def _request(text="prompt", image="data:image/png;base64,AAAA"):
+    return {
+        "model": "gpt-5.2",
+        "input": [{"role": "user", "content": [
+            {"type": "input_image", "image_url": image},
+            {"type": "input_text", "text": text},
+        ]}],
+        "temperature": 0.1,
+    }
+
+
+class DigestTests(unittest.TestCase):
+    def test_digest_follows_every_part_of_the_request(self):
+        base = proposal_request_digest(_request(), column_rules="rules")
+
+        self.assertEqual(base, proposal_request_digest(_request(), column_rules="rules"))
+        self.assertNotEqual(base, proposal_request_digest(_request(text="other"), column_rules="rules"))
+        self.assertNotEqual(base, proposal_request_digest(_request(image="data:image/png;base64,BBBB"), column_rules="rules"))
+        self.assertNotEqual(base, proposal_request_digest(_request(), column_rules="other rules"))
+        self.assertNotEqual(base, proposal_request_digest(dict(_request(), temperature=0.2), column_rules="rules"))
+
+    def test_large_page_images_are_digested_by_hash(self):
+        big = "data:image/png;base64," + "A" * (3 * 1024 * 1024)
+        self.assertIsNotNone(proposal_request_digest(_request(image=big), column_rules="rules"))
+
+
+class ProposalCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = NOW
+        self.db = FakeFirestore()
+        self.cache = ProposalCache(ttl_seconds=3600, enabled=lambda: True, clock=lambda: self.now)
+
+    def test_reply_is_served_until_the_ttl(self):
+        self.cache.put(self.db, "uid-1", "d1", output_text='{"updates": []}', model="gpt-5.2", cost_usd=0.02)
+
+        self.assertEqual(
+            {"outputText": '{"updates": []}', "model": "gpt-5.2", "costUsd": 0.02},
+            self.cache.get(self.db, "uid-1", "d1"),
+        )
+        self.assertIn("users/uid-1/proposalCache/d1", self.db.docs)
+        self.assertIsNone(self.cache.get(self.db, "uid-2", "d1"))
+
+        self.now = NOW + timedelta(seconds=3601)
+        self.assertIsNone(self.cache.get(self.db, "uid-1", "d1"))
+
+    def test_e2e_test_mode_never_reads_or_writes(self):
+        cache = ProposalCache(ttl_seconds=3600, clock=lambda: NOW)
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "true"}):
+            cache.put(self.db, "uid-1", "d1", output_text="{}", model="gpt-5.2", cost_usd=0.0)
+            self.assertIsNone(cache.get(self.db, "uid-1", "d1"))
+        self.assertEqual([], self.db.writes)
+
+
+class AvoidedUsageTests(unittest.TestCase):
+    def test_avoided_call_is_kept_apart_from_billed_spend(self):
+        db = MagicMock()
+        openai_usage.record_avoided_openai_call(
+            db=db, user_id="uid-1", client_id="client-1", operation="ai.extract_sheet_updates",
+            model="gpt-5.2", cost_usd=0.03, now=NOW,
+        )
+
+        user_ref = db.collection.return_value.document.return_value
+        payload = user_ref.collection.return_value.document.return_value.set.call_args_list[0].args[0]
+        self.assertIn("avoidedCalls", payload)
+        self.assertIn("avoidedCostUsd", payload)
+        self.assertNotIn("calls", payload)
+        self.assertNotIn("totalCostUsd", payload)
+        db.collection.assert_called_once_with("users")
+
+
+def _fake_response(text, usage_tokens=(1000, 200)):
+    return SimpleNamespace(
+        output_text=text,
+        usage=SimpleNamespace(input_tokens=usage_tokens[0], output_tokens=usage_tokens[1], total_tokens=sum(usage_tokens)),
+        id="resp_1",
+    )
+
+
+class ProposeSheetUpdatesRetryTests(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeFirestore()
+        self.cache = ProposalCache(ttl_seconds=3600, enabled=lambda: True)
+        patchers = [
+            patch.object(ai_processing, "_fs", self.db),
+            patch.object(ai_processing, "proposal_cache", return_value=self.cache),
+            patch.object(ai_processing, "should_block_openai_call", return_value=False),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _propose(self, content="The space is 18,500 SF.", runtime=None):
+        return ai_processing.propose_sheet_updates(
+            "uid-1",
+            "client-1",
+            "broker@example.com",
+            "sheet-1",
+            ["Property Address", "City", "Total SF"],
+            3,
+            ["123 Main St", "Augusta", ""],
+            "thread-1",
+            conversation=[{"direction": "inbound", "from": "broker@example.com", "content": content}],
+            column_config=get_default_column_config(),
+            dry_run=True,
+            runtime=runtime,
+        )
+
+    def test_identical_retry_reuses_the_reply_and_records_the_avoided_call(self):
+        reply = json.dumps({"updates": [], "events": []})
+        with patch.object(ai_processing.client.responses, "create", return_value=_fake_response(reply)) as create, \
+             patch.object(ai_processing, "track_openai_usage_safely") as billed, \
+             patch.object(ai_processing, "track_avoided_openai_call_safely") as avoided:
+            first = self._propose()
+            retried = self._propose()
+
+        create.assert_called_once()
+        billed.assert_called_once()
+        avoided.assert_called_once()
+        self.assertEqual("ai.extract_sheet_updates", avoided.call_args.kwargs["operation"])
+        self.assertGreater(avoided.call_args.kwargs["cost_usd"], 0)
+        self.assertEqual(first, retried)
+
+    def test_changed_conversation_calls_the_model_again(self):
+        reply = json.dumps({"updates": [], "events": []})
+        with patch.object(ai_processing.client.responses, "create", return_value=_fake_response(reply)) as create, \
+             patch.object(ai_processing, "track_openai_usage_safely"), \
+             patch.object(ai_processing, "track_avoided_openai_call_safely") as avoided:
+            self._propose()
+            self._propose(content="Update: the space is now 20,000 SF.")
+
+        self.assertEqual(2, create.call_count)
+        avoided.assert_not_called()
+
+    def test_unparseable_reply_is_not_stored(self):
+        with patch.object(ai_processing.client.responses, "create", return_value=_fake_response("not json")) as create, \
+             patch.object(ai_processing, "track_openai_usage_safely"):
+            self.assertIsNone(self._propose())
+            self.assertIsNone(self._propose())
+
+        self.assertEqual(2, create.call_count)
+        self.assertFalse([p for p in self.db.docs if "/proposalCache/" in p])
+
+    def test_certification_runtime_never_uses_the_cache(self):
+        with patch.object(proposal_cache, "proposal_request_digest") as digest, \
+             patch.object(ai_processing, "proposal_request_digest", digest), \
+             patch.object(ai_processing, "ai_for") as ai_for, \
+             patch.object(ai_processing, "track_openai_usage_safely"):
+            ai_for.return_value.create_response.return_value = _fake_response(json.dumps({"updates": []}))
+            self._propose(runtime=SimpleNamespace(firestore=None, now=None))
+
+        digest.assert_not_called()
+        self.assertEqual([], self.db.writes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,229 @@
+"""Shared token-bucket rate governor.
+
+Pins the properties the inbox scan relies on now that the fixed 3s sleep
+between threads is gone:
+  * work that does not consume a quota never waits,
+  * a bucket admits its burst immediately and then paces at its refill rate,
+  * a 429 halves the rate and honours Retry-After; successes restore it,
+  * Sheets/Graph/OpenAI call sites actually draw from their buckets, and no
+    scan-path module executes a Sheets request outside _execute_with_retry,
+  * the governor is a no-op under E2E_TEST_MODE.
+"""
+
+import inspect
+import os
+import unittest
+from unittest import mock
+
+from googleapiclient.errors import HttpError
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+from email_automation import automation_runtime, followup, processing, rate_governor, sheets
+from email_automation import logging as sheet_logging
+from email_automation.rate_governor import BucketSpec, RateGovernor, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _governor(clock, **specs):
+    specs = specs or {
+        "sheets_read": BucketSpec(per_minute=60, burst=2),
+        "sheets_write": BucketSpec(per_minute=60, burst=2),
+        "graph": BucketSpec(per_minute=600, burst=5),
+        "openai_tpm": BucketSpec(per_minute=6000, burst=1000),
+    }
+    return RateGovernor(specs, enabled=lambda: True, clock=clock, sleep=clock.sleep)
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_burst_is_admitted_without_waiting_then_paced_at_refill_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(BucketSpec(per_minute=60, burst=3), clock=clock, sleep=clock.sleep)
+
+        for _ in range(3):
+            self.assertEqual(0.0, bucket.acquire())
+        self.assertEqual([], clock.sleeps)
+
+        waited = bucket.acquire()
+        self.assertAlmostEqual(1.0, waited)
+        self.assertAlmostEqual(1.0, sum(clock.sleeps))
+
+    def test_idle_time_refills_bucket(self):
+        clock = FakeClock()
+        bucket = TokenBucket(BucketSpec(per_minute=60, burst=2), clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        bucket.acquire()
+        clock.now += 5
+        self.assertEqual(0.0, bucket.acquire())
+
+    def test_rate_limit_halves_rate_and_blocks_for_retry_after(self):
+        clock = FakeClock()
+        bucket = TokenBucket(BucketSpec(per_minute=60, burst=5), clock=clock, sleep=clock.sleep)
+
+        bucket.on_rate_limited(retry_after=7)
+
+        self.assertAlmostEqual(30.0, bucket.rate_per_minute)
+        waited = bucket.acquire()
+        self.assertGreaterEqual(waited, 7.0)
+        self.assertEqual(1, bucket.rate_limited)
+
+    def test_rate_never_drops_below_floor_and_recovers_on_success(self):
+        clock = FakeClock()
+        bucket = TokenBucket(BucketSpec(per_minute=100, burst=5), clock=clock, sleep=clock.sleep)
+        for _ in range(20):
+            bucket.on_rate_limited()
+        self.assertAlmostEqual(100 * rate_governor.MIN_RATE_FRACTION, bucket.rate_per_minute)
+
+        for _ in range(100):
+            bucket.on_success()
+        self.assertAlmostEqual(100.0, bucket.rate_per_minute)
+
+    def test_oversized_request_is_clamped_to_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(BucketSpec(per_minute=60, burst=10), clock=clock, sleep=clock.sleep)
+        self.assertEqual(0.0, bucket.acquire(10_000))
+
+    def test_wait_is_capped_and_caller_goes_into_debt(self):
+        clock = FakeClock()
+        bucket = TokenBucket(BucketSpec(per_minute=1, burst=1), clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        waited = bucket.acquire(max_wait=5)
+        self.assertEqual(0.0, waited)
+        # The borrowed token is still owed by the next caller.
+        self.assertGreater(bucket.acquire(max_wait=1000), 60.0)
+
+
+class RateGovernorTests(unittest.TestCase):
+    def test_buckets_are_keyed_per_api_and_mailbox(self):
+        governor = _governor(FakeClock())
+        self.assertIs(governor.bucket("graph", "uid-a"), governor.bucket("graph", "uid-a"))
+        self.assertIsNot(governor.bucket("graph", "uid-a"), governor.bucket("graph", "uid-b"))
+        self.assertIsNot(governor.bucket("sheets_read"), governor.bucket("sheets_write"))
+
+    def test_disabled_governor_never_waits_or_builds_buckets(self):
+        governor = RateGovernor(enabled=lambda: False)
+        for _ in range(1000):
+            self.assertEqual(0.0, governor.acquire("sheets_read"))
+        governor.report_rate_limited("sheets_read", retry_after=60)
+        self.assertEqual({}, governor.stats())
+
+    def test_e2e_test_mode_disables_governor(self):
+        with mock.patch.dict(os.environ, {"E2E_TEST_MODE": "true"}):
+            self.assertFalse(rate_governor.governor_enabled())
+        with mock.patch.dict(os.environ, {"E2E_TEST_MODE": "", "SITESIFT_RATE_GOVERNOR": "off"}):
+            self.assertFalse(rate_governor.governor_enabled())
+        with mock.patch.dict(os.environ, {"E2E_TEST_MODE": "", "SITESIFT_RATE_GOVERNOR": ""}):
+            self.assertTrue(rate_governor.governor_enabled())
+
+    def test_env_overrides_per_minute_budget(self):
+        with mock.patch.dict(os.environ, {"SITESIFT_RATE_SHEETS_READ_PER_MINUTE": "30"}):
+            governor = RateGovernor(enabled=lambda: True)
+            self.assertEqual(30.0, governor.bucket("sheets_read").rate_per_minute)
+
+    def test_openai_token_estimate_weighs_prompt_and_output(self):
+        small = rate_governor.estimate_openai_tokens({"input": "hi", "max_output_tokens": 100})
+        large = rate_governor.estimate_openai_tokens({"input": "x" * 40_000, "max_output_tokens": 100})
+        self.assertGreater(large, small + 9000)
+
+
+class _Request:
+    def __init__(self, method, outcomes):
+        self.method = method
+        self.outcomes = list(outcomes)
+
+    def execute(self):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _http_error(status):
+    return HttpError(mock.Mock(status=status, reason="test"), b"{}")
+
+
+class CallSiteTests(unittest.TestCase):
+    def test_sheets_reads_and_writes_draw_from_separate_buckets(self):
+        clock = FakeClock()
+        governor = _governor(clock)
+        with mock.patch.object(sheets, "_rate_governor", return_value=governor):
+            sheets._execute_with_retry(_Request("GET", [{}]), "read")
+            sheets._execute_with_retry(_Request("POST", [{}]), "write")
+            sheets._execute_with_retry(_Request("POST", [{}]), "write")
+            sheets._execute_with_retry(_Request("POST", [{}]), "write")
+
+        self.assertAlmostEqual(1.0, sum(clock.sleeps))
+        self.assertEqual(60.0, governor.bucket("sheets_read").rate_per_minute)
+
+    @mock.patch("email_automation.sheets.time.sleep")
+    def test_sheets_429_shrinks_bucket(self, _sleep):
+        governor = _governor(FakeClock())
+        with mock.patch.object(sheets, "_rate_governor", return_value=governor):
+            sheets._execute_with_retry(_Request("GET", [_http_error(429), {"ok": True}]), "read")
+        self.assertEqual(1, governor.bucket("sheets_read").rate_limited)
+
+    def test_scan_path_sheets_calls_go_through_the_governed_executor(self):
+        for module in (processing, sheet_logging, followup):
+            with self.subTest(module=module.__name__):
+                self.assertNotIn(").execute()", inspect.getsource(module))
+
+    @mock.patch("email_automation.sheets.time.sleep")
+    def test_log_tab_lookup_retries_429_through_the_bucket(self, _sleep):
+        governor = _governor(FakeClock())
+        sheets_client = mock.Mock()
+        sheets_client.spreadsheets.return_value.get.return_value = _Request(
+            "GET", [_http_error(429), {"sheets": [{"properties": {"title": "Log"}}]}]
+        )
+        with mock.patch.object(sheets, "_rate_governor", return_value=governor):
+            self.assertEqual("Log", sheet_logging._ensure_log_tab_exists(sheets_client, "sheet-1"))
+        self.assertEqual(1, governor.bucket("sheets_read").rate_limited)
+
+    def test_graph_reader_keys_bucket_by_bound_mailbox(self):
+        governor = _governor(FakeClock())
+        response = mock.Mock(status_code=429, headers={"Retry-After": "3"})
+        rate_governor.bind_mailbox("uid-graph")
+        with mock.patch.object(processing, "_rate_governor", return_value=governor), \
+             mock.patch.object(processing.requests, "get", return_value=response):
+            processing.GraphMailboxReader().read("inbox_message_page", "https://graph.example/me")
+        self.assertEqual(1, governor.bucket("graph", "uid-graph").rate_limited)
+        self.assertEqual(0, governor.bucket("graph", "other").rate_limited)
+
+    def test_ai_transport_draws_estimated_tokens_and_reports_429(self):
+        clock = FakeClock()
+        governor = _governor(clock)
+
+        class RateLimited(Exception):
+            status_code = 429
+            response = mock.Mock(headers={"Retry-After": "2"})
+
+        client = mock.Mock()
+        client.responses.create.side_effect = [{"ok": True}, RateLimited()]
+        transport = automation_runtime.AmbientAITransport(client)
+        with mock.patch.object(automation_runtime, "_rate_governor", return_value=governor):
+            transport.create_response({"input": "x" * 3600, "max_output_tokens": 100})
+            with self.assertRaises(RateLimited):
+                transport.create_response({"input": "x"})
+
+        bucket = governor.bucket("openai_tpm")
+        self.assertEqual(1, bucket.rate_limited)
+        self.assertAlmostEqual(3000.0, bucket.rate_per_minute)
+
+
+if __name__ == "__main__":
+    unittest.main()
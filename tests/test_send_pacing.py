@@ -0,0 +1,360 @@
+"""Durable per-mailbox send pacing in place of the 120-second sleeps.
+
+Pins:
+  * a claim books the mailbox's next slot (interval plus jitter) and a claim
+    before that slot is refused with its time, recorded on the active scope,
+  * an unreadable schedule fails closed, and pacing is inert under
+    E2E_TEST_MODE,
+  * send_outboxes, separate-mode property groups and follow-ups stop at a
+    refused slot and leave the rest queued, without sleeping,
+  * a follow-up books its slot only after its thread claim succeeds, so an
+    unclaimable thread does not starve the next one, and a refused slot
+    releases the thread claim,
+  * the run dispatcher drains mailboxes earliest-slot-first, waits only for
+    the next due slot and leaves slots past the send window for the next run,
+  * a drain re-runs only the lanes that were held back.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from email_automation import email as email_module
+from email_automation import followup, send_pacing
+from email_automation.send_pacing import (
+    PacedSendDispatcher,
+    SendPacer,
+    SendSlot,
+    paced_send_scope,
+)
+from tests.test_outbox_safety import FakeDoc, FakeFirestoreWithOutbox
+
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+
+    def get(self, transaction=None):
+        if self._store.fail_reads:
+            raise RuntimeError("firestore unavailable")
+        return FakeSnapshot(self._store.docs.get(self.path))
+
+    def collection(self, name):
+        return FakeCollection(self._store, f"{self.path}/{name}")
+
+
+class FakeCollection:
+    def __init__(self, store, path):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id):
+        return FakeDocRef(self._store, f"{self._path}/{doc_id}")
+
+
+class FakeTransaction:
+    def __init__(self, store):
+        self._store = store
+
+    def set(self, ref, payload, merge=False):
+        current = self._store.docs.get(ref.path) if merge else None
+        self._store.docs[ref.path] = {**(current or {}), **payload}
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+        self.fail_reads = False
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+
+PACING_DOC = "users/uid-1/sync/sendPacing"
+
+
+class PacerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.now = NOW
+        self.fs = FakeFirestore()
+        patcher = patch.object(send_pacing, "transactional", lambda fn: fn)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pacer(self, **kwargs):
+        options = {
+            "interval_seconds": 120,
+            "jitter_seconds": 30,
+            "enabled": lambda: True,
+            "clock": lambda: self.now,
+            "rng": lambda: 0.5,
+        }
+        options.update(kwargs)
+        return SendPacer(**options)
+
+
+class SendPacerTests(PacerTestCase):
+    def test_claim_books_the_next_slot_and_refuses_until_it_is_due(self):
+        pacer = self.pacer()
+
+        first = pacer.claim(self.fs, "uid-1", lane="outbox")
+        self.assertEqual(SendSlot(True, NOW + timedelta(seconds=135)), first)
+        self.assertEqual(NOW + timedelta(seconds=135), self.fs.docs[PACING_DOC]["notBefore"])
+
+        with paced_send_scope() as scope:
+            refused = pacer.claim(self.fs, "uid-1", lane="followup")
+        self.assertEqual(SendSlot(False, NOW + timedelta(seconds=135)), refused)
+        self.assertEqual((1, {"followup"}, NOW + timedelta(seconds=135)),
+                         (scope.deferred, scope.lanes, scope.not_before))
+
+        self.assertTrue(pacer.claim(self.fs, "uid-2", lane="outbox").granted)
+
+        self.now = NOW + timedelta(seconds=135)
+        self.assertTrue(pacer.claim(self.fs, "uid-1", lane="outbox").granted)
+
+    def test_unreadable_schedule_fails_closed(self):
+        self.fs.fail_reads = True
+        with paced_send_scope() as scope:
+            slot = self.pacer(jitter_seconds=0).claim(self.fs, "uid-1", lane="outbox")
+
+        self.assertEqual(SendSlot(False, NOW + timedelta(seconds=120)), slot)
+        self.assertEqual(NOW + timedelta(seconds=120), scope.not_before)
+
+    def test_e2e_test_mode_never_reads_or_writes(self):
+        self.fs.fail_reads = True
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "true"}):
+            slot = self.pacer(enabled=send_pacing._pacing_enabled).claim(self.fs, "uid-1", lane="outbox")
+        self.assertTrue(slot.granted)
+        self.assertEqual({}, self.fs.docs)
+
+
+class FakePacer:
+    def __init__(self, *grants):
+        self.grants = list(grants)
+        self.claims = []
+
+    def claim(self, fs, uid, *, lane):
+        self.claims.append((uid, lane))
+        return SendSlot(self.grants.pop(0) if self.grants else False, NOW)
+
+
+class LaneTests(unittest.TestCase):
+    def test_send_outboxes_stops_at_a_refused_slot_without_sleeping(self):
+        docs = [
+            FakeDoc({
+                "assignedEmails": [f"bp21harrison+paced-{row}@gmail.com"],
+                "script": "Hi",
+                "clientId": "client-1",
+                "subject": f"{row} Paced Way",
+                "rowNumber": row,
+            }, doc_id=f"outbox-{row}")
+            for row in (3, 4, 5)
+        ]
+        pacer = FakePacer(True, False)
+        sent = []
+
+        with patch("email_automation.clients._fs", FakeFirestoreWithOutbox(docs)), \
+             patch.object(email_module, "send_pacer", return_value=pacer), \
+             patch.object(email_module, "_send_single_outbox_item",
+                          side_effect=lambda _u, _h, item, *a, **k: sent.append(item["doc"].id)), \
+             patch.object(email_module.time, "sleep") as sleep:
+            email_module.send_outboxes("uid-1", {"Authorization": "Bearer token"})
+
+        self.assertEqual(["outbox-3"], sent)
+        self.assertEqual([("uid-1", "outbox"), ("uid-1", "outbox")], pacer.claims)
+        sleep.assert_not_called()
+
+    def test_request_scoped_runtime_is_never_paced(self):
+        with patch.object(email_module, "send_pacer") as send_pacer:
+            self.assertTrue(email_module._claim_send_slot(MagicMock(), SimpleNamespace(), "uid-1", "outbox"))
+        send_pacer.assert_not_called()
+
+    def test_separate_property_group_leaves_the_rest_queued(self):
+        docs = [FakeDoc({"assignedEmails": ["b@example.com"], "subject": f"{n} Main"}, doc_id=f"o-{n}")
+                for n in range(3)]
+        slots = iter([True, False])
+
+        with patch("email_automation.processing.is_contact_opted_out", return_value=None), \
+             patch.object(email_module, "_delete_cancelled_outbox_item_if_needed", return_value=False), \
+             patch.object(email_module, "_claim_outbox_item", return_value=False) as claim:
+            left = email_module._send_multi_property_email(
+                "uid-1",
+                {"Authorization": "Bearer token"},
+                "b@example.com",
+                [{"doc": doc, "data": doc.to_dict()} for doc in docs],
+                send_slot=lambda: next(slots),
+            )
+
+        self.assertEqual(2, left)
+        claim.assert_called_once()
+
+    def _run_followups(self, threads, pacer, claim_side_effect):
+        docs = []
+        for thread_id in threads:
+            thread = MagicMock(id=thread_id)
+            thread.to_dict.return_value = {
+                "followUpConfig": {
+                    "enabled": True,
+                    "nextFollowUpAt": NOW - timedelta(days=1),
+                    "currentFollowUpIndex": 0,
+                },
+            }
+            docs.append(thread)
+        fs = MagicMock()
+        collection = fs.collection.return_value.document.return_value.collection.return_value
+        collection.where.return_value.stream.return_value = docs
+
+        with patch.object(followup, "_fs", fs), \
+             patch.object(followup, "send_pacer", return_value=pacer), \
+             patch.object(followup, "_next_business_followup_time", return_value=NOW - timedelta(days=1)), \
+             patch.object(followup, "_claim_followup", side_effect=claim_side_effect) as claim, \
+             patch.object(followup, "_release_followup_claim") as release, \
+             patch.object(followup, "_send_followup_email", return_value=False) as send:
+            followup.check_and_send_followups("uid-1", {"Authorization": "Bearer token"})
+        return claim, release, send
+
+    def test_followups_stop_at_a_refused_slot(self):
+        pacer = FakePacer(False)
+        claim, release, send = self._run_followups(
+            ["thread-1", "thread-2"], pacer, lambda *_a: "owner-1",
+        )
+
+        self.assertEqual([("uid-1", "followup")], pacer.claims)
+        claim.assert_called_once_with("uid-1", "thread-1", 0)
+        release.assert_called_once_with("uid-1", "thread-1", current_index=0, claim_owner="owner-1")
+        send.assert_not_called()
+
+    def test_unclaimable_thread_does_not_spend_the_slot(self):
+        pacer = FakePacer(True)
+        claim, _release, send = self._run_followups(
+            ["thread-1", "thread-2"], pacer,
+            lambda _uid, thread_id, _index: None if thread_id == "thread-1" else "owner-2",
+        )
+
+        self.assertEqual(2, claim.call_count)
+        self.assertEqual([("uid-1", "followup")], pacer.claims)
+        send.assert_called_once()
+        self.assertEqual("thread-2", send.call_args.kwargs["thread_id"])
+
+
+class DispatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.now = NOW
+        self.sleeps = []
+
+    def dispatcher(self, window_seconds=600, **kwargs):
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.now += timedelta(seconds=seconds)
+
+        return PacedSendDispatcher(
+            deadline=NOW + timedelta(seconds=window_seconds),
+            clock=lambda: self.now,
+            sleep=sleep,
+            **kwargs,
+        )
+
+    def test_earliest_slot_first_with_one_wait_per_slot(self):
+        order = []
+        remaining = {"uid-a": 2, "uid-b": 1}
+
+        def drain_for(uid, spacing):
+            def drain():
+                order.append((uid, int((self.now - NOW).total_seconds())))
+                remaining[uid] -= 1
+                return self.now + timedelta(seconds=spacing) if remaining[uid] else None
+            return drain
+
+        dispatcher = self.dispatcher()
+        dispatcher.register("uid-a", NOW + timedelta(seconds=120), drain_for("uid-a", 120))
+        dispatcher.register("uid-b", NOW + timedelta(seconds=60), drain_for("uid-b", 120))
+        dispatcher.run()
+
+        self.assertEqual([("uid-b", 60), ("uid-a", 120), ("uid-a", 240)], order)
+        self.assertEqual([60, 60, 120], self.sleeps)
+
+    def test_slots_past_the_window_wait_for_the_next_run(self):
+        drain = MagicMock()
+        dispatcher = self.dispatcher(window_seconds=60)
+        dispatcher.register("uid-a", NOW + timedelta(seconds=61), drain)
+        dispatcher.run()
+
+        drain.assert_not_called()
+        self.assertEqual([], self.sleeps)
+
+    def test_failed_drain_does_not_stop_other_mailboxes(self):
+        healthy = MagicMock(return_value=None)
+        dispatcher = self.dispatcher(runner=lambda uid, drain: drain())
+        dispatcher.register("uid-a", NOW, MagicMock(side_effect=RuntimeError("silent_auth_failed")))
+        dispatcher.register("uid-b", NOW, healthy)
+        dispatcher.run()
+
+        healthy.assert_called_once()
+        self.assertEqual(0, dispatcher.pending())
+
+    def test_registration_outside_a_run_is_a_no_op(self):
+        self.assertFalse(send_pacing.register_paced_sends("uid-a", NOW, MagicMock()))
+        dispatcher = self.dispatcher()
+        with send_pacing.paced_send_dispatch(dispatcher):
+            self.assertTrue(send_pacing.register_paced_sends("uid-a", NOW, MagicMock()))
+        self.assertEqual(1, dispatcher.pending())
+
+
+class DrainTests(PacerTestCase):
+    def test_drain_reruns_only_the_lanes_held_back(self):
+        import main
+
+        self.fs.docs[PACING_DOC] = {"notBefore": NOW + timedelta(seconds=90)}
+        pacer = self.pacer()
+        lanes = {"followup"}
+
+        def followups(user_id, _headers):
+            pacer.claim(self.fs, user_id, lane="followup")
+            return []
+
+        with patch.object(main, "send_outboxes") as outbox, \
+             patch.object(main, "check_and_send_followups", side_effect=followups), \
+             patch.object(main, "record_user_health") as health:
+            next_slot = main._drain_paced_sends("uid-1", lanes, lambda: {}, lambda: {"status": "healthy"})
+
+        outbox.assert_not_called()
+        health.assert_not_called()
+        self.assertEqual(NOW + timedelta(seconds=90), next_slot)
+        self.assertEqual({"followup"}, lanes)
+
+    def test_summary_reports_pacing_counters(self):
+        import main
+
+        self.assertEqual(send_pacing.send_pacing_stats(), main._summarize_user_run([], 1, 1.0)["sendPacing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
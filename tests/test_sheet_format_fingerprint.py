@@ -0,0 +1,202 @@
+"""Formatting-state fingerprint for the per-reply column autosize pass.
+
+fetch_and_log_sheet_for_thread used to issue the autosize batchUpdate on every
+processed reply. These tests pin the replacement:
+  * the fingerprint covers row 2, each column's longest data value and the
+    formatting-rule version,
+  * an unchanged sheet is skipped from the process memo or the client doc,
+  * a header change, a longer value in any column, a new sheetId or an
+    explicit reformat runs the pass,
+  * archived clients never get a stub active-client doc,
+  * the gate is inert under E2E_TEST_MODE.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import importlib.util
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from email_automation import processing, sheets
+from email_automation.sheets import SheetFormatMemo, sheet_format_fingerprint
+
+
+HEADER = ["Property Address", "City", "Email", "Total SF"]
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+
+    def get(self):
+        return FakeSnapshot(self._store.docs.get(self.path))
+
+    def set(self, payload, merge=False):
+        self._store.writes.append((self.path, payload))
+        self._store.docs.setdefault(self.path, {}).update(payload)
+
+    def collection(self, name):
+        return FakeCollection(self._store, f"{self.path}/{name}")
+
+
+class FakeCollection:
+    def __init__(self, store, path):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id):
+        return FakeDocRef(self._store, f"{self._path}/{doc_id}")
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {"users/uid-1/clients/client-1": {"sheetId": "sheet-1"}}
+        self.writes = []
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+
+class FingerprintTests(unittest.TestCase):
+    def test_fingerprint_tracks_header_and_rules_version(self):
+        base = sheet_format_fingerprint(HEADER)
+        self.assertEqual(base, sheet_format_fingerprint([f" {h} " for h in HEADER]))
+        self.assertNotEqual(base, sheet_format_fingerprint(HEADER + ["Notes"]))
+        with patch.object(sheets, "SHEET_FORMAT_RULES_VERSION", sheets.SHEET_FORMAT_RULES_VERSION + 1):
+            self.assertNotEqual(base, sheet_format_fingerprint(HEADER))
+
+    def test_fingerprint_tracks_the_longest_value_per_column(self):
+        rows = [["1 Main St", "Austin"], ["22 Oak Ave", "Waco", "", "1200"]]
+        base = sheet_format_fingerprint(HEADER, rows)
+        self.assertNotEqual(sheet_format_fingerprint(HEADER), base)
+        self.assertEqual(base, sheet_format_fingerprint(HEADER, rows + [["3 Elm", "Tyler"]]))
+        self.assertNotEqual(base, sheet_format_fingerprint(HEADER, rows + [["", "San Antonio"]]))
+
+
+class EnsureSheetFormattingTests(unittest.TestCase):
+    def setUp(self):
+        self.fs = FakeFirestore()
+        self.memo = SheetFormatMemo(enabled=lambda: True)
+        patchers = [
+            patch.object(processing, "_fs", self.fs),
+            patch.object(sheets, "_SHEET_FORMAT_MEMO", self.memo),
+            patch.object(processing, "format_sheet_columns_autosize_with_exceptions"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.format = processing.format_sheet_columns_autosize_with_exceptions
+
+    def test_unchanged_header_is_formatted_once(self):
+        for _ in range(5):
+            processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER)
+
+        self.format.assert_called_once_with("sheet-1", HEADER)
+        stored = self.fs.docs["users/uid-1/clients/client-1"]["sheetFormat"]
+        self.assertEqual(sheet_format_fingerprint(HEADER), stored["fingerprint"])
+        self.assertEqual("sheet-1", stored["sheetId"])
+
+    def test_new_process_trusts_the_fingerprint_on_the_client_doc(self):
+        processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER)
+        self.format.reset_mock()
+
+        with patch.object(sheets, "_SHEET_FORMAT_MEMO", SheetFormatMemo(enabled=lambda: True)):
+            self.assertFalse(processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER))
+        self.format.assert_not_called()
+
+    def test_longer_data_value_reruns_the_pass_once(self):
+        rows = [["1 Main St", "Austin", "a@example.test", "1200"]]
+        processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER, rows)
+        longer = rows + [["1200 North Lamar Boulevard", "Austin", "b@example.test", "900"]]
+        self.assertTrue(processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER, longer))
+        self.assertFalse(processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER, longer))
+        self.assertEqual(2, self.format.call_count)
+
+    def test_header_change_new_sheet_and_force_reformat(self):
+        processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER)
+        self.assertTrue(processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER + ["Notes"]))
+        self.assertTrue(processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-2", HEADER + ["Notes"]))
+        self.assertTrue(processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-2", HEADER + ["Notes"], force=True))
+        self.assertEqual(4, self.format.call_count)
+
+    def test_archived_client_is_not_recreated(self):
+        processing._ensure_sheet_formatting("uid-1", "gone", "sheet-9", HEADER)
+        processing._ensure_sheet_formatting("uid-1", "gone", "sheet-9", HEADER)
+
+        self.format.assert_called_once()
+        self.assertNotIn("users/uid-1/clients/gone", self.fs.docs)
+        self.assertEqual([], self.fs.writes)
+
+    def test_reformat_client_sheet_forces_a_pass(self):
+        processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER)
+        with patch.object(processing, "_get_client_config", return_value=("sheet-1", None, None)), \
+             patch.object(processing, "_sheets_client"), \
+             patch.object(processing, "_get_first_tab_title", return_value="Props"), \
+             patch.object(processing, "_read_header_row2", return_value=list(HEADER)), \
+             patch.object(processing, "_read_sheet_grid", return_value=[list(HEADER), ["1 Main St"]]):
+            result = processing.reformat_client_sheet("uid-1", "client-1")
+
+        self.assertEqual(2, self.format.call_count)
+        self.assertEqual(sheet_format_fingerprint(HEADER, [["1 Main St"]]), result["fingerprint"])
+
+
+class DisabledMemoTests(unittest.TestCase):
+    def test_e2e_test_mode_formats_every_reply(self):
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "true"}), \
+             patch.object(sheets, "_SHEET_FORMAT_MEMO", SheetFormatMemo()), \
+             patch.object(processing, "format_sheet_columns_autosize_with_exceptions") as fmt, \
+             patch.object(processing, "_fs") as fs:
+            processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER)
+            processing._ensure_sheet_formatting("uid-1", "client-1", "sheet-1", HEADER)
+
+        self.assertEqual(2, fmt.call_count)
+        fs.collection.assert_not_called()
+
+
+_SPEC = importlib.util.spec_from_file_location(
+    "reformat_client_sheet", Path(__file__).resolve().parents[1] / "scripts" / "reformat_client_sheet.py"
+)
+reformat_script = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(reformat_script)
+
+
+class ReformatScriptTests(unittest.TestCase):
+    def test_script_forces_the_pass_for_the_named_client(self):
+        out = io.StringIO()
+        with patch.object(reformat_script, "reformat_client_sheet", return_value={"sheetId": "sheet-1"}) as reformat, \
+             redirect_stdout(out):
+            self.assertEqual(0, reformat_script.main(["--uid", "uid-1", "--client-id", "client-1"]))
+        reformat.assert_called_once_with("uid-1", "client-1")
+        self.assertEqual({"sheetId": "sheet-1"}, json.loads(out.getvalue()))
+
+    def test_missing_sheet_is_refused(self):
+        with patch.object(reformat_script, "reformat_client_sheet", side_effect=RuntimeError("no sheetId")), \
+             patch("sys.stderr", io.StringIO()):
+            self.assertEqual(2, reformat_script.main(["--uid", "uid-1", "--client-id", "client-1"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
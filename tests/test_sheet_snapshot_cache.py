@@ -0,0 +1,263 @@
+"""Per-run spreadsheet snapshot for the Sheets row lookup path.
+
+Pins the behaviour the inbox scan relies on:
+  * inside a snapshot scope, tab metadata, row 2 and every row lookup share
+    one metadata read and one grid read per spreadsheet,
+  * a RAW single-cell write (apply_proposal_to_sheet) patches the snapshot in
+    place, while other first-tab writes and row moves force a fresh read,
+  * writes to other tabs and formatting-only batchUpdates keep the grid,
+  * a different Sheets client, an expired snapshot, or E2E_TEST_MODE never
+    sees cached rows.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import json
+import re
+import unittest
+from unittest.mock import patch
+from urllib.parse import quote
+
+from email_automation import sheets as sheets_mod
+from email_automation.sheet_operations import _find_unique_row_by_email, move_row_below_divider
+from email_automation.sheets import SheetSnapshotCache
+
+
+SPREADSHEET_ID = "sheet-1"
+HEADER = ["Property Address", "City", "Email", "Total SF"]
+BASE = "https://sheets.googleapis.com/v4/spreadsheets"
+
+
+class FakeRequest:
+    def __init__(self, method, uri, result, body=None):
+        self.method = method
+        self.uri = uri
+        self.body = json.dumps(body) if body is not None else None
+        self._result = result
+
+    def execute(self):
+        return self._result() if callable(self._result) else self._result
+
+
+class FakeValues:
+    def __init__(self, service):
+        self._service = service
+
+    def get(self, spreadsheetId=None, range=None):  # noqa: A002 (mirror google api kw)
+        self._service.reads.append(range)
+        service = self._service
+        rng = range.split("!", 1)[1]
+        if rng == "A2:ZZZ":
+            return FakeRequest("GET", f"{BASE}/{spreadsheetId}/values/x", lambda: {"values": [list(r) for r in service.grid]})
+        match = re.match(r"(\d+):(\d+)$", rng)
+        if match:
+            row = service.grid[int(match.group(1)) - 2] if int(match.group(1)) - 2 < len(service.grid) else []
+            return FakeRequest("GET", f"{BASE}/{spreadsheetId}/values/x", {"values": [list(row)] if row else []})
+        return FakeRequest("GET", f"{BASE}/{spreadsheetId}/values/x", {"values": []})
+
+    def update(self, spreadsheetId=None, range=None, valueInputOption=None, body=None):  # noqa: A002
+        uri = f"{BASE}/{spreadsheetId}/values/{quote(range)}?valueInputOption={valueInputOption}&alt=json"
+        return FakeRequest("PUT", uri, lambda: self._service.write(range, body["values"]), body)
+
+    def batchUpdate(self, spreadsheetId=None, body=None):
+        def run():
+            for item in body["data"]:
+                self._service.write(item["range"], item["values"])
+            return {}
+        return FakeRequest("POST", f"{BASE}/{spreadsheetId}/values:batchUpdate?alt=json", run, body)
+
+
+class FakeSpreadsheets:
+    def __init__(self, service):
+        self._service = service
+
+    def values(self):
+        return FakeValues(self._service)
+
+    def get(self, spreadsheetId=None):
+        self._service.metadata_reads += 1
+        meta = {"sheets": [{"properties": {"sheetId": 7, "title": "Props"}}, {"properties": {"sheetId": 8, "title": "AI_META"}}]}
+        return FakeRequest("GET", f"{BASE}/{spreadsheetId}?alt=json", meta)
+
+    def batchUpdate(self, spreadsheetId=None, body=None):
+        def run():
+            self._service.structural_updates.append(body)
+            for item in body["requests"]:
+                if "deleteDimension" in item:
+                    start = item["deleteDimension"]["range"]["startIndex"]
+                    del self._service.grid[start - 1]
+            return {}
+        return FakeRequest("POST", f"{BASE}/{spreadsheetId}:batchUpdate?alt=json", run, body)
+
+
+class FakeSheetsService:
+    def __init__(self):
+        self.grid = [
+            list(HEADER),
+            ["1 Main St", "Austin", "amy@broker.test", "1000"],
+            ["2 Oak Ave", "Dallas", "bob@broker.test", "2000"],
+            ["3 Elm Rd", "Austin", "amy@broker.test", "3000"],
+        ]
+        self.reads = []
+        self.metadata_reads = 0
+        self.structural_updates = []
+
+    def spreadsheets(self):
+        return FakeSpreadsheets(self)
+
+    def grid_reads(self):
+        return sum(1 for rng in self.reads if rng.endswith("!A2:ZZZ"))
+
+    def write(self, a1_range, values):
+        cell = re.match(r"([A-Z]+)(\d+)$", a1_range.split("!", 1)[1])
+        if a1_range.startswith("Props!") and cell:
+            row = self.grid[int(cell.group(2)) - 2]
+            row[ord(cell.group(1)) - 65] = str(values[0][0])
+        return {}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class SheetSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = SheetSnapshotCache(enabled=lambda: True, clock=self.clock, ttl_seconds=60)
+        patcher = patch.object(sheets_mod, "_SHEET_SNAPSHOTS", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = FakeSheetsService()
+
+    def _lookup_reply(self, email, address, city):
+        tab = sheets_mod._get_first_tab_title(self.service, SPREADSHEET_ID)
+        header = sheets_mod._read_header_row2(self.service, SPREADSHEET_ID, tab)
+        by_address = sheets_mod._find_row_by_address_city(self.service, SPREADSHEET_ID, tab, header, address, city)
+        by_email = sheets_mod._find_row_by_email(self.service, SPREADSHEET_ID, tab, header, email)
+        return header, by_address, by_email
+
+    def test_batch_of_lookups_costs_one_grid_read(self):
+        with sheets_mod.sheet_snapshot_scope():
+            for _ in range(20):
+                header, by_address, by_email = self._lookup_reply("AMY@broker.test", "3 Elm Rd", "Austin")
+                self.assertEqual(HEADER, header)
+                self.assertEqual(5, by_address[0])
+                self.assertEqual(3, by_email[0])
+                self.assertEqual((None, None), _find_unique_row_by_email(
+                    self.service, SPREADSHEET_ID, "Props", header, "amy@broker.test"))
+                self.assertEqual(4, _find_unique_row_by_email(
+                    self.service, SPREADSHEET_ID, "Props", header, "bob@broker.test")[0])
+
+        self.assertEqual(1, self.service.metadata_reads)
+        self.assertEqual(1, self.service.grid_reads())
+        self.assertEqual(1, self.cache.grid_reads)
+
+    def test_nothing_is_cached_outside_a_scope(self):
+        self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+        self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+        self.assertEqual(2, self.service.metadata_reads)
+        self.assertEqual(4, self.service.grid_reads())
+
+    def test_raw_cell_write_is_patched_into_the_snapshot(self):
+        with sheets_mod.sheet_snapshot_scope():
+            self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+            sheets_mod._execute_with_retry(
+                self.service.spreadsheets().values().batchUpdate(
+                    spreadsheetId=SPREADSHEET_ID,
+                    body={"valueInputOption": "RAW", "data": [
+                        {"range": "Props!D4", "values": [[2500]]},
+                        {"range": "Props!C4", "values": [["robert@broker.test"]]},
+                    ]},
+                ),
+                "apply_proposal_batch_update",
+            )
+            _, _, by_email = self._lookup_reply("robert@broker.test", "2 Oak Ave", "Dallas")
+
+        self.assertEqual(1, self.service.grid_reads())
+        self.assertEqual((4, ["2 Oak Ave", "Dallas", "robert@broker.test", "2500"]), by_email)
+
+    def test_other_first_tab_writes_force_a_fresh_grid_read(self):
+        with sheets_mod.sheet_snapshot_scope():
+            self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+            sheets_mod._execute_with_retry(
+                self.service.spreadsheets().values().update(
+                    spreadsheetId=SPREADSHEET_ID,
+                    range="Props!D4",
+                    valueInputOption="USER_ENTERED",
+                    body={"values": [["=1+1"]]},
+                ),
+                "user_entered_write",
+            )
+            self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+
+        self.assertEqual(2, self.service.grid_reads())
+
+    def test_other_tab_and_formatting_writes_keep_the_grid(self):
+        with sheets_mod.sheet_snapshot_scope():
+            self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+            sheets_mod._execute_with_retry(
+                self.service.spreadsheets().values().update(
+                    spreadsheetId=SPREADSHEET_ID,
+                    range="AI_META!A1",
+                    valueInputOption="USER_ENTERED",
+                    body={"values": [["meta"]]},
+                ),
+                "append_ai_meta",
+            )
+            sheets_mod._execute_with_retry(
+                self.service.spreadsheets().batchUpdate(
+                    spreadsheetId=SPREADSHEET_ID,
+                    body={"requests": [{"updateDimensionProperties": {"fields": "pixelSize"}}]},
+                ),
+                "format_columns",
+            )
+            self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+
+        self.assertEqual(1, self.service.grid_reads())
+        self.assertEqual(1, self.service.metadata_reads)
+
+    def test_row_move_drops_the_snapshot(self):
+        with sheets_mod.sheet_snapshot_scope():
+            self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+            move_row_below_divider(self.service, SPREADSHEET_ID, "Props", src_row=3, divider_row=5)
+            _, by_address, _ = self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+
+        self.assertEqual(2, self.service.grid_reads())
+        self.assertEqual((3, ["2 Oak Ave", "Dallas", "bob@broker.test", "2000"]), by_address)
+
+    def test_other_client_and_expired_snapshot_read_fresh(self):
+        with sheets_mod.sheet_snapshot_scope():
+            self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+
+            fenced = FakeSheetsService()
+            sheets_mod._find_row_by_email(fenced, SPREADSHEET_ID, "Props", HEADER, "bob@broker.test")
+            self.assertEqual(1, fenced.grid_reads())
+
+            self.clock.now += 61
+            self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+
+        self.assertEqual(2, self.service.grid_reads())
+
+    def test_e2e_test_mode_leaves_the_scope_inert(self):
+        cache = SheetSnapshotCache()
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "true"}), \
+             patch.object(sheets_mod, "_SHEET_SNAPSHOTS", cache):
+            with sheets_mod.sheet_snapshot_scope():
+                self.assertFalse(cache.active())
+                self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+                self._lookup_reply("bob@broker.test", "2 Oak Ave", "Dallas")
+        self.assertEqual(4, self.service.grid_reads())
+
+
+if __name__ == "__main__":
+    unittest.main()
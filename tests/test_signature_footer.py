@@ -1,10 +1,14 @@
 import unittest
 import base64
 import io
+import os
 import random
+from unittest import mock
 
 from PIL import Image
 
+from email_automation import utils
+from email_automation.signature_website_validation import SIGNATURE_WEBSITE_VALIDATION_ENV
 from email_automation.utils import (
     SIGNATURE_INLINE_IMAGE_MAX_BYTES,
     build_professional_signature_html,
@@ -469,5 +473,84 @@ Best,<br>
         self.assertLessEqual(max(resized.size), 240)
 
 
+class CompiledSignatureCacheTests(unittest.TestCase):
+    SIGNATURE = (
+        '<div data-sitesift-professional-signature="v1"><strong>Drew Ingram</strong>'
+        '<img src="data:image/png;base64,' + base64.b64encode(b"fake-logo").decode("ascii") + '">'
+        '<a href="https://yourcompany.com">yourcompany.com</a></div>'
+    )
+    EMAIL = "drew.ingram@example.com"
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {"E2E_TEST_MODE": "", SIGNATURE_WEBSITE_VALIDATION_ENV: ""})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        utils.clear_signature_cache()
+        self.addCleanup(utils.clear_signature_cache)
+
+    def _send(self):
+        html = format_email_body_with_footer("Hi there.", self.SIGNATURE, "professional", user_email=self.EMAIL)
+        if needs_signature_attachments("professional", self.SIGNATURE, user_email=self.EMAIL):
+            return html, get_signature_attachments(self.SIGNATURE, "professional", user_email=self.EMAIL)
+        return html, []
+
+    def test_repeat_sends_compile_the_signature_once(self):
+        with mock.patch.object(
+            utils, "_compress_signature_image", wraps=utils._compress_signature_image
+        ) as compress, mock.patch.object(
+            utils, "_sanitize_custom_signature_html", wraps=utils._sanitize_custom_signature_html
+        ) as sanitize:
+            first = self._send()
+            calls = (compress.call_count, sanitize.call_count)
+            for _ in range(3):
+                self.assertEqual(first, self._send())
+
+        self.assertEqual((1, calls[1]), (compress.call_count, sanitize.call_count))
+        self.assertIn('src="cid:signature-custom-logo-1"', first[0])
+        self.assertEqual(["signature-custom-logo-1"], [a["contentId"] for a in first[1]])
+
+    def test_callers_get_their_own_attachment_dicts(self):
+        attachments = get_signature_attachments(self.SIGNATURE, "professional", user_email=self.EMAIL)
+        attachments[0]["contentBytes"] = "mutated"
+
+        again = get_signature_attachments(self.SIGNATURE, "professional", user_email=self.EMAIL)
+        self.assertNotEqual("mutated", again[0]["contentBytes"])
+
+    def test_website_flag_is_part_of_the_key_and_findings_are_kept(self):
+        off = utils.compile_signature(self.SIGNATURE, "professional", self.EMAIL)
+        with mock.patch.dict(os.environ, {SIGNATURE_WEBSITE_VALIDATION_ENV: "true"}):
+            on = utils.compile_signature(self.SIGNATURE, "professional", self.EMAIL)
+
+        self.assertIn('href="https://yourcompany.com"', off.footer_html)
+        self.assertEqual((), off.website_findings)
+        self.assertNotIn('href="https://yourcompany.com"', on.footer_html)
+        self.assertTrue(on.website_findings)
+        self.assertIs(off, utils.compile_signature(self.SIGNATURE, "professional", self.EMAIL))
+
+    def test_every_send_logs_the_website_findings(self):
+        with mock.patch.dict(os.environ, {SIGNATURE_WEBSITE_VALIDATION_ENV: "true"}), \
+             self.assertLogs(utils.logger, level="WARNING") as logs:
+            for _ in range(3):
+                self._send()
+
+        neutralised = [line for line in logs.output if "Signature website neutralised before send" in line]
+        self.assertEqual(3, len(neutralised))
+        self.assertEqual(1, len(set(neutralised)))
+
+    def test_cache_is_off_in_test_mode_and_by_env(self):
+        for env in ({"E2E_TEST_MODE": "true"}, {utils.SIGNATURE_CACHE_ENV: "0"}):
+            with mock.patch.dict(os.environ, env):
+                self.assertFalse(utils.signature_cache_enabled())
+                first = utils.compile_signature(self.SIGNATURE, "professional", self.EMAIL)
+                self.assertIsNot(first, utils.compile_signature(self.SIGNATURE, "professional", self.EMAIL))
+        self.assertTrue(utils.signature_cache_enabled())
+
+    def test_cache_is_bounded(self):
+        with mock.patch.object(utils, "SIGNATURE_CACHE_MAX_ENTRIES", 2):
+            for name in ("a", "b", "c"):
+                utils.compile_signature(name, "custom", self.EMAIL)
+        self.assertEqual(2, len(utils._signature_cache))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -89,7 +89,12 @@ class _FakeFirestore:
         return [e["path"] for e in self._store["events"]]
 
     def rollup_paths(self):
-        return list(self._store["docs"].keys())
+        # usageMonthly/{YYYY-MM} is the one global doc: the budget guard's
+        # all-users spend counter. It is checked separately below.
+        return [p for p in self._store["docs"] if not p.startswith("usageMonthly/")]
+
+    def global_docs(self):
+        return {p: d for p, d in self._store["docs"].items() if p.startswith("usageMonthly/")}
 
 
 _USAGE = {
@@ -150,6 +155,11 @@ class UsageReadonlyReadScopeTest(unittest.TestCase):
         for rollup_path in db.rollup_paths():
             self.assertRegex(rollup_path, r"^users/(operatorA|operatorB)/")
 
+        # The global month counter is a bare total: no principal is named in it.
+        self.assertEqual(["usageMonthly/2026-07"], list(db.global_docs()))
+        for payload in db.global_docs().values():
+            self.assertEqual({"month", "calls", "totalCostUsd", "updatedAt", "pricingVersion"}, set(payload))
+
     def test_persisted_event_strips_broker_email_and_prompt_text(self):
         """The read-only view renders what is persisted. Sensitive metadata
         (broker email, prompt / draft text) must be scrubbed at write time so
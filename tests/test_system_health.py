@@ -354,5 +354,116 @@ class SystemHealthTests(unittest.TestCase):
         self.assertFalse(fs.set_calls[0][2])
 
 
+class AggregatingCollection:
+    """Answers ``count()`` over docs matching an Or of ``==``/``in`` filters."""
+
+    def __init__(self, store, docs, disjuncts=None):
+        self.store = store
+        self.docs = docs
+        self.disjuncts = disjuncts
+
+    def where(self, filter):
+        return AggregatingCollection(self.store, self.docs, list(filter.filters))
+
+    def _matches(self, data):
+        if self.disjuncts is None:
+            return True
+        for f in self.disjuncts:
+            value = data.get(f.field_path, object())
+            if (f.op_string == "==" and value is f.value) or (f.op_string == "in" and value in f.value):
+                return True
+        return False
+
+    def count(self, alias):
+        matched = sum(1 for doc in self.docs if self._matches(doc.to_dict()))
+
+        class _Aggregation:
+            def get(_self):
+                self.store.aggregations += 1
+                return [[type("Result", (), {"value": matched})()]]
+
+        return _Aggregation()
+
+    def limit(self, count):
+        self.store.streamed.append("limit")
+        return self
+
+    def stream(self):
+        self.store.streamed.append("stream")
+        return list(self.docs)
+
+
+class AggregatingUserRef(FakeDocRef):
+    def collection(self, name):
+        if name in self.root.queues:
+            return self.root.queues[name]
+        return super().collection(name)
+
+
+class AggregatingFirestore(FakeFirestore):
+    def __init__(self, docs_by_collection):
+        super().__init__({})
+        self.aggregations = 0
+        self.streamed = []
+        self.queues = {
+            name: AggregatingCollection(self, [FakeHealthDoc(d) for d in docs])
+            for name, docs in docs_by_collection.items()
+        }
+
+    def collection(self, name):
+        return self
+
+    def document(self, name):
+        return AggregatingUserRef(self, ["collection", "users", "document", name])
+
+
+class AggregatedQueueCountTests(unittest.TestCase):
+    def _fs(self):
+        return AggregatingFirestore({
+            "outbox": [{}] * 700,
+            "pendingResponses": [],
+            "deadLetterQueue": [
+                {"status": "dead_lettered"},
+                {"status": "requeued"},
+                {"status": "dead_lettered", "recoveryStatus": "campaign_stopped"},
+                {"status": "dead_lettered", "retryable": False},
+                {"status": "Requeued "},
+            ],
+            "processingFailures": [
+                {"retryable": True},
+                {"retryable": False},
+                {"recoveryStatus": "replayed"},
+                {},
+            ],
+        })
+
+    def test_counts_come_from_aggregations_without_streaming(self):
+        fs = self._fs()
+
+        payload = system_health.collect_user_health(
+            "uid-1", fs_client=fs, token_state={"status": "healthy"}, graph_state={"status": "healthy"}
+        )
+
+        self.assertEqual(
+            {"outbox": 700, "deadLetterQueue": 2, "pendingResponses": 0, "processingFailures": 2},
+            payload["queues"],
+        )
+        self.assertEqual(6, fs.aggregations)
+        self.assertEqual([], fs.streamed)
+
+    def test_reconciliation_records_drift_against_a_full_read(self):
+        fs = self._fs()
+        now = datetime(2026, 6, 2, 12, 0, tzinfo=timezone.utc)
+
+        check = system_health.reconcile_queue_counts("uid-1", fs_client=fs, now=now)
+
+        # "Requeued " is terminal to the health predicate but not to the exact-match filter.
+        self.assertEqual({"deadLetterQueue": {"counted": 2, "exact": 1}}, check["drift"])
+        path, data, merge = fs.set_calls[-1]
+        self.assertEqual(("systemHealth", "emailAutomation"), (path[-3], path[-1]))
+        self.assertEqual({"queueCountCheck": {"checkedAt": now, "drift": check["drift"]}}, data)
+        self.assertTrue(merge)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,239 @@
+"""Thread-resolution cache for msgIndex/convIndex lookups.
+
+Pins the behaviour the inbox matcher relies on:
+  * repeated and missing lookups are answered from memory within the TTL,
+  * a page prewarm resolves every candidate key with one batched read,
+  * index_message_id / index_conversation_id drop what they overwrite before
+    and after the write, so neither a read-after-write check nor a lookup
+    racing the write keeps the old answer,
+  * a runtime's fenced Firestore is never answered from the ambient cache,
+  * the cache is inert under E2E_TEST_MODE.
+"""
+
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from email_automation import messaging, processing
+from email_automation.messaging import ThreadResolutionCache
+from email_automation.utils import b64url_id, normalize_message_id
+
+
+class FakeSnapshot:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.id = ref.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocRef:
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def get(self):
+        self._store.point_reads.append(self.path)
+        return FakeSnapshot(self, self._store.docs.get(self.path))
+
+    def set(self, payload, merge=False):
+        self._store.docs.setdefault(self.path, {}).update(payload)
+
+    def collection(self, name):
+        return FakeCollection(self._store, f"{self.path}/{name}")
+
+
+class FakeCollection:
+    def __init__(self, store, path):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id):
+        return FakeDocRef(self._store, f"{self._path}/{doc_id}")
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+        self.point_reads = []
+        self.get_all_calls = 0
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def get_all(self, refs):
+        self.get_all_calls += 1
+        return [FakeSnapshot(ref, self.docs.get(ref.path)) for ref in refs]
+
+    def index_message(self, user_id, message_id, thread_id):
+        self.docs[f"users/{user_id}/msgIndex/{b64url_id(normalize_message_id(message_id))}"] = {"threadId": thread_id}
+
+    def index_conversation(self, user_id, conversation_id, thread_id):
+        self.docs[f"users/{user_id}/convIndex/{conversation_id}"] = {"threadId": thread_id}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _enabled_cache(clock=None, **kwargs):
+    return ThreadResolutionCache(enabled=lambda: True, clock=clock or FakeClock(), **kwargs)
+
+
+class ThreadResolutionCacheTests(unittest.TestCase):
+    def test_positive_and_negative_entries_expire_on_their_own_ttls(self):
+        clock = FakeClock()
+        cache = _enabled_cache(clock, ttl_seconds=300, negative_ttl_seconds=60)
+        cache.put("uid-1", "msg", "<hit@x>", "thread-1")
+        cache.put("uid-1", "msg", "<miss@x>", None)
+
+        self.assertEqual("thread-1", cache.get("uid-1", "msg", "<hit@x>"))
+        self.assertIsNone(cache.get("uid-1", "msg", "<miss@x>"))
+
+        clock.now += 61
+        self.assertEqual("thread-1", cache.get("uid-1", "msg", "<hit@x>"))
+        self.assertIs(messaging._MISSING, cache.get("uid-1", "msg", "<miss@x>"))
+
+        clock.now += 300
+        self.assertIs(messaging._MISSING, cache.get("uid-1", "msg", "<hit@x>"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = _enabled_cache(max_entries=2)
+        cache.put("uid-1", "msg", "a", "t-a")
+        cache.put("uid-1", "msg", "b", "t-b")
+        cache.get("uid-1", "msg", "a")
+        cache.put("uid-1", "msg", "c", "t-c")
+
+        self.assertEqual("t-a", cache.get("uid-1", "msg", "a"))
+        self.assertIs(messaging._MISSING, cache.get("uid-1", "msg", "b"))
+
+    def test_entries_are_scoped_per_user(self):
+        cache = _enabled_cache()
+        cache.put("uid-1", "conv", "conv-1", "thread-1")
+        self.assertIs(messaging._MISSING, cache.get("uid-2", "conv", "conv-1"))
+
+
+class CachedLookupTests(unittest.TestCase):
+    def setUp(self):
+        self.fs = FakeFirestore()
+        self.cache = _enabled_cache()
+        patcher_fs = patch.object(messaging, "_fs", self.fs)
+        patcher_cache = patch.object(messaging, "_THREAD_RESOLUTION_CACHE", self.cache)
+        patcher_fs.start()
+        patcher_cache.start()
+        self.addCleanup(patcher_fs.stop)
+        self.addCleanup(patcher_cache.stop)
+
+    def test_repeat_and_missing_lookups_are_served_from_memory(self):
+        self.fs.index_message("uid-1", "<known@x>", "thread-1")
+
+        self.assertEqual("thread-1", messaging.lookup_thread_by_message_id("uid-1", "<known@x>"))
+        self.assertIsNone(messaging.lookup_thread_by_message_id("uid-1", "<unknown@x>"))
+        reads_after_first_pass = len(self.fs.point_reads)
+
+        self.assertEqual("thread-1", messaging.lookup_thread_by_message_id("uid-1", "<known@x>"))
+        self.assertIsNone(messaging.lookup_thread_by_message_id("uid-1", "<unknown@x>"))
+        self.assertEqual(reads_after_first_pass, len(self.fs.point_reads))
+
+    def test_index_write_invalidates_a_cached_miss(self):
+        self.assertIsNone(messaging.lookup_thread_by_message_id("uid-1", "<new@x>"))
+        self.assertIsNone(messaging.lookup_thread_by_conversation_id("uid-1", "conv-new"))
+
+        messaging.index_message_id("uid-1", "<new@x>", "thread-9")
+        messaging.index_conversation_id("uid-1", "conv-new", "thread-9")
+
+        self.assertEqual("thread-9", messaging.lookup_thread_by_message_id("uid-1", "<new@x>"))
+        self.assertEqual("thread-9", messaging.lookup_thread_by_conversation_id("uid-1", "conv-new"))
+
+    def test_lookup_racing_the_index_write_is_not_left_cached(self):
+        original_set = FakeDocRef.set
+        raced = []
+
+        def racing_set(ref, payload, merge=False):
+            # Another worker resolves the key between the invalidate and the
+            # write landing, and caches the miss.
+            if "/msgIndex/" in ref.path:
+                raced.append(messaging.lookup_thread_by_message_id("uid-1", "<race@x>"))
+            else:
+                raced.append(messaging.lookup_thread_by_conversation_id("uid-1", "conv-race"))
+            original_set(ref, payload, merge=merge)
+
+        with patch.object(FakeDocRef, "set", racing_set):
+            messaging.index_message_id("uid-1", "<race@x>", "thread-7")
+            messaging.index_conversation_id("uid-1", "conv-race", "thread-7")
+
+        self.assertEqual([None, None], raced)
+        self.assertEqual("thread-7", messaging.lookup_thread_by_message_id("uid-1", "<race@x>"))
+        self.assertEqual("thread-7", messaging.lookup_thread_by_conversation_id("uid-1", "conv-race"))
+
+    def test_prewarm_resolves_a_page_with_one_batched_read(self):
+        self.fs.index_message("uid-1", "<ref-2@x>", "thread-2")
+        self.fs.index_conversation("uid-1", "conv-3", "thread-3")
+        messages = [
+            {
+                "conversationId": "conv-1",
+                "internetMessageHeaders": [
+                    {"name": "In-Reply-To", "value": "<reply@x>"},
+                    {"name": "References", "value": "<ref-1@x> <ref-2@x>"},
+                ],
+            },
+            {
+                "conversationId": "conv-3",
+                "internetMessageHeaders": [{"name": "Subject", "value": "RE: 4402 Rex Rd"}],
+            },
+        ]
+
+        processing._prewarm_thread_matches("uid-1", messages)
+        self.assertEqual(1, self.fs.get_all_calls)
+
+        with patch.object(processing, "_mailbox_reader") as reader:
+            self.assertEqual("thread-2", processing._match_message_to_thread("uid-1", messages[0], {}))
+            self.assertEqual("thread-3", processing._match_message_to_thread("uid-1", messages[1], {}))
+        reader.assert_not_called()
+        self.assertEqual([], self.fs.point_reads)
+
+    def test_fenced_runtime_firestore_bypasses_the_ambient_cache(self):
+        self.fs.index_message("uid-1", "<m@x>", "ambient-thread")
+        messaging.lookup_thread_by_message_id("uid-1", "<m@x>")
+
+        fenced = FakeFirestore()
+        fenced.index_message("uid-1", "<m@x>", "fenced-thread")
+        runtime = SimpleNamespace(firestore=fenced)
+
+        self.assertEqual("fenced-thread", messaging.lookup_thread_by_message_id("uid-1", "<m@x>", runtime=runtime))
+
+
+class DisabledCacheTests(unittest.TestCase):
+    def test_e2e_test_mode_disables_cache_and_prewarm(self):
+        fs = FakeFirestore()
+        cache = ThreadResolutionCache()
+        with patch.dict(os.environ, {"E2E_TEST_MODE": "true"}), \
+             patch.object(messaging, "_fs", fs), \
+             patch.object(messaging, "_THREAD_RESOLUTION_CACHE", cache):
+            cache.put("uid-1", "msg", "<m@x>", "thread-1")
+            self.assertIs(messaging._MISSING, cache.get("uid-1", "msg", "<m@x>"))
+            self.assertEqual(0, messaging.prewarm_thread_resolution("uid-1", ["<m@x>"], ["conv-1"]))
+        self.assertEqual(0, fs.get_all_calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
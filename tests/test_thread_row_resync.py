@@ -0,0 +1,207 @@
+"""Indexed, batched thread rowNumber resync after sheet row moves and inserts.
+
+Pins:
+  * a move reads only the campaign's threads in the src..divider range and
+    writes the shifted rowNumbers in one batch,
+  * an insert reads from the insert row down,
+  * shifts requested inside thread_row_resync_scope() are applied in order
+    in one pass when the scope exits, and stop_threads_for_row sees them,
+  * a shift for another campaign flushes the pending one first,
+  * the composite index the query needs is declared.
+"""
+
+import json
+import operator
+import os
+
+os.environ.setdefault("E2E_TEST_MODE", "true")
+os.environ.setdefault(
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "service-account.json"),
+)
+
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from email_automation import sheet_operations
+from email_automation.sheet_operations import (
+    ThreadRowResync,
+    stop_threads_for_row,
+    sync_thread_row_numbers_after_insert,
+    sync_thread_row_numbers_after_move,
+    thread_row_resync_scope,
+)
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+_OPS = {"==": operator.eq, ">=": operator.ge, "<=": operator.le}
+
+
+class FakeThread:
+    def __init__(self, store, doc_id):
+        self._store = store
+        self.id = doc_id
+
+    def to_dict(self):
+        return dict(self._store.threads[self.id])
+
+    def update(self, payload):
+        self._store.threads[self.id].update(payload)
+
+
+class FakeQuery:
+    def __init__(self, store, filters=()):
+        self._store = store
+        self._filters = list(filters)
+
+    def where(self, filter):
+        return FakeQuery(self._store, self._filters + [filter])
+
+    def stream(self):
+        self._store.queries.append([(f.field_path, f.op_string, f.value) for f in self._filters])
+        out = []
+        for doc_id, data in self._store.threads.items():
+            if all(
+                f.field_path in data and _OPS[f.op_string](data[f.field_path], f.value)
+                for f in self._filters
+            ):
+                out.append(FakeThread(self._store, doc_id))
+        return out
+
+    def document(self, doc_id):
+        return FakeThread(self._store, doc_id)
+
+
+class FakeBatch:
+    def __init__(self, store):
+        self._store = store
+        self._writes = []
+
+    def update(self, ref, payload):
+        self._writes.append((ref, payload))
+
+    def commit(self):
+        self._store.commits.append(len(self._writes))
+        for ref, payload in self._writes:
+            ref.update(payload)
+
+
+class FakeFirestore:
+    def __init__(self, threads):
+        self.threads = threads
+        self.queries = []
+        self.commits = []
+
+    def collection(self, name):
+        return self if name == "users" else FakeQuery(self)
+
+    def document(self, doc_id):
+        return self
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+def _threads(*rows, client="client-1"):
+    return {f"t{row}-{client}": {"clientId": client, "rowNumber": row, "status": "active"} for row in rows}
+
+
+class ThreadRowResyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self.fs = FakeFirestore({**_threads(3, 4, 5, 6, 9), **_threads(4, client="client-2")})
+        patcher = patch.object(sheet_operations, "_fs", self.fs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def rows(self, client="client-1"):
+        return sorted(
+            (data["rowNumber"], doc_id) for doc_id, data in self.fs.threads.items() if data["clientId"] == client
+        )
+
+
+class ImmediateResyncTests(ThreadRowResyncTestCase):
+    def test_move_reads_the_range_and_writes_one_batch(self):
+        updated = sync_thread_row_numbers_after_move("uid-1", 4, 6, 6, client_id="client-1")
+
+        self.assertEqual(3, updated)
+        self.assertEqual(
+            [[("clientId", "==", "client-1"), ("rowNumber", ">=", 4), ("rowNumber", "<=", 6)]],
+            self.fs.queries,
+        )
+        self.assertEqual([3], self.fs.commits)
+        self.assertEqual(
+            [(3, "t3-client-1"), (4, "t5-client-1"), (5, "t6-client-1"), (6, "t4-client-1"), (9, "t9-client-1")],
+            self.rows(),
+        )
+        self.assertEqual([(4, "t4-client-2")], self.rows("client-2"))
+
+    def test_insert_reads_from_the_insert_row_down(self):
+        updated = sync_thread_row_numbers_after_insert("uid-1", 6, client_id="client-1")
+
+        self.assertEqual(2, updated)
+        self.assertEqual([[("clientId", "==", "client-1"), ("rowNumber", ">=", 6)]], self.fs.queries)
+        self.assertEqual([7, 10], [row for row, _ in self.rows()][-2:])
+
+
+class CoalescedResyncTests(ThreadRowResyncTestCase):
+    def test_moves_in_one_scope_share_one_pass(self):
+        with thread_row_resync_scope():
+            self.assertEqual(0, sync_thread_row_numbers_after_move("uid-1", 3, 6, 6, client_id="client-1"))
+            self.assertEqual(0, sync_thread_row_numbers_after_move("uid-1", 4, 5, 5, client_id="client-1"))
+            self.assertEqual([], self.fs.queries)
+
+        self.assertEqual(1, len(self.fs.queries))
+        self.assertEqual([3], self.fs.commits)
+        # The same rows a move-then-resync, move-then-resync sequence leaves;
+        # t5 goes 5 -> 4 -> 5 and is not written at all.
+        self.assertEqual(
+            [(3, "t4-client-1"), (4, "t6-client-1"), (5, "t5-client-1"), (6, "t3-client-1"), (9, "t9-client-1")],
+            self.rows(),
+        )
+
+    def test_stop_threads_for_row_sees_the_pending_shift(self):
+        with thread_row_resync_scope():
+            sync_thread_row_numbers_after_move("uid-1", 4, 6, 6, client_id="client-1")
+            stopped = stop_threads_for_row("uid-1", 6, client_id="client-1")
+
+        self.assertEqual(1, stopped)
+        self.assertEqual("stopped", self.fs.threads["t4-client-1"]["status"])
+        self.assertEqual("active", self.fs.threads["t6-client-1"]["status"])
+
+    def test_another_campaign_flushes_the_pending_shift(self):
+        with thread_row_resync_scope():
+            sync_thread_row_numbers_after_move("uid-1", 4, 6, 6, client_id="client-1")
+            sync_thread_row_numbers_after_insert("uid-1", 1, client_id="client-2")
+            self.assertEqual(1, len(self.fs.queries))
+
+        self.assertEqual(2, len(self.fs.queries))
+        self.assertEqual([(5, "t4-client-2")], self.rows("client-2"))
+
+    def test_range_covers_every_row_any_shift_can_change(self):
+        resync = ThreadRowResync("uid-1")
+        resync.add_move(10, 20, 20)
+        resync.add_move(3, 8, 8)
+        self.assertEqual((3, 20), resync.row_range())
+        resync.add_insert(15)
+        self.assertEqual((3, None), resync.row_range())
+
+
+class IndexDeclarationTests(unittest.TestCase):
+    def test_threads_client_row_index_is_declared(self):
+        indexes = json.loads((REPO_ROOT / "firestore.indexes.json").read_text())["indexes"]
+        self.assertIn(
+            {
+                "collectionGroup": "threads",
+                "queryScope": "COLLECTION",
+                "fields": [
+                    {"fieldPath": "clientId", "order": "ASCENDING"},
+                    {"fieldPath": "rowNumber", "order": "ASCENDING"},
+                ],
+            },
+            indexes,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()